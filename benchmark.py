@@ -0,0 +1,740 @@
+# Registry Benchmark
+#
+# Measures the cost of every entry point and view of the Registry, RegistryLogic,
+# IssuerRegistry and SchemaRegistry contracts on a Tezos node, at several data
+# scales. For every scale the registry is first filled with that many issuers,
+# schemas and bindings per issuer, then every call is simulated with the
+# run_operation RPC, which reports the consumed gas and the paid storage of the
+# call and of each internal call, and forged to get the serialized size.
+# Views are run with run_script_view, their gas is the lowest gas limit that
+# lets them succeed.
+#
+# The contracts must be originated for the benchmark only, on a sandbox node,
+# with the certifier as the benchmark account. Filling the registry injects
+# operations with octez-client.
+#
+# Usage:
+#   python benchmark.py run benchmark.json --scales 1,100,10000 --output results.json
+#   python benchmark.py compare baseline.json results.json --thresholds benchmarkThresholds.json
+#   python benchmark.py size benchmark.json benchmarkCompact.json
+#
+# benchmark.json:
+#   {
+#     "rpc": "http://localhost:20000",
+#     "octez_client": "octez-client",
+#     "source": {"alias": "alice", "address": "tz1..."},
+#     "contracts": {
+#       "registry": "KT1...", "registry_logic": "KT1...",
+#       "issuer_registry": "KT1...", "schema_registry": "KT1..."
+#     }
+#   }
+
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+# Any signature is accepted by run_operation
+SIMULATION_SIGNATURE = "edsigtXomBKi5CTRf5cjATJWSyaRvhfYNHqSUGrn4SdbYRcGwQrUGjzEfQDTuqHhuA8b2d8NarZjz8TRf65WkpQmo423BtomS8Q"
+
+# Number of records sent per operation when filling the registry
+FILL_BATCH_SIZE = 200
+
+BENCH_VERIFICATION_METHOD = '{"id":"#key-1","type":"Ed25519VerificationKey2020","controller":"did:bench:0","publicKeyMultibase":"z6MkhaXgBZDvotDkL5257faiztiGiC2QtKLGpbnnEGta2doK"}'
+
+# Chunk of the Schema upload begun by Benchmark.fill
+BENCH_SCHEMA_CHUNK = '{"$schema":"https://json-schema.org/draft/2020-12/schema","type":"object"}'
+
+SCHEMA_HASH = "e346432021b04179518d9614f3560ccd71354a4ee101ddcb893d6959a9d6301c"
+
+############
+# Micheline #
+############
+
+# Values are built the way SmartPy lays out records and variants by default:
+# fields sorted by name, in a balanced binary tree
+
+def string(value):
+    return {"string": value}
+
+
+def nat(value):
+    return {"int": str(value)}
+
+
+def hex_bytes(value):
+    return {"bytes": value}
+
+
+def tree(items, prim = "Pair"):
+    if len(items) == 1:
+        return items[0]
+    middle = len(items) // 2
+    return {"prim": prim, "args": [tree(items[:middle], prim), tree(items[middle:], prim)]}
+
+
+def record(**fields):
+    return tree([fields[name] for name in sorted(fields)])
+
+
+def variant(case_names, name, value):
+    names = sorted(case_names)
+    if len(names) == 1:
+        return value
+    middle = len(names) // 2
+    if name in names[:middle]:
+        return {"prim": "Left", "args": [variant(names[:middle], name, value)]}
+    return {"prim": "Right", "args": [variant(names[middle:], name, value)]}
+
+
+def status_change(name, value):
+    return variant(["issuer", "schema", "binding"], name, value)
+
+
+def issuer_data_patch(name, value):
+    return variant(["set_section", "remove_section"], name, value)
+
+
+def to_michelson(node):
+    """Michelson text of a Micheline JSON value, as expected by octez-client --arg."""
+    if isinstance(node, list):
+        return "{ " + " ; ".join(to_michelson(item) for item in node) + " }"
+    if "int" in node:
+        return node["int"]
+    if "string" in node:
+        return json.dumps(node["string"])
+    if "bytes" in node:
+        return "0x" + node["bytes"]
+    if not node.get("args"):
+        return node["prim"]
+    return "(" + " ".join([node["prim"]] + [to_michelson(arg) for arg in node["args"]]) + ")"
+
+#######
+# RPC #
+#######
+
+class Node:
+    def __init__(self, rpc):
+        self.rpc = rpc.rstrip("/")
+
+    def request(self, path, body = None):
+        data = None if body is None else json.dumps(body).encode()
+        request = urllib.request.Request(self.rpc + path, data = data, headers = {"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as error:
+            raise RuntimeError("%s %s: %s" % (path, error.code, error.read().decode(errors = "replace")))
+
+    def head(self, path):
+        return self.request("/chains/main/blocks/head" + path)
+
+    def post_head(self, path, body):
+        return self.request("/chains/main/blocks/head" + path, body)
+
+####################
+# Benchmark cases #
+####################
+
+class Context:
+    """Records that exist at a given scale, used as the parameters of the cases."""
+
+    def __init__(self, scale, source, contracts):
+        self.scale = scale
+        self.source = source
+        self.contracts = contracts
+        self.did = bench_did(0)
+        self.new_did = "did:bench:new"
+        self.bytes_did = "did:bench:bytes"
+        self.sections_did = "did:bench:sections"
+        # The first Schema is a Schema reference, see Benchmark.fill
+        self.schema_id = 0
+        self.reference_schema_id = 0
+        # The Schema upload begun by Benchmark.fill, with BENCH_SCHEMA_CHUNK as its only chunk
+        self.upload_schema_id = 1
+        self.upload_content_hash = upload_content_hash([BENCH_SCHEMA_CHUNK])
+        # The Schema added on-chain by Benchmark.fill, get_schema fails on the other two
+        self.onchain_schema_id = 2
+        self.new_dids = ["did:bench:new:%d" % i for i in range(10)]
+
+
+def upload_content_hash(chunks):
+    """Content hash checked by finalize_schema: sha256(hash + pack(chunk)) for each chunk, from empty bytes."""
+    content_hash = b""
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        content_hash = hashlib.sha256(content_hash + bytes.fromhex("0501") + len(data).to_bytes(4, "big") + data).digest()
+    return content_hash.hex()
+
+
+def bench_did(index):
+    return "did:bench:%d" % index
+
+
+def issuer_record(did, data = "issuer_data"):
+    return record(issuer_did = string(did), issuer_data = string(data))
+
+
+def binding_record(did, schema_id, status = None):
+    if status is None:
+        return record(issuer_did = string(did), schema_id = nat(schema_id))
+    return record(issuer_did = string(did), schema_id = nat(schema_id), status = nat(status))
+
+
+def status_changes(ctx):
+    return [
+        status_change("issuer", record(issuer_did = string(ctx.did), status = nat(1))),
+        status_change("schema", record(schema_id = nat(ctx.schema_id), status = nat(1))),
+        status_change("binding", binding_record(ctx.did, ctx.schema_id, 1)),
+    ]
+
+
+def registry_actions(ctx):
+    """Registry actions with the parameters of the Registry dispatch variant."""
+    return {
+        # The filled Schemas all have the content "schema_data", which add_schema would reuse
+        "add_schema": string("schema_data:new"),
+        "add_schemas": [string("schema_data:new:%d" % i) for i in range(10)],
+        "set_schema_active": nat(ctx.schema_id),
+        "set_schema_deprecated": nat(ctx.schema_id),
+        "set_schema_status": record(schema_id = nat(ctx.schema_id), status = nat(1)),
+        "add_schema_reference": record(schema_hash = hex_bytes(SCHEMA_HASH), schema_uri = string("http://localhost:8000/" + SCHEMA_HASH)),
+        "begin_schema": {"prim": "Unit"},
+        "append_schema_chunk": record(schema_id = nat(ctx.upload_schema_id), chunk = string(BENCH_SCHEMA_CHUNK)),
+        "finalize_schema": record(schema_id = nat(ctx.upload_schema_id), content_hash = hex_bytes(ctx.upload_content_hash)),
+        "cancel_schema": nat(ctx.upload_schema_id),
+        "add_issuer": issuer_record(ctx.new_did),
+        "add_issuers": [issuer_record(did) for did in ctx.new_dids],
+        "set_issuer_data": issuer_record(ctx.did, "new_issuer_data"),
+        "add_issuer_bytes": record(issuer_did = string(ctx.new_did), issuer_data_bytes = hex_bytes("01abcdef")),
+        "set_issuer_data_bytes": record(issuer_did = string(ctx.bytes_did), issuer_data_bytes = hex_bytes("010123")),
+        "apply_issuer_data_patch": record(issuer_did = string(ctx.sections_did), patch = [
+            issuer_data_patch("set_section", record(
+                property = string("verificationMethod"),
+                section_id = string("#key-1"),
+                section_data = string(BENCH_VERIFICATION_METHOD)
+            ))
+        ]),
+        "set_issuer_active": string(ctx.did),
+        "set_issuer_deprecated": string(ctx.did),
+        "set_issuer_status": record(issuer_did = string(ctx.did), status = nat(1)),
+        "set_issuer_owner": record(issuer_did = string(ctx.did), owner_address = string(ctx.source)),
+        "transfer_ownership": record(
+            old_owner = string(ctx.source),
+            new_owner = string(ctx.source),
+            issuer_dids = [string(ctx.did)],
+            schema_ids = [nat(ctx.schema_id)]
+        ),
+        "bind_issuer_schema": binding_record(ctx.did, ctx.schema_id),
+        "set_binding_active": binding_record(ctx.did, ctx.schema_id),
+        "set_binding_deprecated": binding_record(ctx.did, ctx.schema_id),
+        "set_binding_status": binding_record(ctx.did, ctx.schema_id, 1),
+        "apply_status_changes": status_changes(ctx),
+    }
+
+
+def logic_parameters(ctx):
+    """Parameters of the RegistryLogic entry points, the same as the actions except for set_issuer_owner."""
+    parameters = registry_actions(ctx)
+    parameters["set_issuer_owner"] = record(issuer_did = string(ctx.did), new_owner_address = string(ctx.source))
+    parameters["update_contract_address"] = record(
+        address = string(ctx.contracts["schema_registry"]),
+        contract_name = string("schema_registry_contract")
+    )
+    return parameters
+
+
+def cases(ctx):
+    """Every call to measure, as (name, kind, contract, entry point or view, parameter)."""
+    result = []
+
+    for action, value in registry_actions(ctx).items():
+        result.append(("registry.%s" % action, "call", "registry", action, value))
+    result.append(("registry.update_logic_contract_address", "call", "registry",
+        "update_logic_contract_address", string(ctx.contracts["registry_logic"])))
+
+    for entry_point, value in logic_parameters(ctx).items():
+        result.append(("registry_logic.%s" % entry_point, "call", "registry_logic", entry_point, value))
+    # The packed action is filled in by pack_dispatch
+    result.append(("registry_logic.dispatch", "call", "registry_logic", "dispatch", ("pack", "add_issuer", registry_actions(ctx)["add_issuer"])))
+    result.append(("registry_logic.add_schema_reused", "call", "registry_logic", "add_schema", string("schema_data")))
+
+    # Storage entry points are only open to the Logic contract, except for the certifier ones.
+    # The others are measured as internal calls of the Registry Logic cases.
+    result += [
+        ("schema_registry.import_schemas", "call", "schema_registry", "import_schemas", [record(
+            schema_id = nat(ctx.schema_id), schema_data = string("schema_data"), schema_owner = string(ctx.source), status = nat(1)
+        )]),
+        ("schema_registry.import_bindings", "call", "schema_registry", "import_bindings", [binding_record(ctx.did, ctx.schema_id, 1)]),
+        ("schema_registry.change_logic_contract_address", "call", "schema_registry",
+            "change_logic_contract_address", string(ctx.contracts["registry_logic"])),
+        ("issuer_registry.change_logic_contract_address", "call", "issuer_registry",
+            "change_logic_contract_address", string(ctx.contracts["registry_logic"])),
+    ]
+
+    schema_content = record(schema_id = nat(ctx.reference_schema_id), schema_hash = hex_bytes(SCHEMA_HASH))
+    bindings = [binding_record(ctx.did, ctx.schema_id), binding_record(ctx.new_did, ctx.schema_id)]
+    schema_issuers = record(schema_id = nat(ctx.schema_id), cursor = nat(0), limit = nat(10))
+    schema_hash = hex_bytes(hashlib.sha256(b"schema_data").hexdigest())
+    schema_chunk = record(schema_id = nat(ctx.schema_id), index = nat(0))
+    owner_page = record(owner = string(ctx.source), from_position = nat(0), limit = nat(10))
+    views = [
+        ("registry", "get_schema", nat(ctx.onchain_schema_id)),
+        ("registry", "get_schema_chunk", schema_chunk),
+        ("registry", "find_schema_by_hash", schema_hash),
+        ("registry", "get_schema_reference", nat(ctx.reference_schema_id)),
+        ("registry", "verify_schema_content", schema_content),
+        ("registry", "get_issuer", string(ctx.did)),
+        ("registry", "get_issuer_data_bytes", string(ctx.bytes_did)),
+        ("registry", "verify_binding", binding_record(ctx.did, ctx.schema_id)),
+        ("registry", "verify_bindings", bindings),
+        ("registry", "get_credential_context", binding_record(ctx.did, ctx.schema_id)),
+        ("registry", "get_status_tables", {"prim": "Unit"}),
+        ("registry", "list_schema_issuers", schema_issuers),
+        ("registry_logic", "get_schema", nat(ctx.onchain_schema_id)),
+        ("registry_logic", "get_schema_chunk", schema_chunk),
+        ("registry_logic", "find_schema_by_hash", schema_hash),
+        ("registry_logic", "get_schema_reference", nat(ctx.reference_schema_id)),
+        ("registry_logic", "verify_schema_content", schema_content),
+        ("registry_logic", "get_issuer", string(ctx.did)),
+        ("registry_logic", "get_issuer_data_bytes", string(ctx.bytes_did)),
+        ("registry_logic", "verify_binding", binding_record(ctx.did, ctx.schema_id)),
+        ("registry_logic", "verify_bindings", bindings),
+        ("registry_logic", "get_credential_context", binding_record(ctx.did, ctx.schema_id)),
+        ("registry_logic", "get_status_tables", {"prim": "Unit"}),
+        ("registry_logic", "list_schema_issuers", schema_issuers),
+        ("issuer_registry", "get", string(ctx.did)),
+        ("issuer_registry", "get_data_bytes", string(ctx.bytes_did)),
+        ("issuer_registry", "get_issuer_owner_address", string(ctx.did)),
+        ("issuer_registry", "get_issuer_status", string(ctx.did)),
+        ("issuer_registry", "issuer_exists", string(ctx.did)),
+        ("issuer_registry", "get_issuer_context", string(ctx.did)),
+        ("issuer_registry", "list_owner_issuers", owner_page),
+        ("schema_registry", "verify_binding", binding_record(ctx.did, ctx.schema_id)),
+        ("schema_registry", "verify_bindings", bindings),
+        ("schema_registry", "list_schemas", record(from_id = nat(0), limit = nat(10))),
+        ("schema_registry", "list_owner_schemas", owner_page),
+        ("schema_registry", "list_schema_issuers", schema_issuers),
+        ("schema_registry", "get", nat(ctx.schema_id)),
+        ("schema_registry", "get_chunk", schema_chunk),
+        ("schema_registry", "find_by_hash", schema_hash),
+        ("schema_registry", "get_reference", nat(ctx.reference_schema_id)),
+        ("schema_registry", "get_content_kind", nat(ctx.schema_id)),
+        ("schema_registry", "verify_schema_content", schema_content),
+        ("schema_registry", "get_schema_owner_address", nat(ctx.schema_id)),
+        ("schema_registry", "get_schema_context", nat(ctx.schema_id)),
+    ]
+    for contract, view, value in views:
+        result.append(("%s.%s" % (contract, view), "view", contract, view, value))
+
+    return result
+
+##############
+# Benchmark #
+##############
+
+class Benchmark:
+    def __init__(self, config):
+        self.node = Node(config["rpc"])
+        self.octez_client = config.get("octez_client", "octez-client")
+        self.source_alias = config["source"]["alias"]
+        self.source = config["source"]["address"]
+        self.contracts = config["contracts"]
+
+        self.chain_id = self.node.request("/chains/main/chain_id")
+        constants = self.node.head("/context/constants")
+        self.gas_limit = int(constants["hard_gas_limit_per_operation"])
+        self.storage_limit = int(constants["hard_storage_limit_per_operation"])
+
+    # Filling the registry
+
+    def inject(self, contract, entry_point, value):
+        subprocess.run([
+            self.octez_client, "--endpoint", self.node.rpc, "--wait", "1",
+            "transfer", "0", "from", self.source_alias, "to", self.contracts[contract],
+            "--entrypoint", entry_point, "--arg", to_michelson(value), "--burn-cap", "100"
+        ], check = True, stdout = subprocess.DEVNULL)
+
+    def run_view(self, contract, view, value, gas = None):
+        body = {
+            "contract": self.contracts[contract],
+            "view": view,
+            "input": value,
+            "chain_id": self.chain_id,
+            "source": self.source,
+            "unparsing_mode": "Readable",
+        }
+        if gas is None:
+            body["unlimited_gas"] = True
+        else:
+            body["gas"] = str(gas)
+        return self.node.post_head("/helpers/scripts/run_script_view", body)["data"]
+
+    def storage_field(self, contract, field):
+        # Read a nat field of the storage by its annotation
+        script = self.node.post_head("/context/contracts/%s/script/normalized" % self.contracts[contract], {"unparsing_mode": "Readable"})
+        storage_type = [node for node in script["code"] if node["prim"] == "storage"][0]["args"][0]
+        return find_annotated(storage_type, script["storage"], "%" + field)
+
+    def issuer_exists(self, issuer_did):
+        return self.run_view("issuer_registry", "issuer_exists", string(issuer_did)) == {"prim": "True"}
+
+    def binding_exists(self, schema_id):
+        binding = self.run_view("schema_registry", "verify_binding", binding_record(bench_did(0), schema_id))
+        return binding["args"][0] == {"prim": "True"}
+
+    def fill(self, scale):
+        """Fill the registry up to scale issuers, schemas, and bindings of the first issuer."""
+        # Issuers and bindings are added in order, so the existing ones are a prefix
+        issuers = count_prefix(lambda index: self.issuer_exists(bench_did(index)), scale)
+        for start in range(issuers, scale, FILL_BATCH_SIZE):
+            batch = [issuer_record(bench_did(i)) for i in range(start, min(scale, start + FILL_BATCH_SIZE))]
+            self.inject("registry_logic", "add_issuers", batch)
+
+        # The first Schema is a Schema reference, so that the reference views have a Schema to read
+        schemas = self.storage_field("schema_registry", "schema_last_id")
+        if schemas == 0:
+            self.inject("registry_logic", "add_schema_reference", record(
+                schema_hash = hex_bytes(SCHEMA_HASH), schema_uri = string("http://localhost:8000/" + SCHEMA_HASH)
+            ))
+
+            # Left open, so that the append_schema_chunk, finalize_schema and cancel_schema cases have an upload
+            self.inject("registry_logic", "begin_schema", {"prim": "Unit"})
+            self.inject("registry_logic", "append_schema_chunk", record(
+                schema_id = nat(1), chunk = string(BENCH_SCHEMA_CHUNK)
+            ))
+
+            # Read by the get_schema cases, and reused by the add_schema_reused case
+            self.inject("registry_logic", "add_schema", string("schema_data"))
+            schemas = 3
+
+        imported = [record(
+            schema_id = nat(i), schema_data = string("schema_data"), schema_owner = string(self.source), status = nat(1)
+        ) for i in range(schemas, scale)]
+        for start in range(0, len(imported), FILL_BATCH_SIZE):
+            self.inject("schema_registry", "import_schemas", imported[start:start + FILL_BATCH_SIZE])
+
+        bindings = count_prefix(self.binding_exists, scale)
+        imported = [binding_record(bench_did(0), i, 1) for i in range(bindings, scale)]
+        for start in range(0, len(imported), FILL_BATCH_SIZE):
+            self.inject("schema_registry", "import_bindings", imported[start:start + FILL_BATCH_SIZE])
+
+        if not self.issuer_exists("did:bench:bytes"):
+            self.inject("registry_logic", "add_issuer_bytes", record(
+                issuer_did = string("did:bench:bytes"), issuer_data_bytes = hex_bytes("01abcdef")
+            ))
+
+        # DID document with a verification method section, replaced by the apply_issuer_data_patch case
+        if not self.issuer_exists("did:bench:sections"):
+            self.inject("registry_logic", "add_issuer", issuer_record("did:bench:sections", '{"id":"did:bench:sections"}'))
+            self.inject("registry_logic", "apply_issuer_data_patch", record(issuer_did = string("did:bench:sections"), patch = [
+                issuer_data_patch("set_section", record(
+                    property = string("verificationMethod"),
+                    section_id = string("#key-1"),
+                    section_data = string(BENCH_VERIFICATION_METHOD)
+                ))
+            ]))
+
+    # Measuring
+
+    def pack_dispatch(self, action, value):
+        dispatch_type = self.node.head("/context/contracts/%s/entrypoints/dispatch" % self.contracts["registry"])["entrypoint_type"]
+        packed = self.node.post_head("/helpers/scripts/pack_data", {
+            "data": variant(variant_cases(dispatch_type), action, value),
+            "type": strip_annotations(dispatch_type)
+        })
+        return hex_bytes(packed["packed"])
+
+    def measure_call(self, contract, entry_point, value):
+        if isinstance(value, tuple) and value[0] == "pack":
+            value = self.pack_dispatch(value[1], value[2])
+
+        counter = int(self.node.head("/context/contracts/%s/counter" % self.source))
+        branch = self.node.request("/chains/main/blocks/head/hash")
+        content = {
+            "kind": "transaction",
+            "source": self.source,
+            "fee": "0",
+            "counter": str(counter + 1),
+            "gas_limit": str(self.gas_limit),
+            "storage_limit": str(self.storage_limit),
+            "amount": "0",
+            "destination": self.contracts[contract],
+            "parameters": {"entrypoint": entry_point, "value": value}
+        }
+
+        simulation = self.node.post_head("/helpers/scripts/run_operation", {
+            "operation": {"branch": branch, "contents": [content], "signature": SIMULATION_SIGNATURE},
+            "chain_id": self.chain_id
+        })
+        forged = self.node.post_head("/helpers/forge/operations", {"branch": branch, "contents": [content]})
+
+        metadata = simulation["contents"][0]["metadata"]
+        results = [(contract, metadata["operation_result"])]
+        for internal in metadata.get("internal_operation_results", []):
+            results.append((self.contract_name(internal.get("destination")), internal["result"]))
+
+        failed = [result for _, result in results if result["status"] != "applied"]
+        if failed:
+            return {"status": "failed", "errors": [error.get("id") for result in failed for error in result.get("errors", [])]}
+
+        return {
+            "status": "applied",
+            "gas": sum(milligas(result) for _, result in results) / 1000,
+            "storage_bytes": sum(int(result.get("paid_storage_size_diff", "0")) for _, result in results),
+            "operation_bytes": len(forged) // 2 + 64,
+            "calls": [
+                {"contract": name, "gas": milligas(result) / 1000, "storage_bytes": int(result.get("paid_storage_size_diff", "0"))}
+                for name, result in results
+            ]
+        }
+
+    def measure_view(self, contract, view, value):
+        try:
+            self.run_view(contract, view, value)
+        except RuntimeError as error:
+            return {"status": "failed", "errors": [str(error)[:200]]}
+
+        # The lowest gas limit that lets the view succeed
+        low, high = 0, self.gas_limit
+        while low < high:
+            middle = (low + high) // 2
+            try:
+                self.run_view(contract, view, value, middle)
+                high = middle
+            except RuntimeError:
+                low = middle + 1
+        return {"status": "applied", "gas": low}
+
+    def code_size(self, contract):
+        """Serialized size of the code of a contract, which is paid at origination and read on every call."""
+        code = self.node.head("/context/contracts/%s/script" % self.contracts[contract])["code"]
+        branch = self.node.request("/chains/main/blocks/head/hash")
+
+        def forged_size(code):
+            content = {
+                "kind": "origination",
+                "source": self.source,
+                "fee": "0",
+                "counter": "1",
+                "gas_limit": "0",
+                "storage_limit": "0",
+                "balance": "0",
+                "script": {"code": code, "storage": {"prim": "Unit"}}
+            }
+            return len(self.node.post_head("/helpers/forge/operations", {"branch": branch, "contents": [content]})) // 2
+
+        # An empty sequence takes 5 bytes, its tag and its length
+        return forged_size(code) - forged_size([]) + 5
+
+    def contract_name(self, address):
+        for name, contract_address in self.contracts.items():
+            if contract_address == address:
+                return name
+        return address
+
+    def run(self, scales, selected = None):
+        results = {}
+        for scale in scales:
+            started = time.time()
+            self.fill(scale)
+            ctx = Context(scale, self.source, self.contracts)
+            results[str(scale)] = {}
+            for name, kind, contract, target, value in cases(ctx):
+                if selected and not any(name.startswith(prefix) for prefix in selected):
+                    continue
+                if kind == "call":
+                    results[str(scale)][name] = self.measure_call(contract, target, value)
+                else:
+                    results[str(scale)][name] = self.measure_view(contract, target, value)
+            print("scale %d measured in %.0fs" % (scale, time.time() - started), file = sys.stderr)
+        return results
+
+
+def count_prefix(exists, limit):
+    """Number of existing records, when the records 0 to n - 1 exist and the next ones do not."""
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if exists(middle - 1):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def milligas(result):
+    return int(result.get("consumed_milligas", "0"))
+
+
+def variant_cases(node):
+    """Names of the annotated cases of a variant type."""
+    annotations = [annotation[1:] for annotation in node.get("annots", []) if annotation.startswith("%")]
+    if node.get("prim") == "or" and not annotations:
+        return variant_cases(node["args"][0]) + variant_cases(node["args"][1])
+    return annotations
+
+
+def strip_annotations(node):
+    if isinstance(node, list):
+        return [strip_annotations(item) for item in node]
+    if "prim" in node:
+        return {"prim": node["prim"], "args": [strip_annotations(arg) for arg in node.get("args", [])]}
+    return node
+
+
+def find_annotated(type_node, value_node, annotation):
+    """Value of the storage field with the given annotation, for storages made of pairs."""
+    if annotation in type_node.get("annots", []):
+        return int(value_node["int"])
+    if type_node.get("prim") != "pair":
+        return None
+
+    # Normalized values may be flattened combs
+    values = value_node["args"] if isinstance(value_node, dict) else value_node
+    types = type_node["args"]
+    if len(values) > len(types):
+        values = values[:len(types) - 1] + [{"prim": "Pair", "args": values[len(types) - 1:]}]
+    for field_type, field_value in zip(types, values):
+        found = find_annotated(field_type, field_value, annotation)
+        if found is not None:
+            return found
+    return None
+
+###############
+# Comparison #
+###############
+
+def load_thresholds(path):
+    thresholds = {"default": {"gas_pct": 5.0, "storage_bytes": 0, "operation_bytes": 0}, "cases": {}}
+    if path:
+        with open(path) as thresholds_file:
+            loaded = json.load(thresholds_file)
+        thresholds["default"].update(loaded.get("default", {}))
+        thresholds["cases"].update(loaded.get("cases", {}))
+    return thresholds
+
+
+def case_thresholds(thresholds, name):
+    limits = dict(thresholds["default"])
+    # The most specific prefix wins, e.g. "registry_logic.add_issuers" over "registry_logic."
+    for prefix in sorted(thresholds["cases"], key = len):
+        if name.startswith(prefix):
+            limits.update(thresholds["cases"][prefix])
+    return limits
+
+
+def compare(baseline, current, thresholds):
+    """Return the regressions of current against baseline, and print the comparison table."""
+    regressions = []
+    print("%-7s %-48s %12s %12s %8s %8s %8s" % ("scale", "case", "gas before", "gas after", "gas %", "storage", "size"))
+
+    for scale in sorted(current["results"], key = int):
+        for name, result in sorted(current["results"][scale].items()):
+            before = baseline["results"].get(scale, {}).get(name)
+            if before is None or before["status"] != "applied":
+                continue
+            if result["status"] != "applied":
+                regressions.append("%s at scale %s: now fails with %s" % (name, scale, ", ".join(map(str, result["errors"]))))
+                continue
+
+            limits = case_thresholds(thresholds, name)
+            gas_change = (result["gas"] - before["gas"]) * 100.0 / before["gas"] if before["gas"] else 0.0
+            storage_change = result.get("storage_bytes", 0) - before.get("storage_bytes", 0)
+            size_change = result.get("operation_bytes", 0) - before.get("operation_bytes", 0)
+
+            print("%-7s %-48s %12.3f %12.3f %+7.2f%% %+8d %+8d" % (
+                scale, name, before["gas"], result["gas"], gas_change, storage_change, size_change
+            ))
+
+            if gas_change > limits["gas_pct"]:
+                regressions.append("%s at scale %s: gas +%.2f%% (limit %.2f%%)" % (name, scale, gas_change, limits["gas_pct"]))
+            if storage_change > limits["storage_bytes"]:
+                regressions.append("%s at scale %s: storage +%d bytes (limit %d)" % (name, scale, storage_change, limits["storage_bytes"]))
+            if size_change > limits["operation_bytes"]:
+                regressions.append("%s at scale %s: operation size +%d bytes (limit %d)" % (name, scale, size_change, limits["operation_bytes"]))
+
+    return regressions
+
+
+def compare_sizes(configs):
+    """Print the code size of the contracts of several deployments, the first one being the baseline."""
+    sizes = []
+    for config in configs:
+        benchmark = Benchmark(config)
+        sizes.append({name: benchmark.code_size(name) for name in config["contracts"]})
+
+    print("%-16s" % "contract" + "".join("%12s" % ("config %d" % index) for index in range(len(configs))) + "%10s" % "change")
+    for name in configs[0]["contracts"]:
+        row = [size.get(name) for size in sizes]
+        change = "%+9.1f%%" % ((row[-1] - row[0]) * 100.0 / row[0]) if row[0] and row[-1] is not None else ""
+        print("%-16s" % name + "".join("%12s" % ("-" if size is None else size) for size in row) + "%10s" % change)
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Gas, storage and operation size of the registry contracts")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    run_parser = subparsers.add_parser("run", help = "fill the registry and measure every entry point and view")
+    run_parser.add_argument("config")
+    run_parser.add_argument("--scales", default = "1,100,10000")
+    run_parser.add_argument("--cases", default = None, help = "comma separated case name prefixes to run")
+    run_parser.add_argument("--output", default = None)
+
+    compare_parser = subparsers.add_parser("compare", help = "compare results against a baseline, fails on regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--thresholds", default = None)
+
+    size_parser = subparsers.add_parser("size", help = "compare the code size of the contracts of several deployments")
+    size_parser.add_argument("configs", nargs = "+")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "size":
+        configs = []
+        for path in args.configs:
+            with open(path) as config_file:
+                configs.append(json.load(config_file))
+        compare_sizes(configs)
+        return 0
+
+    if args.command == "run":
+        with open(args.config) as config_file:
+            config = json.load(config_file)
+
+        benchmark = Benchmark(config)
+        scales = [int(scale) for scale in args.scales.split(",")]
+        selected = args.cases.split(",") if args.cases else None
+        output = {
+            "rpc": config["rpc"],
+            "protocol": benchmark.node.head("/protocols")["protocol"],
+            "contracts": config["contracts"],
+            "results": benchmark.run(scales, selected)
+        }
+
+        text = json.dumps(output, indent = 2, sort_keys = True)
+        if args.output:
+            with open(args.output, "w") as output_file:
+                output_file.write(text + "\n")
+        else:
+            print(text)
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(args.current) as current_file:
+        current = json.load(current_file)
+
+    regressions = compare(baseline, current, load_thresholds(args.thresholds))
+    for regression in regressions:
+        print("REGRESSION " + regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+# DID Document Codec
+#
+# Encoding of issuer DID documents for add_issuer_bytes / set_issuer_data_bytes.
+# The document is serialized as compact UTF-8 JSON and deflated with a preset
+# dictionary of the keys and values that most DID documents share, so that even
+# small documents compress well. The first byte is the format version, which
+# also pins the dictionary: a dictionary change needs a new version.
+#
+# Usage:
+#   python didCodec.py encode did.json      prints the issuer_data_bytes as 0x hex
+#   python didCodec.py decode 0x01...       prints the DID document
+#   python didCodec.py benchmark            prints the size ratio on sample DID documents
+#   python didCodec.py sections did.json    prints the issuer_data and the patch that adds its sections
+#   python didCodec.py patch old.json new.json
+#                                           prints the patch from one version of a document to the next
+#
+# Sections: the array properties of a DID document, such as verificationMethod
+# or service, can also be kept as one section per element with
+# apply_issuer_data_patch, so that a key rotation only sends and writes the
+# changed elements. get_issuer adds them back to the issuer_data, after its own
+# properties, in the order the sections were added.
+
+import argparse
+import json
+import sys
+import zlib
+
+FORMAT_DEFLATE_DID_V1 = 0x01
+
+# zlib favours matches at the end of the dictionary, so the most common strings come last
+DID_DICTIONARY_V1 = "".join([
+    "did:ethr:", "did:ion:", "did:web:", "did:key:z6Mk", "did:pkh:tz:", "did:tz:delphinet:",
+    "\"X25519KeyAgreementKey2019\"", "\"X25519KeyAgreementKey2020\"",
+    "\"Bls12381G2Key2020\"", "\"EcdsaSecp256r1VerificationKey2019\"",
+    "\"Ed25519VerificationKey2020\"", "\"Ed25519VerificationKey2018\"",
+    "\"EcdsaSecp256k1RecoveryMethod2020\"", "\"EcdsaSecp256k1VerificationKey2019\"",
+    "\"JsonWebKey2020\"", "\"P256PublicKeyBLAKE2BDigestSize20Base58CheckEncoded2021\"",
+    "\"Ed25519PublicKeyBLAKE2BDigestSize20Base58CheckEncoded2021\"",
+    "\"https://w3id.org/security/suites/ed25519-2020/v1\"",
+    "\"https://w3id.org/security/suites/jws-2020/v1\"",
+    "\"https://w3id.org/security/suites/secp256k1-2019/v1\"",
+    "\"https://w3id.org/security/v2\"", "\"https://w3id.org/did/v1\"",
+    "\"LinkedDomains\"", "\"DIDCommMessaging\"", "\"routingKeys\":[", "\"accept\":[",
+    "\"capabilityDelegation\":[", "\"capabilityInvocation\":[", "\"keyAgreement\":[",
+    "\"service\":[{\"id\":\"", "#linked-domain\",\"type\":\"LinkedDomains\",\"serviceEndpoint\":\"https://",
+    "\"serviceEndpoint\":\"https://",
+    "\"blockchainAccountId\":\"tezos:NetXdQprcVkpaWU:tz1", "#blockchainAccountId",
+    "\"publicKeyBase58\":\"", "\"publicKeyMultibase\":\"z",
+    "\"publicKeyJwk\":{\"kty\":\"OKP\",\"crv\":\"Ed25519\",\"x\":\"",
+    "\"publicKeyJwk\":{\"kty\":\"EC\",\"crv\":\"P-256\",\"x\":\"",
+    "\"publicKeyJwk\":{\"kty\":\"EC\",\"crv\":\"secp256k1\",\"x\":\"", "\",\"y\":\"",
+    "\"assertionMethod\":[\"", "\"authentication\":[\"", "#key-1", "#key-2",
+    "\",\"controller\":\"did:tz:", "\",\"type\":\"",
+    "\"verificationMethod\":[{\"id\":\"did:tz:",
+    "{\"@context\":[\"https://www.w3.org/ns/did/v1\",",
+    "{\"@context\":\"https://www.w3.org/ns/did/v1\",\"id\":\"did:tz:",
+    "{\"@context\":\"https://w3id.org/did/v1\",\"id\":\"did:tz:",
+]).encode()
+
+# Array properties kept as sections by apply_issuer_data_patch
+SECTION_PROPERTIES = [
+    "verificationMethod", "authentication", "assertionMethod", "keyAgreement",
+    "capabilityInvocation", "capabilityDelegation", "service"
+]
+
+# Largest decoded document accepted, to bound the work of decoding untrusted bytes
+MAX_DOCUMENT_SIZE = 1024 * 1024
+
+
+def compact_json(document):
+    """Serialize a DID document the way it is compressed: no whitespace, UTF-8."""
+    return json.dumps(document, separators = (",", ":"), ensure_ascii = False).encode("utf-8")
+
+
+def encode(document):
+    """Encode a DID document (dict or JSON text) into issuer_data_bytes."""
+    if isinstance(document, (str, bytes)):
+        document = json.loads(document)
+
+    compressor = zlib.compressobj(level = 9, wbits = -15, zdict = DID_DICTIONARY_V1)
+    return bytes([FORMAT_DEFLATE_DID_V1]) + compressor.compress(compact_json(document)) + compressor.flush()
+
+
+def decode(data):
+    """Decode issuer_data_bytes, given as bytes or 0x hex, back into the DID document."""
+    if isinstance(data, str):
+        data = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+
+    if len(data) == 0 or data[0] != FORMAT_DEFLATE_DID_V1:
+        raise ValueError("Unknown DID document encoding")
+
+    decompressor = zlib.decompressobj(wbits = -15, zdict = DID_DICTIONARY_V1)
+    document = decompressor.decompress(data[1:], MAX_DOCUMENT_SIZE)
+    if decompressor.unconsumed_tail:
+        raise ValueError("DID document exceeds %d bytes" % MAX_DOCUMENT_SIZE)
+
+    return json.loads(document.decode("utf-8"))
+
+
+def ascii_json(value):
+    """Serialize a value as compact ASCII JSON, as Michelson strings only hold printable ASCII."""
+    return json.dumps(value, separators = (",", ":"), ensure_ascii = True)
+
+
+def split_sections(document):
+    """Split a DID document into its issuer_data and its sections, as {(property, section_id): section_data}."""
+    if isinstance(document, (str, bytes)):
+        document = json.loads(document)
+
+    base = {}
+    sections = {}
+    for name, value in document.items():
+        if name not in SECTION_PROPERTIES or not isinstance(value, list) or not value:
+            base[name] = value
+            continue
+
+        for element in value:
+            # Verification methods and services are identified by their id, references by themselves
+            section_id = element.get("id") if isinstance(element, dict) else element
+            if not isinstance(section_id, str) or (name, section_id) in sections:
+                raise ValueError("Element of %s without a unique id: %s" % (name, ascii_json(element)))
+            sections[(name, section_id)] = ascii_json(element)
+
+    return ascii_json(base), sections
+
+
+def section_patch(old_document, new_document):
+    """Changes of apply_issuer_data_patch from the sections of one document to those of the next one."""
+    old_data, old_sections = split_sections(old_document) if old_document is not None else ("{}", {})
+    new_data, new_sections = split_sections(new_document)
+    if old_document is not None and old_data != new_data:
+        raise ValueError("The document changes outside of its sections, it must be sent with set_issuer_data")
+
+    patch = []
+    for (name, section_id) in old_sections:
+        if (name, section_id) not in new_sections:
+            patch.append({"remove_section": {"property": name, "section_id": section_id}})
+    for (name, section_id), section_data in new_sections.items():
+        if old_sections.get((name, section_id)) != section_data:
+            patch.append({"set_section": {"property": name, "section_id": section_id, "section_data": section_data}})
+    return patch
+
+
+def sample_documents():
+    """Representative DID documents, used by the benchmark."""
+    tz_did = "did:tz:tz1zsSgDXeYPhZ3AuKhTFneDf1"
+    web_did = "did:web:registry.example.com"
+
+    return {
+        # The example document of the test suite
+        "did:tz secp256k1 (README)": {
+            "@context": "https://w3id.org/did/v1",
+            "id": tz_did,
+            "verificationMethod": [{
+                "id": tz_did,
+                "type": "EcdsaSecp256k1VerificationKey2019",
+                "controller": tz_did,
+                "publicKeyJwk": {
+                    "kty": "EC",
+                    "crv": "secp256k1",
+                    "x": "n03trG-1sWidluyYQ2gcKrgYE94rMkLIArZCHjv2GpI",
+                    "y": "6__x_vqe0nBGYf7azbQ1_VvvuCafG5MhhUPNvYp-Mak"
+                }
+            }],
+            "authentication": [tz_did],
+            "assertionMethod": [tz_did]
+        },
+        "did:tz Ed25519 + account": {
+            "@context": ["https://www.w3.org/ns/did/v1", "https://w3id.org/security/suites/ed25519-2020/v1"],
+            "id": "did:tz:tz1TzrmTBSuiVHV2VfMnGRMYvTEPCP42oSM8",
+            "verificationMethod": [{
+                "id": "did:tz:tz1TzrmTBSuiVHV2VfMnGRMYvTEPCP42oSM8#blockchainAccountId",
+                "type": "Ed25519PublicKeyBLAKE2BDigestSize20Base58CheckEncoded2021",
+                "controller": "did:tz:tz1TzrmTBSuiVHV2VfMnGRMYvTEPCP42oSM8",
+                "blockchainAccountId": "tezos:NetXdQprcVkpaWU:tz1TzrmTBSuiVHV2VfMnGRMYvTEPCP42oSM8"
+            }, {
+                "id": "did:tz:tz1TzrmTBSuiVHV2VfMnGRMYvTEPCP42oSM8#key-1",
+                "type": "Ed25519VerificationKey2020",
+                "controller": "did:tz:tz1TzrmTBSuiVHV2VfMnGRMYvTEPCP42oSM8",
+                "publicKeyMultibase": "z6MkpTHR8VNsBxYAAWHut2Geadd9jSwuBV8xRoAnwWsdvktH"
+            }],
+            "authentication": ["did:tz:tz1TzrmTBSuiVHV2VfMnGRMYvTEPCP42oSM8#blockchainAccountId"],
+            "assertionMethod": [
+                "did:tz:tz1TzrmTBSuiVHV2VfMnGRMYvTEPCP42oSM8#blockchainAccountId",
+                "did:tz:tz1TzrmTBSuiVHV2VfMnGRMYvTEPCP42oSM8#key-1"
+            ]
+        },
+        "did:web JWK + services (non-ASCII)": {
+            "@context": ["https://www.w3.org/ns/did/v1", "https://w3id.org/security/suites/jws-2020/v1"],
+            "id": web_did,
+            "alsoKnownAs": ["https://registry.example.com/organisations/Überprüfungsstelle"],
+            "verificationMethod": [{
+                "id": web_did + "#key-1",
+                "type": "JsonWebKey2020",
+                "controller": web_did,
+                "publicKeyJwk": {"kty": "OKP", "crv": "Ed25519", "x": "VCpo2LMLhn6iWku8MKvSLg2ZAoC-nlOyPVQaO3FxVeQ"}
+            }, {
+                "id": web_did + "#key-2",
+                "type": "JsonWebKey2020",
+                "controller": web_did,
+                "publicKeyJwk": {
+                    "kty": "EC",
+                    "crv": "P-256",
+                    "x": "38M1FDts7Oea7urmseiugGW7tWc3mLpJh6rKe7xINZ8",
+                    "y": "nDQW6XZ7b_u2Sy9slofYLlG03sOEoug3I0aAPQ0exs4"
+                }
+            }],
+            "authentication": [web_did + "#key-1"],
+            "assertionMethod": [web_did + "#key-1", web_did + "#key-2"],
+            "keyAgreement": [web_did + "#key-2"],
+            "service": [{
+                "id": web_did + "#linked-domain",
+                "type": "LinkedDomains",
+                "serviceEndpoint": "https://registry.example.com"
+            }, {
+                "id": web_did + "#didcomm",
+                "type": "DIDCommMessaging",
+                "serviceEndpoint": "https://registry.example.com/didcomm",
+                "accept": ["didcomm/v2"],
+                "routingKeys": []
+            }]
+        }
+    }
+
+
+def benchmark():
+    """Print the size of each sample document as compact issuer_data string and as issuer_data_bytes."""
+    rows = []
+    for name, document in sample_documents().items():
+        # The ratio is against compact ASCII JSON, the smallest issuer_data string of the same document
+        as_compact = len(json.dumps(document, separators = (",", ":"), ensure_ascii = True))
+        # Indented JSON, as the documents are often submitted, for reference only
+        as_indented = len(json.dumps(document, indent = 1, ensure_ascii = True))
+        as_bytes = len(encode(document))
+
+        if decode(encode(document)) != document:
+            raise AssertionError("Round trip failed for %s" % name)
+
+        rows.append((name, as_compact, as_bytes, as_indented))
+
+    print("%-38s %10s %10s %8s %10s" % ("document", "compact", "bytes", "ratio", "indented"))
+    for name, as_compact, as_bytes, as_indented in rows:
+        print("%-38s %10d %10d %7.2fx %10d" % (name, as_compact, as_bytes, as_compact / as_bytes, as_indented))
+
+    # Rotating the first verification method, by sending the whole document or a patch
+    print()
+    print("%-38s %10s %10s" % ("key rotation", "document", "patch"))
+    for name, document in sample_documents().items():
+        rotated = json.loads(json.dumps(document))
+        method = rotated["verificationMethod"][0]
+        for key in ("publicKeyMultibase", "blockchainAccountId"):
+            if key in method:
+                method[key] = method[key][:-4] + "AAAA"
+        if "publicKeyJwk" in method:
+            method["publicKeyJwk"]["x"] = method["publicKeyJwk"]["x"][:-4] + "AAAA"
+
+        patch = section_patch(document, rotated)
+        # Size of the strings sent, as the Michelson encoding adds the same few bytes to each
+        patch_size = sum(len(text) for change in patch for fields in change.values() for text in fields.values())
+        print("%-38s %10d %10d" % (name, len(ascii_json(rotated)), patch_size))
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Compact encoding of issuer DID documents")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    encode_parser = subparsers.add_parser("encode", help = "encode a DID document file into issuer_data_bytes")
+    encode_parser.add_argument("file")
+
+    decode_parser = subparsers.add_parser("decode", help = "decode issuer_data_bytes given as 0x hex")
+    decode_parser.add_argument("data")
+
+    subparsers.add_parser("benchmark", help = "print the size ratio on sample DID documents")
+
+    sections_parser = subparsers.add_parser("sections", help = "print the issuer_data of a DID document file and the patch adding its sections")
+    sections_parser.add_argument("file")
+
+    patch_parser = subparsers.add_parser("patch", help = "print the patch between two versions of a DID document file")
+    patch_parser.add_argument("old_file")
+    patch_parser.add_argument("new_file")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "encode":
+        with open(args.file, "rb") as document_file:
+            print("0x" + encode(document_file.read()).hex())
+    elif args.command == "decode":
+        print(json.dumps(decode(args.data), indent = 2, ensure_ascii = False))
+    elif args.command == "sections":
+        with open(args.file, "rb") as document_file:
+            document = json.loads(document_file.read())
+        print(json.dumps({"issuer_data": split_sections(document)[0], "patch": section_patch(None, document)}, indent = 2))
+    elif args.command == "patch":
+        with open(args.old_file, "rb") as old_file, open(args.new_file, "rb") as new_file:
+            print(json.dumps(section_patch(json.loads(old_file.read()), json.loads(new_file.read())), indent = 2))
+    else:
+        benchmark()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
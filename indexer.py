@@ -0,0 +1,599 @@
+# Registry Indexer
+#
+# Indexes the issuers, schemas and bindings of an IssuerRegistry and a
+# SchemaRegistry contract into SQLite, so that they can be listed and queried
+# in bulk instead of one view call per key.
+#
+# Blocks are read one level at a time from a node RPC or from a directory of
+# recorded block JSON files (<level>.json, as returned by
+# /chains/main/blocks/<level>). The big_map updates of the contracts are
+# applied to SQLite as they are read, and committed every --batch-size blocks
+# together with the last indexed level, so that indexing resumes from there.
+# Every change keeps the previous row in an undo log for the last
+# --reorg-depth levels. When a block does not follow the indexed chain, the
+# changes of the blocks that were replaced are undone before indexing resumes.
+#
+# Usage:
+#   python indexer.py index --rpc http://localhost:20000 --db registry.db --issuer-registry KT1... --schema-registry KT1...
+#   python indexer.py index --fixtures ./blocks --db registry.db --issuer-registry KT1... --schema-registry KT1...
+#   python indexer.py record --rpc http://localhost:20000 --from-level 1 --to-level 100 ./blocks
+#   python indexer.py query --db registry.db issuers --owner tz1...
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Big maps of each contract, by the field annotation of the storage, with the
+# SQLite table, key columns and value columns they are indexed into. Columns are
+# listed in the order of the Michelson leaves: SmartPy lays out the fields of a
+# record in the alphabetical order of their names, not in the order they are
+# declared, e.g. issuer_data comes before issuer_did and the index of a
+# schema_chunks key, stored as chunk_index, before schema_id. Columns named None
+# are not stored.
+BIG_MAPS = {
+    "issuer_registry": {
+        "issuer_map": (
+            "issuers",
+            [("issuer_did", "string")],
+            [("issuer_data", "string"), (None, "string"), ("issuer_owner", "address"), ("status", "nat")]
+        ),
+        "issuer_data_bytes_map": (
+            "issuer_data_bytes",
+            [("issuer_did", "string")],
+            [("issuer_data_bytes", "bytes")]
+        ),
+        "issuer_data_sections": (
+            "issuer_data_sections",
+            [("issuer_did", "string"), ("property", "string"), ("section_id", "string")],
+            [("section_data", "string")]
+        ),
+    },
+    "schema_registry": {
+        "schema_map": (
+            "schemas",
+            [("schema_id", "nat")],
+            [("schema_data", "string"), ("schema_owner", "address"), ("status", "nat")]
+        ),
+        "issuer_schema_map": (
+            "bindings",
+            [("issuer_did", "string"), ("schema_id", "nat")],
+            [("status", "nat")]
+        ),
+        "schema_reference_map": (
+            "schema_references",
+            [("schema_id", "nat")],
+            [("schema_hash", "bytes"), ("schema_uri", "string")]
+        ),
+        "schema_hash_ids": (
+            "schema_hashes",
+            [("schema_hash", "bytes")],
+            [("schema_id", "nat")]
+        ),
+        "schema_chunks": (
+            "schema_chunks",
+            [("chunk_index", "nat"), ("schema_id", "nat")],
+            [("chunk", "string")]
+        ),
+    },
+}
+
+SQL_TYPES = {"string": "TEXT", "address": "TEXT", "bytes": "TEXT", "nat": "INTEGER"}
+
+##############
+# Micheline #
+##############
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+ADDRESS_PREFIXES = {
+    b"\x00\x00": bytes([6, 161, 159]),  # tz1
+    b"\x00\x01": bytes([6, 161, 161]),  # tz2
+    b"\x00\x02": bytes([6, 161, 164]),  # tz3
+    b"\x00\x03": bytes([6, 161, 166]),  # tz4
+}
+ORIGINATED_PREFIX = bytes([2, 90, 121])  # KT1
+
+
+def base58check(payload):
+    checksum = hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4]
+    number = int.from_bytes(payload + checksum, "big")
+    encoded = ""
+    while number > 0:
+        number, remainder = divmod(number, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+    leading_zeros = len(payload + checksum) - len((payload + checksum).lstrip(b"\x00"))
+    return "1" * leading_zeros + encoded
+
+
+def decode_address(data):
+    """Address from its binary form, as found in optimized Micheline."""
+    if data[0] == 1:
+        return base58check(ORIGINATED_PREFIX + data[1:21])
+    return base58check(ADDRESS_PREFIXES[data[:2]] + data[2:22])
+
+
+def flatten(node):
+    """Leaves of a value made of pairs, whether binary, n-ary or written as a sequence."""
+    if isinstance(node, list):
+        return [leaf for item in node for leaf in flatten(item)]
+    if node.get("prim") == "Pair":
+        return [leaf for arg in node["args"] for leaf in flatten(arg)]
+    return [node]
+
+
+def decode_leaf(node, kind):
+    if kind == "nat":
+        return int(node["int"])
+    if kind == "address" and "bytes" in node:
+        return decode_address(bytes.fromhex(node["bytes"]))
+    if kind == "bytes":
+        return node["bytes"]
+    return node["string"]
+
+
+def decode_columns(node, columns):
+    leaves = flatten(node)
+    if len(leaves) != len(columns):
+        raise ValueError("Unexpected value %s for columns %s" % (json.dumps(node), columns))
+    return {
+        name: decode_leaf(leaf, kind)
+        for (name, kind), leaf in zip(columns, leaves) if name is not None
+    }
+
+
+def strip_annotations(node):
+    if isinstance(node, list):
+        return [strip_annotations(item) for item in node]
+    return {"prim": node["prim"], "args": [strip_annotations(arg) for arg in node.get("args", [])]}
+
+
+def annotated_big_maps(type_node, value_node = None):
+    """Big map fields of a storage type, as {annotation: (key type, value type, id or None)}."""
+    found = {}
+    annotations = [annotation[1:] for annotation in type_node.get("annots", []) if annotation.startswith("%")]
+    if type_node["prim"] == "big_map" and annotations:
+        big_map_id = int(value_node["int"]) if value_node is not None and "int" in value_node else None
+        found[annotations[0]] = (
+            strip_annotations(type_node["args"][0]),
+            strip_annotations(type_node["args"][1]),
+            big_map_id
+        )
+    elif type_node["prim"] == "pair":
+        types = type_node["args"]
+        values = [None] * len(types)
+        if value_node is not None:
+            values = value_node if isinstance(value_node, list) else value_node["args"]
+            # Values may be flattened combs of the type
+            if len(values) > len(types):
+                values = values[:len(types) - 1] + [{"prim": "Pair", "args": values[len(types) - 1:]}]
+        for field_type, field_value in zip(types, values):
+            found.update(annotated_big_maps(field_type, field_value))
+    return found
+
+
+def storage_type(script):
+    return [node for node in script["code"] if node.get("prim") == "storage"][0]["args"][0]
+
+
+def operation_results(block):
+    """Yield (content, result) for every applied operation and internal operation of a block."""
+    for operations in block.get("operations", []):
+        for operation in operations:
+            for content in operation.get("contents", []):
+                metadata = content.get("metadata", {})
+                result = metadata.get("operation_result")
+                if result is not None and result.get("status") == "applied":
+                    yield content, result
+                for internal in metadata.get("internal_operation_results", []):
+                    if internal["result"].get("status") == "applied":
+                        yield internal, internal["result"]
+
+###########
+# Sources #
+###########
+
+class RpcSource:
+    def __init__(self, rpc):
+        self.rpc = rpc.rstrip("/")
+
+    def get(self, path):
+        try:
+            with urllib.request.urlopen(self.rpc + path) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as error:
+            raise RuntimeError("%s %s: %s" % (path, error.code, error.read().decode(errors = "replace")))
+
+    def head_level(self):
+        return self.get("/chains/main/blocks/head/header")["level"]
+
+    def block_hash(self, level):
+        return self.get("/chains/main/blocks/%d/hash" % level)
+
+    def block(self, level):
+        return self.get("/chains/main/blocks/%d" % level)
+
+    def script(self, contract):
+        return self.get("/chains/main/blocks/head/context/contracts/%s/script" % contract)
+
+
+class FixtureSource:
+    """Recorded blocks, one <level>.json file per level."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def levels(self):
+        return sorted(int(name[:-5]) for name in os.listdir(self.directory) if name.endswith(".json") and name[:-5].isdigit())
+
+    def head_level(self):
+        levels = self.levels()
+        return levels[-1] if levels else 0
+
+    def block_hash(self, level):
+        return self.block(level)["hash"]
+
+    def block(self, level):
+        with open(os.path.join(self.directory, "%d.json" % level)) as block_file:
+            return json.load(block_file)
+
+    def script(self, contract):
+        # Big map IDs are found in the originations of the recorded blocks
+        return None
+
+#########
+# Store #
+#########
+
+class Store:
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.create_tables()
+
+    def create_tables(self):
+        for maps in BIG_MAPS.values():
+            for table, key_columns, value_columns in maps.values():
+                columns = [(name, kind) for name, kind in key_columns + value_columns if name is not None]
+                self.db.execute("CREATE TABLE IF NOT EXISTS %s (%s, level INTEGER, PRIMARY KEY (%s))" % (
+                    table,
+                    ", ".join("%s %s" % (name, SQL_TYPES[kind]) for name, kind in columns),
+                    ", ".join(name for name, _ in key_columns)
+                ))
+
+        self.db.executescript("""
+            CREATE INDEX IF NOT EXISTS issuers_owner ON issuers (issuer_owner);
+            CREATE INDEX IF NOT EXISTS schemas_owner ON schemas (schema_owner);
+            CREATE INDEX IF NOT EXISTS bindings_schema ON bindings (schema_id);
+            CREATE TABLE IF NOT EXISTS big_maps (big_map_id INTEGER PRIMARY KEY, contract TEXT, name TEXT, level INTEGER);
+            CREATE TABLE IF NOT EXISTS blocks (level INTEGER PRIMARY KEY, hash TEXT);
+            CREATE TABLE IF NOT EXISTS undo_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, level INTEGER, table_name TEXT, key TEXT, row TEXT
+            );
+            CREATE INDEX IF NOT EXISTS undo_log_level ON undo_log (level);
+            CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.db.commit()
+
+    # Rows
+
+    def get_row(self, table, key):
+        where = " AND ".join("%s = ?" % name for name in key)
+        row = self.db.execute("SELECT * FROM %s WHERE %s" % (table, where), list(key.values())).fetchone()
+        return dict(row) if row is not None else None
+
+    def write_row(self, table, key, row):
+        if row is None:
+            where = " AND ".join("%s = ?" % name for name in key)
+            self.db.execute("DELETE FROM %s WHERE %s" % (table, where), list(key.values()))
+        else:
+            self.db.execute("INSERT OR REPLACE INTO %s (%s) VALUES (%s)" % (
+                table, ", ".join(row), ", ".join("?" * len(row))
+            ), list(row.values()))
+
+    def put(self, table, key, values, level):
+        """Insert, update or, with values None, delete a row, keeping the previous row in the undo log."""
+        previous = self.get_row(table, key)
+        self.db.execute("INSERT INTO undo_log (level, table_name, key, row) VALUES (?, ?, ?, ?)", (
+            level, table, json.dumps(key), json.dumps(previous) if previous is not None else None
+        ))
+        self.write_row(table, key, None if values is None else dict(key, **values, level = level))
+
+    # Chain
+
+    def last_level(self):
+        row = self.db.execute("SELECT value FROM state WHERE name = 'last_level'").fetchone()
+        return int(row[0]) if row is not None else None
+
+    def set_last_level(self, level):
+        self.db.execute("INSERT OR REPLACE INTO state (name, value) VALUES ('last_level', ?)", (str(level),))
+
+    def block_hash(self, level):
+        row = self.db.execute("SELECT hash FROM blocks WHERE level = ?", (level,)).fetchone()
+        return row[0] if row is not None else None
+
+    def add_block(self, level, block_hash):
+        self.db.execute("INSERT OR REPLACE INTO blocks (level, hash) VALUES (?, ?)", (level, block_hash))
+
+    def rollback(self, level):
+        """Undo every change of the given level."""
+        undo = self.db.execute("SELECT table_name, key, row FROM undo_log WHERE level = ? ORDER BY id DESC", (level,)).fetchall()
+        for table, key, row in undo:
+            self.write_row(table, json.loads(key), json.loads(row) if row is not None else None)
+        self.db.execute("DELETE FROM undo_log WHERE level = ?", (level,))
+        self.db.execute("DELETE FROM blocks WHERE level = ?", (level,))
+        self.set_last_level(level - 1)
+
+    def prune(self, below_level):
+        self.db.execute("DELETE FROM undo_log WHERE level < ?", (below_level,))
+        self.db.execute("DELETE FROM blocks WHERE level < ?", (below_level,))
+
+    # Big maps
+
+    def big_maps(self):
+        return {row["big_map_id"]: (row["contract"], row["name"]) for row in self.db.execute("SELECT * FROM big_maps")}
+
+    def add_big_map(self, big_map_id, contract, name, level):
+        self.put("big_maps", {"big_map_id": big_map_id}, {"contract": contract, "name": name}, level)
+
+###########
+# Indexer #
+###########
+
+class Indexer:
+    def __init__(self, source, store, contracts, batch_size = 100, reorg_depth = 120, workers = 4):
+        self.source = source
+        self.store = store
+        # {"issuer_registry": "KT1...", "schema_registry": "KT1..."}
+        self.contracts = contracts
+        self.batch_size = batch_size
+        self.reorg_depth = reorg_depth
+        self.workers = workers
+        self.big_maps = store.big_maps()
+
+    def discover_big_maps(self):
+        """Find the big map IDs from the scripts of the contracts, when the source can give them."""
+        for contract, address in self.contracts.items():
+            if any(owner == contract for owner, _ in self.big_maps.values()):
+                continue
+            script = self.source.script(address)
+            if script is None:
+                continue
+            for name, (_, _, big_map_id) in annotated_big_maps(storage_type(script), script["storage"]).items():
+                if name in BIG_MAPS[contract] and big_map_id is not None:
+                    self.store.add_big_map(big_map_id, contract, name, 0)
+        self.store.db.commit()
+        self.big_maps = self.store.big_maps()
+
+    def register_originations(self, content, result, level):
+        """Map the big maps allocated by the origination of a tracked contract to their storage field."""
+        for address in result.get("originated_contracts", []):
+            contract = next((name for name, tracked in self.contracts.items() if tracked == address), None)
+            if contract is None:
+                continue
+
+            fields = annotated_big_maps(storage_type(content["script"]))
+            for diff in result.get("lazy_storage_diff", []):
+                if diff["kind"] != "big_map" or diff["diff"]["action"] != "alloc":
+                    continue
+                types = (strip_annotations(diff["diff"]["key_type"]), strip_annotations(diff["diff"]["value_type"]))
+                matches = [name for name, (key_type, value_type, _) in fields.items()
+                    if (key_type, value_type) == types and name in BIG_MAPS[contract]]
+                if len(matches) == 1:
+                    self.store.add_big_map(int(diff["id"]), contract, matches[0], level)
+                    self.big_maps[int(diff["id"])] = (contract, matches[0])
+
+    def apply_block(self, block):
+        level = block["header"]["level"]
+
+        for content, result in operation_results(block):
+            if content.get("kind") == "origination":
+                self.register_originations(content, result, level)
+
+            for diff in result.get("lazy_storage_diff", []):
+                if diff["kind"] != "big_map" or int(diff["id"]) not in self.big_maps:
+                    continue
+                contract, name = self.big_maps[int(diff["id"])]
+                table, key_columns, value_columns = BIG_MAPS[contract][name]
+
+                # Copies and removals of the registry big maps do not happen, the contracts never drop them
+                for update in diff["diff"].get("updates", []):
+                    key = decode_columns(update["key"], key_columns)
+                    values = decode_columns(update["value"], value_columns) if "value" in update else None
+                    self.store.put(table, key, values, level)
+
+        self.store.add_block(level, block["hash"])
+        self.store.set_last_level(level)
+
+    def rollback_to_fork(self, level):
+        """Undo the indexed levels, from level down, that are not on the chain of the source. Return the last common level."""
+        lowest = max(level - self.reorg_depth, 0)
+        while level > lowest:
+            indexed_hash = self.store.block_hash(level)
+            # Nothing was indexed at this level or below
+            if indexed_hash is None or indexed_hash == self.source.block_hash(level):
+                # The big maps registered by the undone originations are gone
+                self.big_maps = self.store.big_maps()
+                return level
+            self.store.rollback(level)
+            level -= 1
+        raise RuntimeError("Chain reorganization deeper than %d levels, the index must be rebuilt" % self.reorg_depth)
+
+    def blocks(self, from_level, to_level):
+        """Stream blocks in order, fetching the next batch while the current one is read."""
+        starts = range(from_level, to_level + 1, self.batch_size)
+
+        with ThreadPoolExecutor(max_workers = self.workers) as executor:
+            def fetch(start):
+                return [executor.submit(self.source.block, level) for level in range(start, min(to_level, start + self.batch_size - 1) + 1)]
+
+            following = fetch(starts[0]) if starts else []
+            try:
+                for index in range(len(starts)):
+                    current = following
+                    following = fetch(starts[index + 1]) if index + 1 < len(starts) else []
+                    for future in current:
+                        yield future.result()
+            finally:
+                # The reader stopped early, for example on a reorganization
+                for future in following:
+                    future.cancel()
+
+    def run(self, from_level = 1, to_level = None):
+        """Index up to to_level or the head of the source, return the last indexed level."""
+        self.discover_big_maps()
+
+        last_level = self.store.last_level()
+        level = from_level - 1 if last_level is None else last_level
+        target = self.source.head_level() if to_level is None else to_level
+
+        while level < target:
+            pending = 0
+            restart = False
+            for block in self.blocks(level + 1, target):
+                block_level = block["header"]["level"]
+                known_predecessor = self.store.block_hash(block_level - 1)
+                if known_predecessor is not None and known_predecessor != block["header"]["predecessor"]:
+                    # The block does not follow the indexed chain
+                    level = self.rollback_to_fork(block_level - 1)
+                    self.store.db.commit()
+                    restart = True
+                    break
+
+                self.apply_block(block)
+                level = block_level
+                pending += 1
+                if pending == self.batch_size:
+                    self.commit(level)
+                    pending = 0
+
+            self.commit(level)
+            if not restart:
+                break
+        return level
+
+    def commit(self, level):
+        self.store.prune(level - self.reorg_depth)
+        self.store.db.commit()
+
+    def follow(self, interval):
+        while True:
+            level = self.run()
+            print("indexed up to level %d" % level, file = sys.stderr)
+            time.sleep(interval)
+
+###########
+# Queries #
+###########
+
+def query(store, kind, owner = None, issuer_did = None, schema_id = None, limit = 100, offset = 0):
+    conditions, parameters = [], []
+    if kind == "issuers":
+        table = "issuers"
+        if owner:
+            conditions.append("issuer_owner = ?")
+            parameters.append(owner)
+        order = "issuer_did"
+    elif kind == "schemas":
+        table = "schemas"
+        if owner:
+            conditions.append("schema_owner = ?")
+            parameters.append(owner)
+        order = "schema_id"
+    else:
+        table = "bindings"
+        if issuer_did:
+            conditions.append("issuer_did = ?")
+            parameters.append(issuer_did)
+        if schema_id is not None:
+            conditions.append("schema_id = ?")
+            parameters.append(schema_id)
+        order = "issuer_did, schema_id"
+
+    where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+    rows = store.db.execute("SELECT * FROM %s%s ORDER BY %s LIMIT ? OFFSET ?" % (table, where, order), parameters + [limit, offset])
+    return [dict(row) for row in rows]
+
+
+def record_blocks(source, from_level, to_level, directory):
+    os.makedirs(directory, exist_ok = True)
+    for level in range(from_level, to_level + 1):
+        with open(os.path.join(directory, "%d.json" % level), "w") as block_file:
+            json.dump(source.block(level), block_file)
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "SQLite index of the issuers, schemas and bindings of the registry")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    index_parser = subparsers.add_parser("index", help = "index blocks from a node or from recorded blocks")
+    source_group = index_parser.add_mutually_exclusive_group(required = True)
+    source_group.add_argument("--rpc")
+    source_group.add_argument("--fixtures")
+    index_parser.add_argument("--db", default = "registry.db")
+    index_parser.add_argument("--issuer-registry", required = True)
+    index_parser.add_argument("--schema-registry", required = True)
+    index_parser.add_argument("--from-level", type = int, default = 1)
+    index_parser.add_argument("--to-level", type = int, default = None)
+    index_parser.add_argument("--batch-size", type = int, default = 100)
+    index_parser.add_argument("--reorg-depth", type = int, default = 120)
+    index_parser.add_argument("--follow", type = float, default = None, metavar = "SECONDS",
+        help = "keep indexing new blocks, polling the head every SECONDS")
+
+    record_parser = subparsers.add_parser("record", help = "record blocks from a node as fixtures")
+    record_parser.add_argument("--rpc", required = True)
+    record_parser.add_argument("--from-level", type = int, required = True)
+    record_parser.add_argument("--to-level", type = int, required = True)
+    record_parser.add_argument("directory")
+
+    query_parser = subparsers.add_parser("query", help = "list indexed records as JSON lines")
+    query_parser.add_argument("--db", default = "registry.db")
+    query_parser.add_argument("kind", choices = ["issuers", "schemas", "bindings"])
+    query_parser.add_argument("--owner")
+    query_parser.add_argument("--issuer-did")
+    query_parser.add_argument("--schema-id", type = int)
+    query_parser.add_argument("--limit", type = int, default = 100)
+    query_parser.add_argument("--offset", type = int, default = 0)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record_blocks(RpcSource(args.rpc), args.from_level, args.to_level, args.directory)
+        return 0
+
+    store = Store(args.db)
+
+    if args.command == "query":
+        for row in query(store, args.kind, args.owner, args.issuer_did, args.schema_id, args.limit, args.offset):
+            print(json.dumps(row))
+        return 0
+
+    source = RpcSource(args.rpc) if args.rpc else FixtureSource(args.fixtures)
+    indexer = Indexer(
+        source,
+        store,
+        {"issuer_registry": args.issuer_registry, "schema_registry": args.schema_registry},
+        batch_size = args.batch_size,
+        reorg_depth = args.reorg_depth
+    )
+
+    if args.follow is not None:
+        try:
+            indexer.follow(args.follow)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    level = indexer.run(args.from_level, args.to_level)
+    print("indexed up to level %d" % level, file = sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,12 @@
 
 import smartpy as sp
 
+# Change to a section of a DID document, applied by apply_data_patch
+ISSUER_DATA_PATCH_TYPE = sp.TVariant(
+    set_section = sp.TRecord(property = sp.TString, section_id = sp.TString, section_data = sp.TString),
+    remove_section = sp.TRecord(property = sp.TString, section_id = sp.TString)
+)
+
 class IssuerRegistry(sp.Contract):
     def __init__(self, logic_contract_address, certifier):
         self.init_type(
@@ -15,32 +21,218 @@ class IssuerRegistry(sp.Contract):
                         status = sp.TNat
                     )
                 ),
+                issuer_data_bytes_map = sp.TBigMap(
+                    sp.TString,
+                    sp.TBytes
+                ),
+                issuer_data_sections = sp.TBigMap(
+                    sp.TRecord(
+                        issuer_did = sp.TString,
+                        property = sp.TString,
+                        section_id = sp.TString
+                    ),
+                    sp.TString
+                ),
+                issuer_section_ids = sp.TBigMap(
+                    sp.TString,
+                    sp.TMap(sp.TString, sp.TList(sp.TString))
+                ),
+                owner_issuers = sp.TBigMap(
+                    sp.TRecord(
+                        owner = sp.TAddress,
+                        position = sp.TNat
+                    ),
+                    sp.TString
+                ),
+                owner_issuer_count = sp.TBigMap(
+                    sp.TAddress,
+                    sp.TNat
+                ),
+                issuer_positions = sp.TBigMap(
+                    sp.TString,
+                    sp.TNat
+                ),
                 logic_contract_address = sp.TAddress,
                 certifier = sp.TAddress
             )
         )
         self.init(
             issuer_map = sp.big_map(),
+            issuer_data_bytes_map = sp.big_map(),
+            issuer_data_sections = sp.big_map(),
+            issuer_section_ids = sp.big_map(),
+            owner_issuers = sp.big_map(),
+            owner_issuer_count = sp.big_map(),
+            issuer_positions = sp.big_map(),
             logic_contract_address = logic_contract_address,
             certifier = certifier
         )
 
+    # Append an issuer to the index of its owner
+    def index_issuer(self, issuer_owner, issuer_did):
+        position = sp.compute(self.data.owner_issuer_count.get(issuer_owner, default_value = 0))
+
+        self.data.owner_issuers[sp.record(owner = issuer_owner, position = position)] = issuer_did
+        self.data.issuer_positions[issuer_did] = position
+        self.data.owner_issuer_count[issuer_owner] = position + 1
+
+    # Remove an issuer from the index of its owner, the last issuer of the owner takes its position
+    def unindex_issuer(self, issuer_owner, issuer_did):
+        position = sp.compute(self.data.issuer_positions[issuer_did])
+        last_position = sp.compute(sp.as_nat(self.data.owner_issuer_count[issuer_owner] - 1))
+
+        with sp.if_(position != last_position):
+            last_issuer_did = sp.compute(self.data.owner_issuers[sp.record(owner = issuer_owner, position = last_position)])
+            self.data.owner_issuers[sp.record(owner = issuer_owner, position = position)] = last_issuer_did
+            self.data.issuer_positions[last_issuer_did] = position
+
+        del self.data.owner_issuers[sp.record(owner = issuer_owner, position = last_position)]
+        del self.data.issuer_positions[issuer_did]
+        self.data.owner_issuer_count[issuer_owner] = last_position
+
+    # Remove every section of the DID document of an issuer
+    def clear_sections(self, issuer_did):
+        with sp.if_(self.data.issuer_section_ids.contains(issuer_did)):
+            with sp.for_("entry", self.data.issuer_section_ids[issuer_did].items()) as entry:
+                with sp.for_("section_id", entry.value) as section_id:
+                    del self.data.issuer_data_sections[sp.record(issuer_did = issuer_did, property = entry.key, section_id = section_id)]
+
+            del self.data.issuer_section_ids[issuer_did]
+
+    # Whether the issuer data contains the quoted name of a property, as a key or as a value
+    def contains_property(self, issuer_data, property):
+        quoted_property = sp.compute(sp.concat(["\"", property, "\""]))
+        found = sp.local("found", False)
+
+        with sp.if_(sp.len(issuer_data) >= sp.len(quoted_property)):
+            with sp.for_("position", sp.range(0, sp.as_nat(sp.len(issuer_data) - sp.len(quoted_property)) + 1)) as position:
+                with sp.if_(sp.slice(issuer_data, position, sp.len(quoted_property)) == sp.some(quoted_property)):
+                    found.value = True
+
+        return found.value
+
+    # DID document of an issuer: its issuer data, with the sections added as array properties
+    def issuer_document(self, issuer_did, issuer_data):
+        document = sp.local("document", issuer_data)
+
+        with sp.if_(self.data.issuer_section_ids.contains(issuer_did)):
+            # The properties go before the closing brace of the issuer data, after its own properties if any
+            parts = sp.local("parts", sp.list([sp.slice(issuer_data, 0, sp.as_nat(sp.len(issuer_data) - 1)).open_some()]))
+            separator = sp.local("separator", ",")
+            with sp.if_(sp.len(issuer_data) == 2):
+                separator.value = ""
+
+            with sp.for_("entry", self.data.issuer_section_ids[issuer_did].items()) as entry:
+                # Section IDs are kept from the last added to the first, pushing them restores their order
+                elements = sp.local("elements", sp.list(t = sp.TString))
+                with sp.for_("section_id", entry.value) as section_id:
+                    with sp.if_(sp.len(elements.value) > 0):
+                        elements.value.push(",")
+                    elements.value.push(self.data.issuer_data_sections[sp.record(issuer_did = issuer_did, property = entry.key, section_id = section_id)])
+
+                parts.value.push(sp.concat([separator.value, "\"", entry.key, "\":[", sp.concat(elements.value), "]"]))
+                separator.value = ","
+
+            parts.value.push("}")
+            document.value = sp.concat(parts.value.rev())
+
+        return document.value
+
+    # Compare-and-set check of the change_* entry points: the issuer must exist and still have the
+    # expected owner, None for any owner, so that RegistryLogic does not read it with a view first
+    def verify_expected_owner(self, issuer_did, expected_owner, message):
+        sp.verify(self.data.issuer_map.contains(issuer_did), message = "Issuer did does not exist")
+        issuer = sp.compute(self.data.issuer_map[issuer_did])
+
+        with sp.if_(expected_owner.is_some()):
+            sp.verify(issuer.issuer_owner == expected_owner.open_some(), message = message)
+
+        return issuer
+
     @sp.entry_point
     def add(self, parameters):
         # Verifying whether the caller address is our Registry contract
         sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
 
+        # Only set the issuer if the DID is not registered yet
+        sp.verify(~self.data.issuer_map.contains(parameters.issuer_did), message = "Issuer did already exists")
+
         self.data.issuer_map[parameters.issuer_did] = parameters
+        self.index_issuer(parameters.issuer_owner, parameters.issuer_did)
+
+        sp.emit(
+            sp.record(issuer_did = parameters.issuer_did, issuer_owner = parameters.issuer_owner, status = parameters.status),
+            tag = "issuer_added"
+        )
+
+    @sp.entry_point
+    def add_issuers(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.issuers, sp.TList(sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString)))
+        sp.set_type(parameters.issuer_owner, sp.TAddress)
+        sp.set_type(parameters.status, sp.TNat)
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        with sp.for_("issuer", parameters.issuers) as issuer:
+            # The same DID may not appear twice in a batch
+            sp.verify(~self.data.issuer_map.contains(issuer.issuer_did), message = "Issuer did already exists")
+
+            self.data.issuer_map[issuer.issuer_did] = sp.record(
+                issuer_did = issuer.issuer_did,
+                issuer_data = issuer.issuer_data,
+                issuer_owner = parameters.issuer_owner,
+                status = parameters.status
+            )
+            self.index_issuer(parameters.issuer_owner, issuer.issuer_did)
+
+            sp.emit(
+                sp.record(issuer_did = issuer.issuer_did, issuer_owner = parameters.issuer_owner, status = parameters.status),
+                tag = "issuer_added"
+            )
+
+    @sp.entry_point
+    def add_bytes(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.issuer_did, sp.TString)
+        sp.set_type(parameters.issuer_data_bytes, sp.TBytes)
+        sp.set_type(parameters.issuer_owner, sp.TAddress)
+        sp.set_type(parameters.status, sp.TNat)
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        # Only set the issuer if the DID is not registered yet
+        sp.verify(~self.data.issuer_map.contains(parameters.issuer_did), message = "Issuer did already exists")
+
+        # The DID document is kept encoded in issuer_data_bytes_map
+        self.data.issuer_map[parameters.issuer_did] = sp.record(
+            issuer_did = parameters.issuer_did,
+            issuer_data = "",
+            issuer_owner = parameters.issuer_owner,
+            status = parameters.status
+        )
+        self.data.issuer_data_bytes_map[parameters.issuer_did] = parameters.issuer_data_bytes
+        self.index_issuer(parameters.issuer_owner, parameters.issuer_did)
+
+        sp.emit(
+            sp.record(issuer_did = parameters.issuer_did, issuer_owner = parameters.issuer_owner, status = parameters.status),
+            tag = "issuer_added"
+        )
 
     @sp.entry_point
     def change_data(self, parameters):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
         sp.set_type(parameters.issuer_data, sp.TString)
+        sp.set_type(parameters.expected_owner, sp.TOption(sp.TAddress))
 
         # Verifying whether the caller address is our Registry contract
         sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
 
+        self.verify_expected_owner(parameters.issuer_did, parameters.expected_owner, "Cannot be called from non-certified addresses")
+
         issuer_data = self.data.issuer_map[parameters.issuer_did]
         
         with sp.modify_record(issuer_data, "data") as data:
@@ -48,15 +240,117 @@ class IssuerRegistry(sp.Contract):
 
         self.data.issuer_map[parameters.issuer_did] = issuer_data
 
+        # The string data replaces any encoded DID document, and its sections
+        del self.data.issuer_data_bytes_map[parameters.issuer_did]
+        self.clear_sections(parameters.issuer_did)
+
+        sp.emit(sp.record(issuer_did = parameters.issuer_did), tag = "issuer_data_changed")
+
+    @sp.entry_point
+    def change_data_bytes(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.issuer_did, sp.TString)
+        sp.set_type(parameters.issuer_data_bytes, sp.TBytes)
+        sp.set_type(parameters.expected_owner, sp.TOption(sp.TAddress))
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        self.verify_expected_owner(parameters.issuer_did, parameters.expected_owner, "Cannot be called from non-certified addresses")
+
+        # The encoded DID document replaces the string data and its sections
+        self.data.issuer_map[parameters.issuer_did].issuer_data = ""
+        self.data.issuer_data_bytes_map[parameters.issuer_did] = parameters.issuer_data_bytes
+        self.clear_sections(parameters.issuer_did)
+
+        sp.emit(sp.record(issuer_did = parameters.issuer_did), tag = "issuer_data_changed")
+
+    @sp.entry_point
+    def apply_data_patch(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.issuer_did, sp.TString)
+        sp.set_type(parameters.patch, sp.TList(ISSUER_DATA_PATCH_TYPE))
+        sp.set_type(parameters.expected_owner, sp.TOption(sp.TAddress))
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        issuer = self.verify_expected_owner(parameters.issuer_did, parameters.expected_owner, "Cannot be called from non-certified addresses")
+
+        # Sections complete a DID document kept as a string, a JSON object
+        issuer_data = sp.compute(issuer.issuer_data)
+        sp.verify(~self.data.issuer_data_bytes_map.contains(parameters.issuer_did), message = "Issuer data is encoded")
+        sp.verify(sp.len(issuer_data) >= 2, message = "Invalid issuer data")
+        sp.verify(sp.slice(issuer_data, sp.as_nat(sp.len(issuer_data) - 1), 1) == sp.some("}"), message = "Invalid issuer data")
+
+        # Section IDs of every property, rewritten only when sections are added or removed
+        section_ids = sp.local("section_ids", self.data.issuer_section_ids.get(
+            parameters.issuer_did,
+            default_value = sp.map(tkey = sp.TString, tvalue = sp.TList(sp.TString))
+        ))
+        section_ids_changed = sp.local("section_ids_changed", False)
+
+        with sp.for_("change", parameters.patch) as change:
+            with change.match_cases() as arg:
+                with arg.match("set_section") as section:
+                    section_key = sp.record(issuer_did = parameters.issuer_did, property = section.property, section_id = section.section_id)
+
+                    # A property of the issuer data cannot be completed by sections, get_issuer would return it twice,
+                    # it is looked up once, when the first section of the property is added
+                    with sp.if_(~section_ids.value.contains(section.property)):
+                        sp.verify(~self.contains_property(issuer_data, section.property), message = "Property is in issuer data")
+
+                    # A new section is added after the other sections of its property
+                    with sp.if_(~self.data.issuer_data_sections.contains(section_key)):
+                        section_ids.value[section.property] = sp.cons(
+                            section.section_id,
+                            section_ids.value.get(section.property, default_value = sp.list(t = sp.TString))
+                        )
+                        section_ids_changed.value = True
+
+                    self.data.issuer_data_sections[section_key] = section.section_data
+
+                with arg.match("remove_section") as section:
+                    section_key = sp.record(issuer_did = parameters.issuer_did, property = section.property, section_id = section.section_id)
+                    sp.verify(self.data.issuer_data_sections.contains(section_key), message = "Section does not exist")
+
+                    del self.data.issuer_data_sections[section_key]
+
+                    remaining_ids = sp.local("remaining_ids", sp.list(t = sp.TString))
+                    with sp.for_("section_id", section_ids.value[section.property]) as section_id:
+                        with sp.if_(section_id != section.section_id):
+                            remaining_ids.value.push(section_id)
+
+                    with sp.if_(sp.len(remaining_ids.value) == 0):
+                        del section_ids.value[section.property]
+                    with sp.else_():
+                        section_ids.value[section.property] = remaining_ids.value.rev()
+                    section_ids_changed.value = True
+
+        with sp.if_(section_ids_changed.value):
+            with sp.if_(sp.len(section_ids.value) == 0):
+                del self.data.issuer_section_ids[parameters.issuer_did]
+            with sp.else_():
+                self.data.issuer_section_ids[parameters.issuer_did] = section_ids.value
+
+        sp.emit(sp.record(issuer_did = parameters.issuer_did), tag = "issuer_data_changed")
+
     @sp.entry_point
     def change_status(self, parameters):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
         sp.set_type(parameters.status, sp.TNat)
+        sp.set_type(parameters.expected_owner, sp.TOption(sp.TAddress))
+        sp.set_type(parameters.expected_statuses, sp.TOption(sp.TSet(sp.TNat)))
 
         # Verifying whether the caller address is our Registry contract
         sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
 
+        # The issuer must also still have one of the expected statuses, None for any status
+        issuer = self.verify_expected_owner(parameters.issuer_did, parameters.expected_owner, "Status change not allowed")
+        with sp.if_(parameters.expected_statuses.is_some()):
+            sp.verify(parameters.expected_statuses.open_some().contains(issuer.status), message = "Status change not allowed")
+
         issuer_data = self.data.issuer_map[parameters.issuer_did]
         
         with sp.modify_record(issuer_data, "data") as data:
@@ -64,25 +358,153 @@ class IssuerRegistry(sp.Contract):
 
         self.data.issuer_map[parameters.issuer_did] = issuer_data
 
+        sp.emit(sp.record(issuer_did = parameters.issuer_did, status = parameters.status), tag = "issuer_status_changed")
+
+    @sp.entry_point
+    def change_statuses(self, changes):
+        # Defining the parameters' types
+        sp.set_type(changes, sp.TList(sp.TRecord(issuer_did = sp.TString, status = sp.TNat)))
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        with sp.for_("change", changes) as change:
+            self.data.issuer_map[change.issuer_did].status = change.status
+
+            sp.emit(sp.record(issuer_did = change.issuer_did, status = change.status), tag = "issuer_status_changed")
+
     @sp.entry_point
     def change_owner(self, parameters):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
         sp.set_type(parameters.new_owner_address, sp.TAddress)
+        sp.set_type(parameters.expected_owner, sp.TOption(sp.TAddress))
 
         # Verifying whether the caller address is our Registry contract
         sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
 
+        self.verify_expected_owner(parameters.issuer_did, parameters.expected_owner, "Cannot be called from non-certified addresses")
+
         issuer_data = self.data.issuer_map[parameters.issuer_did]
+
+        # Move the issuer to the index of its new owner
+        with sp.if_(issuer_data.issuer_owner != parameters.new_owner_address):
+            self.unindex_issuer(issuer_data.issuer_owner, parameters.issuer_did)
+            self.index_issuer(parameters.new_owner_address, parameters.issuer_did)
         
         with sp.modify_record(issuer_data, "data") as data:
             data.issuer_owner = parameters.new_owner_address
 
         self.data.issuer_map[parameters.issuer_did] = issuer_data
-    
+
+        sp.emit(
+            sp.record(issuer_did = parameters.issuer_did, issuer_owner = parameters.new_owner_address),
+            tag = "issuer_owner_changed"
+        )
+
+    @sp.entry_point
+    def change_owners(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.old_owner, sp.TAddress)
+        sp.set_type(parameters.new_owner, sp.TAddress)
+        sp.set_type(parameters.issuer_dids, sp.TList(sp.TString))
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        with sp.for_("issuer_did", parameters.issuer_dids) as issuer_did:
+            # Every issuer must still belong to the old owner
+            sp.verify(self.data.issuer_map[issuer_did].issuer_owner == parameters.old_owner, message = "Incorrect owner")
+
+            with sp.if_(parameters.old_owner != parameters.new_owner):
+                self.unindex_issuer(parameters.old_owner, issuer_did)
+                self.index_issuer(parameters.new_owner, issuer_did)
+
+            self.data.issuer_map[issuer_did].issuer_owner = parameters.new_owner
+
+            sp.emit(
+                sp.record(issuer_did = issuer_did, issuer_owner = parameters.new_owner),
+                tag = "issuer_owner_changed"
+            )
+
+    @sp.entry_point
+    def import_issuers(self, issuers):
+        # Defining the parameters' types
+        sp.set_type(issuers, sp.TList(sp.TRecord(
+            issuer_did = sp.TString,
+            issuer_data = sp.TString,
+            issuer_data_bytes = sp.TOption(sp.TBytes),
+            issuer_owner = sp.TAddress,
+            status = sp.TNat
+        )))
+
+        # Migration from a previous Issuer Registry contract is allowed only by certifier
+        sp.verify(self.data.certifier == sp.source, message = "Incorrect certifier")
+
+        with sp.for_("issuer", issuers) as issuer:
+            # An imported issuer replaces any issuer with the same DID, with its encoded data, sections and owner index entry
+            with sp.if_(self.data.issuer_map.contains(issuer.issuer_did)):
+                self.unindex_issuer(self.data.issuer_map[issuer.issuer_did].issuer_owner, issuer.issuer_did)
+                with sp.if_(self.data.issuer_data_bytes_map.contains(issuer.issuer_did)):
+                    del self.data.issuer_data_bytes_map[issuer.issuer_did]
+                self.clear_sections(issuer.issuer_did)
+            self.index_issuer(issuer.issuer_owner, issuer.issuer_did)
+
+            self.data.issuer_map[issuer.issuer_did] = sp.record(
+                issuer_did = issuer.issuer_did,
+                issuer_data = issuer.issuer_data,
+                issuer_owner = issuer.issuer_owner,
+                status = issuer.status
+            )
+            with sp.if_(issuer.issuer_data_bytes.is_some()):
+                self.data.issuer_data_bytes_map[issuer.issuer_did] = issuer.issuer_data_bytes.open_some()
+
+            sp.emit(
+                sp.record(issuer_did = issuer.issuer_did, issuer_owner = issuer.issuer_owner, status = issuer.status),
+                tag = "issuer_added"
+            )
+
     @sp.onchain_view()
     def get(self, issuer_did):
-        sp.result(self.data.issuer_map[issuer_did])
+        # The DID document is reassembled from its sections, if any
+        issuer = sp.compute(self.data.issuer_map[issuer_did])
+        issuer_data = sp.compute(self.issuer_document(issuer_did, issuer.issuer_data))
+
+        sp.result(sp.record(
+            issuer_did = issuer.issuer_did,
+            issuer_data = issuer_data,
+            issuer_owner = issuer.issuer_owner,
+            status = issuer.status
+        ))
+
+    @sp.onchain_view()
+    def get_data_bytes(self, issuer_did):
+        sp.result(self.data.issuer_data_bytes_map[issuer_did])
+
+    @sp.onchain_view()
+    def list_owner_issuers(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.owner, sp.TAddress)
+        sp.set_type(parameters.from_position, sp.TNat)
+        sp.set_type(parameters.limit, sp.TNat)
+
+        issuer_count = sp.compute(self.data.owner_issuer_count.get(parameters.owner, default_value = 0))
+
+        end_position = sp.local("end_position", parameters.from_position + parameters.limit)
+        with sp.if_(end_position.value > issuer_count):
+            end_position.value = issuer_count
+
+        issuer_dids = sp.local("issuer_dids", sp.list(t = sp.TString))
+
+        with sp.for_("position", sp.range(parameters.from_position, end_position.value)) as position:
+            issuer_dids.value.push(self.data.owner_issuers[sp.record(owner = parameters.owner, position = position)])
+
+        # The next page starts at next_position, None after the last issuer of the owner
+        next_position = sp.local("next_position", sp.none)
+        with sp.if_(end_position.value < issuer_count):
+            next_position.value = sp.some(end_position.value)
+
+        sp.result(sp.record(issuer_dids = issuer_dids.value.rev(), next_position = next_position.value))
 
     @sp.onchain_view()
     def get_issuer_owner_address(self, issuer_did):
@@ -96,6 +518,15 @@ class IssuerRegistry(sp.Contract):
     def issuer_exists(self, issuer_did):
         sp.result(self.data.issuer_map.contains(issuer_did))
 
+    @sp.onchain_view()
+    def get_issuer_context(self, issuer_did):
+        # Owner and status of the issuer, None if the issuer does not exist
+        with sp.if_(self.data.issuer_map.contains(issuer_did)):
+            issuer = sp.compute(self.data.issuer_map[issuer_did])
+            sp.result(sp.some(sp.record(issuer_owner = issuer.issuer_owner, status = issuer.status)))
+        with sp.else_():
+            sp.result(sp.none)
+
     @sp.entry_point
     def change_logic_contract_address(self, new_logic_contract_address):
         with sp.if_(self.data.certifier != sp.source):
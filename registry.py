@@ -2,8 +2,68 @@
 
 import smartpy as sp
 
+# Status changes accepted by apply_status_changes
+STATUS_CHANGE_TYPE = sp.TVariant(
+    issuer = sp.TRecord(issuer_did = sp.TString, status = sp.TNat),
+    schema = sp.TRecord(schema_id = sp.TNat, status = sp.TNat),
+    binding = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat, status = sp.TNat)
+)
+
+# Change to a section of an issuer DID document, as applied by apply_issuer_data_patch
+ISSUER_DATA_PATCH_TYPE = sp.TVariant(
+    set_section = sp.TRecord(property = sp.TString, section_id = sp.TString, section_data = sp.TString),
+    remove_section = sp.TRecord(property = sp.TString, section_id = sp.TString)
+)
+
+# Every Registry action, forwarded unchanged to the dispatch entry point of the Logic contract
+# Each case keeps the name and parameters of the former Registry entry point, so clients can
+# still call %add_schema, %set_issuer_active, ... directly
+DISPATCH_TYPE = sp.TVariant(
+    add_schema = sp.TString,
+    add_schemas = sp.TList(sp.TString),
+    set_schema_active = sp.TNat,
+    set_schema_deprecated = sp.TNat,
+    set_schema_status = sp.TRecord(schema_id = sp.TNat, status = sp.TNat),
+    add_schema_reference = sp.TRecord(schema_hash = sp.TBytes, schema_uri = sp.TString),
+    begin_schema = sp.TUnit,
+    append_schema_chunk = sp.TRecord(schema_id = sp.TNat, chunk = sp.TString),
+    finalize_schema = sp.TRecord(schema_id = sp.TNat, content_hash = sp.TBytes),
+    cancel_schema = sp.TNat,
+    add_issuer = sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString),
+    add_issuers = sp.TList(sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString)),
+    set_issuer_data = sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString),
+    add_issuer_bytes = sp.TRecord(issuer_did = sp.TString, issuer_data_bytes = sp.TBytes),
+    set_issuer_data_bytes = sp.TRecord(issuer_did = sp.TString, issuer_data_bytes = sp.TBytes),
+    apply_issuer_data_patch = sp.TRecord(issuer_did = sp.TString, patch = sp.TList(ISSUER_DATA_PATCH_TYPE)),
+    set_issuer_active = sp.TString,
+    set_issuer_deprecated = sp.TString,
+    set_issuer_status = sp.TRecord(issuer_did = sp.TString, status = sp.TNat),
+    set_issuer_owner = sp.TRecord(issuer_did = sp.TString, owner_address = sp.TAddress),
+    transfer_ownership = sp.TRecord(old_owner = sp.TAddress, new_owner = sp.TAddress, issuer_dids = sp.TList(sp.TString), schema_ids = sp.TList(sp.TNat)),
+    bind_issuer_schema = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat),
+    set_binding_active = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat),
+    set_binding_deprecated = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat),
+    set_binding_status = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat, status = sp.TNat),
+    apply_status_changes = sp.TList(STATUS_CHANGE_TYPE)
+)
+
+# Page of the issuers bound to a schema, as returned by the list_schema_issuers view of the Logic contract
+SCHEMA_ISSUERS_TYPE = sp.TRecord(
+    issuers = sp.TList(sp.TRecord(issuer_did = sp.TString, status = sp.TNat)),
+    next_cursor = sp.TOption(sp.TNat)
+)
+
+# Names of the status IDs, as returned by the get_status_tables view of the Logic contract
+STATUS_TABLES_TYPE = sp.TRecord(
+    issuer_statuses = sp.TMap(sp.TNat, sp.TString),
+    schema_statuses = sp.TMap(sp.TNat, sp.TString)
+)
+
 class Registry(sp.Contract):
-    def __init__(self, logic_contract, certifier):
+    def __init__(self, logic_contract, certifier, numeric_statuses = False):
+        # Must match the numeric_statuses of the Logic contract
+        self.status_type = sp.TNat if numeric_statuses else sp.TString
+
         self.init_type(
             sp.TRecord(
                 logic_contract = sp.TAddress,
@@ -24,82 +84,16 @@ class Registry(sp.Contract):
         self.data.logic_contract = address
 
     @sp.entry_point
-    def add_schema(self, schema_data):
-        # Defining the parameters' types
-        sp.set_type(schema_data, sp.TString)
-
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(schema_data = sp.TString)
-
-        # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "add_schema").open_some()
-        
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
-            schema_data = schema_data
-        )
-
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
-
-    @sp.entry_point
-    def set_schema_active(self, schema_id):
-        # Defining the parameters' types
-        sp.set_type(schema_id, sp.TNat)
-
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(schema_id = sp.TNat)
-
-        # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "set_schema_active").open_some()
-
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
-            schema_id = schema_id,
-        )
-
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
-
-    @sp.entry_point
-    def set_schema_deprecated(self, schema_id):
-        # Defining the parameters' types
-        sp.set_type(schema_id, sp.TNat)
-
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(schema_id = sp.TNat)
-        
-        # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "set_schema_deprecated").open_some()
-
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
-            schema_id = schema_id,
-        )
-
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
-
-    @sp.entry_point
-    def set_schema_status(self, schema_id, status):
+    def dispatch(self, action):
         # Defining the parameters' types
-        sp.set_type(schema_id, sp.TNat)
-        sp.set_type(status, sp.TNat)
-
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(schema_id = sp.TNat, status = sp.TNat)
+        sp.set_type(action, DISPATCH_TYPE)
 
         # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "set_schema_status").open_some()
+        # The action is passed packed, as the Logic contract keeps entry points with the same names
+        logic_contract = sp.contract(sp.TBytes, self.data.logic_contract, "dispatch").open_some()
 
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
-            schema_id = schema_id,
-            status = status
-        )
-
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
+        # Calling the Logic contract with the action unchanged
+        sp.transfer(sp.pack(action), sp.mutez(0), logic_contract)
 
     @sp.onchain_view()
     def get_schema(self, schema_id):
@@ -113,133 +107,83 @@ class Registry(sp.Contract):
             schema_id,
             t = sp.TRecord(
                 schema_data = sp.TString,
-                status = sp.TString
+                status = self.status_type
             )
         ).open_some("Invalid view");
         
         sp.result(schema)
-    
-    @sp.entry_point
-    def add_issuer(self, issuer_did, issuer_data):
-        # Defining the parameters' types
-        sp.set_type(issuer_did, sp.TString)
-        sp.set_type(issuer_data, sp.TString)
-
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString)
-
-        # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "add_issuer").open_some()
-        
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
-            issuer_did = issuer_did,
-            issuer_data = issuer_data
-        )
-
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
 
-    @sp.entry_point
-    def set_issuer_data(self, issuer_did, issuer_data):
+    @sp.onchain_view()
+    def get_schema_chunk(self, parameters):
         # Defining the parameters' types
-        sp.set_type(issuer_did, sp.TString)
-        sp.set_type(issuer_data, sp.TString)
-
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString)
-
-        # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "set_issuer_data").open_some()
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.index, sp.TNat)
 
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
-            issuer_did = issuer_did,
-            issuer_data = issuer_data
-        )
+        schema_chunk = sp.view(
+            "get_schema_chunk",
+            self.data.logic_contract,
+            sp.record(
+                schema_id = parameters.schema_id,
+                index = parameters.index
+            ),
+            t = sp.TRecord(
+                chunk = sp.TString,
+                chunk_count = sp.TNat
+            )
+        ).open_some("Invalid view");
 
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
+        sp.result(schema_chunk)
 
-    @sp.entry_point
-    def set_issuer_active(self, issuer_did):
+    @sp.onchain_view()
+    def find_schema_by_hash(self, schema_hash):
         # Defining the parameters' types
-        sp.set_type(issuer_did, sp.TString)
-
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(issuer_did = sp.TString)
-
-        # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "set_issuer_active").open_some()
+        sp.set_type(schema_hash, sp.TBytes)
 
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
-            issuer_did = issuer_did,
-        )
+        # ID of the schema stored on-chain with this SHA-256 content hash, if any
+        schema_id = sp.view(
+            "find_schema_by_hash",
+            self.data.logic_contract,
+            schema_hash,
+            t = sp.TOption(sp.TNat)
+        ).open_some("Invalid view");
 
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
+        sp.result(schema_id)
 
-    @sp.entry_point
-    def set_issuer_deprecated(self, issuer_did):
+    @sp.onchain_view()
+    def get_schema_reference(self, schema_id):
         # Defining the parameters' types
-        sp.set_type(issuer_did, sp.TString)
-
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(issuer_did = sp.TString)
-
-        # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "set_issuer_deprecated").open_some()
-
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
-            issuer_did = issuer_did,
-        )
-
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
+        sp.set_type(schema_id, sp.TNat)
 
-    @sp.entry_point
-    def set_issuer_status(self, issuer_did, status):
         # Defining the parameters' types
-        sp.set_type(issuer_did, sp.TString)
-        sp.set_type(status, sp.TNat)
-
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(issuer_did = sp.TString, status = sp.TNat)
-
-        # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "set_issuer_status").open_some()
-
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
-            issuer_did = issuer_did,
-            status = status
-        )
+        schema_reference = sp.view(
+            "get_schema_reference",
+            self.data.logic_contract,
+            schema_id,
+            t = sp.TRecord(
+                schema_hash = sp.TBytes,
+                schema_uri = sp.TString
+            )
+        ).open_some("Invalid view");
 
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
+        sp.result(schema_reference)
 
-    @sp.entry_point
-    def set_issuer_owner(self, issuer_did, owner_address):
+    @sp.onchain_view()
+    def verify_schema_content(self, parameters):
         # Defining the parameters' types
-        sp.set_type(issuer_did, sp.TString)
-        sp.set_type(owner_address, sp.TAddress)
-
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(issuer_did = sp.TString, owner_address = sp.TAddress)
-
-        # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "set_issuer_owner").open_some()
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.schema_hash, sp.TBytes)
 
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
-            issuer_did = issuer_did,
-            owner_address = owner_address
-        )
+        content_verified = sp.view(
+            "verify_schema_content",
+            self.data.logic_contract,
+            sp.record(
+                schema_id = parameters.schema_id,
+                schema_hash = parameters.schema_hash
+            ),
+            t = sp.TBool
+        ).open_some("Invalid view");
 
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
+        sp.result(content_verified)
 
     @sp.onchain_view()
     def get_issuer(self, issuer_did):
@@ -254,123 +198,125 @@ class Registry(sp.Contract):
             t = sp.TRecord(
                 issuer_data = sp.TString,
                 issuer_owner = sp.TAddress,
-                status = sp.TString
+                status = self.status_type
             )
         ).open_some("Invalid view");
         
         sp.result(issuer)
 
-    @sp.entry_point
-    def bind_issuer_schema(self, issuer_did, schema_id):
+    @sp.onchain_view()
+    def get_issuer_data_bytes(self, issuer_did):
         # Defining the parameters' types
         sp.set_type(issuer_did, sp.TString)
-        sp.set_type(schema_id, sp.TNat)
-
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat)
 
-        # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "bind_issuer_schema").open_some()
-
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
-            issuer_did = issuer_did,
-            schema_id = schema_id
-        )
-
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
-
-    @sp.entry_point
-    def set_binding_active(self, issuer_did, schema_id):
         # Defining the parameters' types
-        sp.set_type(issuer_did, sp.TString)
-        sp.set_type(schema_id, sp.TNat)
+        issuer_data_bytes = sp.view(
+            "get_issuer_data_bytes",
+            self.data.logic_contract,
+            issuer_did,
+            t = sp.TBytes
+        ).open_some("Invalid view");
 
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat)
+        sp.result(issuer_data_bytes)
 
-        # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "set_binding_active").open_some()
+    @sp.onchain_view()
+    def verify_binding(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.issuer_did, sp.TString)
+        sp.set_type(parameters.schema_id, sp.TNat)
 
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
+        issuer_did = parameters.issuer_did
+        schema_id = parameters.schema_id
+        binding_record = sp.record(
             issuer_did = issuer_did,
             schema_id = schema_id
         )
 
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
-
-    @sp.entry_point
-    def set_binding_deprecated(self, issuer_did, schema_id):
         # Defining the parameters' types
-        sp.set_type(issuer_did, sp.TString)
-        sp.set_type(schema_id, sp.TNat)
-
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat)
+        binding_result = sp.view(
+            "verify_binding",
+            self.data.logic_contract,
+            binding_record,
+            t = sp.TRecord(
+                binding_exists = sp.TBool,
+                status = sp.TNat
+            )
+        ).open_some("Invalid view");
+        
+        sp.result(binding_result)
 
-        # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "set_binding_deprecated").open_some()
+    @sp.onchain_view()
+    def verify_bindings(self, bindings):
+        # Defining the parameters' types
+        sp.set_type(bindings, sp.TList(sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat)))
 
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
-            issuer_did = issuer_did,
-            schema_id = schema_id
-        )
+        # Defining the parameters' types
+        binding_results = sp.view(
+            "verify_bindings",
+            self.data.logic_contract,
+            bindings,
+            t = sp.TList(sp.TRecord(
+                binding_exists = sp.TBool,
+                status = sp.TNat
+            ))
+        ).open_some("Invalid view");
 
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
+        sp.result(binding_results)
 
-    @sp.entry_point
-    def set_binding_status(self, issuer_did, schema_id, status):
+    @sp.onchain_view()
+    def list_schema_issuers(self, parameters):
         # Defining the parameters' types
-        sp.set_type(issuer_did, sp.TString)
-        sp.set_type(schema_id, sp.TNat)
-        sp.set_type(status, sp.TNat)
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.cursor, sp.TNat)
+        sp.set_type(parameters.limit, sp.TNat)
 
-        # Defining the data expected by the Logic contract
-        contract_data = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat, status = sp.TNat)
+        schema_issuers = sp.view(
+            "list_schema_issuers",
+            self.data.logic_contract,
+            sp.record(
+                schema_id = parameters.schema_id,
+                cursor = parameters.cursor,
+                limit = parameters.limit
+            ),
+            t = SCHEMA_ISSUERS_TYPE
+        ).open_some("Invalid view");
 
-        # Defining the Logic contract itself and its entry point for the call
-        logic_contract = sp.contract(contract_data, self.data.logic_contract, "set_binding_status").open_some()
+        sp.result(schema_issuers)
 
-        # Defining the parameters that will be passed to the Logic contract
-        params = sp.record(
-            issuer_did = issuer_did,
-            schema_id = schema_id,
-            status = status
-        )
+    @sp.onchain_view()
+    def get_status_tables(self):
+        status_tables = sp.view(
+            "get_status_tables",
+            self.data.logic_contract,
+            sp.unit,
+            t = STATUS_TABLES_TYPE
+        ).open_some("Invalid view");
 
-        # Calling the Logic contract with the parameters we defined
-        sp.transfer(params, sp.mutez(0), logic_contract)
+        sp.result(status_tables)
 
     @sp.onchain_view()
-    def verify_binding(self, parameters):
+    def get_credential_context(self, parameters):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
         sp.set_type(parameters.schema_id, sp.TNat)
 
-        issuer_did = parameters.issuer_did
-        schema_id = parameters.schema_id
-        binding_record = sp.record(
-            issuer_did = issuer_did,
-            schema_id = schema_id
-        )
-
         # Defining the parameters' types
-        binding_result = sp.view(
-            "verify_binding",
+        credential_context = sp.view(
+            "get_credential_context",
             self.data.logic_contract,
-            binding_record,
+            sp.record(
+                issuer_did = parameters.issuer_did,
+                schema_id = parameters.schema_id
+            ),
             t = sp.TRecord(
-                binding_exists = sp.TBool,
-                status = sp.TNat
+                issuer_status = sp.TNat,
+                schema_status = sp.TNat,
+                binding_status = sp.TNat,
+                valid = sp.TBool
             )
         ).open_some("Invalid view");
-        
-        sp.result(binding_result)
+
+        sp.result(credential_context)
 
 @sp.add_test(name = "Registry")
 def test():
@@ -380,4 +326,13 @@ def test():
             sp.address('KT1_contract_address'),
             sp.address('tz1_certifier_address')
         )
+    )
+
+    # To deploy with registryLogicNumericStatuses
+    sp.add_compilation_target("registryNumericStatuses",
+        Registry(
+            sp.address('KT1_contract_address'),
+            sp.address('tz1_certifier_address'),
+            numeric_statuses = True
+        )
     )
\ No newline at end of file
@@ -0,0 +1,435 @@
+# Registry Fast Contract
+#
+# Single contract deployment of the registry. The issuer and schema records
+# live in this contract, and the logic of every write is stored as a lambda
+# that the certifier can replace with update_logic. Writes run in a single
+# contract execution instead of Registry -> RegistryLogic -> storage contract.
+
+import smartpy as sp
+
+# Records of the registry, as in the IssuerRegistry and SchemaRegistry contracts
+REGISTRY_TYPE = sp.TRecord(
+    issuer_map = sp.TBigMap(
+        sp.TString,
+        sp.TRecord(
+            issuer_did = sp.TString,
+            issuer_data = sp.TString,
+            issuer_owner = sp.TAddress,
+            status = sp.TNat
+        )
+    ),
+    schema_map = sp.TBigMap(
+        sp.TNat,
+        sp.TRecord(
+            schema_data = sp.TString,
+            schema_owner = sp.TAddress,
+            status = sp.TNat
+        )
+    ),
+    issuer_schema_map = sp.TBigMap(
+        sp.TRecord(
+            issuer_did = sp.TString,
+            schema_id = sp.TNat
+        ),
+        sp.TNat
+    ),
+    schema_last_id = sp.TNat,
+    issuer_statuses = sp.TMap(sp.TNat, sp.TString),
+    schema_statuses = sp.TMap(sp.TNat, sp.TString),
+    certifier = sp.TAddress
+)
+
+# A logic lambda gets the packed entry point parameters and returns the updated registry
+LOGIC_TYPE = sp.TLambda(
+    sp.TRecord(
+        parameters = sp.TBytes,
+        registry = REGISTRY_TYPE
+    ),
+    REGISTRY_TYPE
+)
+
+###########
+# Helpers #
+###########
+
+# Unpack the parameters of a logic lambda
+def unpack_parameters(logic_input, t):
+    sp.set_type(logic_input.registry, REGISTRY_TYPE)
+    return sp.compute(sp.unpack(logic_input.parameters, t = t).open_some("Invalid parameters"))
+
+# Source of transaction is owner or certifier
+def is_owner_or_certifier(registry, owner_address):
+    return (sp.source == registry.certifier) | (sp.source == owner_address)
+
+# Source of transaction is certifier, or owner and neither status is "In conflict"
+def is_status_change_allowed(registry, owner_address, current_status, new_status):
+    return (sp.source == registry.certifier) | (
+        (sp.source == owner_address) & (current_status != 3) & (new_status != 3)
+    )
+
+# Get an Issuer, fails if the issuer does not exist
+def get_issuer_record(registry, issuer_did):
+    sp.verify(registry.issuer_map.contains(issuer_did), message = "Issuer did does not exist")
+    return sp.compute(registry.issuer_map[issuer_did])
+
+##################
+# Logic lambdas #
+##################
+
+def add_schema_logic(logic_input):
+    parameters = unpack_parameters(logic_input, sp.TRecord(schema_data = sp.TString))
+    registry = sp.local("registry", logic_input.registry)
+
+    registry.value.schema_map[registry.value.schema_last_id] = sp.record(
+        schema_data = parameters.schema_data,
+        schema_owner = sp.source,
+        status = 1
+    )
+    registry.value.schema_last_id += 1
+
+    sp.result(registry.value)
+
+def set_schema_status_logic(logic_input):
+    parameters = unpack_parameters(logic_input, sp.TRecord(schema_id = sp.TNat, status = sp.TNat))
+    registry = sp.local("registry", logic_input.registry)
+
+    sp.verify(registry.value.schema_map.contains(parameters.schema_id), message = "Schema id does not exist")
+
+    # Update is allowed only from owner
+    sp.verify(is_owner_or_certifier(
+        registry.value,
+        registry.value.schema_map[parameters.schema_id].schema_owner
+    ), message = "Incorrect owner")
+
+    # Verify status ID exists
+    sp.verify(registry.value.schema_statuses.contains(parameters.status), message = "Incorrect status")
+
+    registry.value.schema_map[parameters.schema_id].status = parameters.status
+
+    sp.result(registry.value)
+
+def add_issuer_logic(logic_input):
+    parameters = unpack_parameters(logic_input, sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString))
+    registry = sp.local("registry", logic_input.registry)
+
+    sp.verify(~registry.value.issuer_map.contains(parameters.issuer_did), message = "Issuer did already exists")
+
+    registry.value.issuer_map[parameters.issuer_did] = sp.record(
+        issuer_did = parameters.issuer_did,
+        issuer_data = parameters.issuer_data,
+        issuer_owner = sp.source,
+        status = 1
+    )
+
+    sp.result(registry.value)
+
+def set_issuer_data_logic(logic_input):
+    parameters = unpack_parameters(logic_input, sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString))
+    registry = sp.local("registry", logic_input.registry)
+
+    # Update is allowed only from owner
+    issuer = get_issuer_record(registry.value, parameters.issuer_did)
+    sp.verify(is_owner_or_certifier(registry.value, issuer.issuer_owner), message = "Cannot be called from non-certified addresses")
+
+    registry.value.issuer_map[parameters.issuer_did].issuer_data = parameters.issuer_data
+
+    sp.result(registry.value)
+
+def set_issuer_status_logic(logic_input):
+    parameters = unpack_parameters(logic_input, sp.TRecord(issuer_did = sp.TString, status = sp.TNat))
+    registry = sp.local("registry", logic_input.registry)
+
+    # Update is allowed only from owner, and only by certifier for issuers "In conflict"
+    issuer = get_issuer_record(registry.value, parameters.issuer_did)
+    sp.verify(is_status_change_allowed(
+        registry.value,
+        issuer.issuer_owner,
+        issuer.status,
+        parameters.status
+    ), message = "Status change not allowed")
+
+    # Verify status ID exists
+    sp.verify(registry.value.issuer_statuses.contains(parameters.status), message = "Incorrect status")
+
+    registry.value.issuer_map[parameters.issuer_did].status = parameters.status
+
+    sp.result(registry.value)
+
+def set_issuer_owner_logic(logic_input):
+    parameters = unpack_parameters(logic_input, sp.TRecord(issuer_did = sp.TString, new_owner_address = sp.TAddress))
+    registry = sp.local("registry", logic_input.registry)
+
+    # Update is allowed only from owner
+    issuer = get_issuer_record(registry.value, parameters.issuer_did)
+    sp.verify(is_owner_or_certifier(registry.value, issuer.issuer_owner), message = "Cannot be called from non-certified addresses")
+
+    registry.value.issuer_map[parameters.issuer_did].issuer_owner = parameters.new_owner_address
+
+    sp.result(registry.value)
+
+def bind_issuer_schema_logic(logic_input):
+    parameters = unpack_parameters(logic_input, sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat))
+    registry = sp.local("registry", logic_input.registry)
+
+    # Update is allowed only from owner
+    issuer = get_issuer_record(registry.value, parameters.issuer_did)
+    sp.verify(is_owner_or_certifier(registry.value, issuer.issuer_owner), message = "Binding not allowed")
+
+    registry.value.issuer_schema_map[sp.record(issuer_did = parameters.issuer_did, schema_id = parameters.schema_id)] = 1
+
+    sp.result(registry.value)
+
+def set_binding_status_logic(logic_input):
+    parameters = unpack_parameters(logic_input, sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat, status = sp.TNat))
+    registry = sp.local("registry", logic_input.registry)
+
+    # Update is allowed only from owner, and only by certifier for issuers "In conflict"
+    issuer = get_issuer_record(registry.value, parameters.issuer_did)
+    sp.verify(is_status_change_allowed(
+        registry.value,
+        issuer.issuer_owner,
+        issuer.status,
+        parameters.status
+    ), message = "Status change not allowed")
+
+    # Verify status ID exists
+    sp.verify(registry.value.issuer_statuses.contains(parameters.status), message = "Incorrect status")
+
+    binding_key = sp.compute(sp.record(issuer_did = parameters.issuer_did, schema_id = parameters.schema_id))
+    sp.verify(registry.value.issuer_schema_map.contains(binding_key), message = "Binding does not exist")
+
+    registry.value.issuer_schema_map[binding_key] = parameters.status
+
+    sp.result(registry.value)
+
+class RegistryFast(sp.Contract):
+    def __init__(self, certifier):
+        self.init_type(
+            sp.TRecord(
+                registry = REGISTRY_TYPE,
+                logic = sp.TBigMap(
+                    sp.TString,
+                    LOGIC_TYPE
+                )
+            )
+        )
+        self.init(
+            registry = sp.record(
+                issuer_map = sp.big_map(),
+                schema_map = sp.big_map(),
+                issuer_schema_map = sp.big_map(),
+                schema_last_id = 0,
+                issuer_statuses = sp.map({
+                    1: "active",
+                    2: "deprecated",
+                    3: "in_conflict"
+                }),
+                schema_statuses = sp.map({
+                    1: "active",
+                    2: "deprecated"
+                }),
+                certifier = certifier
+            ),
+            logic = sp.big_map({
+                "add_schema": sp.build_lambda(add_schema_logic),
+                "set_schema_status": sp.build_lambda(set_schema_status_logic),
+                "add_issuer": sp.build_lambda(add_issuer_logic),
+                "set_issuer_data": sp.build_lambda(set_issuer_data_logic),
+                "set_issuer_status": sp.build_lambda(set_issuer_status_logic),
+                "set_issuer_owner": sp.build_lambda(set_issuer_owner_logic),
+                "bind_issuer_schema": sp.build_lambda(bind_issuer_schema_logic),
+                "set_binding_status": sp.build_lambda(set_binding_status_logic)
+            })
+        )
+
+    ###########
+    # Helpers #
+    ###########
+
+    # Run the logic lambda stored under name on the registry
+    def run_logic(self, logic_name, parameters):
+        logic = self.data.logic.get_opt(logic_name).open_some("Unknown logic")
+        self.data.registry = logic(sp.record(parameters = sp.pack(parameters), registry = self.data.registry))
+
+    ################
+    # Entry points #
+    ################
+
+    @sp.entry_point
+    def update_logic(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.logic_name, sp.TString)
+        sp.set_type(parameters.logic, LOGIC_TYPE)
+
+        # Update is allowed only by certifier
+        sp.verify(self.data.registry.certifier == sp.source, message = "Incorrect certifier")
+        self.data.logic[parameters.logic_name] = parameters.logic
+
+    @sp.entry_point
+    def add_schema(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters, sp.TRecord(schema_data = sp.TString))
+
+        self.run_logic("add_schema", parameters)
+
+    @sp.entry_point
+    def set_schema_active(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+
+        self.run_logic("set_schema_status", sp.record(schema_id = parameters.schema_id, status = 1))
+
+    @sp.entry_point
+    def set_schema_deprecated(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+
+        self.run_logic("set_schema_status", sp.record(schema_id = parameters.schema_id, status = 2))
+
+    @sp.entry_point
+    def set_schema_status(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters, sp.TRecord(schema_id = sp.TNat, status = sp.TNat))
+
+        self.run_logic("set_schema_status", parameters)
+
+    @sp.onchain_view()
+    def get_schema(self, schema_id):
+        # Defining the parameters' types
+        sp.set_type(schema_id, sp.TNat)
+
+        schema = sp.compute(self.data.registry.schema_map[schema_id])
+
+        sp.result(sp.record(
+            schema_data = schema.schema_data,
+            status = self.data.registry.schema_statuses[schema.status]
+        ))
+
+    @sp.entry_point
+    def add_issuer(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters, sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString))
+
+        self.run_logic("add_issuer", parameters)
+
+    @sp.entry_point
+    def set_issuer_data(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters, sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString))
+
+        self.run_logic("set_issuer_data", parameters)
+
+    @sp.entry_point
+    def set_issuer_active(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.issuer_did, sp.TString)
+
+        self.run_logic("set_issuer_status", sp.record(issuer_did = parameters.issuer_did, status = 1))
+
+    @sp.entry_point
+    def set_issuer_deprecated(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.issuer_did, sp.TString)
+
+        self.run_logic("set_issuer_status", sp.record(issuer_did = parameters.issuer_did, status = 2))
+
+    @sp.entry_point
+    def set_issuer_status(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters, sp.TRecord(issuer_did = sp.TString, status = sp.TNat))
+
+        self.run_logic("set_issuer_status", parameters)
+
+    @sp.entry_point
+    def set_issuer_owner(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters, sp.TRecord(issuer_did = sp.TString, new_owner_address = sp.TAddress))
+
+        self.run_logic("set_issuer_owner", parameters)
+
+    @sp.onchain_view()
+    def get_issuer(self, issuer_did):
+        # Defining the parameters' types
+        sp.set_type(issuer_did, sp.TString)
+
+        issuer = sp.compute(self.data.registry.issuer_map[issuer_did])
+
+        sp.result(sp.record(
+            issuer_data = issuer.issuer_data,
+            issuer_owner = issuer.issuer_owner,
+            status = self.data.registry.issuer_statuses[issuer.status]
+        ))
+
+    @sp.entry_point
+    def bind_issuer_schema(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters, sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat))
+
+        self.run_logic("bind_issuer_schema", parameters)
+
+    @sp.entry_point
+    def set_binding_active(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters, sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat))
+
+        self.run_logic("set_binding_status", sp.record(issuer_did = parameters.issuer_did, schema_id = parameters.schema_id, status = 1))
+
+    @sp.entry_point
+    def set_binding_deprecated(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters, sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat))
+
+        self.run_logic("set_binding_status", sp.record(issuer_did = parameters.issuer_did, schema_id = parameters.schema_id, status = 2))
+
+    @sp.entry_point
+    def set_binding_status(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters, sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat, status = sp.TNat))
+
+        self.run_logic("set_binding_status", parameters)
+
+    @sp.onchain_view()
+    def verify_binding(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters, sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat))
+
+        with sp.if_(self.data.registry.issuer_schema_map.contains(parameters)):
+            sp.result(sp.record(
+                binding_exists = True,
+                status = self.data.registry.issuer_schema_map[parameters]
+            ))
+        with sp.else_():
+            sp.result(sp.record(
+                binding_exists = False,
+                status = 0
+            ))
+
+    @sp.onchain_view()
+    def verify_bindings(self, bindings):
+        # Defining the parameters' types
+        sp.set_type(bindings, sp.TList(sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat)))
+
+        results = sp.local("results", sp.list(t = sp.TRecord(binding_exists = sp.TBool, status = sp.TNat)))
+
+        with sp.for_("binding_key", bindings) as binding_key:
+            with sp.if_(self.data.registry.issuer_schema_map.contains(binding_key)):
+                results.value.push(sp.record(
+                    binding_exists = True,
+                    status = self.data.registry.issuer_schema_map[binding_key]
+                ))
+            with sp.else_():
+                results.value.push(sp.record(
+                    binding_exists = False,
+                    status = 0
+                ))
+
+        # Results are pushed in front of the list, reversing it gives them in the order of the bindings
+        sp.result(results.value.rev())
+
+@sp.add_test(name = "RegistryFast")
+def test():
+    sp.add_compilation_target("registryFast",
+        RegistryFast(
+            sp.address('tz1_certifier_address')
+        )
+    )
@@ -2,36 +2,115 @@
 
 import smartpy as sp
 
+# Status changes accepted by apply_status_changes
+STATUS_CHANGE_TYPE = sp.TVariant(
+    issuer = sp.TRecord(issuer_did = sp.TString, status = sp.TNat),
+    schema = sp.TRecord(schema_id = sp.TNat, status = sp.TNat),
+    binding = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat, status = sp.TNat)
+)
+
+# Change to a section of an issuer DID document, as applied by apply_issuer_data_patch
+ISSUER_DATA_PATCH_TYPE = sp.TVariant(
+    set_section = sp.TRecord(property = sp.TString, section_id = sp.TString, section_data = sp.TString),
+    remove_section = sp.TRecord(property = sp.TString, section_id = sp.TString)
+)
+
+# Every Registry action, as packed by the dispatch entry point of the Registry contract
+DISPATCH_TYPE = sp.TVariant(
+    add_schema = sp.TString,
+    add_schemas = sp.TList(sp.TString),
+    set_schema_active = sp.TNat,
+    set_schema_deprecated = sp.TNat,
+    set_schema_status = sp.TRecord(schema_id = sp.TNat, status = sp.TNat),
+    add_schema_reference = sp.TRecord(schema_hash = sp.TBytes, schema_uri = sp.TString),
+    begin_schema = sp.TUnit,
+    append_schema_chunk = sp.TRecord(schema_id = sp.TNat, chunk = sp.TString),
+    finalize_schema = sp.TRecord(schema_id = sp.TNat, content_hash = sp.TBytes),
+    cancel_schema = sp.TNat,
+    add_issuer = sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString),
+    add_issuers = sp.TList(sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString)),
+    set_issuer_data = sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString),
+    add_issuer_bytes = sp.TRecord(issuer_did = sp.TString, issuer_data_bytes = sp.TBytes),
+    set_issuer_data_bytes = sp.TRecord(issuer_did = sp.TString, issuer_data_bytes = sp.TBytes),
+    apply_issuer_data_patch = sp.TRecord(issuer_did = sp.TString, patch = sp.TList(ISSUER_DATA_PATCH_TYPE)),
+    set_issuer_active = sp.TString,
+    set_issuer_deprecated = sp.TString,
+    set_issuer_status = sp.TRecord(issuer_did = sp.TString, status = sp.TNat),
+    set_issuer_owner = sp.TRecord(issuer_did = sp.TString, owner_address = sp.TAddress),
+    transfer_ownership = sp.TRecord(old_owner = sp.TAddress, new_owner = sp.TAddress, issuer_dids = sp.TList(sp.TString), schema_ids = sp.TList(sp.TNat)),
+    bind_issuer_schema = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat),
+    set_binding_active = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat),
+    set_binding_deprecated = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat),
+    set_binding_status = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat, status = sp.TNat),
+    apply_status_changes = sp.TList(STATUS_CHANGE_TYPE)
+)
+
+# Registry action signed off-chain by an issuer or schema owner, relayed with apply_permits.
+# The signature covers sp.pack(sp.record(action, chain_id, contract, nonce)), where action
+# is a packed DISPATCH_TYPE value and contract is the address of the Logic contract
+PERMIT_TYPE = sp.TRecord(
+    public_key = sp.TKey,
+    signature = sp.TSignature,
+    nonce = sp.TNat,
+    action = sp.TBytes
+)
+
+# Status names, compiled into the contract rather than read from storage
+ISSUER_STATUSES = {
+    1: "active",
+    2: "deprecated",
+    3: "in_conflict"
+}
+
+SCHEMA_STATUSES = {
+    1: "active",
+    2: "deprecated"
+}
+
+# Page of the issuers bound to a schema, as returned by list_schema_issuers
+SCHEMA_ISSUERS_TYPE = sp.TRecord(
+    issuers = sp.TList(sp.TRecord(issuer_did = sp.TString, status = sp.TNat)),
+    next_cursor = sp.TOption(sp.TNat)
+)
+
+STATUS_TABLES_TYPE = sp.TRecord(
+    issuer_statuses = sp.TMap(sp.TNat, sp.TString),
+    schema_statuses = sp.TMap(sp.TNat, sp.TString)
+)
+
 class RegistryLogic(sp.Contract):
-    def __init__(self, certifier):
+    def __init__(self, certifier, issuer_registry_contract = None, schema_registry_contract = None, numeric_statuses = False, compact = False):
+        # With numeric_statuses, get_schema and get_issuer return the status ID instead of its name
+        self.numeric_statuses = numeric_statuses
+
+        # With compact, every entry point runs its action through the shared_action lambda, so the
+        # logic is compiled once instead of once per entry point, dispatch and apply_permits.
+        # The contract is smaller and calls cost slightly more gas
+        self.compact = compact
+
+        # Storage contracts that are not known at origination point to the burn address
+        # until they are set with update_contract_address
+        unset_contract_address = sp.address("tz1burnburnburnburnburnburnburjAYjjX")
+
         self.init_type(
             sp.TRecord(
-                contracts = sp.TBigMap(
-                    sp.TString,
-                    sp.TAddress
+                contracts = sp.TRecord(
+                    issuer_registry_contract = sp.TAddress,
+                    schema_registry_contract = sp.TAddress
                 ),
-                issuer_statuses = sp.TBigMap(
-                    sp.TNat,
-                    sp.TString
-                ),
-                schema_statuses = sp.TBigMap(
-                    sp.TNat,
-                    sp.TString
+                permit_nonces = sp.TBigMap(
+                    sp.TAddress,
+                    sp.TNat
                 ),
                 certifier = sp.TAddress
             )
         )
         self.init(
-            contracts = sp.big_map(),
-            issuer_statuses = sp.big_map({
-                1: "active",
-                2: "deprecated",
-                3: "in_conflict"
-            }),
-            schema_statuses = sp.big_map({
-                1: "active",
-                2: "deprecated"
-            }),
+            contracts = sp.record(
+                issuer_registry_contract = issuer_registry_contract if issuer_registry_contract is not None else unset_contract_address,
+                schema_registry_contract = schema_registry_contract if schema_registry_contract is not None else unset_contract_address
+            ),
+            permit_nonces = sp.big_map(),
             certifier = certifier
         )
     
@@ -41,107 +120,246 @@ class RegistryLogic(sp.Contract):
     
     # Get storage contract address by name
     def get_contract_address(self, contract_name):
-        return self.data.contracts[contract_name]
+        return getattr(self.data.contracts, contract_name)
+
+    # Available statuses for the issuer registry records, and the bindings
+    def issuer_statuses(self):
+        return sp.map(ISSUER_STATUSES, tkey = sp.TNat, tvalue = sp.TString)
+
+    # Available statuses for the schema registry records
+    def schema_statuses(self):
+        return sp.map(SCHEMA_STATUSES, tkey = sp.TNat, tvalue = sp.TString)
 
-    # Verify source of transaction is owner or certifier
+    # Status returned by get_schema and get_issuer, by ID or by name
+    def format_status(self, statuses, status):
+        if self.numeric_statuses:
+            return status
+        return statuses[status]
+
+    # Verify sender of the action is owner or certifier, for schema and issuer updates
+    # Also replaces verify_issuer_update_allowed, which had the same body
     @sp.private_lambda(with_storage="read-only")
     def verify_owner_source_address(self, params):
+        sp.set_type(params.sender_address, sp.TAddress)
         sp.set_type(params.owner_address, sp.TAddress)
 
-        sp.if (sp.source == self.data.certifier):
+        with sp.if_(params.sender_address == self.data.certifier):
             sp.result(True)
-        sp.else:
-            sp.if (sp.source == params.owner_address):
+        with sp.else_():
+            with sp.if_(params.sender_address == params.owner_address):
                 sp.result(True)
-            sp.else:
+            with sp.else_():
                 sp.result(False)
 
-    # Get Schema owner address
-    def get_schema_owner_address(self, schema_id):
-        schema_owner_address = sp.view(
-            "get_schema_owner_address",
+    # Owner that the Storage contract must find on a record before changing it, none for the Certifier
+    @sp.private_lambda(with_storage="read-only")
+    def expected_owner(self, sender_address):
+        sp.set_type(sender_address, sp.TAddress)
+
+        with sp.if_(sender_address == self.data.certifier):
+            sp.result(sp.none)
+        with sp.else_():
+            sp.result(sp.some(sender_address))
+
+    # Statuses that the Storage contract must find on an issuer before changing its status, none for the Certifier
+    @sp.private_lambda(with_storage="read-only")
+    def expected_issuer_statuses(self, sender_address):
+        sp.set_type(sender_address, sp.TAddress)
+
+        with sp.if_(sender_address == self.data.certifier):
+            sp.result(sp.none)
+        with sp.else_():
+            sp.result(sp.some(sp.set([status for status in ISSUER_STATUSES if status != 3], t = sp.TNat)))
+
+    # Get Schema owner address and status, fails if the schema does not exist
+    def get_schema_context(self, schema_id):
+        schema_context = sp.view(
+            "get_schema_context",
             self.get_contract_address('schema_registry_contract'),
             schema_id,
-            t = sp.TAddress
-        ).open_some("Invalid view");
+            t = sp.TOption(sp.TRecord(schema_owner = sp.TAddress, status = sp.TNat))
+        ).open_some("Invalid view").open_some("Schema id does not exist");
 
-        return schema_owner_address
+        return sp.compute(schema_context)
 
-    # Verify issuer status change is allowed
+    # Verify issuer or issuer-schema binding status change is allowed
+    # Also replaces verify_binding_status_change_allowed, which had the same body
     @sp.private_lambda(with_storage="read-only")
     def verify_issuer_status_change_allowed(self, params):
+        sp.set_type(params.sender_address, sp.TAddress)
         sp.set_type(params.owner_address, sp.TAddress)
         sp.set_type(params.current_status, sp.TNat)
         sp.set_type(params.new_status, sp.TNat)
 
-        sp.if (sp.source == self.data.certifier) :
+        with sp.if_(params.sender_address == self.data.certifier):
             sp.result(True)
-        sp.else:
-            sp.if ((sp.source == params.owner_address) & (params.current_status != 3) & (params.new_status != 3)):
+        with sp.else_():
+            with sp.if_((params.sender_address == params.owner_address) & (params.current_status != 3) & (params.new_status != 3)):
                 sp.result(True)
-            sp.else:
+            with sp.else_():
                 sp.result(False)
 
-    # Verify issuer (non-status) change is allowed
-    @sp.private_lambda(with_storage="read-only")
-    def verify_issuer_update_allowed(self, params):
-        sp.set_type(params.owner_address, sp.TAddress)
-
-        sp.if (sp.source == self.data.certifier) :
-            sp.result(True)
-        sp.else:
-            sp.if (sp.source == params.owner_address):
-                sp.result(True)
-            sp.else:
-                sp.result(False)
-
-    # Get Issuer owner address
-    def get_issuer_owner_address(self, issuer_did):
-        issuer_owner_address = sp.view(
-            "get_issuer_owner_address",
-            self.get_contract_address('issuer_registry_contract'),
-            issuer_did,
-            t = sp.TAddress
-        ).open_some("Invalid view");
-
-        return issuer_owner_address
-
-    # Get Issuer status
-    def get_issuer_status(self, issuer_did):
-        issuer_status = sp.view(
-            "get_issuer_status",
-            self.get_contract_address('issuer_registry_contract'),
-            issuer_did,
-            t = sp.TNat
-        ).open_some("Invalid view");
-
-        return issuer_status
-
-    # Verify Issuer existence
-    def check_issuer_exists(self, issuer_did):
-        issuer_existance = sp.view(
-            "issuer_exists",
+    # Get Issuer owner address and status in a single view, fails if the issuer does not exist
+    def get_issuer_context(self, issuer_did):
+        issuer_context = sp.view(
+            "get_issuer_context",
             self.get_contract_address('issuer_registry_contract'),
             issuer_did,
-            t = sp.TBool
-        ).open_some("Invalid view");
+            t = sp.TOption(sp.TRecord(issuer_owner = sp.TAddress, status = sp.TNat))
+        ).open_some("Invalid view").open_some("Issuer did does not exist");
 
-        return issuer_existance
+        return sp.compute(issuer_context)
 
-    # Verify issuer-schema binding is allowed
-    @sp.private_lambda(with_storage="read-only")
-    def verify_binding_status_change_allowed(self, params):
-        sp.set_type(params.owner_address, sp.TAddress)
-        sp.set_type(params.current_status, sp.TNat)
-        sp.set_type(params.new_status, sp.TNat)
+    # Run a Registry action with the rights of sender_address
+    def run_action(self, action, sender_address):
+        # The compact build applies the status actions as a list of status changes, so that
+        # the status logic is compiled once, in apply_status_changes
+        status_changes = sp.local("status_changes", sp.list([], t = STATUS_CHANGE_TYPE)) if self.compact else None
 
-        sp.if (sp.source == self.data.certifier) :
-            sp.result(True)
-        sp.else:
-            sp.if ((sp.source == params.owner_address) & (params.current_status != 3) & (params.new_status != 3)):
-                sp.result(True)
-            sp.else:
-                sp.result(False)
+        # Every action runs the same logic as the entry point of the same name
+        with action.match_cases() as arg:
+            with arg.match("add_schema") as schema_data:
+                self.handle_add_schema(sp.record(schema_data = schema_data), sender_address)
+
+            with arg.match("add_schemas") as schemas_data:
+                self.handle_add_schemas(sp.record(schemas_data = schemas_data), sender_address)
+
+            with arg.match("set_schema_active") as schema_id:
+                self.run_status_action(
+                    self.handle_set_schema_active, sp.record(schema_id = schema_id), sender_address,
+                    status_changes, sp.variant("schema", sp.record(schema_id = schema_id, status = 1))
+                )
+
+            with arg.match("set_schema_deprecated") as schema_id:
+                self.run_status_action(
+                    self.handle_set_schema_deprecated, sp.record(schema_id = schema_id), sender_address,
+                    status_changes, sp.variant("schema", sp.record(schema_id = schema_id, status = 2))
+                )
+
+            with arg.match("set_schema_status") as params:
+                self.run_status_action(
+                    self.handle_set_schema_status, params, sender_address,
+                    status_changes, sp.variant("schema", params)
+                )
+
+            with arg.match("add_schema_reference") as params:
+                self.handle_add_schema_reference(params, sender_address)
+
+            with arg.match("begin_schema"):
+                self.handle_begin_schema(sp.unit, sender_address)
+
+            with arg.match("append_schema_chunk") as params:
+                self.handle_append_schema_chunk(params, sender_address)
+
+            with arg.match("finalize_schema") as params:
+                self.handle_finalize_schema(params, sender_address)
+
+            with arg.match("cancel_schema") as schema_id:
+                self.handle_cancel_schema(sp.record(schema_id = schema_id), sender_address)
+
+            with arg.match("add_issuer") as params:
+                self.handle_add_issuer(params, sender_address)
+
+            with arg.match("add_issuers") as issuers:
+                self.handle_add_issuers(sp.record(issuers = issuers), sender_address)
+
+            with arg.match("set_issuer_data") as params:
+                self.handle_set_issuer_data(params, sender_address)
+
+            with arg.match("add_issuer_bytes") as params:
+                self.handle_add_issuer_bytes(params, sender_address)
+
+            with arg.match("set_issuer_data_bytes") as params:
+                self.handle_set_issuer_data_bytes(params, sender_address)
+
+            with arg.match("apply_issuer_data_patch") as params:
+                self.handle_apply_issuer_data_patch(params, sender_address)
+
+            with arg.match("set_issuer_active") as issuer_did:
+                self.run_status_action(
+                    self.handle_set_issuer_active, sp.record(issuer_did = issuer_did), sender_address,
+                    status_changes, sp.variant("issuer", sp.record(issuer_did = issuer_did, status = 1))
+                )
+
+            with arg.match("set_issuer_deprecated") as issuer_did:
+                self.run_status_action(
+                    self.handle_set_issuer_deprecated, sp.record(issuer_did = issuer_did), sender_address,
+                    status_changes, sp.variant("issuer", sp.record(issuer_did = issuer_did, status = 2))
+                )
+
+            with arg.match("set_issuer_status") as params:
+                self.run_status_action(
+                    self.handle_set_issuer_status, params, sender_address,
+                    status_changes, sp.variant("issuer", params)
+                )
+
+            with arg.match("set_issuer_owner") as params:
+                self.handle_set_issuer_owner(sp.record(issuer_did = params.issuer_did, new_owner_address = params.owner_address), sender_address)
+
+            with arg.match("transfer_ownership") as params:
+                self.handle_transfer_ownership(params, sender_address)
+
+            with arg.match("bind_issuer_schema") as params:
+                self.handle_bind_issuer_schema(params, sender_address)
+
+            with arg.match("set_binding_active") as params:
+                self.run_status_action(
+                    self.handle_set_binding_active, params, sender_address,
+                    status_changes, sp.variant("binding", sp.record(issuer_did = params.issuer_did, schema_id = params.schema_id, status = 1))
+                )
+
+            with arg.match("set_binding_deprecated") as params:
+                self.run_status_action(
+                    self.handle_set_binding_deprecated, params, sender_address,
+                    status_changes, sp.variant("binding", sp.record(issuer_did = params.issuer_did, schema_id = params.schema_id, status = 2))
+                )
+
+            with arg.match("set_binding_status") as params:
+                self.run_status_action(
+                    self.handle_set_binding_status, params, sender_address,
+                    status_changes, sp.variant("binding", params)
+                )
+
+            with arg.match("apply_status_changes") as changes:
+                if self.compact:
+                    status_changes.value = changes
+                else:
+                    self.handle_apply_status_changes(sp.record(changes = changes), sender_address)
+
+        # Only the status actions leave a status change, the other actions make no further call
+        if self.compact:
+            with sp.if_(sp.len(status_changes.value) > 0):
+                self.handle_apply_status_changes(sp.record(changes = status_changes.value), sender_address)
+
+    # Run a status action of run_action, or in the compact build keep it as the status change
+    # applied after the match
+    def run_status_action(self, handler, parameters, sender_address, status_changes, status_change):
+        if self.compact:
+            status_changes.value = sp.list([status_change])
+        else:
+            handler(parameters, sender_address)
+
+    # Single copy of run_action, called by every entry point of the compact build
+    @sp.private_lambda(with_storage="read-only", with_operations=True, wrap_call=True)
+    def shared_action(self, params):
+        sp.set_type(params.action, DISPATCH_TYPE)
+        sp.set_type(params.sender_address, sp.TAddress)
+
+        self.run_action(params.action, params.sender_address)
+
+    # Run a Registry action, inline or through shared_action in the compact build
+    def execute_action(self, action, sender_address):
+        if self.compact:
+            self.shared_action(sp.record(action = action, sender_address = sender_address))
+        else:
+            self.run_action(action, sender_address)
+
+    # Run the handler of an entry point, or in the compact build the action of the same name
+    def run_entry_point(self, handler, parameters, action):
+        if self.compact:
+            self.execute_action(action, sp.source)
+        else:
+            handler(parameters, sp.source)
 
     ##############################
     # Logic Entry points / Views #
@@ -155,10 +373,56 @@ class RegistryLogic(sp.Contract):
 
         # Update is allowed only by certifier
         sp.verify(self.data.certifier == sp.source, message = "Incorrect certifier")
-        self.data.contracts[parameters.contract_name] = parameters.address
+
+        with sp.if_(parameters.contract_name == "issuer_registry_contract"):
+            self.data.contracts.issuer_registry_contract = parameters.address
+        with sp.else_():
+            sp.verify(parameters.contract_name == "schema_registry_contract", message = "Incorrect contract name")
+            self.data.contracts.schema_registry_contract = parameters.address
+
+    @sp.entry_point
+    def dispatch(self, packed_action):
+        # Defining the parameters' types
+        sp.set_type(packed_action, sp.TBytes)
+
+        action = sp.compute(sp.unpack(packed_action, t = DISPATCH_TYPE).open_some("Invalid action"))
+
+        self.execute_action(action, sp.source)
+
+    @sp.entry_point
+    def apply_permits(self, permits):
+        # Defining the parameters' types
+        sp.set_type(permits, sp.TList(PERMIT_TYPE))
+
+        # Anyone may relay permits, every action runs with the rights of the account that signed it
+        with sp.for_("permit", permits) as permit:
+            signer_address = sp.compute(sp.to_address(sp.implicit_account(sp.hash_key(permit.public_key))))
+
+            # The permits of an account are applied once each, in the order of their nonces
+            sp.verify(permit.nonce == self.data.permit_nonces.get(signer_address, default_value = 0), message = "Invalid permit nonce")
+            sp.verify(sp.check_signature(permit.public_key, permit.signature, sp.pack(sp.record(
+                action = permit.action,
+                chain_id = sp.chain_id,
+                contract = sp.self_address,
+                nonce = permit.nonce
+            ))), message = "Invalid permit signature")
+            self.data.permit_nonces[signer_address] = permit.nonce + 1
+
+            action = sp.compute(sp.unpack(permit.action, t = DISPATCH_TYPE).open_some("Invalid action"))
+            self.execute_action(action, signer_address)
+
+    @sp.onchain_view()
+    def get_permit_nonce(self, address):
+        # Nonce of the next permit signed by the account
+        sp.set_type(address, sp.TAddress)
+
+        sp.result(self.data.permit_nonces.get(address, default_value = 0))
 
     @sp.entry_point
     def add_schema(self, parameters):
+        self.run_entry_point(self.handle_add_schema, parameters, sp.variant("add_schema", parameters.schema_data))
+
+    def handle_add_schema(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.schema_data, sp.TString)
 
@@ -171,7 +435,32 @@ class RegistryLogic(sp.Contract):
         # Defining the parameters that will be passed to the Storage contract
         params = sp.record(
             schema_data = parameters.schema_data,
-            schema_owner = sp.source,
+            schema_owner = sender_address,
+            status = 1
+        )
+
+        # Calling the Storage contract with the parameters we defined
+        sp.transfer(params, sp.mutez(0), storage_contract)
+
+    @sp.entry_point
+    def add_schemas(self, parameters):
+        self.run_entry_point(self.handle_add_schemas, parameters, sp.variant("add_schemas", parameters.schemas_data))
+
+    def handle_add_schemas(self, parameters, sender_address):
+        # Defining the parameters' types
+        sp.set_type(parameters.schemas_data, sp.TList(sp.TString))
+
+        # Defining the data expected by the Storage contract
+        contract_data = sp.TRecord(schemas_data = sp.TList(sp.TString), schema_owner = sp.TAddress, status = sp.TNat)
+
+        # Defining the Storage contract itself and its entry point for the call
+        storage_contract = sp.contract(contract_data, self.get_contract_address('schema_registry_contract'), "add_schemas").open_some()
+
+        # Defining the parameters that will be passed to the Storage contract
+        # All the schemas of the batch are owned by the caller, as in add_schema
+        params = sp.record(
+            schemas_data = parameters.schemas_data,
+            schema_owner = sender_address,
             status = 1
         )
 
@@ -180,19 +469,17 @@ class RegistryLogic(sp.Contract):
 
     @sp.entry_point
     def set_schema_active(self, parameters):
+        self.run_entry_point(self.handle_set_schema_active, parameters, sp.variant("set_schema_active", parameters.schema_id))
+
+    def handle_set_schema_active(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.schema_id, sp.TNat)
 
-        # Update is allowed only from owner
-        owner_address = self.get_schema_owner_address(parameters.schema_id)
-        sp.verify(self.verify_owner_source_address(
-            sp.record(
-                owner_address = owner_address,
-            )
-        ), message = "Incorrect owner")
+        # Update is allowed only from owner, the Storage contract checks the owner when it changes the record
+        expected_owner = self.expected_owner(sender_address)
 
         # Defining the data expected by the Storage contract
-        contract_data = sp.TRecord(schema_id = sp.TNat, status = sp.TNat)
+        contract_data = sp.TRecord(schema_id = sp.TNat, status = sp.TNat, expected_owner = sp.TOption(sp.TAddress))
 
         # Defining the Storage contract itself and its entry point for the call
         storage_contract = sp.contract(contract_data, self.get_contract_address('schema_registry_contract'), "change_status").open_some()
@@ -200,7 +487,8 @@ class RegistryLogic(sp.Contract):
         # Defining the parameters that will be passed to the Storage contract
         params = sp.record(
             schema_id = parameters.schema_id,
-            status = 1
+            status = 1,
+            expected_owner = expected_owner
         )
 
         # Calling the Storage contract with the parameters we defined
@@ -208,19 +496,17 @@ class RegistryLogic(sp.Contract):
 
     @sp.entry_point
     def set_schema_deprecated(self, parameters):
+        self.run_entry_point(self.handle_set_schema_deprecated, parameters, sp.variant("set_schema_deprecated", parameters.schema_id))
+
+    def handle_set_schema_deprecated(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.schema_id, sp.TNat)
 
-        # Update is allowed only from owner
-        owner_address = self.get_schema_owner_address(parameters.schema_id)
-        sp.verify(self.verify_owner_source_address(
-            sp.record(
-                owner_address = owner_address,
-            )
-        ), message = "Incorrect owner")
+        # Update is allowed only from owner, the Storage contract checks the owner when it changes the record
+        expected_owner = self.expected_owner(sender_address)
 
         # Defining the data expected by the Storage contract
-        contract_data = sp.TRecord(schema_id = sp.TNat, status = sp.TNat)
+        contract_data = sp.TRecord(schema_id = sp.TNat, status = sp.TNat, expected_owner = sp.TOption(sp.TAddress))
 
         # Defining the Storage contract itself and its entry point for the call
         storage_contract = sp.contract(contract_data, self.get_contract_address('schema_registry_contract'), "change_status").open_some()
@@ -228,7 +514,8 @@ class RegistryLogic(sp.Contract):
         # Defining the parameters that will be passed to the Storage contract
         params = sp.record(
             schema_id = parameters.schema_id,
-            status = 2
+            status = 2,
+            expected_owner = expected_owner
         )
 
         # Calling the Storage contract with the parameters we defined
@@ -236,31 +523,30 @@ class RegistryLogic(sp.Contract):
 
     @sp.entry_point
     def set_schema_status(self, parameters):
+        self.run_entry_point(self.handle_set_schema_status, parameters, sp.variant("set_schema_status", parameters))
+
+    def handle_set_schema_status(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.schema_id, sp.TNat)
         sp.set_type(parameters.status, sp.TNat)
 
-        # Update is allowed only from owner
-        owner_address = self.get_schema_owner_address(parameters.schema_id)
-        sp.verify(self.verify_owner_source_address(
-            sp.record(
-                owner_address = owner_address,
-            )
-        ), message = "Incorrect owner")
+        # Update is allowed only from owner, the Storage contract checks the owner when it changes the record
+        expected_owner = self.expected_owner(sender_address)
 
         # Defining the data expected by the Storage contract
-        contract_data = sp.TRecord(schema_id = sp.TNat, status = sp.TNat)
+        contract_data = sp.TRecord(schema_id = sp.TNat, status = sp.TNat, expected_owner = sp.TOption(sp.TAddress))
 
         # Defining the Storage contract itself and its entry point for the call
         storage_contract = sp.contract(contract_data, self.get_contract_address('schema_registry_contract'), "change_status").open_some()
 
         # Verify status ID exists
-        sp.verify(self.data.schema_statuses.contains(parameters.status), message = "Incorrect status")
+        sp.verify(self.schema_statuses().contains(parameters.status), message = "Incorrect status")
 
         # Defining the parameters that will be passed to the Storage contract
         params = sp.record(
             schema_id = parameters.schema_id,
-            status = parameters.status
+            status = parameters.status,
+            expected_owner = expected_owner
         )
 
         # Calling the Storage contract with the parameters we defined
@@ -283,24 +569,223 @@ class RegistryLogic(sp.Contract):
             )
         ).open_some("Invalid view");
 
+        # Schemas uploaded in chunks or stored off-chain have no schema_data, they are read with their own views
+        with sp.if_(schema.schema_data == ""):
+            content_kind = sp.view(
+                "get_content_kind",
+                self.get_contract_address('schema_registry_contract'),
+                schema_id,
+                t = sp.TString
+            ).open_some("Invalid view")
+
+            sp.verify(content_kind != "chunks", message = "Schema is stored in chunks, read it with get_schema_chunk")
+            sp.verify(content_kind != "reference", message = "Schema is stored off-chain, read it with get_schema_reference")
+
         # Format result
         result_schema = sp.record(
             schema_data = schema.schema_data,
-            status = self.data.schema_statuses[schema.status]
+            status = self.format_status(self.schema_statuses(), schema.status)
         )
 
         # Calling the Storage contract with the parameters we defined
         sp.result(result_schema)
 
+    @sp.entry_point
+    def add_schema_reference(self, parameters):
+        self.run_entry_point(self.handle_add_schema_reference, parameters, sp.variant("add_schema_reference", parameters))
+
+    def handle_add_schema_reference(self, parameters, sender_address):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_hash, sp.TBytes)
+        sp.set_type(parameters.schema_uri, sp.TString)
+
+        # Defining the data expected by the Storage contract
+        contract_data = sp.TRecord(schema_hash = sp.TBytes, schema_uri = sp.TString, schema_owner = sp.TAddress, status = sp.TNat)
+
+        # Defining the Storage contract itself and its entry point for the call
+        storage_contract = sp.contract(contract_data, self.get_contract_address('schema_registry_contract'), "add_reference").open_some()
+
+        # Defining the parameters that will be passed to the Storage contract
+        params = sp.record(
+            schema_hash = parameters.schema_hash,
+            schema_uri = parameters.schema_uri,
+            schema_owner = sender_address,
+            status = 1
+        )
+
+        # Calling the Storage contract with the parameters we defined
+        sp.transfer(params, sp.mutez(0), storage_contract)
+
+    @sp.entry_point
+    def begin_schema(self):
+        self.run_entry_point(self.handle_begin_schema, sp.unit, sp.variant("begin_schema", sp.unit))
+
+    def handle_begin_schema(self, parameters, sender_address):
+        # Defining the Storage contract itself and its entry point for the call
+        storage_contract = sp.contract(sp.TAddress, self.get_contract_address('schema_registry_contract'), "begin_upload").open_some()
+
+        # Calling the Storage contract with the owner of the schema being uploaded
+        sp.transfer(sender_address, sp.mutez(0), storage_contract)
+
+    @sp.entry_point
+    def append_schema_chunk(self, parameters):
+        self.run_entry_point(self.handle_append_schema_chunk, parameters, sp.variant("append_schema_chunk", parameters))
+
+    def handle_append_schema_chunk(self, parameters, sender_address):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.chunk, sp.TString)
+
+        # Defining the data expected by the Storage contract
+        contract_data = sp.TRecord(schema_id = sp.TNat, schema_owner = sp.TAddress, chunk = sp.TString)
+
+        # Defining the Storage contract itself and its entry point for the call
+        storage_contract = sp.contract(contract_data, self.get_contract_address('schema_registry_contract'), "append_chunk").open_some()
+
+        # Defining the parameters that will be passed to the Storage contract
+        # Only the caller that began the upload can append to it
+        params = sp.record(
+            schema_id = parameters.schema_id,
+            schema_owner = sender_address,
+            chunk = parameters.chunk
+        )
+
+        # Calling the Storage contract with the parameters we defined
+        sp.transfer(params, sp.mutez(0), storage_contract)
+
+    @sp.entry_point
+    def finalize_schema(self, parameters):
+        self.run_entry_point(self.handle_finalize_schema, parameters, sp.variant("finalize_schema", parameters))
+
+    def handle_finalize_schema(self, parameters, sender_address):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.content_hash, sp.TBytes)
+
+        # Defining the data expected by the Storage contract
+        contract_data = sp.TRecord(schema_id = sp.TNat, schema_owner = sp.TAddress, content_hash = sp.TBytes, status = sp.TNat)
+
+        # Defining the Storage contract itself and its entry point for the call
+        storage_contract = sp.contract(contract_data, self.get_contract_address('schema_registry_contract'), "finalize_upload").open_some()
+
+        # Defining the parameters that will be passed to the Storage contract
+        params = sp.record(
+            schema_id = parameters.schema_id,
+            schema_owner = sender_address,
+            content_hash = parameters.content_hash,
+            status = 1
+        )
+
+        # Calling the Storage contract with the parameters we defined
+        sp.transfer(params, sp.mutez(0), storage_contract)
+
+    @sp.entry_point
+    def cancel_schema(self, parameters):
+        self.run_entry_point(self.handle_cancel_schema, parameters, sp.variant("cancel_schema", parameters.schema_id))
+
+    def handle_cancel_schema(self, parameters, sender_address):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+
+        # Defining the data expected by the Storage contract
+        contract_data = sp.TRecord(schema_id = sp.TNat, schema_owner = sp.TAddress)
+
+        # Defining the Storage contract itself and its entry point for the call
+        storage_contract = sp.contract(contract_data, self.get_contract_address('schema_registry_contract'), "cancel_upload").open_some()
+
+        # Defining the parameters that will be passed to the Storage contract
+        # The caller that began the upload, or the Certifier, can cancel it
+        params = sp.record(
+            schema_id = parameters.schema_id,
+            schema_owner = sender_address
+        )
+
+        # Calling the Storage contract with the parameters we defined
+        sp.transfer(params, sp.mutez(0), storage_contract)
+
+    @sp.onchain_view()
+    def get_schema_chunk(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.index, sp.TNat)
+
+        schema_chunk = sp.view(
+            "get_chunk",
+            self.get_contract_address('schema_registry_contract'),
+            sp.record(
+                schema_id = parameters.schema_id,
+                index = parameters.index
+            ),
+            t = sp.TRecord(
+                chunk = sp.TString,
+                chunk_count = sp.TNat
+            )
+        ).open_some("Invalid view");
+
+        sp.result(schema_chunk)
+
+    @sp.onchain_view()
+    def find_schema_by_hash(self, schema_hash):
+        # Defining the parameters' types
+        sp.set_type(schema_hash, sp.TBytes)
+
+        # ID of the schema stored on-chain with this SHA-256 content hash, if any
+        schema_id = sp.view(
+            "find_by_hash",
+            self.get_contract_address('schema_registry_contract'),
+            schema_hash,
+            t = sp.TOption(sp.TNat)
+        ).open_some("Invalid view");
+
+        sp.result(schema_id)
+
+    @sp.onchain_view()
+    def get_schema_reference(self, schema_id):
+        # Defining the parameters' types
+        sp.set_type(schema_id, sp.TNat)
+
+        # Defining the parameters' types
+        schema_reference = sp.view(
+            "get_reference",
+            self.get_contract_address('schema_registry_contract'),
+            schema_id,
+            t = sp.TRecord(
+                schema_hash = sp.TBytes,
+                schema_uri = sp.TString
+            )
+        ).open_some("Invalid view");
+
+        sp.result(schema_reference)
+
+    @sp.onchain_view()
+    def verify_schema_content(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.schema_hash, sp.TBytes)
+
+        content_verified = sp.view(
+            "verify_schema_content",
+            self.get_contract_address('schema_registry_contract'),
+            sp.record(
+                schema_id = parameters.schema_id,
+                schema_hash = parameters.schema_hash
+            ),
+            t = sp.TBool
+        ).open_some("Invalid view");
+
+        sp.result(content_verified)
+
     @sp.entry_point
     def add_issuer(self, parameters):
+        self.run_entry_point(self.handle_add_issuer, parameters, sp.variant("add_issuer", parameters))
+
+    def handle_add_issuer(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
         sp.set_type(parameters.issuer_data, sp.TString)
 
-        # Check if issuer does not exist, does not allow add call otherwise
+        # The Storage contract only adds the issuer if the DID does not exist yet
         # This is to avoid update from unauthorized
-        sp.verify(self.check_issuer_exists(parameters.issuer_did) == sp.bool(False), message = "Issuer did already exists")
 
         # Defining the data expected by the Storage contract
         contract_data = sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString, issuer_owner = sp.TAddress, status = sp.TNat)
@@ -312,7 +797,38 @@ class RegistryLogic(sp.Contract):
         params = sp.record(
             issuer_did = parameters.issuer_did,
             issuer_data = parameters.issuer_data,
-            issuer_owner = sp.source,
+            issuer_owner = sender_address,
+            status = 1
+        )
+
+        # Calling the Storage contract with the parameters we defined
+        sp.transfer(params, sp.mutez(0), storage_contract)
+
+    @sp.entry_point
+    def add_issuers(self, parameters):
+        self.run_entry_point(self.handle_add_issuers, parameters, sp.variant("add_issuers", parameters.issuers))
+
+    def handle_add_issuers(self, parameters, sender_address):
+        # Defining the parameters' types
+        sp.set_type(parameters.issuers, sp.TList(sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString)))
+
+        # The Storage contract rejects the batch if any of the DIDs exists already
+
+        # Defining the data expected by the Storage contract
+        contract_data = sp.TRecord(
+            issuers = sp.TList(sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString)),
+            issuer_owner = sp.TAddress,
+            status = sp.TNat
+        )
+
+        # Defining the Storage contract itself and its entry point for the call
+        storage_contract = sp.contract(contract_data, self.get_contract_address('issuer_registry_contract'), "add_issuers").open_some()
+
+        # Defining the parameters that will be passed to the Storage contract
+        # All the issuers of the batch are owned by the caller, as in add_issuer
+        params = sp.record(
+            issuers = parameters.issuers,
+            issuer_owner = sender_address,
             status = 1
         )
 
@@ -321,23 +837,18 @@ class RegistryLogic(sp.Contract):
 
     @sp.entry_point
     def set_issuer_data(self, parameters):
+        self.run_entry_point(self.handle_set_issuer_data, parameters, sp.variant("set_issuer_data", parameters))
+
+    def handle_set_issuer_data(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
         sp.set_type(parameters.issuer_data, sp.TString)
 
-        # Check if issuer exists, does not allow call otherwise
-        sp.verify(self.check_issuer_exists(parameters.issuer_did), message = "Issuer did does not exist")
-
-        # Update is allowed only from owner
-        owner_address = self.get_issuer_owner_address(parameters.issuer_did)
-        sp.verify(self.verify_issuer_update_allowed(
-            sp.record(
-                owner_address = owner_address,
-            )
-        ), message = "Cannot be called from non-certified addresses")
+        # Update is allowed only from owner, the Storage contract checks the owner when it changes the record
+        expected_owner = self.expected_owner(sender_address)
 
         # Defining the data expected by the Storage contract
-        contract_data = sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString)
+        contract_data = sp.TRecord(issuer_did = sp.TString, issuer_data = sp.TString, expected_owner = sp.TOption(sp.TAddress))
 
         # Defining the Storage contract itself and its entry point for the call
         storage_contract = sp.contract(contract_data, self.get_contract_address('issuer_registry_contract'),
@@ -347,6 +858,93 @@ class RegistryLogic(sp.Contract):
         params = sp.record(
             issuer_did = parameters.issuer_did,
             issuer_data = parameters.issuer_data,
+            expected_owner = expected_owner
+        )
+
+        # Calling the Storage contract with the parameters we defined
+        sp.transfer(params, sp.mutez(0), storage_contract)
+
+    @sp.entry_point
+    def add_issuer_bytes(self, parameters):
+        self.run_entry_point(self.handle_add_issuer_bytes, parameters, sp.variant("add_issuer_bytes", parameters))
+
+    def handle_add_issuer_bytes(self, parameters, sender_address):
+        # Defining the parameters' types
+        sp.set_type(parameters.issuer_did, sp.TString)
+        sp.set_type(parameters.issuer_data_bytes, sp.TBytes)
+
+        # The Storage contract only adds the issuer if the DID does not exist yet
+
+        # Defining the data expected by the Storage contract
+        contract_data = sp.TRecord(issuer_did = sp.TString, issuer_data_bytes = sp.TBytes, issuer_owner = sp.TAddress, status = sp.TNat)
+
+        # Defining the Storage contract itself and its entry point for the call
+        storage_contract = sp.contract(contract_data, self.get_contract_address('issuer_registry_contract'), "add_bytes").open_some()
+
+        # Defining the parameters that will be passed to the Storage contract
+        params = sp.record(
+            issuer_did = parameters.issuer_did,
+            issuer_data_bytes = parameters.issuer_data_bytes,
+            issuer_owner = sender_address,
+            status = 1
+        )
+
+        # Calling the Storage contract with the parameters we defined
+        sp.transfer(params, sp.mutez(0), storage_contract)
+
+    @sp.entry_point
+    def set_issuer_data_bytes(self, parameters):
+        self.run_entry_point(self.handle_set_issuer_data_bytes, parameters, sp.variant("set_issuer_data_bytes", parameters))
+
+    def handle_set_issuer_data_bytes(self, parameters, sender_address):
+        # Defining the parameters' types
+        sp.set_type(parameters.issuer_did, sp.TString)
+        sp.set_type(parameters.issuer_data_bytes, sp.TBytes)
+
+        # Update is allowed only from owner, the Storage contract checks the owner when it changes the record
+        expected_owner = self.expected_owner(sender_address)
+
+        # Defining the data expected by the Storage contract
+        contract_data = sp.TRecord(issuer_did = sp.TString, issuer_data_bytes = sp.TBytes, expected_owner = sp.TOption(sp.TAddress))
+
+        # Defining the Storage contract itself and its entry point for the call
+        storage_contract = sp.contract(contract_data, self.get_contract_address('issuer_registry_contract'),
+            "change_data_bytes").open_some()
+
+        # Defining the parameters that will be passed to the Storage contract
+        params = sp.record(
+            issuer_did = parameters.issuer_did,
+            issuer_data_bytes = parameters.issuer_data_bytes,
+            expected_owner = expected_owner
+        )
+
+        # Calling the Storage contract with the parameters we defined
+        sp.transfer(params, sp.mutez(0), storage_contract)
+
+    @sp.entry_point
+    def apply_issuer_data_patch(self, parameters):
+        self.run_entry_point(self.handle_apply_issuer_data_patch, parameters, sp.variant("apply_issuer_data_patch", parameters))
+
+    def handle_apply_issuer_data_patch(self, parameters, sender_address):
+        # Defining the parameters' types
+        sp.set_type(parameters.issuer_did, sp.TString)
+        sp.set_type(parameters.patch, sp.TList(ISSUER_DATA_PATCH_TYPE))
+
+        # Update is allowed only from owner, the Storage contract checks the owner when it changes the record
+        expected_owner = self.expected_owner(sender_address)
+
+        # Defining the data expected by the Storage contract
+        contract_data = sp.TRecord(issuer_did = sp.TString, patch = sp.TList(ISSUER_DATA_PATCH_TYPE), expected_owner = sp.TOption(sp.TAddress))
+
+        # Defining the Storage contract itself and its entry point for the call
+        storage_contract = sp.contract(contract_data, self.get_contract_address('issuer_registry_contract'),
+            "apply_data_patch").open_some()
+
+        # Defining the parameters that will be passed to the Storage contract
+        params = sp.record(
+            issuer_did = parameters.issuer_did,
+            patch = parameters.patch,
+            expected_owner = expected_owner
         )
 
         # Calling the Storage contract with the parameters we defined
@@ -354,23 +952,18 @@ class RegistryLogic(sp.Contract):
 
     @sp.entry_point
     def set_issuer_active(self, parameters):
+        self.run_entry_point(self.handle_set_issuer_active, parameters, sp.variant("set_issuer_active", parameters.issuer_did))
+
+    def handle_set_issuer_active(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
 
-        # Update is allowed only from owner
-        owner_address = self.get_issuer_owner_address(parameters.issuer_did)
-        current_issuer_status = self.get_issuer_status(parameters.issuer_did)
-        
-        sp.verify(self.verify_issuer_status_change_allowed(
-            sp.record(
-                owner_address = owner_address,
-                current_status = current_issuer_status,
-                new_status = 1
-            )
-        ), message = "Status change not allowed")
+        # Update is allowed only from owner, the Storage contract checks the owner and that the issuer
+        # is not in conflict when it changes the record
+        expected_owner = self.expected_owner(sender_address)
 
         # Defining the data expected by the Storage contract
-        contract_data = sp.TRecord(issuer_did = sp.TString, status = sp.TNat)
+        contract_data = sp.TRecord(issuer_did = sp.TString, status = sp.TNat, expected_owner = sp.TOption(sp.TAddress), expected_statuses = sp.TOption(sp.TSet(sp.TNat)))
 
         # Defining the Storage contract itself and its entry point for the call
         storage_contract = sp.contract(contract_data, self.get_contract_address('issuer_registry_contract'), "change_status").open_some()
@@ -378,7 +971,9 @@ class RegistryLogic(sp.Contract):
         # Defining the parameters that will be passed to the Storage contract
         params = sp.record(
             issuer_did = parameters.issuer_did,
-            status = 1
+            status = 1,
+            expected_owner = expected_owner,
+            expected_statuses = self.expected_issuer_statuses(sender_address)
         )
 
         # Calling the Storage contract with the parameters we defined
@@ -386,23 +981,18 @@ class RegistryLogic(sp.Contract):
 
     @sp.entry_point
     def set_issuer_deprecated(self, parameters):
+        self.run_entry_point(self.handle_set_issuer_deprecated, parameters, sp.variant("set_issuer_deprecated", parameters.issuer_did))
+
+    def handle_set_issuer_deprecated(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
 
-        # Update is allowed only from owner
-        owner_address = self.get_issuer_owner_address(parameters.issuer_did)
-        current_issuer_status = self.get_issuer_status(parameters.issuer_did)
-        
-        sp.verify(self.verify_issuer_status_change_allowed(
-            sp.record(
-                owner_address = owner_address,
-                current_status = current_issuer_status,
-                new_status = 2
-            )
-        ), message = "Status change not allowed")
+        # Update is allowed only from owner, the Storage contract checks the owner and that the issuer
+        # is not in conflict when it changes the record
+        expected_owner = self.expected_owner(sender_address)
 
         # Defining the data expected by the Storage contract
-        contract_data = sp.TRecord(issuer_did = sp.TString, status = sp.TNat)
+        contract_data = sp.TRecord(issuer_did = sp.TString, status = sp.TNat, expected_owner = sp.TOption(sp.TAddress), expected_statuses = sp.TOption(sp.TSet(sp.TNat)))
 
         # Defining the Storage contract itself and its entry point for the call
         storage_contract = sp.contract(contract_data, self.get_contract_address('issuer_registry_contract'), "change_status").open_some()
@@ -410,7 +1000,9 @@ class RegistryLogic(sp.Contract):
         # Defining the parameters that will be passed to the Storage contract
         params = sp.record(
             issuer_did = parameters.issuer_did,
-            status = 2
+            status = 2,
+            expected_owner = expected_owner,
+            expected_statuses = self.expected_issuer_statuses(sender_address)
         )
 
         # Calling the Storage contract with the parameters we defined
@@ -418,35 +1010,33 @@ class RegistryLogic(sp.Contract):
 
     @sp.entry_point
     def set_issuer_status(self, parameters):
+        self.run_entry_point(self.handle_set_issuer_status, parameters, sp.variant("set_issuer_status", parameters))
+
+    def handle_set_issuer_status(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
         sp.set_type(parameters.status, sp.TNat)
 
-        # Update is allowed only from owner
-        owner_address = self.get_issuer_owner_address(parameters.issuer_did)
-        current_issuer_status = self.get_issuer_status(parameters.issuer_did)
-
-        sp.verify(self.verify_issuer_status_change_allowed(
-            sp.record(
-                owner_address = owner_address,
-                current_status = current_issuer_status,
-                new_status = parameters.status
-            )
-        ), message = "Status change not allowed")
+        # Update is allowed only from owner, and only the Certifier sets the in_conflict status, the Storage
+        # contract checks the owner and that the issuer is not in conflict when it changes the record
+        sp.verify((sender_address == self.data.certifier) | (parameters.status != 3), message = "Status change not allowed")
+        expected_owner = self.expected_owner(sender_address)
         
         # Defining the data expected by the Storage contract
-        contract_data = sp.TRecord(issuer_did = sp.TString, status = sp.TNat)
+        contract_data = sp.TRecord(issuer_did = sp.TString, status = sp.TNat, expected_owner = sp.TOption(sp.TAddress), expected_statuses = sp.TOption(sp.TSet(sp.TNat)))
 
         # Defining the Storage contract itself and its entry point for the call
         storage_contract = sp.contract(contract_data, self.get_contract_address('issuer_registry_contract'), "change_status").open_some()
 
         # Verify status ID exists
-        sp.verify(self.data.issuer_statuses.contains(parameters.status), message = "Incorrect status")
+        sp.verify(self.issuer_statuses().contains(parameters.status), message = "Incorrect status")
 
         # Defining the parameters that will be passed to the Storage contract
         params = sp.record(
             issuer_did = parameters.issuer_did,
-            status = parameters.status
+            status = parameters.status,
+            expected_owner = expected_owner,
+            expected_statuses = self.expected_issuer_statuses(sender_address)
         )
 
         # Calling the Storage contract with the parameters we defined
@@ -454,20 +1044,18 @@ class RegistryLogic(sp.Contract):
 
     @sp.entry_point
     def set_issuer_owner(self, parameters):
+        self.run_entry_point(self.handle_set_issuer_owner, parameters, sp.variant("set_issuer_owner", sp.record(issuer_did = parameters.issuer_did, owner_address = parameters.new_owner_address)))
+
+    def handle_set_issuer_owner(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
         sp.set_type(parameters.new_owner_address, sp.TAddress)
 
-        # Update is allowed only from owner
-        owner_address = self.get_issuer_owner_address(parameters.issuer_did)
-        sp.verify(self.verify_issuer_update_allowed(
-            sp.record(
-                owner_address = owner_address,
-            )
-        ), message = "Cannot be called from non-certified addresses")
+        # Update is allowed only from owner, the Storage contract checks the owner when it changes the record
+        expected_owner = self.expected_owner(sender_address)
 
         # Defining the data expected by the Storage contract
-        contract_data = sp.TRecord(issuer_did = sp.TString, new_owner_address = sp.TAddress)
+        contract_data = sp.TRecord(issuer_did = sp.TString, new_owner_address = sp.TAddress, expected_owner = sp.TOption(sp.TAddress))
 
         # Defining the Storage contract itself and its entry point for the call
         storage_contract = sp.contract(contract_data, self.get_contract_address('issuer_registry_contract'), "change_owner").open_some()
@@ -475,12 +1063,57 @@ class RegistryLogic(sp.Contract):
         # Defining the parameters that will be passed to the Storage contract
         params = sp.record(
             issuer_did = parameters.issuer_did,
-            new_owner_address = parameters.new_owner_address
+            new_owner_address = parameters.new_owner_address,
+            expected_owner = expected_owner
         )
 
         # Calling the Storage contract with the parameters we defined
         sp.transfer(params, sp.mutez(0), storage_contract)
 
+    @sp.entry_point
+    def transfer_ownership(self, parameters):
+        self.run_entry_point(self.handle_transfer_ownership, parameters, sp.variant("transfer_ownership", parameters))
+
+    def handle_transfer_ownership(self, parameters, sender_address):
+        # Defining the parameters' types
+        sp.set_type(parameters.old_owner, sp.TAddress)
+        sp.set_type(parameters.new_owner, sp.TAddress)
+        sp.set_type(parameters.issuer_dids, sp.TList(sp.TString))
+        sp.set_type(parameters.schema_ids, sp.TList(sp.TNat))
+
+        # Transfer is allowed only from the old owner, the Storage contracts check that every record belongs to it
+        sp.verify(self.verify_owner_source_address(
+            sp.record(
+                sender_address = sender_address,
+                owner_address = parameters.old_owner,
+            )
+        ), message = "Cannot be called from non-certified addresses")
+
+        # Calling each Storage contract once, large portfolios are moved in several operations
+        with sp.if_(sp.len(parameters.issuer_dids) > 0):
+            issuer_storage_contract = sp.contract(
+                sp.TRecord(old_owner = sp.TAddress, new_owner = sp.TAddress, issuer_dids = sp.TList(sp.TString)),
+                self.get_contract_address('issuer_registry_contract'),
+                "change_owners"
+            ).open_some()
+            sp.transfer(sp.record(
+                old_owner = parameters.old_owner,
+                new_owner = parameters.new_owner,
+                issuer_dids = parameters.issuer_dids
+            ), sp.mutez(0), issuer_storage_contract)
+
+        with sp.if_(sp.len(parameters.schema_ids) > 0):
+            schema_storage_contract = sp.contract(
+                sp.TRecord(old_owner = sp.TAddress, new_owner = sp.TAddress, schema_ids = sp.TList(sp.TNat)),
+                self.get_contract_address('schema_registry_contract'),
+                "change_owners"
+            ).open_some()
+            sp.transfer(sp.record(
+                old_owner = parameters.old_owner,
+                new_owner = parameters.new_owner,
+                schema_ids = parameters.schema_ids
+            ), sp.mutez(0), schema_storage_contract)
+
     @sp.onchain_view()
     def get_issuer(self, issuer_did):
         # Defining the parameters' types
@@ -503,25 +1136,41 @@ class RegistryLogic(sp.Contract):
         result_issuer = sp.record(
             issuer_data = issuer.issuer_data,
             issuer_owner = issuer.issuer_owner,
-            status = self.data.issuer_statuses[issuer.status]
+            status = self.format_status(self.issuer_statuses(), issuer.status)
         )
 
         # Calling the Storage contract with the parameters we defined
         sp.result(result_issuer)
 
+    @sp.onchain_view()
+    def get_issuer_data_bytes(self, issuer_did):
+        # Defining the parameters' types
+        sp.set_type(issuer_did, sp.TString)
+
+        # Encoded DID document of issuers added with add_issuer_bytes
+        issuer_data_bytes = sp.view(
+            "get_data_bytes",
+            self.get_contract_address('issuer_registry_contract'),
+            issuer_did,
+            t = sp.TBytes
+        ).open_some("Invalid view");
+
+        sp.result(issuer_data_bytes)
+
     @sp.entry_point
     def bind_issuer_schema(self, parameters):
+        self.run_entry_point(self.handle_bind_issuer_schema, parameters, sp.variant("bind_issuer_schema", parameters))
+
+    def handle_bind_issuer_schema(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
         sp.set_type(parameters.schema_id, sp.TNat)
         
-        # Verify Issuer DID exists
-        sp.verify(self.check_issuer_exists(parameters.issuer_did), message = "Issuer did does not exist")
-        
         # Update is allowed only from owner
-        owner_address = self.get_issuer_owner_address(parameters.issuer_did)
+        owner_address = self.get_issuer_context(parameters.issuer_did).issuer_owner
         sp.verify(self.verify_owner_source_address(
             sp.record(
+                sender_address = sender_address,
                 owner_address=owner_address,
             )
         ), message = "Binding not allowed")
@@ -546,16 +1195,21 @@ class RegistryLogic(sp.Contract):
 
     @sp.entry_point
     def set_binding_active(self, parameters):
+        self.run_entry_point(self.handle_set_binding_active, parameters, sp.variant("set_binding_active", parameters))
+
+    def handle_set_binding_active(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
         sp.set_type(parameters.schema_id, sp.TNat)
 
         # Update is allowed only from owner
-        owner_address = self.get_issuer_owner_address(parameters.issuer_did)
-        current_issuer_status = self.get_issuer_status(parameters.issuer_did)
+        issuer_context = self.get_issuer_context(parameters.issuer_did)
+        owner_address = issuer_context.issuer_owner
+        current_issuer_status = issuer_context.status
         
-        sp.verify(self.verify_binding_status_change_allowed(
+        sp.verify(self.verify_issuer_status_change_allowed(
             sp.record(
+                sender_address = sender_address,
                 owner_address = owner_address,
                 current_status = current_issuer_status,
                 new_status = 1
@@ -580,16 +1234,21 @@ class RegistryLogic(sp.Contract):
 
     @sp.entry_point
     def set_binding_deprecated(self, parameters):
+        self.run_entry_point(self.handle_set_binding_deprecated, parameters, sp.variant("set_binding_deprecated", parameters))
+
+    def handle_set_binding_deprecated(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
         sp.set_type(parameters.schema_id, sp.TNat)
 
         # Update is allowed only from owner
-        owner_address = self.get_issuer_owner_address(parameters.issuer_did)
-        current_issuer_status = self.get_issuer_status(parameters.issuer_did)
+        issuer_context = self.get_issuer_context(parameters.issuer_did)
+        owner_address = issuer_context.issuer_owner
+        current_issuer_status = issuer_context.status
         
-        sp.verify(self.verify_binding_status_change_allowed(
+        sp.verify(self.verify_issuer_status_change_allowed(
             sp.record(
+                sender_address = sender_address,
                 owner_address = owner_address,
                 current_status = current_issuer_status,
                 new_status = 2
@@ -614,17 +1273,22 @@ class RegistryLogic(sp.Contract):
 
     @sp.entry_point
     def set_binding_status(self, parameters):
+        self.run_entry_point(self.handle_set_binding_status, parameters, sp.variant("set_binding_status", parameters))
+
+    def handle_set_binding_status(self, parameters, sender_address):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
         sp.set_type(parameters.schema_id, sp.TNat)
         sp.set_type(parameters.status, sp.TNat)
 
         # Update is allowed only from owner
-        owner_address = self.get_issuer_owner_address(parameters.issuer_did)
-        current_issuer_status = self.get_issuer_status(parameters.issuer_did)
+        issuer_context = self.get_issuer_context(parameters.issuer_did)
+        owner_address = issuer_context.issuer_owner
+        current_issuer_status = issuer_context.status
         
-        sp.verify(self.verify_binding_status_change_allowed(
+        sp.verify(self.verify_issuer_status_change_allowed(
             sp.record(
+                sender_address = sender_address,
                 owner_address = owner_address,
                 current_status = current_issuer_status,
                 new_status = parameters.status
@@ -638,7 +1302,7 @@ class RegistryLogic(sp.Contract):
         storage_contract = sp.contract(contract_data, self.get_contract_address('schema_registry_contract'), "set_binding_status").open_some()
 
         # Verify status ID exists
-        sp.verify(self.data.issuer_statuses.contains(parameters.status), message = "Incorrect status")
+        sp.verify(self.issuer_statuses().contains(parameters.status), message = "Incorrect status")
 
         # Defining the parameters that will be passed to the Storage contract
         params = sp.record(
@@ -650,6 +1314,100 @@ class RegistryLogic(sp.Contract):
         # Calling the Storage contract with the parameters we defined
         sp.transfer(params, sp.mutez(0), storage_contract)
 
+    @sp.entry_point
+    def apply_status_changes(self, parameters):
+        self.run_entry_point(self.handle_apply_status_changes, parameters, sp.variant("apply_status_changes", parameters.changes))
+
+    def handle_apply_status_changes(self, parameters, sender_address):
+        # Defining the parameters' types
+        sp.set_type(parameters.changes, sp.TList(STATUS_CHANGE_TYPE))
+
+        # Accepted changes, grouped per Storage contract call
+        issuer_changes = sp.local("issuer_changes", sp.list([], t = sp.TRecord(issuer_did = sp.TString, status = sp.TNat)))
+        schema_changes = sp.local("schema_changes", sp.list([], t = sp.TRecord(schema_id = sp.TNat, status = sp.TNat)))
+        binding_changes = sp.local("binding_changes", sp.list([], t = sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat, status = sp.TNat)))
+
+        # Every change is checked with the same rules as the single status entry points
+        with sp.for_("change", parameters.changes) as change:
+            with change.match_cases() as arg:
+                with arg.match("issuer") as issuer_change:
+                    issuer_context = self.get_issuer_context(issuer_change.issuer_did)
+                    owner_address = issuer_context.issuer_owner
+                    current_issuer_status = issuer_context.status
+
+                    sp.verify(self.verify_issuer_status_change_allowed(
+                        sp.record(
+                            sender_address = sender_address,
+                            owner_address = owner_address,
+                            current_status = current_issuer_status,
+                            new_status = issuer_change.status
+                        )
+                    ), message = "Status change not allowed")
+
+                    # Verify status ID exists
+                    sp.verify(self.issuer_statuses().contains(issuer_change.status), message = "Incorrect status")
+
+                    issuer_changes.value.push(issuer_change)
+
+                with arg.match("schema") as schema_change:
+                    owner_address = self.get_schema_context(schema_change.schema_id).schema_owner
+
+                    sp.verify(self.verify_owner_source_address(
+                        sp.record(
+                            sender_address = sender_address,
+                            owner_address = owner_address,
+                        )
+                    ), message = "Incorrect owner")
+
+                    # Verify status ID exists
+                    sp.verify(self.schema_statuses().contains(schema_change.status), message = "Incorrect status")
+
+                    schema_changes.value.push(schema_change)
+
+                with arg.match("binding") as binding_change:
+                    issuer_context = self.get_issuer_context(binding_change.issuer_did)
+                    owner_address = issuer_context.issuer_owner
+                    current_issuer_status = issuer_context.status
+
+                    sp.verify(self.verify_issuer_status_change_allowed(
+                        sp.record(
+                            sender_address = sender_address,
+                            owner_address = owner_address,
+                            current_status = current_issuer_status,
+                            new_status = binding_change.status
+                        )
+                    ), message = "Status change not allowed")
+
+                    # Verify status ID exists
+                    sp.verify(self.issuer_statuses().contains(binding_change.status), message = "Incorrect status")
+
+                    binding_changes.value.push(binding_change)
+
+        # Calling each Storage contract once, keeping the order of the changes
+        with sp.if_(sp.len(issuer_changes.value) > 0):
+            issuer_storage_contract = sp.contract(
+                sp.TList(sp.TRecord(issuer_did = sp.TString, status = sp.TNat)),
+                self.get_contract_address('issuer_registry_contract'),
+                "change_statuses"
+            ).open_some()
+            sp.transfer(issuer_changes.value.rev(), sp.mutez(0), issuer_storage_contract)
+
+        with sp.if_(sp.len(schema_changes.value) > 0):
+            schema_storage_contract = sp.contract(
+                sp.TList(sp.TRecord(schema_id = sp.TNat, status = sp.TNat)),
+                self.get_contract_address('schema_registry_contract'),
+                "change_statuses"
+            ).open_some()
+            sp.transfer(schema_changes.value.rev(), sp.mutez(0), schema_storage_contract)
+
+        with sp.if_(sp.len(binding_changes.value) > 0):
+            binding_storage_contract = sp.contract(
+                sp.TList(sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat, status = sp.TNat)),
+                self.get_contract_address('schema_registry_contract'),
+                "set_binding_statuses"
+            ).open_some()
+            sp.transfer(binding_changes.value.rev(), sp.mutez(0), binding_storage_contract)
+
     @sp.onchain_view()
     def verify_binding(self, parameters):
         # Defining the parameters' types
@@ -677,10 +1435,125 @@ class RegistryLogic(sp.Contract):
         # Calling the Storage contract with the parameters we defined
         sp.result(binding_result)
 
+    @sp.onchain_view()
+    def verify_bindings(self, bindings):
+        # Defining the parameters' types
+        sp.set_type(bindings, sp.TList(sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat)))
+
+        # All the bindings are read in a single view of the Storage contract
+        binding_results = sp.view(
+            "verify_bindings",
+            self.get_contract_address('schema_registry_contract'),
+            bindings,
+            t = sp.TList(sp.TRecord(
+                binding_exists = sp.TBool,
+                status = sp.TNat
+            ))
+        ).open_some("Invalid view");
+
+        sp.result(binding_results)
+
+    @sp.onchain_view()
+    def list_schema_issuers(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.cursor, sp.TNat)
+        sp.set_type(parameters.limit, sp.TNat)
+
+        schema_issuers = sp.view(
+            "list_schema_issuers",
+            self.get_contract_address('schema_registry_contract'),
+            sp.record(
+                schema_id = parameters.schema_id,
+                cursor = parameters.cursor,
+                limit = parameters.limit
+            ),
+            t = SCHEMA_ISSUERS_TYPE
+        ).open_some("Invalid view");
+
+        sp.result(schema_issuers)
+
+    @sp.onchain_view()
+    def get_status_tables(self):
+        # Names of the status IDs returned by the views
+        sp.result(sp.set_type_expr(
+            sp.record(
+                issuer_statuses = self.issuer_statuses(),
+                schema_statuses = self.schema_statuses()
+            ),
+            STATUS_TABLES_TYPE
+        ))
+
+    @sp.onchain_view()
+    def get_credential_context(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.issuer_did, sp.TString)
+        sp.set_type(parameters.schema_id, sp.TNat)
+
+        # Only the owners and statuses are read, not the DID document or the schema content
+        issuer_context = sp.view(
+            "get_issuer_context",
+            self.get_contract_address('issuer_registry_contract'),
+            parameters.issuer_did,
+            t = sp.TOption(sp.TRecord(issuer_owner = sp.TAddress, status = sp.TNat))
+        ).open_some("Invalid view")
+
+        schema_context = sp.view(
+            "get_schema_context",
+            self.get_contract_address('schema_registry_contract'),
+            parameters.schema_id,
+            t = sp.TOption(sp.TRecord(schema_owner = sp.TAddress, status = sp.TNat))
+        ).open_some("Invalid view")
+
+        binding_result = sp.view(
+            "verify_binding",
+            self.get_contract_address('schema_registry_contract'),
+            sp.record(
+                issuer_did = parameters.issuer_did,
+                schema_id = parameters.schema_id
+            ),
+            t = sp.TRecord(
+                binding_exists = sp.TBool,
+                status = sp.TNat
+            )
+        ).open_some("Invalid view")
+
+        # Status 0 stands for an issuer, schema or binding that does not exist
+        issuer_status = sp.local("issuer_status", sp.nat(0))
+        with sp.if_(issuer_context.is_some()):
+            issuer_status.value = issuer_context.open_some().status
+
+        schema_status = sp.local("schema_status", sp.nat(0))
+        with sp.if_(schema_context.is_some()):
+            schema_status.value = schema_context.open_some().status
+
+        # A credential is valid only when its issuer, schema and binding are all active
+        sp.result(sp.record(
+            issuer_status = issuer_status.value,
+            schema_status = schema_status.value,
+            binding_status = binding_result.status,
+            valid = (issuer_status.value == 1) & (schema_status.value == 1) & (binding_result.status == 1)
+        ))
+
 @sp.add_test(name = "RegistryLogic")
 def test():
     sp.add_compilation_target("registryLogic",
         RegistryLogic(
             sp.address('tz1_certifier_address')
         )
-    )
\ No newline at end of file
+    )
+
+    # Views return status IDs, their names are given by get_status_tables
+    sp.add_compilation_target("registryLogicNumericStatuses",
+        RegistryLogic(
+            sp.address('tz1_certifier_address'),
+            numeric_statuses = True
+        )
+    )
+    # Same entry points and views, with the logic compiled once in the shared_action lambda
+    sp.add_compilation_target("registryLogicCompact",
+        RegistryLogic(
+            sp.address('tz1_certifier_address'),
+            compact = True
+        )
+    )
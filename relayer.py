@@ -0,0 +1,359 @@
+# Registry Permit Relayer
+#
+# Local service that collects Registry actions signed off-chain by issuers and
+# schema owners, and submits them in batches to the apply_permits entry point
+# of the RegistryLogic contract, from a single relayer account. The contract
+# checks the signature and the nonce of every permit, then applies the action
+# with the rights of the account that signed it.
+#
+# A signer asks the relayer for the bytes to sign, signs them with its wallet,
+# for example with `octez-client sign bytes 0x... for <alias>`, and posts the
+# permit back. Permits are queued in the order they are received, and every
+# batch is simulated before it is injected: a permit that fails is rejected
+# with the later permits of the same signer, whose nonces can no longer apply.
+#
+# Usage:
+#   python relayer.py serve relayer.json --port 8200 --batch-size 50 --interval 5
+#   curl -d '{"public_key": "edpk...", "action": "add_schema", "value": {"string": "schema_data"}}' http://localhost:8200/payload
+#   curl -d '{"public_key": "edpk...", "signature": "edsig...", "nonce": 0, "action_bytes": "05..."}' http://localhost:8200/permits
+#   curl http://localhost:8200/permits/1
+#
+# relayer.json:
+#   {
+#     "rpc": "http://localhost:20000",
+#     "octez_client": "octez-client",
+#     "source": {"alias": "relayer", "address": "tz1..."},
+#     "contracts": {"registry": "KT1...", "registry_logic": "KT1..."}
+#   }
+
+import argparse
+import hashlib
+import json
+import re
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import benchmark
+import indexer
+
+# Public key prefixes, with the prefix of the address of their hash
+PUBLIC_KEY_PREFIXES = {
+    bytes([13, 15, 37, 217]): bytes([6, 161, 159]),  # edpk, tz1
+    bytes([3, 254, 226, 86]): bytes([6, 161, 161]),  # sppk, tz2
+    bytes([3, 178, 139, 127]): bytes([6, 161, 164]),  # p2pk, tz3
+}
+
+# Type of the signed payload, sp.pack(sp.record(action, chain_id, contract, nonce))
+PAYLOAD_TYPE = {"prim": "pair", "args": [
+    {"prim": "pair", "args": [{"prim": "bytes"}, {"prim": "chain_id"}]},
+    {"prim": "pair", "args": [{"prim": "address"}, {"prim": "nat"}]}
+]}
+
+OPERATION_HASH = re.compile(r"Operation hash is '(o\w+)'")
+
+########
+# Keys #
+########
+
+def base58check_decode(text):
+    number = 0
+    for character in text:
+        number = number * 58 + indexer.BASE58_ALPHABET.index(character)
+    data = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    data = b"\x00" * (len(text) - len(text.lstrip("1"))) + data
+    payload, checksum = data[:-4], data[-4:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        raise ValueError("Invalid checksum in %s" % text)
+    return payload
+
+
+def key_address(public_key):
+    """Address of the implicit account of a public key, as sp.hash_key gives it."""
+    data = base58check_decode(public_key)
+    for prefix, address_prefix in PUBLIC_KEY_PREFIXES.items():
+        if data.startswith(prefix):
+            return indexer.base58check(address_prefix + hashlib.blake2b(data[len(prefix):], digest_size = 20).digest())
+    raise ValueError("Unknown public key %s" % public_key)
+
+###########
+# Permits #
+###########
+
+def permit_value(permit):
+    """Micheline of a permit, in the layout of PERMIT_TYPE."""
+    return benchmark.record(
+        action = benchmark.hex_bytes(permit["action_bytes"]),
+        nonce = benchmark.nat(permit["nonce"]),
+        public_key = benchmark.string(permit["public_key"]),
+        signature = benchmark.string(permit["signature"])
+    )
+
+
+class Relayer:
+    def __init__(self, config, batch_size = 50):
+        self.node = benchmark.Node(config["rpc"])
+        self.octez_client = config.get("octez_client", "octez-client")
+        self.source_alias = config["source"]["alias"]
+        self.source = config["source"]["address"]
+        self.contracts = config["contracts"]
+        self.batch_size = batch_size
+
+        self.chain_id = self.node.request("/chains/main/chain_id")
+        constants = self.node.head("/context/constants")
+        self.gas_limit = int(constants["hard_gas_limit_per_operation"])
+        self.storage_limit = int(constants["hard_storage_limit_per_operation"])
+        self.dispatch_type = self.node.head("/context/contracts/%s/entrypoints/dispatch" % self.contracts["registry"])["entrypoint_type"]
+
+        self.lock = threading.Lock()
+        self.queue = []
+        self.permits = {}
+        self.last_id = 0
+        self.stats = {"received": 0, "included": 0, "rejected": 0, "batches": 0}
+
+    # Preparing permits
+
+    def run_view(self, view, value):
+        return self.node.post_head("/helpers/scripts/run_script_view", {
+            "contract": self.contracts["registry_logic"],
+            "view": view,
+            "input": value,
+            "chain_id": self.chain_id,
+            "source": self.source,
+            "unlimited_gas": True,
+            "unparsing_mode": "Readable",
+        })["data"]
+
+    def pack_action(self, action, value):
+        packed = self.node.post_head("/helpers/scripts/pack_data", {
+            "data": benchmark.variant(benchmark.variant_cases(self.dispatch_type), action, value),
+            "type": benchmark.strip_annotations(self.dispatch_type)
+        })
+        return packed["packed"]
+
+    def next_nonce(self, signer):
+        """Nonce of the next permit of a signer, after the permits already queued."""
+        applied = int(self.run_view("get_permit_nonce", benchmark.string(signer))["int"])
+        with self.lock:
+            queued = [permit for permit in self.queue if permit["signer"] == signer]
+        return applied + len(queued)
+
+    def payload(self, request):
+        signer = request.get("signer") or key_address(request["public_key"])
+        action_bytes = request.get("action_bytes") or self.pack_action(request["action"], request["value"])
+        nonce = request.get("nonce")
+        if nonce is None:
+            # Reading the nonce costs a view call, only made when the signer does not give it
+            nonce = self.next_nonce(signer)
+
+        packed = self.node.post_head("/helpers/scripts/pack_data", {
+            "data": {"prim": "Pair", "args": [
+                {"prim": "Pair", "args": [{"bytes": action_bytes}, {"string": self.chain_id}]},
+                {"prim": "Pair", "args": [{"string": self.contracts["registry_logic"]}, {"int": str(nonce)}]}
+            ]},
+            "type": PAYLOAD_TYPE
+        })
+        return {"signer": signer, "nonce": nonce, "action_bytes": action_bytes, "payload": packed["packed"]}
+
+    def submit(self, request):
+        permit = {
+            "public_key": request["public_key"],
+            "signature": request["signature"],
+            "nonce": int(request["nonce"]),
+            "action_bytes": request["action_bytes"][2:] if request["action_bytes"].startswith("0x") else request["action_bytes"],
+            "signer": key_address(request["public_key"]),
+        }
+
+        with self.lock:
+            self.last_id += 1
+            permit["id"] = self.last_id
+            permit["status"] = "queued"
+            self.queue.append(permit)
+            self.permits[permit["id"]] = permit
+            self.stats["received"] += 1
+            return {"id": permit["id"], "signer": permit["signer"], "position": len(self.queue)}
+
+    # Submitting batches
+
+    def simulate(self, permits):
+        """Errors of apply_permits with these permits, None if it would succeed."""
+        counter = int(self.node.head("/context/contracts/%s/counter" % self.source))
+        branch = self.node.request("/chains/main/blocks/head/hash")
+        content = {
+            "kind": "transaction",
+            "source": self.source,
+            "fee": "0",
+            "counter": str(counter + 1),
+            "gas_limit": str(self.gas_limit),
+            "storage_limit": str(self.storage_limit),
+            "amount": "0",
+            "destination": self.contracts["registry_logic"],
+            "parameters": {"entrypoint": "apply_permits", "value": [permit_value(permit) for permit in permits]}
+        }
+        simulation = self.node.post_head("/helpers/scripts/run_operation", {
+            "operation": {"branch": branch, "contents": [content], "signature": benchmark.SIMULATION_SIGNATURE},
+            "chain_id": self.chain_id
+        })
+
+        metadata = simulation["contents"][0]["metadata"]
+        results = [metadata["operation_result"]] + [internal["result"] for internal in metadata.get("internal_operation_results", [])]
+        errors = [error for result in results if result["status"] != "applied" for error in result.get("errors", [])]
+        return errors or None
+
+    def first_failing(self, permits):
+        """Index of the first permit that makes the batch fail, the batch failing as a whole."""
+        # A batch that fails at a permit fails with any later permit added
+        low, high = 0, len(permits) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self.simulate(permits[:middle + 1]) is None:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def reject(self, permit, errors):
+        permit["status"] = "rejected"
+        permit["errors"] = errors
+        self.stats["rejected"] += 1
+
+    def next_batch(self):
+        """Take the next batch from the queue, without the permits that would make it fail."""
+        with self.lock:
+            batch = self.queue[:self.batch_size]
+
+        while batch:
+            errors = self.simulate(batch)
+            if errors is None:
+                break
+
+            failing = batch[self.first_failing(batch)]
+            # The later permits of the same signer can no longer match its nonce
+            dropped = [permit for permit in batch if permit["signer"] == failing["signer"] and permit["nonce"] >= failing["nonce"]]
+            with self.lock:
+                for permit in dropped:
+                    self.reject(permit, errors if permit is failing else ["Previous permit of the signer rejected"])
+                    self.queue.remove(permit)
+            batch = [permit for permit in batch if permit not in dropped]
+        return batch
+
+    def inject(self, batch):
+        value = [permit_value(permit) for permit in batch]
+        output = subprocess.run([
+            self.octez_client, "--endpoint", self.node.rpc, "--wait", "1",
+            "transfer", "0", "from", self.source_alias, "to", self.contracts["registry_logic"],
+            "--entrypoint", "apply_permits", "--arg", benchmark.to_michelson(value), "--burn-cap", "10"
+        ], check = True, capture_output = True, text = True).stdout
+        operation_hash = OPERATION_HASH.search(output)
+        return operation_hash.group(1) if operation_hash else None
+
+    def flush(self):
+        batch = self.next_batch()
+        if not batch:
+            return 0
+
+        operation_hash = self.inject(batch)
+        with self.lock:
+            for permit in batch:
+                permit["status"] = "included"
+                permit["operation_hash"] = operation_hash
+                self.queue.remove(permit)
+            self.stats["included"] += len(batch)
+            self.stats["batches"] += 1
+        return len(batch)
+
+    def run(self, interval):
+        while True:
+            try:
+                # Batches are sent back to back while the queue is full
+                if self.flush() < self.batch_size:
+                    time.sleep(interval)
+            except Exception as error:
+                print("relayer: %s" % error, file = sys.stderr)
+                time.sleep(interval)
+
+
+###############
+# HTTP server #
+###############
+
+def make_handler(relayer):
+    class RelayerHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = self.path.strip("/").split("/")
+            if parts == ["status"]:
+                with relayer.lock:
+                    self.send_json(200, dict(relayer.stats, queued = len(relayer.queue)))
+            elif len(parts) == 2 and parts[0] == "permits" and parts[1].isdigit() and int(parts[1]) in relayer.permits:
+                with relayer.lock:
+                    permit = relayer.permits[int(parts[1])]
+                    self.send_json(200, {name: permit[name] for name in ("id", "signer", "nonce", "status", "operation_hash", "errors") if name in permit})
+            else:
+                self.send_json(404, {"error": "Unknown path"})
+
+        def do_POST(self):
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if self.path == "/payload":
+                    self.send_json(200, relayer.payload(request))
+                elif self.path == "/permits":
+                    self.send_json(202, relayer.submit(request))
+                else:
+                    self.send_json(404, {"error": "Unknown path"})
+            except (KeyError, ValueError) as error:
+                self.send_json(400, {"error": "Invalid request: %s" % error})
+            except RuntimeError as error:
+                self.send_json(502, {"error": str(error)})
+
+        def send_json(self, code, body):
+            payload = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return RelayerHandler
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Relayer of signed Registry permits")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    serve_parser = subparsers.add_parser("serve", help = "collect permits over HTTP and submit them in batches")
+    serve_parser.add_argument("config")
+    serve_parser.add_argument("--host", default = "127.0.0.1")
+    serve_parser.add_argument("--port", type = int, default = 8200)
+    serve_parser.add_argument("--batch-size", type = int, default = 50, help = "permits per operation")
+    serve_parser.add_argument("--interval", type = float, default = 5, help = "seconds between batches when the queue is not full")
+
+    address_parser = subparsers.add_parser("address", help = "print the address that signs with a public key")
+    address_parser.add_argument("public_key")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "address":
+        print(key_address(args.public_key))
+        return 0
+
+    with open(args.config) as config_file:
+        relayer = Relayer(json.load(config_file), args.batch_size)
+
+    threading.Thread(target = relayer.run, args = (args.interval,), daemon = True).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(relayer))
+    print("Relaying permits to %s on http://%s:%d" % (relayer.contracts["registry_logic"], args.host, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,495 @@
+# Registry Resolver
+#
+# Local HTTP service answering get_issuer, get_schema and verify_binding from a
+# cache, for verifiers that check many credentials. Results are read with the
+# views of the Registry contract at a block level, and stay in the cache until
+# a new block changes the big map key they were read from in the
+# IssuerRegistry or SchemaRegistry contract, or until they expire. Keys that
+# no block touches are kept across levels.
+#
+# All the reads of a request are made at the same block level, so that the
+# issuer, the schema and the binding of a credential are consistent. Requests
+# for the same key at the same level share a single view call.
+#
+# Usage:
+#   python resolver.py serve --rpc http://localhost:20000 --registry KT1... --registry-logic KT1... \
+#       --issuer-registry KT1... --schema-registry KT1... --port 8100
+#   curl http://localhost:8100/issuers/did:tz:...
+#   curl "http://localhost:8100/context?issuer_did=did:tz:...&schema_id=0"
+#   python resolver.py bench
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import indexer
+
+# Results of the Registry views, with the order of their Michelson leaves. The
+# types are those of the regular build: the served Registry is read with
+# view_types, as the numeric_statuses build returns the statuses as nat.
+VIEWS = {
+    "issuer": ("get_issuer", [("issuer_data", "string"), ("issuer_owner", "address"), ("status", "string")]),
+    "schema": ("get_schema", [("schema_data", "string"), ("status", "string")]),
+    "binding": ("verify_binding", [("binding_exists", "bool"), ("status", "nat")]),
+}
+
+# Messages of get_schema for the schemas it does not return, answered as invalid requests
+SCHEMA_VIEW_REASONS = (
+    "Schema is stored in chunks, read it with get_schema_chunk",
+    "Schema is stored off-chain, read it with get_schema_reference"
+)
+
+# Cache keys touched by the big map updates of the storage contracts
+BIG_MAP_KEYS = {
+    "issuer_map": lambda key: ("issuer", key["issuer_did"]),
+    "issuer_data_sections": lambda key: ("issuer", key["issuer_did"]),
+    "schema_map": lambda key: ("schema", key["schema_id"]),
+    "issuer_schema_map": lambda key: ("binding", (key["issuer_did"], key["schema_id"])),
+}
+
+# Entry points that change the contracts the views read from
+CONTRACT_UPDATE_ENTRY_POINTS = {"update_logic_contract_address", "update_contract_address", "change_logic_contract_address"}
+
+
+class NotFound(Exception):
+    pass
+
+#########
+# Cache #
+#########
+
+class Cache:
+    """LRU cache whose entries also expire after ttl seconds."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires"] < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, value, level):
+        self.entries[key] = {"value": value, "level": level, "expires": time.monotonic() + self.ttl}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last = False)
+
+    def invalidate(self, key):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+############
+# Resolver #
+############
+
+class Resolver:
+    def __init__(self, fetch, level, max_entries = 100000, ttl = 300):
+        # fetch(kind, key, level) returns the view result, or raises NotFound
+        self.fetch = fetch
+        self.level = level
+        self.cache = Cache(max_entries, ttl)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0, "flushes": 0}
+
+    def resolve(self, kind, key, level = None):
+        """Return (value, level) for a key, read at level or at the current level."""
+        with self.lock:
+            if level is None:
+                level = self.level
+            entry = self.cache.get((kind, key))
+            # An entry is valid from the level it was read at, up to the current level
+            if entry is not None and entry["level"] <= level:
+                self.stats["hits"] += 1
+                return entry["value"], level
+
+            # Requests for a key that is being read wait for the same view call
+            flight_key = (kind, key, level)
+            future = self.in_flight.get(flight_key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+            else:
+                self.stats["misses"] += 1
+                self.in_flight[flight_key] = Future()
+        if future is not None:
+            return future.result(), level
+        future = self.in_flight[flight_key]
+
+        try:
+            try:
+                value = self.fetch(kind, key, level)
+            except NotFound:
+                value = None
+            with self.lock:
+                # A newer block may have changed the key while it was read
+                if level == self.level:
+                    self.cache.put((kind, key), value, level)
+            future.set_result(value)
+        except Exception as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(flight_key, None)
+        return value, level
+
+    def context(self, issuer_did, schema_id):
+        """Issuer, schema and binding of a credential, all read at the same level."""
+        with self.lock:
+            level = self.level
+        issuer, _ = self.resolve("issuer", issuer_did, level)
+        schema, _ = self.resolve("schema", schema_id, level)
+        binding, _ = self.resolve("binding", (issuer_did, schema_id), level)
+        return {"level": level, "issuer": issuer, "schema": schema, "binding": binding}
+
+    def advance(self, level, touched_keys):
+        """Move to a new block level, dropping the keys changed by its operations."""
+        with self.lock:
+            for key in touched_keys:
+                self.cache.invalidate(key)
+            self.stats["invalidations"] += len(touched_keys)
+            self.level = level
+
+    def flush(self, level):
+        with self.lock:
+            self.cache.clear()
+            self.stats["flushes"] += 1
+            self.level = level
+
+#################
+# Chain watcher #
+#################
+
+def touched_keys(block, big_maps):
+    """Cache keys changed by a block, or None if the whole cache must be dropped."""
+    keys = set()
+    for content, result in indexer.operation_results(block):
+        parameters = content.get("parameters") or {}
+        if parameters.get("entrypoint") in CONTRACT_UPDATE_ENTRY_POINTS:
+            return None
+
+        for diff in result.get("lazy_storage_diff", []):
+            if diff["kind"] != "big_map" or int(diff["id"]) not in big_maps:
+                continue
+            contract, name = big_maps[int(diff["id"])]
+            if name not in BIG_MAP_KEYS:
+                continue
+            _, key_columns, _ = indexer.BIG_MAPS[contract][name]
+            for update in diff["diff"].get("updates", []):
+                keys.add(BIG_MAP_KEYS[name](indexer.decode_columns(update["key"], key_columns)))
+    return keys
+
+
+class ChainWatcher(threading.Thread):
+    """Follows the head of the node and moves the resolver to every new level."""
+
+    def __init__(self, source, resolver, storage_contracts, interval = 1.0):
+        super().__init__(daemon = True)
+        self.source = source
+        self.resolver = resolver
+        self.interval = interval
+        self.big_maps = {}
+        for contract, address in storage_contracts.items():
+            script = source.script(address)
+            for name, (_, _, big_map_id) in indexer.annotated_big_maps(indexer.storage_type(script), script["storage"]).items():
+                if name in indexer.BIG_MAPS[contract]:
+                    self.big_maps[big_map_id] = (contract, name)
+        self.last_hash = source.block_hash(resolver.level)
+
+    def poll(self):
+        head = self.source.head_level()
+        level = self.resolver.level
+        while level < head:
+            block = self.source.block(level + 1)
+            keys = touched_keys(block, self.big_maps)
+            if block["header"]["predecessor"] != self.last_hash or keys is None:
+                # Reorganization or new storage contracts, nothing cached can be trusted
+                self.resolver.flush(block["header"]["level"])
+            else:
+                self.resolver.advance(block["header"]["level"], keys)
+            self.last_hash = block["hash"]
+            level = block["header"]["level"]
+
+    def run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as error:
+                print("watcher: %s" % error, file = sys.stderr)
+            time.sleep(self.interval)
+
+#########
+# Views #
+#########
+
+def view_input(kind, key):
+    if kind == "issuer":
+        return {"string": key}
+    if kind == "schema":
+        return {"int": str(key)}
+    return {"prim": "Pair", "args": [{"string": key[0]}, {"int": str(key[1])}]}
+
+
+def type_leaves(type_node):
+    if type_node["prim"] == "pair":
+        return [leaf for arg in type_node["args"] for leaf in type_leaves(arg)]
+    return [type_node]
+
+
+def view_types(script):
+    """VIEWS with the result types declared by the views of a Registry script."""
+    declared = {node["args"][0]["string"]: node["args"][2] for node in script["code"] if node.get("prim") == "view"}
+    views = {}
+    for kind, (view, columns) in VIEWS.items():
+        if view not in declared:
+            raise RuntimeError("The Registry has no %s view" % view)
+        leaves = type_leaves(declared[view])
+        if len(leaves) != len(columns):
+            raise RuntimeError("Unexpected result type of the %s view" % view)
+        views[kind] = (view, [(name, leaf["prim"]) for (name, _), leaf in zip(columns, leaves)])
+    return views
+
+
+def decode_view(kind, data, views = VIEWS):
+    _, columns = views[kind]
+    leaves = indexer.flatten(data)
+    result = {}
+    for (name, column_type), leaf in zip(columns, leaves):
+        if column_type == "bool":
+            result[name] = leaf.get("prim") == "True"
+        else:
+            result[name] = indexer.decode_leaf(leaf, column_type)
+    return result
+
+
+def rpc_fetcher(source, registry, chain_id, views = VIEWS):
+    def fetch(kind, key, level):
+        view, _ = views[kind]
+        body = json.dumps({
+            "contract": registry,
+            "view": view,
+            "input": view_input(kind, key),
+            "chain_id": chain_id,
+            "unlimited_gas": True,
+            "unparsing_mode": "Readable"
+        }).encode()
+        request = urllib.request.Request(
+            "%s/chains/main/blocks/%d/helpers/scripts/run_script_view" % (source.rpc, level),
+            data = body,
+            headers = {"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return decode_view(kind, json.loads(response.read())["data"], views)
+        except urllib.error.HTTPError as error:
+            # The views fail when the issuer or schema does not exist, and get_schema
+            # when the schema is stored in chunks or off-chain
+            message = error.read().decode(errors = "replace")
+            for reason in SCHEMA_VIEW_REASONS:
+                if reason in message:
+                    raise ValueError(reason)
+            if "script_rejected" in message:
+                raise NotFound()
+            raise
+    return fetch
+
+###############
+# HTTP server #
+###############
+
+def make_handler(resolver, latencies):
+    class ResolverHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            parts = [urllib.parse.unquote(part) for part in url.path.strip("/").split("/")]
+            query = urllib.parse.parse_qs(url.query)
+            started = time.perf_counter()
+
+            try:
+                if len(parts) == 2 and parts[0] == "issuers":
+                    body = self.result(*resolver.resolve("issuer", parts[1]))
+                elif len(parts) == 2 and parts[0] == "schemas":
+                    body = self.result(*resolver.resolve("schema", int(parts[1])))
+                elif len(parts) == 3 and parts[0] == "bindings":
+                    body = self.result(*resolver.resolve("binding", (parts[1], int(parts[2]))))
+                elif parts == ["context"]:
+                    body = resolver.context(query["issuer_did"][0], int(query["schema_id"][0]))
+                elif parts == ["stats"]:
+                    body = dict(resolver.stats, level = resolver.level, entries = len(resolver.cache.entries),
+                        latency = percentiles(latencies.snapshot()))
+                else:
+                    self.send_json(404, {"error": "Unknown path"})
+                    return
+            except (KeyError, ValueError) as error:
+                self.send_json(400, {"error": "Invalid request: %s" % error})
+                return
+            except Exception as error:
+                self.send_json(502, {"error": str(error)})
+                return
+
+            latencies.add(time.perf_counter() - started)
+            self.send_json(200 if body.get("result", True) is not None else 404, body)
+
+        def result(self, value, level):
+            return {"level": level, "result": value}
+
+        def send_json(self, code, body):
+            payload = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ResolverHandler
+
+
+class Latencies:
+    """The last latencies measured, to report percentiles."""
+
+    def __init__(self, size = 10000):
+        self.size = size
+        self.values = []
+        self.lock = threading.Lock()
+
+    def add(self, value):
+        with self.lock:
+            self.values.append(value)
+            if len(self.values) > self.size:
+                del self.values[:len(self.values) - self.size]
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.values)
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    values = sorted(values)
+    def at(fraction):
+        return values[min(len(values) - 1, int(fraction * len(values)))] * 1000
+    return {"count": len(values), "p50_ms": at(0.50), "p99_ms": at(0.99), "max_ms": values[-1] * 1000}
+
+#############
+# Benchmark #
+#############
+
+def bench(keys, requests, threads, fetch_delay):
+    """Latency of cache hits and of coalesced misses, with a fetch that takes fetch_delay seconds."""
+    def fetch(kind, key, level):
+        time.sleep(fetch_delay)
+        return {"issuer_data": "issuer_data", "issuer_owner": "tz1", "status": "active"}
+
+    resolver = Resolver(fetch, level = 1, max_entries = keys)
+    dids = ["did:bench:%d" % index for index in range(keys)]
+
+    # Cold: each key is asked for 4 times at once, and read once
+    with ThreadPoolExecutor(max_workers = threads) as executor:
+        list(executor.map(lambda did: resolver.resolve("issuer", did), [did for did in dids for _ in range(4)]))
+    cold = dict(resolver.stats)
+
+    # Hot: random keys, all in the cache
+    def worker(count):
+        measured = []
+        generator = random.Random(count)
+        for _ in range(count):
+            did = dids[generator.randrange(keys)]
+            started = time.perf_counter()
+            resolver.resolve("issuer", did)
+            measured.append(time.perf_counter() - started)
+        return measured
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = threads) as executor:
+        results = list(executor.map(worker, [requests // threads] * threads))
+    elapsed = time.perf_counter() - started
+    latencies = [value for result in results for value in result]
+
+    # Invalidation: one block touching 1% of the keys
+    touched = {("issuer", did) for did in dids[:max(1, keys // 100)]}
+    resolver.advance(2, touched)
+
+    print(json.dumps({
+        "cold": {"requests": keys * 4, "view_calls": cold["misses"], "coalesced": cold["coalesced"]},
+        "hits": dict(percentiles(latencies), requests_per_second = round(len(latencies) / elapsed)),
+        "after_block": {"entries": len(resolver.cache.entries), "invalidated": len(touched)}
+    }, indent = 2))
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Caching resolver for the Registry views")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    serve_parser = subparsers.add_parser("serve", help = "serve the Registry views over HTTP")
+    serve_parser.add_argument("--rpc", required = True)
+    serve_parser.add_argument("--registry", required = True)
+    serve_parser.add_argument("--registry-logic", required = True)
+    serve_parser.add_argument("--issuer-registry", required = True)
+    serve_parser.add_argument("--schema-registry", required = True)
+    serve_parser.add_argument("--host", default = "127.0.0.1")
+    serve_parser.add_argument("--port", type = int, default = 8100)
+    serve_parser.add_argument("--max-entries", type = int, default = 100000)
+    serve_parser.add_argument("--ttl", type = float, default = 300, help = "seconds before a cached result is read again")
+    serve_parser.add_argument("--poll", type = float, default = 1.0, help = "seconds between head polls")
+
+    bench_parser = subparsers.add_parser("bench", help = "measure the cache latency without a node")
+    bench_parser.add_argument("--keys", type = int, default = 10000)
+    bench_parser.add_argument("--requests", type = int, default = 200000)
+    bench_parser.add_argument("--threads", type = int, default = 8)
+    bench_parser.add_argument("--fetch-delay", type = float, default = 0.005)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        bench(args.keys, args.requests, args.threads, args.fetch_delay)
+        return 0
+
+    source = indexer.RpcSource(args.rpc)
+    chain_id = source.get("/chains/main/chain_id")
+    resolver = Resolver(
+        rpc_fetcher(source, args.registry, chain_id, view_types(source.script(args.registry))),
+        source.head_level(),
+        max_entries = args.max_entries,
+        ttl = args.ttl
+    )
+
+    watcher = ChainWatcher(source, resolver, {
+        "issuer_registry": args.issuer_registry,
+        "schema_registry": args.schema_registry
+    }, args.poll)
+    watcher.start()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(resolver, Latencies()))
+    print("Resolving from %s on http://%s:%d" % (args.rpc, args.host, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
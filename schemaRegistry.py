@@ -2,6 +2,9 @@
 
 import smartpy as sp
 
+# Chunks deleted by a call of cancel_upload, larger uploads are cancelled in several calls
+CANCELLED_CHUNKS_PER_CALL = 50
+
 class SchemaRegistry(sp.Contract):
     def __init__(self, logic_contract_address, certifier):
         self.init_type(
@@ -15,12 +18,69 @@ class SchemaRegistry(sp.Contract):
                     )
                 ),
                 issuer_schema_map = sp.TBigMap(
-                    sp.TString,
-                    sp.TMap(
-                        sp.TNat,
-                        sp.TNat,
+                    sp.TRecord(
+                        issuer_did = sp.TString,
+                        schema_id = sp.TNat
+                    ),
+                    sp.TNat
+                ),
+                schema_reference_map = sp.TBigMap(
+                    sp.TNat,
+                    sp.TRecord(
+                        schema_hash = sp.TBytes,
+                        schema_uri = sp.TString
                     )
-                ), 
+                ),
+                owner_schemas = sp.TBigMap(
+                    sp.TRecord(
+                        owner = sp.TAddress,
+                        position = sp.TNat
+                    ),
+                    sp.TNat
+                ),
+                owner_schema_count = sp.TBigMap(
+                    sp.TAddress,
+                    sp.TNat
+                ),
+                schema_positions = sp.TBigMap(
+                    sp.TNat,
+                    sp.TNat
+                ),
+                schema_issuers = sp.TBigMap(
+                    sp.TRecord(
+                        schema_id = sp.TNat,
+                        position = sp.TNat
+                    ),
+                    sp.TString
+                ),
+                schema_issuer_count = sp.TBigMap(
+                    sp.TNat,
+                    sp.TNat
+                ),
+                schema_hash_ids = sp.TBigMap(
+                    sp.TBytes,
+                    sp.TNat
+                ),
+                schema_uploads = sp.TBigMap(
+                    sp.TNat,
+                    sp.TRecord(
+                        schema_owner = sp.TAddress,
+                        chunk_count = sp.TNat,
+                        content_hash = sp.TBytes,
+                        cancelled = sp.TBool
+                    )
+                ),
+                schema_chunks = sp.TBigMap(
+                    sp.TRecord(
+                        schema_id = sp.TNat,
+                        index = sp.TNat
+                    ),
+                    sp.TString
+                ),
+                schema_chunk_count = sp.TBigMap(
+                    sp.TNat,
+                    sp.TNat
+                ),
                 schema_last_id = sp.TNat,
                 logic_contract_address = sp.TAddress,
                 certifier = sp.TAddress
@@ -29,35 +89,319 @@ class SchemaRegistry(sp.Contract):
         self.init(
             schema_map = sp.big_map(),
             issuer_schema_map = sp.big_map(),
+            schema_reference_map = sp.big_map(),
+            owner_schemas = sp.big_map(),
+            owner_schema_count = sp.big_map(),
+            schema_positions = sp.big_map(),
+            schema_issuers = sp.big_map(),
+            schema_issuer_count = sp.big_map(),
+            schema_hash_ids = sp.big_map(),
+            schema_uploads = sp.big_map(),
+            schema_chunks = sp.big_map(),
+            schema_chunk_count = sp.big_map(),
             schema_last_id = 0,
             logic_contract_address = logic_contract_address,
             certifier = certifier
         )
 
+    # Append a schema to the index of its owner
+    def index_schema(self, schema_owner, schema_id):
+        position = sp.compute(self.data.owner_schema_count.get(schema_owner, default_value = 0))
+
+        self.data.owner_schemas[sp.record(owner = schema_owner, position = position)] = schema_id
+        self.data.schema_positions[schema_id] = position
+        self.data.owner_schema_count[schema_owner] = position + 1
+
+    # Remove a schema from the index of its owner, the last schema of the owner takes its position
+    def unindex_schema(self, schema_owner, schema_id):
+        position = sp.compute(self.data.schema_positions[schema_id])
+        last_position = sp.compute(sp.as_nat(self.data.owner_schema_count[schema_owner] - 1))
+
+        with sp.if_(position != last_position):
+            last_schema_id = sp.compute(self.data.owner_schemas[sp.record(owner = schema_owner, position = last_position)])
+            self.data.owner_schemas[sp.record(owner = schema_owner, position = position)] = last_schema_id
+            self.data.schema_positions[last_schema_id] = position
+
+        del self.data.owner_schemas[sp.record(owner = schema_owner, position = last_position)]
+        del self.data.schema_positions[schema_id]
+        self.data.owner_schema_count[schema_owner] = last_position
+
+    # SHA-256 hash of the schema content, the same as the hash of the schema file.
+    # The packed string is the content after a 6 bytes prefix
+    def content_hash(self, schema_data):
+        packed_data = sp.compute(sp.pack(schema_data))
+        return sp.compute(sp.sha256(sp.slice(packed_data, 6, sp.as_nat(sp.len(packed_data) - 6)).open_some()))
+
+    # Store a new schema under the next ID, or reuse the active schema of the same owner with the same content
+    def store_schema(self, schema_data, schema_owner, status):
+        schema_hash = self.content_hash(schema_data)
+        reused = sp.local("reused", False)
+
+        with sp.if_(self.data.schema_hash_ids.contains(schema_hash)):
+            existing_id = sp.compute(self.data.schema_hash_ids[schema_hash])
+
+            # The active schema with the same content is reused whatever its owner, binding an issuer
+            # to it does not require owning it. Nothing is stored, the event gives clients its ID
+            with sp.if_(self.data.schema_map[existing_id].status == 1):
+                sp.emit(sp.record(schema_id = existing_id, schema_owner = schema_owner), tag = "schema_reused")
+                reused.value = True
+
+        with sp.if_(~reused.value):
+            self.data.schema_map[self.data.schema_last_id] = sp.record(
+                schema_data = schema_data,
+                schema_owner = schema_owner,
+                status = status
+            )
+            # A deprecated schema with the same content is no longer found by its hash
+            self.data.schema_hash_ids[schema_hash] = self.data.schema_last_id
+            self.index_schema(schema_owner, self.data.schema_last_id)
+
+            # The event gives clients the ID assigned to the schema
+            sp.emit(
+                sp.record(schema_id = self.data.schema_last_id, schema_owner = schema_owner, status = status),
+                tag = "schema_added"
+            )
+
+            self.data.schema_last_id += 1
+
+    # Append the issuer of a new binding to the index of the schema, bindings are never removed
+    def index_binding(self, binding_key):
+        with sp.if_(~self.data.issuer_schema_map.contains(binding_key)):
+            position = sp.compute(self.data.schema_issuer_count.get(binding_key.schema_id, default_value = 0))
+
+            self.data.schema_issuers[sp.record(schema_id = binding_key.schema_id, position = position)] = binding_key.issuer_did
+            self.data.schema_issuer_count[binding_key.schema_id] = position + 1
+
     @sp.entry_point
     def add(self, parameters):
         # Verifying whether the caller address is our Registry contract
         sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
 
-        self.data.schema_map[self.data.schema_last_id] = parameters
+        self.store_schema(parameters.schema_data, parameters.schema_owner, parameters.status)
+
+    @sp.entry_point
+    def add_schemas(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.schemas_data, sp.TList(sp.TString))
+        sp.set_type(parameters.schema_owner, sp.TAddress)
+        sp.set_type(parameters.status, sp.TNat)
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        # Stored schemas get consecutive IDs in the order of the list, reused ones keep their ID
+        with sp.for_("schema_data", parameters.schemas_data) as schema_data:
+            self.store_schema(schema_data, parameters.schema_owner, parameters.status)
+
+    @sp.entry_point
+    def add_reference(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_hash, sp.TBytes)
+        sp.set_type(parameters.schema_uri, sp.TString)
+        sp.set_type(parameters.schema_owner, sp.TAddress)
+        sp.set_type(parameters.status, sp.TNat)
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        # The schema content is kept off-chain, only its hash and location are stored
+        self.data.schema_map[self.data.schema_last_id] = sp.record(
+            schema_data = "",
+            schema_owner = parameters.schema_owner,
+            status = parameters.status
+        )
+        self.data.schema_reference_map[self.data.schema_last_id] = sp.record(
+            schema_hash = parameters.schema_hash,
+            schema_uri = parameters.schema_uri
+        )
+        self.index_schema(parameters.schema_owner, self.data.schema_last_id)
+
+        sp.emit(
+            sp.record(schema_id = self.data.schema_last_id, schema_owner = parameters.schema_owner, status = parameters.status),
+            tag = "schema_added"
+        )
+
+        self.data.schema_last_id += 1
+
+    @sp.entry_point
+    def begin_upload(self, schema_owner):
+        # Defining the parameters' types
+        sp.set_type(schema_owner, sp.TAddress)
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        # The schema ID is reserved now, the schema is added when the upload is finalized
+        self.data.schema_uploads[self.data.schema_last_id] = sp.record(
+            schema_owner = schema_owner,
+            chunk_count = 0,
+            content_hash = sp.bytes("0x"),
+            cancelled = False
+        )
+
+        # The event gives clients the ID to upload the chunks to
+        sp.emit(sp.record(schema_id = self.data.schema_last_id, schema_owner = schema_owner), tag = "schema_upload_started")
+
         self.data.schema_last_id += 1
 
+    @sp.entry_point
+    def append_chunk(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.schema_owner, sp.TAddress)
+        sp.set_type(parameters.chunk, sp.TString)
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        sp.verify(self.data.schema_uploads.contains(parameters.schema_id), message = "Upload does not exist")
+        upload = sp.compute(self.data.schema_uploads[parameters.schema_id])
+        sp.verify(upload.schema_owner == parameters.schema_owner, message = "Incorrect owner")
+        sp.verify(~upload.cancelled, message = "Upload is cancelled")
+
+        self.data.schema_chunks[sp.record(schema_id = parameters.schema_id, index = upload.chunk_count)] = parameters.chunk
+
+        # The content hash is chained over the chunks, sha256(content_hash + pack(chunk)), so that
+        # it is updated without reading the previous chunks
+        self.data.schema_uploads[parameters.schema_id] = sp.record(
+            schema_owner = upload.schema_owner,
+            chunk_count = upload.chunk_count + 1,
+            content_hash = sp.sha256(sp.concat([upload.content_hash, sp.pack(parameters.chunk)])),
+            cancelled = False
+        )
+
+    @sp.entry_point
+    def finalize_upload(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.schema_owner, sp.TAddress)
+        sp.set_type(parameters.content_hash, sp.TBytes)
+        sp.set_type(parameters.status, sp.TNat)
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        sp.verify(self.data.schema_uploads.contains(parameters.schema_id), message = "Upload does not exist")
+        upload = sp.compute(self.data.schema_uploads[parameters.schema_id])
+        sp.verify(upload.schema_owner == parameters.schema_owner, message = "Incorrect owner")
+
+        # The chunks must be the content the owner computed the hash of
+        sp.verify(~upload.cancelled, message = "Upload is cancelled")
+        sp.verify(upload.chunk_count > 0, message = "Upload has no chunks")
+        sp.verify(upload.content_hash == parameters.content_hash, message = "Incorrect content hash")
+
+        # The schema content is kept in its chunks, read with the get_chunk view
+        self.data.schema_map[parameters.schema_id] = sp.record(
+            schema_data = "",
+            schema_owner = parameters.schema_owner,
+            status = parameters.status
+        )
+        self.data.schema_chunk_count[parameters.schema_id] = upload.chunk_count
+        del self.data.schema_uploads[parameters.schema_id]
+        self.index_schema(parameters.schema_owner, parameters.schema_id)
+
+        sp.emit(
+            sp.record(schema_id = parameters.schema_id, schema_owner = parameters.schema_owner, status = parameters.status),
+            tag = "schema_added"
+        )
+
+    @sp.entry_point
+    def cancel_upload(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.schema_owner, sp.TAddress)
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        # The Certifier can also cancel the uploads that were abandoned
+        sp.verify(self.data.schema_uploads.contains(parameters.schema_id), message = "Upload does not exist")
+        upload = sp.compute(self.data.schema_uploads[parameters.schema_id])
+        sp.verify((upload.schema_owner == parameters.schema_owner) | (self.data.certifier == parameters.schema_owner), message = "Incorrect owner")
+
+        # The last chunks are deleted first, at most CANCELLED_CHUNKS_PER_CALL per call
+        remaining_count = sp.local("remaining_count", sp.nat(0))
+        with sp.if_(upload.chunk_count > CANCELLED_CHUNKS_PER_CALL):
+            remaining_count.value = sp.as_nat(upload.chunk_count - CANCELLED_CHUNKS_PER_CALL)
+
+        with sp.for_("index", sp.range(remaining_count.value, upload.chunk_count)) as index:
+            del self.data.schema_chunks[sp.record(schema_id = parameters.schema_id, index = index)]
+
+        with sp.if_(remaining_count.value == 0):
+            del self.data.schema_uploads[parameters.schema_id]
+
+            # The reserved schema ID stays unused
+            sp.emit(sp.record(schema_id = parameters.schema_id, schema_owner = upload.schema_owner), tag = "schema_upload_cancelled")
+        with sp.else_():
+            # A cancelled upload takes no more chunks and cannot be finalized, cancel_schema is called again
+            self.data.schema_uploads[parameters.schema_id] = sp.record(
+                schema_owner = upload.schema_owner,
+                chunk_count = remaining_count.value,
+                content_hash = upload.content_hash,
+                cancelled = True
+            )
+
     @sp.entry_point
     def change_status(self, parameters):
         # Defining the parameters' types
         sp.set_type(parameters.schema_id, sp.TNat)
         sp.set_type(parameters.status, sp.TNat)
+        sp.set_type(parameters.expected_owner, sp.TOption(sp.TAddress))
 
         # Verifying whether the caller address is our Registry contract
         sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
 
+        # Compare-and-set: the schema must still have the expected owner, None for any owner
+        sp.verify(self.data.schema_map.contains(parameters.schema_id), message = "Schema id does not exist")
         schema_data = self.data.schema_map[parameters.schema_id]
+        with sp.if_(parameters.expected_owner.is_some()):
+            sp.verify(schema_data.schema_owner == parameters.expected_owner.open_some(), message = "Incorrect owner")
         
         with sp.modify_record(schema_data, "data") as data:
             data.status = parameters.status
 
         self.data.schema_map[parameters.schema_id] = schema_data
 
+        sp.emit(sp.record(schema_id = parameters.schema_id, status = parameters.status), tag = "schema_status_changed")
+
+    @sp.entry_point
+    def change_statuses(self, changes):
+        # Defining the parameters' types
+        sp.set_type(changes, sp.TList(sp.TRecord(schema_id = sp.TNat, status = sp.TNat)))
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        with sp.for_("change", changes) as change:
+            self.data.schema_map[change.schema_id].status = change.status
+
+            sp.emit(sp.record(schema_id = change.schema_id, status = change.status), tag = "schema_status_changed")
+
+    @sp.entry_point
+    def change_owners(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.old_owner, sp.TAddress)
+        sp.set_type(parameters.new_owner, sp.TAddress)
+        sp.set_type(parameters.schema_ids, sp.TList(sp.TNat))
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        with sp.for_("schema_id", parameters.schema_ids) as schema_id:
+            # Every schema must still belong to the old owner
+            sp.verify(self.data.schema_map[schema_id].schema_owner == parameters.old_owner, message = "Incorrect owner")
+
+            with sp.if_(parameters.old_owner != parameters.new_owner):
+                self.unindex_schema(parameters.old_owner, schema_id)
+                self.index_schema(parameters.new_owner, schema_id)
+
+            self.data.schema_map[schema_id].schema_owner = parameters.new_owner
+
+            sp.emit(
+                sp.record(schema_id = schema_id, schema_owner = parameters.new_owner),
+                tag = "schema_owner_changed"
+            )
+
     @sp.entry_point
     def bind_issuer_schema(self, parameters):
         # Defining the parameters' types
@@ -67,7 +411,18 @@ class SchemaRegistry(sp.Contract):
         # Verifying whether the caller address is our Registry contract
         sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
 
-        self.data.issuer_schema_map[parameters.issuer_did] = {parameters.schema_binding.schema_id: parameters.schema_binding.status}
+        binding_key = sp.record(issuer_did = parameters.issuer_did, schema_id = parameters.schema_binding.schema_id)
+        self.index_binding(binding_key)
+        self.data.issuer_schema_map[binding_key] = parameters.schema_binding.status
+
+        sp.emit(
+            sp.record(
+                issuer_did = parameters.issuer_did,
+                schema_id = parameters.schema_binding.schema_id,
+                status = parameters.schema_binding.status
+            ),
+            tag = "binding_status_changed"
+        )
 
     @sp.entry_point
     def set_binding_status(self, parameters):
@@ -79,40 +434,295 @@ class SchemaRegistry(sp.Contract):
         # Verifying whether the caller address is our Registry contract
         sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
 
-        self.data.issuer_schema_map[parameters.issuer_did][parameters.schema_id] = parameters.status
+        binding_key = sp.record(issuer_did = parameters.issuer_did, schema_id = parameters.schema_id)
+        sp.verify(self.data.issuer_schema_map.contains(binding_key), message = "Binding does not exist")
+
+        self.data.issuer_schema_map[binding_key] = parameters.status
+
+        sp.emit(
+            sp.record(issuer_did = parameters.issuer_did, schema_id = parameters.schema_id, status = parameters.status),
+            tag = "binding_status_changed"
+        )
     
+    @sp.entry_point
+    def set_binding_statuses(self, changes):
+        # Defining the parameters' types
+        sp.set_type(changes, sp.TList(sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat, status = sp.TNat)))
+
+        # Verifying whether the caller address is our Registry contract
+        sp.verify(self.data.logic_contract_address == sp.sender, message = "Incorrect caller")
+
+        with sp.for_("change", changes) as change:
+            binding_key = sp.record(issuer_did = change.issuer_did, schema_id = change.schema_id)
+            sp.verify(self.data.issuer_schema_map.contains(binding_key), message = "Binding does not exist")
+
+            self.data.issuer_schema_map[binding_key] = change.status
+
+            sp.emit(
+                sp.record(issuer_did = change.issuer_did, schema_id = change.schema_id, status = change.status),
+                tag = "binding_status_changed"
+            )
+
     @sp.onchain_view()
     def verify_binding(self, parameters):
         # Defining the parameters' types
         sp.set_type(parameters.issuer_did, sp.TString)
         sp.set_type(parameters.schema_id, sp.TNat)
 
-        issuer_did = parameters.issuer_did
-        schema_id = parameters.schema_id
+        binding_key = sp.record(
+            issuer_did = parameters.issuer_did,
+            schema_id = parameters.schema_id
+        )
 
-        with sp.if_(
-            self.data.issuer_schema_map.contains(issuer_did)
-            &
-            self.data.issuer_schema_map[issuer_did].contains(schema_id)
-        ) :
+        with sp.if_(self.data.issuer_schema_map.contains(binding_key)) :
             sp.result(sp.record(
                 binding_exists = True,
-                status = self.data.issuer_schema_map[issuer_did][schema_id]
+                status = self.data.issuer_schema_map[binding_key]
             ))
         with sp.else_():
             sp.result(sp.record(
                 binding_exists = False,
                 status = 0
             ))
+
+    @sp.onchain_view()
+    def verify_bindings(self, bindings):
+        # Defining the parameters' types
+        sp.set_type(bindings, sp.TList(sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat)))
+
+        results = sp.local("results", sp.list(t = sp.TRecord(binding_exists = sp.TBool, status = sp.TNat)))
+
+        with sp.for_("binding_key", bindings) as binding_key:
+            with sp.if_(self.data.issuer_schema_map.contains(binding_key)):
+                results.value.push(sp.record(
+                    binding_exists = True,
+                    status = self.data.issuer_schema_map[binding_key]
+                ))
+            with sp.else_():
+                results.value.push(sp.record(
+                    binding_exists = False,
+                    status = 0
+                ))
+
+        # Results are pushed in front of the list, reversing it gives them in the order of the bindings
+        sp.result(results.value.rev())
+        
+    @sp.onchain_view()
+    def list_schema_issuers(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.cursor, sp.TNat)
+        sp.set_type(parameters.limit, sp.TNat)
+
+        issuer_count = sp.compute(self.data.schema_issuer_count.get(parameters.schema_id, default_value = 0))
+
+        end_position = sp.local("end_position", parameters.cursor + parameters.limit)
+        with sp.if_(end_position.value > issuer_count):
+            end_position.value = issuer_count
+
+        issuers = sp.local("issuers", sp.list(t = sp.TRecord(issuer_did = sp.TString, status = sp.TNat)))
+
+        # Issuers are listed in the order they were bound, with the current status of the binding
+        with sp.for_("position", sp.range(parameters.cursor, end_position.value)) as position:
+            issuer_did = sp.compute(self.data.schema_issuers[sp.record(schema_id = parameters.schema_id, position = position)])
+            issuers.value.push(sp.record(
+                issuer_did = issuer_did,
+                status = self.data.issuer_schema_map[sp.record(issuer_did = issuer_did, schema_id = parameters.schema_id)]
+            ))
+
+        # The next page starts at next_cursor, None after the last issuer of the schema
+        next_cursor = sp.local("next_cursor", sp.none)
+        with sp.if_(end_position.value < issuer_count):
+            next_cursor.value = sp.some(end_position.value)
+
+        sp.result(sp.record(issuers = issuers.value.rev(), next_cursor = next_cursor.value))
         
     @sp.onchain_view()
     def get(self, schema_id):
         sp.result(self.data.schema_map[schema_id])
 
+    @sp.onchain_view()
+    def get_chunk(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.index, sp.TNat)
+
+        # Schemas added in a single operation are a single chunk
+        with sp.if_(self.data.schema_chunk_count.contains(parameters.schema_id)):
+            chunk_count = sp.compute(self.data.schema_chunk_count[parameters.schema_id])
+            sp.verify(parameters.index < chunk_count, message = "Chunk does not exist")
+            sp.result(sp.record(
+                chunk = self.data.schema_chunks[sp.record(schema_id = parameters.schema_id, index = parameters.index)],
+                chunk_count = chunk_count
+            ))
+        with sp.else_():
+            # The content of schema references is not on-chain, as for get_schema
+            sp.verify(~self.data.schema_reference_map.contains(parameters.schema_id), message = "Schema is stored off-chain, read it with get_schema_reference")
+            sp.verify(parameters.index == 0, message = "Chunk does not exist")
+            sp.result(sp.record(chunk = self.data.schema_map[parameters.schema_id].schema_data, chunk_count = 1))
+
+    @sp.onchain_view()
+    def find_by_hash(self, schema_hash):
+        # Defining the parameters' types
+        sp.set_type(schema_hash, sp.TBytes)
+
+        sp.result(self.data.schema_hash_ids.get_opt(schema_hash))
+
+    @sp.onchain_view()
+    def get_content_kind(self, schema_id):
+        # Where the content of the schema is kept: "on_chain" in schema_map, "chunks" or "reference"
+        with sp.if_(self.data.schema_chunk_count.contains(schema_id)):
+            sp.result("chunks")
+        with sp.else_():
+            with sp.if_(self.data.schema_reference_map.contains(schema_id)):
+                sp.result("reference")
+            with sp.else_():
+                sp.result("on_chain")
+
+    @sp.onchain_view()
+    def get_reference(self, schema_id):
+        sp.result(self.data.schema_reference_map[schema_id])
+
+    @sp.onchain_view()
+    def verify_schema_content(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.schema_id, sp.TNat)
+        sp.set_type(parameters.schema_hash, sp.TBytes)
+
+        with sp.if_(self.data.schema_reference_map.contains(parameters.schema_id)):
+            sp.result(self.data.schema_reference_map[parameters.schema_id].schema_hash == parameters.schema_hash)
+        with sp.else_():
+            sp.result(False)
+
+    @sp.onchain_view()
+    def list_schemas(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.from_id, sp.TNat)
+        sp.set_type(parameters.limit, sp.TNat)
+
+        # At most limit IDs are read, IDs missing after an import are skipped
+        end_id = sp.local("end_id", parameters.from_id + parameters.limit)
+        with sp.if_(end_id.value > self.data.schema_last_id):
+            end_id.value = self.data.schema_last_id
+
+        schemas = sp.local("schemas", sp.list(t = sp.TRecord(schema_id = sp.TNat, schema_owner = sp.TAddress, status = sp.TNat)))
+
+        with sp.for_("schema_id", sp.range(parameters.from_id, end_id.value)) as schema_id:
+            with sp.if_(self.data.schema_map.contains(schema_id)):
+                schema = sp.compute(self.data.schema_map[schema_id])
+                schemas.value.push(sp.record(
+                    schema_id = schema_id,
+                    schema_owner = schema.schema_owner,
+                    status = schema.status
+                ))
+
+        # The next page starts at next_id, None after the last schema
+        next_id = sp.local("next_id", sp.none)
+        with sp.if_(end_id.value < self.data.schema_last_id):
+            next_id.value = sp.some(end_id.value)
+
+        sp.result(sp.record(schemas = schemas.value.rev(), next_id = next_id.value))
+
+    @sp.onchain_view()
+    def list_owner_schemas(self, parameters):
+        # Defining the parameters' types
+        sp.set_type(parameters.owner, sp.TAddress)
+        sp.set_type(parameters.from_position, sp.TNat)
+        sp.set_type(parameters.limit, sp.TNat)
+
+        schema_count = sp.compute(self.data.owner_schema_count.get(parameters.owner, default_value = 0))
+
+        end_position = sp.local("end_position", parameters.from_position + parameters.limit)
+        with sp.if_(end_position.value > schema_count):
+            end_position.value = schema_count
+
+        schema_ids = sp.local("schema_ids", sp.list(t = sp.TNat))
+
+        with sp.for_("position", sp.range(parameters.from_position, end_position.value)) as position:
+            schema_ids.value.push(self.data.owner_schemas[sp.record(owner = parameters.owner, position = position)])
+
+        # The next page starts at next_position, None after the last schema of the owner
+        next_position = sp.local("next_position", sp.none)
+        with sp.if_(end_position.value < schema_count):
+            next_position.value = sp.some(end_position.value)
+
+        sp.result(sp.record(schema_ids = schema_ids.value.rev(), next_position = next_position.value))
+
     @sp.onchain_view()
     def get_schema_owner_address(self, schema_id):
         sp.result(self.data.schema_map[schema_id].schema_owner)
 
+    @sp.onchain_view()
+    def get_schema_context(self, schema_id):
+        # Owner and status of the schema, None if the schema does not exist
+        with sp.if_(self.data.schema_map.contains(schema_id)):
+            schema = sp.compute(self.data.schema_map[schema_id])
+            sp.result(sp.some(sp.record(schema_owner = schema.schema_owner, status = schema.status)))
+        with sp.else_():
+            sp.result(sp.none)
+
+    @sp.entry_point
+    def import_schemas(self, schemas):
+        # Defining the parameters' types
+        sp.set_type(schemas, sp.TList(sp.TRecord(
+            schema_id = sp.TNat,
+            schema_data = sp.TString,
+            schema_owner = sp.TAddress,
+            status = sp.TNat
+        )))
+
+        # Migration from a previous Schema Registry contract is allowed only by certifier
+        sp.verify(self.data.certifier == sp.source, message = "Incorrect certifier")
+
+        # Schemas keep their IDs, new schemas are numbered after the highest imported ID
+        with sp.for_("schema", schemas) as schema:
+            # An imported schema replaces any schema with the same ID, in the owner and content indexes too
+            with sp.if_(self.data.schema_map.contains(schema.schema_id)):
+                replaced_schema = sp.compute(self.data.schema_map[schema.schema_id])
+                self.unindex_schema(replaced_schema.schema_owner, schema.schema_id)
+                replaced_hash = self.content_hash(replaced_schema.schema_data)
+                with sp.if_(self.data.schema_hash_ids.contains(replaced_hash)):
+                    with sp.if_(self.data.schema_hash_ids[replaced_hash] == schema.schema_id):
+                        del self.data.schema_hash_ids[replaced_hash]
+            self.index_schema(schema.schema_owner, schema.schema_id)
+
+            # The first schema imported with a content keeps the content index
+            schema_hash = self.content_hash(schema.schema_data)
+            with sp.if_(~self.data.schema_hash_ids.contains(schema_hash)):
+                self.data.schema_hash_ids[schema_hash] = schema.schema_id
+
+            self.data.schema_map[schema.schema_id] = sp.record(
+                schema_data = schema.schema_data,
+                schema_owner = schema.schema_owner,
+                status = schema.status
+            )
+
+            sp.emit(
+                sp.record(schema_id = schema.schema_id, schema_owner = schema.schema_owner, status = schema.status),
+                tag = "schema_added"
+            )
+
+            with sp.if_(schema.schema_id >= self.data.schema_last_id):
+                self.data.schema_last_id = schema.schema_id + 1
+
+    @sp.entry_point
+    def import_bindings(self, bindings):
+        # Defining the parameters' types
+        sp.set_type(bindings, sp.TList(sp.TRecord(issuer_did = sp.TString, schema_id = sp.TNat, status = sp.TNat)))
+
+        # Migration from a previous Schema Registry contract is allowed only by certifier
+        sp.verify(self.data.certifier == sp.source, message = "Incorrect certifier")
+
+        with sp.for_("binding", bindings) as binding:
+            binding_key = sp.record(issuer_did = binding.issuer_did, schema_id = binding.schema_id)
+            self.index_binding(binding_key)
+            self.data.issuer_schema_map[binding_key] = binding.status
+
+            sp.emit(
+                sp.record(issuer_did = binding.issuer_did, schema_id = binding.schema_id, status = binding.status),
+                tag = "binding_status_changed"
+            )
+
     @sp.entry_point
     def change_logic_contract_address(self, new_logic_contract_address):
         with sp.if_(self.data.certifier != sp.source):
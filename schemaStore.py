@@ -0,0 +1,215 @@
+# Schema Content Store
+#
+# Off-chain store for the schemas registered with add_schema_reference.
+# Every schema is kept in a file named after the SHA-256 hash of its content,
+# which is the schema_hash stored on-chain, and can be served over HTTP so that
+# the schema_uri of a reference points to http://<host>:<port>/<hash>.
+#
+# It also splits schemas for the chunked upload of begin_schema, append_schema_chunk
+# and finalize_schema, and computes the content hash that finalize_schema checks.
+#
+# Usage:
+#   python schemaStore.py add schema.json --root ./schemas --base-url http://localhost:8000
+#   python schemaStore.py verify schema.json 0x<schema_hash>
+#   python schemaStore.py chunks schema.json --size 16000
+#   python schemaStore.py serve --root ./schemas --port 8000
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HASH_PATTERN = re.compile(r"^(0x)?([0-9a-f]{64})$")
+
+# Largest schema accepted through HTTP uploads
+MAX_SCHEMA_SIZE = 1024 * 1024
+
+# Default size of the chunks of an upload, below the operation size limit with room for the call
+CHUNK_SIZE = 16000
+
+
+def schema_hash(content):
+    """Return the hash of a schema as stored on-chain, a 0x prefixed hex string."""
+    return "0x" + hashlib.sha256(content).hexdigest()
+
+
+def split_chunks(content, size = CHUNK_SIZE):
+    """Split a schema into the strings sent with append_schema_chunk."""
+    # Michelson strings are printable ASCII, other characters have to be escaped in the JSON
+    text = content.decode("ascii")
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+
+def chunked_content_hash(chunks):
+    """Return the content hash checked by finalize_schema, a 0x prefixed hex string.
+
+    The hash is chained over the chunks, sha256(hash + pack(chunk)) starting from empty bytes,
+    so that the contract updates it on every append without reading the previous chunks.
+    """
+    content_hash = b""
+    for chunk in chunks:
+        data = chunk.encode("ascii")
+        # Packed Michelson string: 0x05 prefix, string tag, 4 byte length
+        packed = b"\x05\x01" + len(data).to_bytes(4, "big") + data
+        content_hash = hashlib.sha256(content_hash + packed).digest()
+    return "0x" + content_hash.hex()
+
+
+def parse_hash(value):
+    """Return the 64 hex characters of a hash, with or without the 0x prefix."""
+    match = HASH_PATTERN.match(value.lower())
+    if match is None:
+        raise ValueError("Invalid schema hash: %s" % value)
+    return match.group(2)
+
+
+class SchemaStore:
+    """Content-addressed schema files kept in a local directory."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok = True)
+
+    def path(self, content_hash):
+        return os.path.join(self.root, parse_hash(content_hash) + ".json")
+
+    def put(self, content):
+        """Store a schema and return its hash. Storing the same content twice is a no-op."""
+        content_hash = schema_hash(content)
+        path = self.path(content_hash)
+
+        if not os.path.exists(path):
+            # Write to a temporary file first so that readers never see a partial schema
+            fd, tmp_path = tempfile.mkstemp(dir = self.root)
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(content)
+            os.replace(tmp_path, path)
+
+        return content_hash
+
+    def get(self, content_hash):
+        """Return the content of a schema, or None if it is not stored."""
+        try:
+            with open(self.path(content_hash), "rb") as schema_file:
+                content = schema_file.read()
+        except FileNotFoundError:
+            return None
+
+        # Files edited in place no longer match their name
+        if schema_hash(content) != "0x" + parse_hash(content_hash):
+            raise ValueError("Stored schema does not match its hash: %s" % content_hash)
+
+        return content
+
+
+def make_handler(store, base_url):
+    class SchemaStoreHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            try:
+                content = store.get(self.path.lstrip("/"))
+            except ValueError as error:
+                self.send_json(400, {"error": str(error)})
+                return
+
+            if content is None:
+                self.send_json(404, {"error": "Schema not found"})
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            # The content of a hash never changes
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+            self.end_headers()
+            self.wfile.write(content)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            if length == 0 or length > MAX_SCHEMA_SIZE:
+                self.send_json(400, {"error": "Schema size must be between 1 and %d bytes" % MAX_SCHEMA_SIZE})
+                return
+
+            content_hash = store.put(self.rfile.read(length))
+            self.send_json(201, {
+                "schema_hash": content_hash,
+                "schema_uri": "%s/%s" % (base_url.rstrip("/"), parse_hash(content_hash))
+            })
+
+        def send_json(self, code, body):
+            payload = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return SchemaStoreHandler
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Local content-addressed store for registry schemas")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    add_parser = subparsers.add_parser("add", help = "store a schema file and print its schema_hash and schema_uri")
+    add_parser.add_argument("file")
+    add_parser.add_argument("--root", default = "schemas")
+    add_parser.add_argument("--base-url", default = "http://localhost:8000")
+
+    verify_parser = subparsers.add_parser("verify", help = "check a schema file against an on-chain schema_hash")
+    verify_parser.add_argument("file")
+    verify_parser.add_argument("schema_hash")
+
+    chunks_parser = subparsers.add_parser("chunks", help = "split a schema file for a chunked upload and print its content_hash")
+    chunks_parser.add_argument("file")
+    chunks_parser.add_argument("--size", type = int, default = CHUNK_SIZE)
+
+    serve_parser = subparsers.add_parser("serve", help = "serve the stored schemas over HTTP")
+    serve_parser.add_argument("--root", default = "schemas")
+    serve_parser.add_argument("--host", default = "127.0.0.1")
+    serve_parser.add_argument("--port", type = int, default = 8000)
+    serve_parser.add_argument("--base-url", default = None)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        with open(args.file, "rb") as schema_file:
+            content_hash = SchemaStore(args.root).put(schema_file.read())
+        print(json.dumps({
+            "schema_hash": content_hash,
+            "schema_uri": "%s/%s" % (args.base_url.rstrip("/"), parse_hash(content_hash))
+        }))
+        return 0
+
+    if args.command == "verify":
+        with open(args.file, "rb") as schema_file:
+            matches = schema_hash(schema_file.read()) == "0x" + parse_hash(args.schema_hash)
+        print("match" if matches else "mismatch")
+        return 0 if matches else 1
+
+    if args.command == "chunks":
+        with open(args.file, "rb") as schema_file:
+            content = schema_file.read()
+        try:
+            chunks = split_chunks(content, args.size)
+        except UnicodeDecodeError:
+            print("Schemas uploaded in chunks must be ASCII, escape other characters in the JSON", file = sys.stderr)
+            return 1
+        print(json.dumps({"chunks": chunks, "content_hash": chunked_content_hash(chunks)}))
+        return 0
+
+    base_url = args.base_url or "http://%s:%d" % (args.host, args.port)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(SchemaStore(args.root), base_url))
+    print("Serving schemas from %s on %s" % (args.root, base_url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1150 @@
+# Registry Simulator
+#
+# In-memory model of the Registry, RegistryLogic, IssuerRegistry and
+# SchemaRegistry contracts, for replaying recorded or synthetic workloads much
+# faster than the SmartPy interpreter, for capacity planning and client tests.
+#
+# Every operation is checked with the rules of the contracts: issuers, schemas
+# and bindings are changed by their owner or the certifier, an issuer in
+# conflict (status 3) is only changed by the certifier, and statuses must be in
+# the status tables. Like on-chain, the RegistryLogic checks of an operation
+# read the storage before its Storage contract calls are applied, and an
+# operation that fails leaves no change, whatever the error. Fees, gas and
+# storage burn are not modelled, and the signatures of permits are not
+# checked, only their nonces.
+#
+# Usage:
+#   python simulator.py replay workload.jsonl --certifier tz1...
+#   python simulator.py synthetic --operations 1000000 --owners 1000 --seed 1
+#   python simulator.py synthetic --operations 1000 --output workload.jsonl
+#
+# Workloads have one operation per line, an action of the dispatch entry point
+# with the parameters of the RegistryLogic entry point of the same name.
+# Variants are objects with a single key, bytes are hex strings:
+#   {"sender": "tz1...", "action": "add_issuer", "parameters": {"issuer_did": "did:tz:1", "issuer_data": "{}"}}
+#   {"sender": "tz1...", "action": "apply_status_changes", "parameters": {"changes": [{"issuer": {"issuer_did": "did:tz:1", "status": 2}}]}}
+
+import argparse
+import gc
+import hashlib
+import inspect
+import json
+import random
+import sys
+import time
+
+# Status names, as compiled into the RegistryLogic contract
+ISSUER_STATUSES = {
+    1: "active",
+    2: "deprecated",
+    3: "in_conflict"
+}
+
+SCHEMA_STATUSES = {
+    1: "active",
+    2: "deprecated"
+}
+
+# Chunks deleted by a call of cancel_upload, as compiled into the SchemaRegistry contract
+CANCELLED_CHUNKS_PER_CALL = 50
+
+# Statuses that an owner may find on its issuers and change, the others only the certifier changes
+OWNER_ISSUER_STATUSES = frozenset(status for status in ISSUER_STATUSES if status != 3)
+
+# Default certifier of the replays, the certifier of the test scenarios
+DEFAULT_CERTIFIER = "tz1_certifier_address"
+
+# Value of a key that was not in a table, in the journal of an operation
+MISSING = object()
+
+# Handler and parameters of an action that does not exist
+NO_ACTION = (None, None)
+
+
+class ContractError(Exception):
+    """Operation or view rejected by the contracts, with the message they fail with."""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+###########
+# Records #
+###########
+
+# Records are replaced rather than changed, so that the journal only has to restore table entries
+
+class Issuer:
+    __slots__ = ("issuer_data", "issuer_owner", "status")
+
+    def __init__(self, issuer_data, issuer_owner, status):
+        self.issuer_data = issuer_data
+        self.issuer_owner = issuer_owner
+        self.status = status
+
+
+class Schema:
+    __slots__ = ("schema_data", "schema_owner", "status")
+
+    def __init__(self, schema_data, schema_owner, status):
+        self.schema_data = schema_data
+        self.schema_owner = schema_owner
+        self.status = status
+
+
+class SchemaReference:
+    __slots__ = ("schema_hash", "schema_uri")
+
+    def __init__(self, schema_hash, schema_uri):
+        self.schema_hash = schema_hash
+        self.schema_uri = schema_uri
+
+
+class Upload:
+    __slots__ = ("schema_owner", "chunk_count", "content_hash", "cancelled")
+
+    def __init__(self, schema_owner, chunk_count, content_hash, cancelled):
+        self.schema_owner = schema_owner
+        self.chunk_count = chunk_count
+        self.content_hash = content_hash
+        self.cancelled = cancelled
+
+
+def to_bytes(value):
+    """Bytes of a parameter given as bytes or as a hex string, with or without the 0x prefix."""
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+
+
+def pack_string(value):
+    """sp.pack of a string: 0x05 prefix, string tag, 4 byte length."""
+    data = value.encode("utf-8")
+    return b"\x05\x01" + len(data).to_bytes(4, "big") + data
+
+
+def variant(value):
+    """Case name and value of a variant given as an object with a single key."""
+    (name, case_value), = value.items()
+    return name, case_value
+
+###################
+# Storage tables #
+###################
+
+class Storage:
+    """Tables of a contract, written through the journal of the current operation."""
+
+    def __init__(self, journal, events):
+        self.journal = journal
+        # Bound once, every write of every operation goes through it
+        self.journal_append = journal.append
+        self.events = events
+
+    def put(self, table, key, value):
+        self.journal_append((table, key, table.get(key, MISSING)))
+        table[key] = value
+
+    def remove(self, table, key):
+        # Removing a key that does not exist is a no-op, as for big maps
+        self.journal_append((table, key, table.pop(key, MISSING)))
+
+    def set_field(self, name, value):
+        self.put(self.__dict__, name, value)
+
+    def emit(self, tag, **fields):
+        if self.events is not None:
+            self.events.append((tag, fields))
+
+
+class IssuerRegistry(Storage):
+    """Model of the IssuerRegistry Storage contract."""
+
+    def __init__(self, journal, events):
+        super().__init__(journal, events)
+        self.issuer_map = {}
+        self.issuer_data_bytes_map = {}
+        # (issuer_did, property, section_id) to section data
+        self.issuer_data_sections = {}
+        # Section IDs of every property, oldest first
+        self.issuer_section_ids = {}
+        self.owner_issuers = {}
+        self.owner_issuer_count = {}
+        self.issuer_positions = {}
+
+    def issuer(self, issuer_did):
+        issuer = self.issuer_map.get(issuer_did)
+        if issuer is None:
+            raise ContractError("Issuer did does not exist")
+        return issuer
+
+    # Compare-and-set check of the change_* entry points, None expects any owner
+    def expected_issuer(self, issuer_did, expected_owner, message):
+        issuer = self.issuer(issuer_did)
+        if expected_owner is not None and issuer.issuer_owner != expected_owner:
+            raise ContractError(message)
+        return issuer
+
+    # Append an issuer to the index of its owner
+    def index_issuer(self, issuer_owner, issuer_did):
+        position = self.owner_issuer_count.get(issuer_owner, 0)
+        self.put(self.owner_issuers, (issuer_owner, position), issuer_did)
+        self.put(self.issuer_positions, issuer_did, position)
+        self.put(self.owner_issuer_count, issuer_owner, position + 1)
+
+    # Remove an issuer from the index of its owner, the last issuer of the owner takes its position
+    def unindex_issuer(self, issuer_owner, issuer_did):
+        position = self.issuer_positions[issuer_did]
+        last_position = self.owner_issuer_count[issuer_owner] - 1
+        if position != last_position:
+            last_issuer_did = self.owner_issuers[(issuer_owner, last_position)]
+            self.put(self.owner_issuers, (issuer_owner, position), last_issuer_did)
+            self.put(self.issuer_positions, last_issuer_did, position)
+        self.remove(self.owner_issuers, (issuer_owner, last_position))
+        self.remove(self.issuer_positions, issuer_did)
+        self.put(self.owner_issuer_count, issuer_owner, last_position)
+
+    def clear_sections(self, issuer_did):
+        section_ids = self.issuer_section_ids.get(issuer_did)
+        if section_ids is not None:
+            for property, ids in section_ids.items():
+                for section_id in ids:
+                    self.remove(self.issuer_data_sections, (issuer_did, property, section_id))
+            self.remove(self.issuer_section_ids, issuer_did)
+
+    # DID document of an issuer: its issuer data, with the sections added as array properties
+    def issuer_document(self, issuer_did, issuer_data):
+        section_ids = self.issuer_section_ids.get(issuer_did)
+        if section_ids is None:
+            return issuer_data
+
+        parts = [issuer_data[:-1]]
+        separator = "" if len(issuer_data) == 2 else ","
+        for property in sorted(section_ids):
+            sections = ",".join(self.issuer_data_sections[(issuer_did, property, section_id)] for section_id in section_ids[property])
+            parts.append('%s"%s":[%s]' % (separator, property, sections))
+            separator = ","
+        parts.append("}")
+        return "".join(parts)
+
+    # Entry points
+
+    def add(self, issuer_did, issuer_data, issuer_owner, status):
+        if issuer_did in self.issuer_map:
+            raise ContractError("Issuer did already exists")
+        self.put(self.issuer_map, issuer_did, Issuer(issuer_data, issuer_owner, status))
+        self.index_issuer(issuer_owner, issuer_did)
+        self.emit("issuer_added", issuer_did = issuer_did, issuer_owner = issuer_owner, status = status)
+
+    def add_issuers(self, issuers, issuer_owner, status):
+        for issuer in issuers:
+            self.add(issuer["issuer_did"], issuer["issuer_data"], issuer_owner, status)
+
+    def add_bytes(self, issuer_did, issuer_data_bytes, issuer_owner, status):
+        self.add(issuer_did, "", issuer_owner, status)
+        self.put(self.issuer_data_bytes_map, issuer_did, issuer_data_bytes)
+
+    def change_data(self, issuer_did, issuer_data, expected_owner):
+        issuer = self.expected_issuer(issuer_did, expected_owner, "Cannot be called from non-certified addresses")
+        self.put(self.issuer_map, issuer_did, Issuer(issuer_data, issuer.issuer_owner, issuer.status))
+        self.remove(self.issuer_data_bytes_map, issuer_did)
+        self.clear_sections(issuer_did)
+        self.emit("issuer_data_changed", issuer_did = issuer_did)
+
+    def change_data_bytes(self, issuer_did, issuer_data_bytes, expected_owner):
+        issuer = self.expected_issuer(issuer_did, expected_owner, "Cannot be called from non-certified addresses")
+        self.put(self.issuer_map, issuer_did, Issuer("", issuer.issuer_owner, issuer.status))
+        self.put(self.issuer_data_bytes_map, issuer_did, issuer_data_bytes)
+        self.clear_sections(issuer_did)
+        self.emit("issuer_data_changed", issuer_did = issuer_did)
+
+    def apply_data_patch(self, issuer_did, patch, expected_owner):
+        issuer_data = self.expected_issuer(issuer_did, expected_owner, "Cannot be called from non-certified addresses").issuer_data
+        if issuer_did in self.issuer_data_bytes_map:
+            raise ContractError("Issuer data is encoded")
+        if len(issuer_data) < 2 or issuer_data[-1] != "}":
+            raise ContractError("Invalid issuer data")
+
+        section_ids = dict(self.issuer_section_ids.get(issuer_did, {}))
+        section_ids_changed = False
+        for change in patch:
+            name, section = variant(change)
+            section_key = (issuer_did, section["property"], section["section_id"])
+            if name == "set_section":
+                # A property of the issuer data cannot be completed by sections, looked up with its quoted name
+                if section["property"] not in section_ids and "\"%s\"" % section["property"] in issuer_data:
+                    raise ContractError("Property is in issuer data")
+                # A new section is added after the other sections of its property
+                if section_key not in self.issuer_data_sections:
+                    section_ids[section["property"]] = section_ids.get(section["property"], ()) + (section["section_id"],)
+                    section_ids_changed = True
+                self.put(self.issuer_data_sections, section_key, section["section_data"])
+            elif name == "remove_section":
+                if section_key not in self.issuer_data_sections:
+                    raise ContractError("Section does not exist")
+                self.remove(self.issuer_data_sections, section_key)
+                remaining_ids = tuple(section_id for section_id in section_ids[section["property"]] if section_id != section["section_id"])
+                if remaining_ids:
+                    section_ids[section["property"]] = remaining_ids
+                else:
+                    del section_ids[section["property"]]
+                section_ids_changed = True
+            else:
+                raise ContractError("Invalid action")
+
+        if section_ids_changed:
+            if section_ids:
+                self.put(self.issuer_section_ids, issuer_did, section_ids)
+            else:
+                self.remove(self.issuer_section_ids, issuer_did)
+        self.emit("issuer_data_changed", issuer_did = issuer_did)
+
+    def change_status(self, issuer_did, status, expected_owner, expected_statuses):
+        issuer = self.expected_issuer(issuer_did, expected_owner, "Status change not allowed")
+        if expected_statuses is not None and issuer.status not in expected_statuses:
+            raise ContractError("Status change not allowed")
+        self.put(self.issuer_map, issuer_did, Issuer(issuer.issuer_data, issuer.issuer_owner, status))
+        self.emit("issuer_status_changed", issuer_did = issuer_did, status = status)
+
+    def change_statuses(self, changes):
+        for change in changes:
+            self.change_status(change["issuer_did"], change["status"], None, None)
+
+    def change_owner(self, issuer_did, new_owner_address, expected_owner):
+        issuer = self.expected_issuer(issuer_did, expected_owner, "Cannot be called from non-certified addresses")
+        if issuer.issuer_owner != new_owner_address:
+            self.unindex_issuer(issuer.issuer_owner, issuer_did)
+            self.index_issuer(new_owner_address, issuer_did)
+        self.put(self.issuer_map, issuer_did, Issuer(issuer.issuer_data, new_owner_address, issuer.status))
+        self.emit("issuer_owner_changed", issuer_did = issuer_did, issuer_owner = new_owner_address)
+
+    def change_owners(self, old_owner, new_owner, issuer_dids):
+        for issuer_did in issuer_dids:
+            # Every issuer must still belong to the old owner
+            if self.issuer(issuer_did).issuer_owner != old_owner:
+                raise ContractError("Incorrect owner")
+            self.change_owner(issuer_did, new_owner, None)
+
+    def import_issuers(self, issuers):
+        for issuer in issuers:
+            issuer_did = issuer["issuer_did"]
+            # An imported issuer replaces any issuer with the same DID, with its encoded data, sections and owner index entry
+            replaced_issuer = self.issuer_map.get(issuer_did)
+            if replaced_issuer is not None:
+                self.unindex_issuer(replaced_issuer.issuer_owner, issuer_did)
+                self.remove(self.issuer_data_bytes_map, issuer_did)
+                self.clear_sections(issuer_did)
+            self.index_issuer(issuer["issuer_owner"], issuer_did)
+
+            self.put(self.issuer_map, issuer_did, Issuer(issuer["issuer_data"], issuer["issuer_owner"], issuer["status"]))
+            if issuer["issuer_data_bytes"] is not None:
+                self.put(self.issuer_data_bytes_map, issuer_did, issuer["issuer_data_bytes"])
+            self.emit("issuer_added", issuer_did = issuer_did, issuer_owner = issuer["issuer_owner"], status = issuer["status"])
+
+    # Views
+
+    def get(self, issuer_did):
+        issuer = self.issuer(issuer_did)
+        return {
+            "issuer_did": issuer_did,
+            "issuer_data": self.issuer_document(issuer_did, issuer.issuer_data),
+            "issuer_owner": issuer.issuer_owner,
+            "status": issuer.status
+        }
+
+    def get_data_bytes(self, issuer_did):
+        if issuer_did not in self.issuer_data_bytes_map:
+            raise ContractError("Issuer data is not encoded")
+        return self.issuer_data_bytes_map[issuer_did]
+
+    def list_owner_issuers(self, owner, from_position, limit):
+        issuer_count = self.owner_issuer_count.get(owner, 0)
+        end_position = min(from_position + limit, issuer_count)
+        return {
+            "issuer_dids": [self.owner_issuers[(owner, position)] for position in range(from_position, end_position)],
+            "next_position": end_position if end_position < issuer_count else None
+        }
+
+    def issuer_exists(self, issuer_did):
+        return issuer_did in self.issuer_map
+
+    def get_issuer_context(self, issuer_did):
+        issuer = self.issuer_map.get(issuer_did)
+        if issuer is None:
+            return None
+        return {"issuer_owner": issuer.issuer_owner, "status": issuer.status}
+
+
+class SchemaRegistry(Storage):
+    """Model of the SchemaRegistry Storage contract."""
+
+    def __init__(self, journal, events, certifier):
+        super().__init__(journal, events)
+        self.certifier = certifier
+        self.schema_map = {}
+        # (issuer_did, schema_id) to the status of the binding
+        self.issuer_schema_map = {}
+        self.schema_reference_map = {}
+        self.owner_schemas = {}
+        self.owner_schema_count = {}
+        self.schema_positions = {}
+        self.schema_issuers = {}
+        self.schema_issuer_count = {}
+        self.schema_hash_ids = {}
+        self.schema_uploads = {}
+        self.schema_chunks = {}
+        self.schema_chunk_count = {}
+        self.schema_last_id = 0
+
+    def schema(self, schema_id):
+        schema = self.schema_map.get(schema_id)
+        if schema is None:
+            raise ContractError("Schema id does not exist")
+        return schema
+
+    def upload(self, schema_id, schema_owner):
+        upload = self.schema_uploads.get(schema_id)
+        if upload is None:
+            raise ContractError("Upload does not exist")
+        if upload.schema_owner != schema_owner:
+            raise ContractError("Incorrect owner")
+        return upload
+
+    def index_schema(self, schema_owner, schema_id):
+        position = self.owner_schema_count.get(schema_owner, 0)
+        self.put(self.owner_schemas, (schema_owner, position), schema_id)
+        self.put(self.schema_positions, schema_id, position)
+        self.put(self.owner_schema_count, schema_owner, position + 1)
+
+    def unindex_schema(self, schema_owner, schema_id):
+        position = self.schema_positions[schema_id]
+        last_position = self.owner_schema_count[schema_owner] - 1
+        if position != last_position:
+            last_schema_id = self.owner_schemas[(schema_owner, last_position)]
+            self.put(self.owner_schemas, (schema_owner, position), last_schema_id)
+            self.put(self.schema_positions, last_schema_id, position)
+        self.remove(self.owner_schemas, (schema_owner, last_position))
+        self.remove(self.schema_positions, schema_id)
+        self.put(self.owner_schema_count, schema_owner, last_position)
+
+    # Append the issuer of a new binding to the index of the schema, bindings are never removed
+    def index_binding(self, binding_key):
+        if binding_key not in self.issuer_schema_map:
+            position = self.schema_issuer_count.get(binding_key[1], 0)
+            self.put(self.schema_issuers, (binding_key[1], position), binding_key[0])
+            self.put(self.schema_issuer_count, binding_key[1], position + 1)
+
+    def add_schema_record(self, schema, schema_hash = None):
+        schema_id = self.schema_last_id
+        self.put(self.schema_map, schema_id, schema)
+        if schema_hash is not None:
+            self.put(self.schema_hash_ids, schema_hash, schema_id)
+        self.index_schema(schema.schema_owner, schema_id)
+        self.emit("schema_added", schema_id = schema_id, schema_owner = schema.schema_owner, status = schema.status)
+        self.set_field("schema_last_id", schema_id + 1)
+        return schema_id
+
+    # Entry points
+
+    def add(self, schema_data, schema_owner, status):
+        # The active schema with the same content is reused, whatever its owner
+        schema_hash = hashlib.sha256(schema_data.encode("utf-8")).digest()
+        existing_id = self.schema_hash_ids.get(schema_hash)
+        if existing_id is not None and self.schema_map[existing_id].status == 1:
+            self.emit("schema_reused", schema_id = existing_id, schema_owner = schema_owner)
+            return
+        self.add_schema_record(Schema(schema_data, schema_owner, status), schema_hash)
+
+    def add_schemas(self, schemas_data, schema_owner, status):
+        for schema_data in schemas_data:
+            self.add(schema_data, schema_owner, status)
+
+    def add_reference(self, schema_hash, schema_uri, schema_owner, status):
+        self.put(self.schema_reference_map, self.schema_last_id, SchemaReference(schema_hash, schema_uri))
+        self.add_schema_record(Schema("", schema_owner, status))
+
+    def begin_upload(self, schema_owner):
+        schema_id = self.schema_last_id
+        self.put(self.schema_uploads, schema_id, Upload(schema_owner, 0, b"", False))
+        self.emit("schema_upload_started", schema_id = schema_id, schema_owner = schema_owner)
+        self.set_field("schema_last_id", schema_id + 1)
+
+    def append_chunk(self, schema_id, schema_owner, chunk):
+        upload = self.upload(schema_id, schema_owner)
+        if upload.cancelled:
+            raise ContractError("Upload is cancelled")
+        self.put(self.schema_chunks, (schema_id, upload.chunk_count), chunk)
+        # The content hash is chained over the packed chunks
+        content_hash = hashlib.sha256(upload.content_hash + pack_string(chunk)).digest()
+        self.put(self.schema_uploads, schema_id, Upload(schema_owner, upload.chunk_count + 1, content_hash, False))
+
+    def finalize_upload(self, schema_id, schema_owner, content_hash, status):
+        upload = self.upload(schema_id, schema_owner)
+        if upload.cancelled:
+            raise ContractError("Upload is cancelled")
+        if upload.chunk_count == 0:
+            raise ContractError("Upload has no chunks")
+        if upload.content_hash != content_hash:
+            raise ContractError("Incorrect content hash")
+
+        self.put(self.schema_map, schema_id, Schema("", schema_owner, status))
+        self.put(self.schema_chunk_count, schema_id, upload.chunk_count)
+        self.remove(self.schema_uploads, schema_id)
+        self.index_schema(schema_owner, schema_id)
+        self.emit("schema_added", schema_id = schema_id, schema_owner = schema_owner, status = status)
+
+    def cancel_upload(self, schema_id, schema_owner):
+        upload = self.schema_uploads.get(schema_id)
+        if upload is None:
+            raise ContractError("Upload does not exist")
+        # The certifier can also cancel the uploads that were abandoned
+        if upload.schema_owner != schema_owner and self.certifier != schema_owner:
+            raise ContractError("Incorrect owner")
+        # The last chunks are deleted first, at most CANCELLED_CHUNKS_PER_CALL per call
+        remaining_count = max(upload.chunk_count - CANCELLED_CHUNKS_PER_CALL, 0)
+        for index in range(remaining_count, upload.chunk_count):
+            self.remove(self.schema_chunks, (schema_id, index))
+        if remaining_count == 0:
+            self.remove(self.schema_uploads, schema_id)
+            self.emit("schema_upload_cancelled", schema_id = schema_id, schema_owner = upload.schema_owner)
+        else:
+            self.put(self.schema_uploads, schema_id, Upload(upload.schema_owner, remaining_count, upload.content_hash, True))
+
+    def change_status(self, schema_id, status, expected_owner):
+        schema = self.schema(schema_id)
+        # Compare-and-set, None expects any owner
+        if expected_owner is not None and schema.schema_owner != expected_owner:
+            raise ContractError("Incorrect owner")
+        self.put(self.schema_map, schema_id, Schema(schema.schema_data, schema.schema_owner, status))
+        self.emit("schema_status_changed", schema_id = schema_id, status = status)
+
+    def change_statuses(self, changes):
+        for change in changes:
+            self.change_status(change["schema_id"], change["status"], None)
+
+    def change_owners(self, old_owner, new_owner, schema_ids):
+        for schema_id in schema_ids:
+            schema = self.schema(schema_id)
+            # Every schema must still belong to the old owner
+            if schema.schema_owner != old_owner:
+                raise ContractError("Incorrect owner")
+            if old_owner != new_owner:
+                self.unindex_schema(old_owner, schema_id)
+                self.index_schema(new_owner, schema_id)
+            self.put(self.schema_map, schema_id, Schema(schema.schema_data, new_owner, schema.status))
+            self.emit("schema_owner_changed", schema_id = schema_id, schema_owner = new_owner)
+
+    def bind_issuer_schema(self, issuer_did, schema_id, status):
+        binding_key = (issuer_did, schema_id)
+        self.index_binding(binding_key)
+        self.put(self.issuer_schema_map, binding_key, status)
+        self.emit("binding_status_changed", issuer_did = issuer_did, schema_id = schema_id, status = status)
+
+    def set_binding_status(self, issuer_did, schema_id, status):
+        binding_key = (issuer_did, schema_id)
+        if binding_key not in self.issuer_schema_map:
+            raise ContractError("Binding does not exist")
+        self.put(self.issuer_schema_map, binding_key, status)
+        self.emit("binding_status_changed", issuer_did = issuer_did, schema_id = schema_id, status = status)
+
+    def set_binding_statuses(self, changes):
+        for change in changes:
+            self.set_binding_status(change["issuer_did"], change["schema_id"], change["status"])
+
+    def import_schemas(self, schemas):
+        for schema in schemas:
+            schema_id = schema["schema_id"]
+            # An imported schema replaces any schema with the same ID, in the owner and content indexes too
+            replaced_schema = self.schema_map.get(schema_id)
+            if replaced_schema is not None:
+                self.unindex_schema(replaced_schema.schema_owner, schema_id)
+                replaced_hash = hashlib.sha256(replaced_schema.schema_data.encode("utf-8")).digest()
+                if self.schema_hash_ids.get(replaced_hash) == schema_id:
+                    self.remove(self.schema_hash_ids, replaced_hash)
+            self.index_schema(schema["schema_owner"], schema_id)
+
+            schema_hash = hashlib.sha256(schema["schema_data"].encode("utf-8")).digest()
+            if schema_hash not in self.schema_hash_ids:
+                self.put(self.schema_hash_ids, schema_hash, schema_id)
+
+            self.put(self.schema_map, schema_id, Schema(schema["schema_data"], schema["schema_owner"], schema["status"]))
+            self.emit("schema_added", schema_id = schema_id, schema_owner = schema["schema_owner"], status = schema["status"])
+
+            if schema_id >= self.schema_last_id:
+                self.set_field("schema_last_id", schema_id + 1)
+
+    def import_bindings(self, bindings):
+        for binding in bindings:
+            binding_key = (binding["issuer_did"], binding["schema_id"])
+            self.index_binding(binding_key)
+            self.put(self.issuer_schema_map, binding_key, binding["status"])
+            self.emit("binding_status_changed", issuer_did = binding["issuer_did"], schema_id = binding["schema_id"], status = binding["status"])
+
+    # Views
+
+    def verify_binding(self, issuer_did, schema_id):
+        status = self.issuer_schema_map.get((issuer_did, schema_id))
+        if status is None:
+            return {"binding_exists": False, "status": 0}
+        return {"binding_exists": True, "status": status}
+
+    def list_schema_issuers(self, schema_id, cursor, limit):
+        issuer_count = self.schema_issuer_count.get(schema_id, 0)
+        end_position = min(cursor + limit, issuer_count)
+        issuers = []
+        for position in range(cursor, end_position):
+            issuer_did = self.schema_issuers[(schema_id, position)]
+            issuers.append({"issuer_did": issuer_did, "status": self.issuer_schema_map[(issuer_did, schema_id)]})
+        return {"issuers": issuers, "next_cursor": end_position if end_position < issuer_count else None}
+
+    def get(self, schema_id):
+        schema = self.schema(schema_id)
+        return {"schema_data": schema.schema_data, "schema_owner": schema.schema_owner, "status": schema.status}
+
+    def get_chunk(self, schema_id, index):
+        chunk_count = self.schema_chunk_count.get(schema_id)
+        if chunk_count is not None:
+            if index >= chunk_count:
+                raise ContractError("Chunk does not exist")
+            return {"chunk": self.schema_chunks[(schema_id, index)], "chunk_count": chunk_count}
+        if schema_id in self.schema_reference_map:
+            raise ContractError("Schema is stored off-chain, read it with get_schema_reference")
+        if index != 0:
+            raise ContractError("Chunk does not exist")
+        return {"chunk": self.schema(schema_id).schema_data, "chunk_count": 1}
+
+    def find_by_hash(self, schema_hash):
+        return self.schema_hash_ids.get(to_bytes(schema_hash))
+
+    def get_content_kind(self, schema_id):
+        if schema_id in self.schema_chunk_count:
+            return "chunks"
+        if schema_id in self.schema_reference_map:
+            return "reference"
+        return "on_chain"
+
+    def get_reference(self, schema_id):
+        reference = self.schema_reference_map.get(schema_id)
+        if reference is None:
+            raise ContractError("Schema reference does not exist")
+        return {"schema_hash": reference.schema_hash, "schema_uri": reference.schema_uri}
+
+    def verify_schema_content(self, schema_id, schema_hash):
+        reference = self.schema_reference_map.get(schema_id)
+        return reference is not None and reference.schema_hash == to_bytes(schema_hash)
+
+    def list_schemas(self, from_id, limit):
+        end_id = min(from_id + limit, self.schema_last_id)
+        schemas = []
+        for schema_id in range(from_id, end_id):
+            schema = self.schema_map.get(schema_id)
+            if schema is not None:
+                schemas.append({"schema_id": schema_id, "schema_owner": schema.schema_owner, "status": schema.status})
+        return {"schemas": schemas, "next_id": end_id if end_id < self.schema_last_id else None}
+
+    def list_owner_schemas(self, owner, from_position, limit):
+        schema_count = self.owner_schema_count.get(owner, 0)
+        end_position = min(from_position + limit, schema_count)
+        return {
+            "schema_ids": [self.owner_schemas[(owner, position)] for position in range(from_position, end_position)],
+            "next_position": end_position if end_position < schema_count else None
+        }
+
+    def get_schema_context(self, schema_id):
+        schema = self.schema_map.get(schema_id)
+        if schema is None:
+            return None
+        return {"schema_owner": schema.schema_owner, "status": schema.status}
+
+#################
+# Registry Logic #
+#################
+
+class RegistryLogic(Storage):
+    """Model of the RegistryLogic contract and the Storage contracts it calls.
+
+    Every action is run by its handle_<action> method, which checks it against the storage
+    and returns the Storage contract calls to apply, as (entry point, arguments) pairs.
+    """
+
+    def __init__(self, certifier = DEFAULT_CERTIFIER, numeric_statuses = False, record_events = False):
+        self.numeric_statuses = numeric_statuses
+        events = [] if record_events else None
+        super().__init__([], events)
+        self.certifier = certifier
+        self.permit_nonces = {}
+        self.issuer_registry = IssuerRegistry(self.journal, events)
+        self.schema_registry = SchemaRegistry(self.journal, events, certifier)
+        # Permits are not an action of their own
+        self.handlers = {
+            name[len("handle_"):]: getattr(self, name) for name in dir(self)
+            if name.startswith("handle_") and name != "handle_permits"
+        }
+        # Handler of every action with its parameters, the handler arguments after sender_address,
+        # so that an operation is checked with a single lookup
+        self.actions = {
+            action: (handler, frozenset(list(inspect.signature(handler).parameters)[1:])) for action, handler in self.handlers.items()
+        }
+
+    # Operations
+
+    def handler(self, action, parameters):
+        """Handler of an action, once its parameters are checked, as the parameter type of the entry point would be."""
+        handler, parameter_names = self.actions.get(action, NO_ACTION)
+        if handler is None:
+            raise ContractError("Invalid action")
+        if type(parameters) is not dict or parameters.keys() != parameter_names:
+            raise ContractError("Invalid parameters")
+        return handler
+
+    def execute(self, sender_address, action, parameters):
+        """Run an action with the rights of sender_address, as one operation."""
+        # The checks of handler, inlined as they run for every operation of a replay
+        handler, parameter_names = self.actions.get(action, NO_ACTION)
+        if handler is None:
+            raise ContractError("Invalid action")
+        if type(parameters) is not dict or parameters.keys() != parameter_names:
+            raise ContractError("Invalid parameters")
+        self.run_operation(handler, sender_address, parameters)
+
+    def apply_permits(self, permits):
+        """Run a list of permits, as one operation. A permit is a signer, a nonce and an action
+        with its parameters, the signature is not checked."""
+        self.run_operation(self.handle_permits, None, {"permits": permits})
+
+    def handle_permits(self, sender_address, permits):
+        # Anyone may relay permits, every action runs with the rights of the account that signed it
+        calls = []
+        for permit in permits:
+            # The permits of an account are applied once each, in the order of their nonces
+            signer_address = permit["signer"]
+            if permit["nonce"] != self.permit_nonces.get(signer_address, 0):
+                raise ContractError("Invalid permit nonce")
+            self.put(self.permit_nonces, signer_address, permit["nonce"] + 1)
+
+            calls += self.handler(permit["action"], permit["parameters"])(signer_address, **permit["parameters"])
+        return calls
+
+    def run_operation(self, handler, sender_address, parameters):
+        # The Storage contract calls are applied after every check, an error undoes the whole operation,
+        # whether it is a ContractError or an error of the parameters, such as a missing key
+        events = self.events
+        event_count = len(events) if events is not None else 0
+        journal = self.journal
+        try:
+            for entry_point, arguments in handler(sender_address, **parameters):
+                entry_point(*arguments)
+        except BaseException:
+            for table, key, value in reversed(journal):
+                if value is MISSING:
+                    table.pop(key, None)
+                else:
+                    table[key] = value
+            if events is not None:
+                del events[event_count:]
+            raise
+        finally:
+            journal.clear()
+
+    # Checks
+
+    def issuer_context(self, issuer_did):
+        issuer = self.issuer_registry.issuer_map.get(issuer_did)
+        if issuer is None:
+            raise ContractError("Issuer did does not exist")
+        return issuer
+
+    def schema_context(self, schema_id):
+        schema = self.schema_registry.schema_map.get(schema_id)
+        if schema is None:
+            raise ContractError("Schema id does not exist")
+        return schema
+
+    def verify_owner(self, sender_address, owner_address, message):
+        if sender_address != self.certifier and sender_address != owner_address:
+            raise ContractError(message)
+
+    # Issuers in conflict are changed only by the certifier, and only the certifier sets the conflict status
+    def verify_issuer_status_change(self, sender_address, issuer, new_status):
+        if sender_address == self.certifier:
+            return
+        if sender_address != issuer.issuer_owner or issuer.status == 3 or new_status == 3:
+            raise ContractError("Status change not allowed")
+
+    # Owner that the Storage contracts must find on a record before changing it, None for the certifier
+    def expected_owner(self, sender_address):
+        return None if sender_address == self.certifier else sender_address
+
+    # Statuses that the Storage contract must find on an issuer before changing its status
+    def expected_issuer_statuses(self, sender_address):
+        return None if sender_address == self.certifier else OWNER_ISSUER_STATUSES
+
+    def verify_status(self, statuses, status):
+        if status not in statuses:
+            raise ContractError("Incorrect status")
+
+    # Schemas
+
+    def handle_add_schema(self, sender_address, schema_data):
+        return [(self.schema_registry.add, (schema_data, sender_address, 1))]
+
+    def handle_add_schemas(self, sender_address, schemas_data):
+        return [(self.schema_registry.add_schemas, (schemas_data, sender_address, 1))]
+
+    def handle_set_schema_active(self, sender_address, schema_id):
+        return self.handle_set_schema_status(sender_address, schema_id, 1)
+
+    def handle_set_schema_deprecated(self, sender_address, schema_id):
+        return self.handle_set_schema_status(sender_address, schema_id, 2)
+
+    def handle_set_schema_status(self, sender_address, schema_id, status):
+        self.verify_status(SCHEMA_STATUSES, status)
+        return [(self.schema_registry.change_status, (schema_id, status, self.expected_owner(sender_address)))]
+
+    def handle_add_schema_reference(self, sender_address, schema_hash, schema_uri):
+        return [(self.schema_registry.add_reference, (to_bytes(schema_hash), schema_uri, sender_address, 1))]
+
+    def handle_begin_schema(self, sender_address):
+        return [(self.schema_registry.begin_upload, (sender_address,))]
+
+    def handle_append_schema_chunk(self, sender_address, schema_id, chunk):
+        return [(self.schema_registry.append_chunk, (schema_id, sender_address, chunk))]
+
+    def handle_finalize_schema(self, sender_address, schema_id, content_hash):
+        return [(self.schema_registry.finalize_upload, (schema_id, sender_address, to_bytes(content_hash), 1))]
+
+    def handle_cancel_schema(self, sender_address, schema_id):
+        return [(self.schema_registry.cancel_upload, (schema_id, sender_address))]
+
+    # Issuers
+
+    def handle_add_issuer(self, sender_address, issuer_did, issuer_data):
+        return [(self.issuer_registry.add, (issuer_did, issuer_data, sender_address, 1))]
+
+    def handle_add_issuers(self, sender_address, issuers):
+        return [(self.issuer_registry.add_issuers, (issuers, sender_address, 1))]
+
+    def handle_set_issuer_data(self, sender_address, issuer_did, issuer_data):
+        return [(self.issuer_registry.change_data, (issuer_did, issuer_data, self.expected_owner(sender_address)))]
+
+    def handle_add_issuer_bytes(self, sender_address, issuer_did, issuer_data_bytes):
+        return [(self.issuer_registry.add_bytes, (issuer_did, to_bytes(issuer_data_bytes), sender_address, 1))]
+
+    def handle_set_issuer_data_bytes(self, sender_address, issuer_did, issuer_data_bytes):
+        return [(self.issuer_registry.change_data_bytes, (issuer_did, to_bytes(issuer_data_bytes), self.expected_owner(sender_address)))]
+
+    def handle_apply_issuer_data_patch(self, sender_address, issuer_did, patch):
+        return [(self.issuer_registry.apply_data_patch, (issuer_did, patch, self.expected_owner(sender_address)))]
+
+    def handle_set_issuer_active(self, sender_address, issuer_did):
+        return self.handle_set_issuer_status(sender_address, issuer_did, 1)
+
+    def handle_set_issuer_deprecated(self, sender_address, issuer_did):
+        return self.handle_set_issuer_status(sender_address, issuer_did, 2)
+
+    def handle_set_issuer_status(self, sender_address, issuer_did, status):
+        # The Storage contract checks the owner and that the issuer is not in conflict
+        if sender_address != self.certifier and status == 3:
+            raise ContractError("Status change not allowed")
+        self.verify_status(ISSUER_STATUSES, status)
+        return [(self.issuer_registry.change_status,
+            (issuer_did, status, self.expected_owner(sender_address), self.expected_issuer_statuses(sender_address)))]
+
+    def handle_set_issuer_owner(self, sender_address, issuer_did, new_owner_address):
+        return [(self.issuer_registry.change_owner, (issuer_did, new_owner_address, self.expected_owner(sender_address)))]
+
+    def handle_transfer_ownership(self, sender_address, old_owner, new_owner, issuer_dids, schema_ids):
+        # The Storage contracts check that every record belongs to the old owner
+        self.verify_owner(sender_address, old_owner, "Cannot be called from non-certified addresses")
+        calls = []
+        if issuer_dids:
+            calls.append((self.issuer_registry.change_owners, (old_owner, new_owner, issuer_dids)))
+        if schema_ids:
+            calls.append((self.schema_registry.change_owners, (old_owner, new_owner, schema_ids)))
+        return calls
+
+    # Bindings
+
+    def handle_bind_issuer_schema(self, sender_address, issuer_did, schema_id):
+        self.verify_owner(sender_address, self.issuer_context(issuer_did).issuer_owner, "Binding not allowed")
+        return [(self.schema_registry.bind_issuer_schema, (issuer_did, schema_id, 1))]
+
+    def handle_set_binding_active(self, sender_address, issuer_did, schema_id):
+        self.verify_issuer_status_change(sender_address, self.issuer_context(issuer_did), 1)
+        return [(self.schema_registry.set_binding_status, (issuer_did, schema_id, 1))]
+
+    def handle_set_binding_deprecated(self, sender_address, issuer_did, schema_id):
+        self.verify_issuer_status_change(sender_address, self.issuer_context(issuer_did), 2)
+        return [(self.schema_registry.set_binding_status, (issuer_did, schema_id, 2))]
+
+    def handle_set_binding_status(self, sender_address, issuer_did, schema_id, status):
+        self.verify_issuer_status_change(sender_address, self.issuer_context(issuer_did), status)
+        self.verify_status(ISSUER_STATUSES, status)
+        return [(self.schema_registry.set_binding_status, (issuer_did, schema_id, status))]
+
+    def handle_apply_status_changes(self, sender_address, changes):
+        issuer_changes, schema_changes, binding_changes = [], [], []
+
+        # Every change is checked with the same rules as the single status entry points
+        for change in changes:
+            name, value = variant(change)
+            if name == "issuer":
+                self.verify_issuer_status_change(sender_address, self.issuer_context(value["issuer_did"]), value["status"])
+                self.verify_status(ISSUER_STATUSES, value["status"])
+                issuer_changes.append(value)
+            elif name == "schema":
+                self.verify_owner(sender_address, self.schema_context(value["schema_id"]).schema_owner, "Incorrect owner")
+                self.verify_status(SCHEMA_STATUSES, value["status"])
+                schema_changes.append(value)
+            elif name == "binding":
+                self.verify_issuer_status_change(sender_address, self.issuer_context(value["issuer_did"]), value["status"])
+                self.verify_status(ISSUER_STATUSES, value["status"])
+                binding_changes.append(value)
+            else:
+                raise ContractError("Invalid action")
+
+        calls = []
+        if issuer_changes:
+            calls.append((self.issuer_registry.change_statuses, (issuer_changes,)))
+        if schema_changes:
+            calls.append((self.schema_registry.change_statuses, (schema_changes,)))
+        if binding_changes:
+            calls.append((self.schema_registry.set_binding_statuses, (binding_changes,)))
+        return calls
+
+    # Views
+
+    def format_status(self, statuses, status):
+        if self.numeric_statuses:
+            return status
+        return statuses[status]
+
+    def get_schema(self, schema_id):
+        schema = self.schema_registry.get(schema_id)
+        # Schemas uploaded in chunks or stored off-chain are read with their own views
+        if schema["schema_data"] == "":
+            content_kind = self.schema_registry.get_content_kind(schema_id)
+            if content_kind == "chunks":
+                raise ContractError("Schema is stored in chunks, read it with get_schema_chunk")
+            if content_kind == "reference":
+                raise ContractError("Schema is stored off-chain, read it with get_schema_reference")
+        return {"schema_data": schema["schema_data"], "status": self.format_status(SCHEMA_STATUSES, schema["status"])}
+
+    def get_schema_chunk(self, schema_id, index):
+        return self.schema_registry.get_chunk(schema_id, index)
+
+    def find_schema_by_hash(self, schema_hash):
+        return self.schema_registry.find_by_hash(schema_hash)
+
+    def get_schema_reference(self, schema_id):
+        return self.schema_registry.get_reference(schema_id)
+
+    def verify_schema_content(self, schema_id, schema_hash):
+        return self.schema_registry.verify_schema_content(schema_id, schema_hash)
+
+    def get_issuer(self, issuer_did):
+        issuer = self.issuer_registry.get(issuer_did)
+        return {
+            "issuer_data": issuer["issuer_data"],
+            "issuer_owner": issuer["issuer_owner"],
+            "status": self.format_status(ISSUER_STATUSES, issuer["status"])
+        }
+
+    def get_issuer_data_bytes(self, issuer_did):
+        return self.issuer_registry.get_data_bytes(issuer_did)
+
+    def verify_binding(self, issuer_did, schema_id):
+        return self.schema_registry.verify_binding(issuer_did, schema_id)
+
+    def verify_bindings(self, bindings):
+        return [self.schema_registry.verify_binding(binding["issuer_did"], binding["schema_id"]) for binding in bindings]
+
+    def list_schema_issuers(self, schema_id, cursor, limit):
+        return self.schema_registry.list_schema_issuers(schema_id, cursor, limit)
+
+    def get_status_tables(self):
+        return {"issuer_statuses": dict(ISSUER_STATUSES), "schema_statuses": dict(SCHEMA_STATUSES)}
+
+    def get_credential_context(self, issuer_did, schema_id):
+        # Status 0 stands for an issuer, schema or binding that does not exist
+        issuer = self.issuer_registry.issuer_map.get(issuer_did)
+        schema = self.schema_registry.schema_map.get(schema_id)
+        issuer_status = issuer.status if issuer is not None else 0
+        schema_status = schema.status if schema is not None else 0
+        binding_status = self.schema_registry.issuer_schema_map.get((issuer_did, schema_id), 0)
+        return {
+            "issuer_status": issuer_status,
+            "schema_status": schema_status,
+            "binding_status": binding_status,
+            "valid": issuer_status == 1 and schema_status == 1 and binding_status == 1
+        }
+
+    def get_permit_nonce(self, address):
+        return self.permit_nonces.get(address, 0)
+
+
+class Registry:
+    """Model of the Registry contract, which forwards every action and view to its Logic contract."""
+
+    FORWARDED_VIEWS = (
+        "get_schema", "get_schema_chunk", "find_schema_by_hash", "get_schema_reference", "verify_schema_content",
+        "get_issuer", "get_issuer_data_bytes", "verify_binding", "verify_bindings", "list_schema_issuers",
+        "get_status_tables", "get_credential_context"
+    )
+
+    def __init__(self, logic, certifier = DEFAULT_CERTIFIER):
+        self.logic = logic
+        self.certifier = certifier
+
+    def update_logic_contract_address(self, sender_address, logic):
+        if sender_address != self.certifier:
+            raise ContractError("Incorrect certifier")
+        self.logic = logic
+
+    def dispatch(self, sender_address, action, parameters):
+        self.logic.execute(sender_address, action, parameters)
+
+    def __getattr__(self, name):
+        if name in Registry.FORWARDED_VIEWS:
+            return getattr(self.logic, name)
+        raise AttributeError(name)
+
+##############
+# Workloads #
+##############
+
+def load_workload(path):
+    with open(path) as workload_file:
+        for line in workload_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def synthetic_workload(operations, owners, seed):
+    """Mix of registry actions from a fixed number of owners, most of them on existing records.
+
+    Status changes are made on existing bindings, with the statuses their owner may set. About
+    one in twenty of the actions on existing records is sent by another account and fails the
+    ownership checks.
+    """
+    rng = random.Random(seed)
+    owner_addresses = ["tz1owner%d" % index for index in range(owners)]
+    issuers = []
+    schema_count = 0
+    # Bindings made by the owner of their issuer, and their keys
+    bindings = []
+    binding_keys = set()
+
+    for _ in range(operations):
+        owner = rng.choice(owner_addresses)
+        draw = rng.random()
+        if draw < 0.2 or not issuers:
+            issuer_did = "did:sim:%d" % len(issuers)
+            issuers.append((issuer_did, owner))
+            yield {"sender": owner, "action": "add_issuer", "parameters": {"issuer_did": issuer_did, "issuer_data": "{\"id\":\"%s\"}" % issuer_did}}
+        elif draw < 0.3 or schema_count == 0:
+            yield {"sender": owner, "action": "add_schema", "parameters": {"schema_data": "{\"title\":\"schema %d\"}" % schema_count}}
+            schema_count += 1
+        elif draw < 0.6 or (draw < 0.8 and not bindings):
+            issuer_did, issuer_owner = rng.choice(issuers)
+            sender = issuer_owner if rng.random() < 0.95 else owner
+            schema_id = rng.randrange(schema_count)
+            if sender == issuer_owner and (issuer_did, schema_id) not in binding_keys:
+                binding_keys.add((issuer_did, schema_id))
+                bindings.append((issuer_did, issuer_owner, schema_id))
+            yield {"sender": sender, "action": "bind_issuer_schema", "parameters": {"issuer_did": issuer_did, "schema_id": schema_id}}
+        elif draw < 0.8:
+            issuer_did, issuer_owner, schema_id = rng.choice(bindings)
+            sender = issuer_owner if rng.random() < 0.95 else owner
+            yield {"sender": sender, "action": "set_binding_status", "parameters": {"issuer_did": issuer_did, "schema_id": schema_id, "status": rng.choice((1, 2))}}
+        else:
+            # Only the certifier sets the conflict status, so owners keep the rights on their issuers
+            issuer_did, issuer_owner = rng.choice(issuers)
+            sender = issuer_owner if rng.random() < 0.95 else owner
+            if draw < 0.9:
+                yield {"sender": sender, "action": "set_issuer_status", "parameters": {"issuer_did": issuer_did, "status": rng.choice((1, 2))}}
+            else:
+                yield {"sender": sender, "action": "set_issuer_data", "parameters": {"issuer_did": issuer_did, "issuer_data": "{\"id\":\"%s\",\"v\":%d}" % (issuer_did, rng.randrange(1000))}}
+
+
+def replay(logic, operations):
+    """Run every operation and return the number of operations and the failures by message.
+
+    Operations that are not valid actions, such as a malformed line of a workload, are failures too.
+    """
+    count = 0
+    failures = {}
+    execute = logic.execute
+    # Records and operations have no reference cycles, the cyclic garbage collector would only
+    # scan the growing tables over and over
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for operation in operations:
+            count += 1
+            try:
+                execute(operation["sender"], operation["action"], operation.get("parameters", {}))
+            except ContractError as error:
+                failures[error.message] = failures.get(error.message, 0) + 1
+            except (KeyError, TypeError, ValueError, AttributeError) as error:
+                message = "Invalid operation: %s" % type(error).__name__
+                failures[message] = failures.get(message, 0) + 1
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return count, failures
+
+
+def summary(logic, count, failures, seconds):
+    return {
+        "operations": count,
+        "applied": count - sum(failures.values()),
+        "failed": failures,
+        "seconds": round(seconds, 3),
+        # Throughput of the applied operations, failed ones are mostly rejected by the first check
+        "operations_per_second": int((count - sum(failures.values())) / seconds) if seconds > 0 else None,
+        "issuers": len(logic.issuer_registry.issuer_map),
+        "schemas": len(logic.schema_registry.schema_map),
+        "bindings": len(logic.schema_registry.issuer_schema_map)
+    }
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "In-memory model of the registry contracts, for replaying workloads")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    replay_parser = subparsers.add_parser("replay", help = "replay the operations of a JSON lines workload")
+    replay_parser.add_argument("workload")
+
+    synthetic_parser = subparsers.add_parser("synthetic", help = "generate a synthetic workload, and replay it or write it out")
+    synthetic_parser.add_argument("--operations", type = int, default = 100000)
+    synthetic_parser.add_argument("--owners", type = int, default = 100)
+    synthetic_parser.add_argument("--seed", type = int, default = 0)
+    synthetic_parser.add_argument("--output", default = None, help = "write the workload to this file instead of replaying it")
+
+    for subparser in (replay_parser, synthetic_parser):
+        subparser.add_argument("--certifier", default = DEFAULT_CERTIFIER)
+        subparser.add_argument("--numeric-statuses", action = "store_true")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "replay":
+        operations = list(load_workload(args.workload))
+    else:
+        operations = list(synthetic_workload(args.operations, args.owners, args.seed))
+        if args.output is not None:
+            with open(args.output, "w") as output_file:
+                for operation in operations:
+                    output_file.write(json.dumps(operation) + "\n")
+            return 0
+
+    # The workload is loaded before the clock starts, only the simulation is timed
+    logic = RegistryLogic(args.certifier, numeric_statuses = args.numeric_statuses)
+    start = time.perf_counter()
+    count, failures = replay(logic, operations)
+    print(json.dumps(summary(logic, count, failures, time.perf_counter() - start), indent = 2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
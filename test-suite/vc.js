@@ -153,7 +153,9 @@ function add_schema(schema_data) {
             (
                 async () => {
                     let data = await op.transactionOperation();
-                    let schema_id = data.metadata.internal_operation_results[1].result.storage[2]["int"] - 1
+                    // The Schema Registry emits the assigned ID in its schema_added event
+                    let event = data.metadata.internal_operation_results.find((result) => result.kind === "event" && result.tag === "schema_added");
+                    let schema_id = event.payload.args[0]["int"];
                     showResultAlert(`Created new Schema with ID ${schema_id} <a class="btn btn-success ms-2" target="_blank" href="${browser_operations_url + op.opHash}">See Operation</a>`, "alert-success");
                     get_schema(schema_id, false);
                 }
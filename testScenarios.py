@@ -7,6 +7,7 @@ def test():
     REGISTRY_LOGIC = sp.io.import_stored_contract("registryLogic.py")
     ISSUER_REGISTRY = sp.io.import_stored_contract("issuerRegistry.py")
     SCHEMA_REGISTRY = sp.io.import_stored_contract("schemaRegistry.py")
+    REGISTRY = sp.io.import_stored_contract("registry.py")
     certifier = sp.test_account("Certifier")
     operator_A = sp.test_account("Operator_A")
     operator_B = sp.test_account("Operator_B")
@@ -76,8 +77,19 @@ def test():
     scenario.h3("Setting Issuer Schema contract address")
     registry_logic_contract.update_contract_address(schema_contract_record).run(valid = True, sender = certifier_address)
 
-    scenario.verify(registry_logic_contract.data.contracts["issuer_registry_contract"] == issuer_registry_contract.address)
-    scenario.verify(registry_logic_contract.data.contracts["schema_registry_contract"] == schema_registry_contract.address)
+    scenario.verify(registry_logic_contract.data.contracts.issuer_registry_contract == issuer_registry_contract.address)
+    scenario.verify(registry_logic_contract.data.contracts.schema_registry_contract == schema_registry_contract.address)
+
+    # FAIL - Only the storage contracts known to the Registry Logic contract can be set
+    scenario.h3("FAIL - Setting an unknown contract address")
+    registry_logic_contract.update_contract_address(sp.record(
+        contract_name = "unknown_contract",
+        address = schema_registry_contract.address
+    )).run(valid = False, sender = certifier_address)
+
+    # FAIL - Only the Certifier can set the storage contract addresses
+    scenario.h3("FAIL - Setting a contract address, non-Certifier operator")
+    registry_logic_contract.update_contract_address(schema_contract_record).run(valid = False, sender = operator_A_address)
 
     scenario.h1("Testing")
     
@@ -98,6 +110,10 @@ def test():
     # Check Schema addition on Registry Logic contract view
     scenario.verify(registry_logic_contract.get_schema(0).schema_data == "schema_data")
 
+    # Check Schema authorization context on Schema Registry contract view
+    scenario.verify(schema_registry_contract.get_schema_context(0).open_some().schema_owner == operator_A_address)
+    scenario.verify(schema_registry_contract.get_schema_context(999).is_none())
+
     # Updating the status of Schema
     scenario.h3("Updating Schema Status")
 
@@ -167,6 +183,10 @@ def test():
     # Check Issuer addition on Registry Logic contract view
     scenario.verify(registry_logic_contract.get_issuer(issuer_did).issuer_data == "issuer_data")
 
+    # Check Issuer authorization context on Issuer Registry contract view
+    scenario.verify(issuer_registry_contract.get_issuer_context(issuer_did).open_some().status == 1)
+    scenario.verify(issuer_registry_contract.get_issuer_context("did:tz:invalid_did").is_none())
+
     # FAIL - Issuer DID already exists
     scenario.h4("FAIL - Adding an Issuer, DID already exits")
     registry_logic_contract.add_issuer(issuer).run(valid = False, sender = operator_A_address)
@@ -246,6 +266,10 @@ def test():
     # FAIL - Sender is not the owner of the Issuer
     scenario.h4("FAIL - Setting Issuer data, Operator is not the owner of the Issuer")
     registry_logic_contract.set_issuer_data(issuer_update_data_valid).run(valid = False, sender = operator_B_address)
+
+    # FAIL - Issuer DID does not exist
+    scenario.h4("FAIL - Setting Issuer data, Issuer DID does not exist")
+    registry_logic_contract.set_issuer_data(sp.record(issuer_did = "did:tz:invalid_did", issuer_data = "new_data")).run(valid = False, sender = operator_A_address)
     
     # Updating the Issuer owner
     scenario.h3("Updating Issuer owner")
@@ -355,6 +379,34 @@ def test():
         status = 0
     ))
 
+    # Verify several Issuer to Schema bindings at once, results are in the order of the bindings
+    scenario.verify(registry_logic_contract.verify_bindings([
+        bind_issuer_schema_invalid_schema_id,
+        bind_issuer_schema_valid,
+        bind_issuer_schema_invalid_issuer_did
+    ]) == [
+        sp.record(binding_exists = False, status = 0),
+        sp.record(binding_exists = True, status = 1),
+        sp.record(binding_exists = False, status = 0)
+    ])
+    scenario.verify(sp.len(registry_logic_contract.verify_bindings([])) == 0)
+
+    # Credential context - the binding is active but the Schema is deprecated
+    scenario.verify(registry_logic_contract.get_credential_context(bind_issuer_schema_valid) == sp.record(
+        issuer_status = 1,
+        schema_status = 2,
+        binding_status = 1,
+        valid = False
+    ))
+
+    # Credential context - Issuer does not exist
+    scenario.verify(registry_logic_contract.get_credential_context(bind_issuer_schema_invalid_issuer_did) == sp.record(
+        issuer_status = 0,
+        schema_status = 2,
+        binding_status = 0,
+        valid = False
+    ))
+
     scenario.h3("Updating Issuer-Schema binding status")
 
     set_binding_status_valid = sp.record(
@@ -400,4 +452,1283 @@ def test():
 
     # FAIL - Status ID does not exist
     scenario.h4("FAIL - Setting Issuer-Schema binding status, status ID does not exist")
-    registry_logic_contract.set_binding_status(set_binding_status_invalid).run(valid = False, sender = operator_A_address)
\ No newline at end of file
+    registry_logic_contract.set_binding_status(set_binding_status_invalid).run(valid = False, sender = operator_A_address)
+
+    # Batch operations
+    scenario.h2("Batch operations")
+    scenario.h3("Adding Schemas in batch")
+
+    schemas_batch = sp.record(
+        schemas_data = ["schema_data_1", "schema_data_2"]
+    )
+
+    # Add Schemas, IDs are assigned in the order of the list
+    scenario.h4("Adding two Schemas")
+    registry_logic_contract.add_schemas(schemas_batch).run(valid = True, sender = operator_B_address)
+    scenario.verify(schema_registry_contract.get(1).schema_data == "schema_data_1")
+    scenario.verify(schema_registry_contract.get(2).schema_data == "schema_data_2")
+    scenario.verify(schema_registry_contract.get(2).schema_owner == operator_B_address)
+    scenario.verify(schema_registry_contract.data.schema_last_id == 3)
+
+    scenario.h3("Adding Issuers in batch")
+
+    issuers_batch_valid = sp.record(
+        issuers = [
+            sp.record(issuer_did = "did:tz:batch_did_1", issuer_data = "issuer_data_1"),
+            sp.record(issuer_did = "did:tz:batch_did_2", issuer_data = "issuer_data_2"),
+        ]
+    )
+
+    issuers_batch_existing_did = sp.record(
+        issuers = [
+            sp.record(issuer_did = "did:tz:batch_did_3", issuer_data = "issuer_data_3"),
+            sp.record(issuer_did = issuer_did, issuer_data = "issuer_data"),
+        ]
+    )
+
+    issuers_batch_duplicate_did = sp.record(
+        issuers = [
+            sp.record(issuer_did = "did:tz:batch_did_3", issuer_data = "issuer_data_3"),
+            sp.record(issuer_did = "did:tz:batch_did_3", issuer_data = "issuer_data_3"),
+        ]
+    )
+
+    scenario.show([
+        issuers_batch_valid,
+        issuers_batch_existing_did,
+        issuers_batch_duplicate_did,
+    ], stripStrings = True)
+
+    # Add Issuers
+    scenario.h4("Adding two Issuers")
+    registry_logic_contract.add_issuers(issuers_batch_valid).run(valid = True, sender = operator_B_address)
+    scenario.verify(issuer_registry_contract.get("did:tz:batch_did_1").issuer_owner == operator_B_address)
+    scenario.verify(issuer_registry_contract.get("did:tz:batch_did_2").issuer_data == "issuer_data_2")
+
+    # FAIL - One of the Issuer DIDs already exists
+    scenario.h4("FAIL - Adding Issuers in batch, DID already exists")
+    registry_logic_contract.add_issuers(issuers_batch_existing_did).run(valid = False, sender = operator_B_address)
+
+    # FAIL - The same Issuer DID appears twice in the batch
+    scenario.h4("FAIL - Adding Issuers in batch, duplicate DID in batch")
+    registry_logic_contract.add_issuers(issuers_batch_duplicate_did).run(valid = False, sender = operator_B_address)
+    scenario.verify(~issuer_registry_contract.data.issuer_map.contains("did:tz:batch_did_3"))
+
+    scenario.h3("Applying status changes in batch")
+
+    status_changes_certifier = sp.record(
+        changes = [
+            sp.variant("issuer", sp.record(issuer_did = issuer_did, status = 3)),
+            sp.variant("schema", sp.record(schema_id = 1, status = 2)),
+            sp.variant("binding", sp.record(issuer_did = issuer_did, schema_id = 0, status = 1)),
+        ]
+    )
+
+    status_changes_owner_valid = sp.record(
+        changes = [
+            sp.variant("issuer", sp.record(issuer_did = "did:tz:batch_did_1", status = 2)),
+            sp.variant("schema", sp.record(schema_id = 1, status = 1)),
+            sp.variant("schema", sp.record(schema_id = 2, status = 2)),
+        ]
+    )
+
+    status_changes_owner_non_owned = sp.record(
+        changes = [
+            sp.variant("issuer", sp.record(issuer_did = "did:tz:batch_did_2", status = 2)),
+            sp.variant("schema", sp.record(schema_id = 0, status = 1)),
+        ]
+    )
+
+    status_changes_owner_in_conflict = sp.record(
+        changes = [
+            sp.variant("binding", sp.record(issuer_did = issuer_did, schema_id = 0, status = 2)),
+        ]
+    )
+
+    status_changes_invalid_status_id = sp.record(
+        changes = [
+            sp.variant("schema", sp.record(schema_id = 1, status = 3)),
+        ]
+    )
+
+    scenario.show([
+        status_changes_certifier,
+        status_changes_owner_valid,
+        status_changes_owner_non_owned,
+        status_changes_owner_in_conflict,
+        status_changes_invalid_status_id,
+    ], stripStrings = True)
+
+    # Apply issuer, schema and binding changes as Certifier
+    scenario.h4("Applying status changes, Certifier operator")
+    registry_logic_contract.apply_status_changes(status_changes_certifier).run(valid = True, sender = certifier_address)
+    scenario.verify(issuer_registry_contract.get(issuer_did).status == 3)
+    scenario.verify(schema_registry_contract.get(1).status == 2)
+    scenario.verify(registry_logic_contract.verify_binding(bind_issuer_schema_valid) == sp.record(
+        binding_exists = True,
+        status = 1
+    ))
+
+    # Apply changes on owned records
+    scenario.h4("Applying status changes, owner operator")
+    registry_logic_contract.apply_status_changes(status_changes_owner_valid).run(valid = True, sender = operator_B_address)
+    scenario.verify(issuer_registry_contract.get("did:tz:batch_did_1").status == 2)
+    scenario.verify(schema_registry_contract.get(1).status == 1)
+    scenario.verify(schema_registry_contract.get(2).status == 2)
+
+    # FAIL - One of the records is not owned by the sender, no change is applied
+    scenario.h4("FAIL - Applying status changes, non-valid operator for one of the changes")
+    registry_logic_contract.apply_status_changes(status_changes_owner_non_owned).run(valid = False, sender = operator_B_address)
+    scenario.verify(issuer_registry_contract.get("did:tz:batch_did_2").status == 1)
+
+    # FAIL - Issuer is "In conflict", binding status changes allowed only by Certifier
+    scenario.h4("FAIL - Applying status changes, Issuer \"In conflict\", non-Certifier operator")
+    registry_logic_contract.apply_status_changes(status_changes_owner_in_conflict).run(valid = False, sender = operator_A_address)
+
+    # FAIL - Status ID does not exist for Schemas
+    scenario.h4("FAIL - Applying status changes, status ID does not exist")
+    registry_logic_contract.apply_status_changes(status_changes_invalid_status_id).run(valid = False, sender = operator_B_address)
+
+    scenario.h3("Binding several Schemas to an Issuer")
+
+    bind_issuer_second_schema = sp.record(
+        schema_id = 1,
+        issuer_did = issuer_did,
+    )
+
+    # Bind a second Schema, the first binding is kept
+    scenario.h4("Bind a second Schema to Issuer")
+    registry_logic_contract.bind_issuer_schema(bind_issuer_second_schema).run(valid = True, sender = operator_A_address)
+    scenario.verify(registry_logic_contract.verify_binding(bind_issuer_second_schema) == sp.record(
+        binding_exists = True,
+        status = 1
+    ))
+    scenario.verify(registry_logic_contract.verify_binding(bind_issuer_schema_valid) == sp.record(
+        binding_exists = True,
+        status = 1
+    ))
+
+    # The credential context is valid only when the Issuer, Schema and binding are all active
+    credential_context = registry_logic_contract.get_credential_context(bind_issuer_second_schema)
+    scenario.verify(credential_context.issuer_status == issuer_registry_contract.get(issuer_did).status)
+    scenario.verify(credential_context.schema_status == schema_registry_contract.get(1).status)
+    scenario.verify(credential_context.binding_status == 1)
+    scenario.verify(credential_context.valid == ((credential_context.issuer_status == 1) & (credential_context.schema_status == 1)))
+
+    # FAIL - Setting the status of a binding that does not exist
+    scenario.h4("FAIL - Setting Issuer-Schema binding status, binding does not exist")
+    registry_logic_contract.set_binding_deprecated(sp.record(
+        schema_id = 0,
+        issuer_did = "did:tz:batch_did_1",
+    )).run(valid = False, sender = operator_B_address)
+
+    # Migration of Schemas and bindings to a new Schema Registry contract
+    scenario.h2("Schema Registry migration")
+
+    migrated_schema_registry_contract = SCHEMA_REGISTRY.SchemaRegistry(
+        registry_logic_contract.address,
+        certifier_address
+    )
+
+    scenario += migrated_schema_registry_contract
+
+    schemas_import = [
+        sp.record(schema_id = 0, schema_data = "schema_data", schema_owner = operator_A_address, status = 2),
+        sp.record(schema_id = 2, schema_data = "schema_data_2", schema_owner = operator_B_address, status = 1),
+    ]
+
+    bindings_import = [
+        sp.record(issuer_did = issuer_did, schema_id = 0, status = 1),
+        sp.record(issuer_did = issuer_did, schema_id = 2, status = 2),
+    ]
+
+    scenario.h3("Importing Schemas")
+    migrated_schema_registry_contract.import_schemas(schemas_import).run(valid = True, sender = certifier_address)
+    scenario.verify(migrated_schema_registry_contract.get(2).schema_owner == operator_B_address)
+    scenario.verify(migrated_schema_registry_contract.data.schema_last_id == 3)
+
+    scenario.h3("Importing bindings")
+    migrated_schema_registry_contract.import_bindings(bindings_import).run(valid = True, sender = certifier_address)
+    scenario.verify(migrated_schema_registry_contract.verify_binding(sp.record(issuer_did = issuer_did, schema_id = 2)) == sp.record(
+        binding_exists = True,
+        status = 2
+    ))
+
+    # FAIL - Only the Certifier can import
+    scenario.h3("FAIL - Importing bindings, non-Certifier operator")
+    migrated_schema_registry_contract.import_bindings(bindings_import).run(valid = False, sender = operator_A_address)
+
+    # Issuers are imported in a new Issuer Registry contract with their owner index
+    scenario.h2("Issuer Registry migration")
+
+    migrated_issuer_registry_contract = ISSUER_REGISTRY.IssuerRegistry(
+        registry_logic_contract.address,
+        certifier_address
+    )
+    scenario += migrated_issuer_registry_contract
+
+    issuers_import = [
+        sp.record(issuer_did = issuer_did, issuer_data = "issuer_data", issuer_data_bytes = sp.none, issuer_owner = operator_A_address, status = 1),
+        sp.record(issuer_did = "did:tz:imported_did", issuer_data = "", issuer_data_bytes = sp.some(sp.bytes("0x7b7d")), issuer_owner = operator_B_address, status = 2),
+    ]
+
+    scenario.h3("Importing Issuers")
+    migrated_issuer_registry_contract.import_issuers(issuers_import).run(valid = True, sender = certifier_address)
+    scenario.verify(migrated_issuer_registry_contract.get(issuer_did).issuer_owner == operator_A_address)
+    scenario.verify(migrated_issuer_registry_contract.get_data_bytes("did:tz:imported_did") == sp.bytes("0x7b7d"))
+    scenario.verify(migrated_issuer_registry_contract.list_owner_issuers(sp.record(owner = operator_B_address, from_position = 0, limit = 10)).issuer_dids == ["did:tz:imported_did"])
+
+    # Importing an Issuer again replaces it, and moves it to the index of its new owner
+    scenario.h3("Importing an Issuer again")
+    migrated_issuer_registry_contract.import_issuers([
+        sp.record(issuer_did = "did:tz:imported_did", issuer_data = "{}", issuer_data_bytes = sp.none, issuer_owner = operator_A_address, status = 1)
+    ]).run(valid = True, sender = certifier_address)
+    scenario.verify(~migrated_issuer_registry_contract.data.issuer_data_bytes_map.contains("did:tz:imported_did"))
+    scenario.verify(migrated_issuer_registry_contract.list_owner_issuers(sp.record(owner = operator_A_address, from_position = 0, limit = 10)).issuer_dids == [issuer_did, "did:tz:imported_did"])
+    scenario.verify(migrated_issuer_registry_contract.data.owner_issuer_count[operator_B_address] == 0)
+
+    # FAIL - Only the Certifier can import
+    scenario.h3("FAIL - Importing Issuers, non-Certifier operator")
+    migrated_issuer_registry_contract.import_issuers(issuers_import).run(valid = False, sender = operator_A_address)
+
+    # Content-addressed Schemas
+    scenario.h2("Schema references")
+
+    schema_reference = sp.record(
+        schema_hash = sp.bytes("0xe346432021b04179518d9614f3560ccd71354a4ee101ddcb893d6959a9d6301c"),
+        schema_uri = "http://localhost:8000/e346432021b04179518d9614f3560ccd71354a4ee101ddcb893d6959a9d6301c"
+    )
+
+    # Add a Schema stored off-chain, it gets the next Schema ID
+    scenario.h3("Adding a Schema reference")
+    registry_logic_contract.add_schema_reference(schema_reference).run(valid = True, sender = operator_A_address)
+    scenario.verify(schema_registry_contract.get(3).schema_owner == operator_A_address)
+    scenario.verify(registry_logic_contract.get_schema_reference(3).schema_uri == schema_reference.schema_uri)
+
+    # Verify the Schema content against its hash
+    scenario.verify(registry_logic_contract.verify_schema_content(sp.record(
+        schema_id = 3,
+        schema_hash = schema_reference.schema_hash
+    )))
+    scenario.verify(~registry_logic_contract.verify_schema_content(sp.record(
+        schema_id = 3,
+        schema_hash = sp.bytes("0x00")
+    )))
+
+    # Schemas stored on-chain have no reference
+    scenario.verify(~registry_logic_contract.verify_schema_content(sp.record(
+        schema_id = 0,
+        schema_hash = schema_reference.schema_hash
+    )))
+
+    # Schema references share the status entry points with on-chain Schemas
+    scenario.h3("Setting Schema reference as deprecated")
+    registry_logic_contract.set_schema_deprecated(sp.record(schema_id = 3)).run(valid = True, sender = operator_A_address)
+    scenario.verify(schema_registry_contract.get(3).status == 2)
+
+    # Issuers with an encoded DID document
+    scenario.h2("Issuer data bytes")
+
+    issuer_bytes_did = "did:tz:bytes_did"
+
+    issuer_bytes = sp.record(
+        issuer_did = issuer_bytes_did,
+        issuer_data_bytes = sp.bytes("0x01abcdef"),
+    )
+
+    issuer_bytes_update = sp.record(
+        issuer_did = issuer_bytes_did,
+        issuer_data_bytes = sp.bytes("0x010123"),
+    )
+
+    scenario.h3("Adding an Issuer with an encoded DID document")
+    registry_logic_contract.add_issuer_bytes(issuer_bytes).run(valid = True, sender = operator_A_address)
+    scenario.verify(issuer_registry_contract.get(issuer_bytes_did).issuer_owner == operator_A_address)
+    scenario.verify(issuer_registry_contract.get(issuer_bytes_did).issuer_data == "")
+    scenario.verify(registry_logic_contract.get_issuer_data_bytes(issuer_bytes_did) == sp.bytes("0x01abcdef"))
+
+    # FAIL - Issuer DID already exists
+    scenario.h4("FAIL - Adding an Issuer with an encoded DID document, DID already exists")
+    registry_logic_contract.add_issuer_bytes(sp.record(
+        issuer_did = issuer_did,
+        issuer_data_bytes = sp.bytes("0x01abcdef"),
+    )).run(valid = False, sender = operator_A_address)
+
+    scenario.h3("Updating an encoded DID document")
+    registry_logic_contract.set_issuer_data_bytes(issuer_bytes_update).run(valid = True, sender = operator_A_address)
+    scenario.verify(registry_logic_contract.get_issuer_data_bytes(issuer_bytes_did) == sp.bytes("0x010123"))
+
+    # FAIL - Sender is not the owner of the Issuer
+    scenario.h4("FAIL - Updating an encoded DID document, Operator is not the owner of the Issuer")
+    registry_logic_contract.set_issuer_data_bytes(issuer_bytes_update).run(valid = False, sender = operator_B_address)
+
+    # Setting string data removes the encoded DID document
+    scenario.h3("Replacing an encoded DID document with string data")
+    registry_logic_contract.set_issuer_data(sp.record(
+        issuer_did = issuer_bytes_did,
+        issuer_data = "issuer_data"
+    )).run(valid = True, sender = operator_A_address)
+    scenario.verify(issuer_registry_contract.get(issuer_bytes_did).issuer_data == "issuer_data")
+    scenario.verify(~issuer_registry_contract.data.issuer_data_bytes_map.contains(issuer_bytes_did))
+
+    # Single dispatch entry point of the Registry contract
+    scenario.h2("Dispatch")
+
+    registry_contract = REGISTRY.Registry(
+        registry_logic_contract.address,
+        certifier_address
+    )
+
+    scenario += registry_contract
+
+    scenario.h3("Adding a Schema through the Registry contract")
+    registry_contract.dispatch(sp.variant("add_schema", "dispatched_schema_data")).run(valid = True, sender = operator_B_address)
+    scenario.verify(schema_registry_contract.get(4).schema_data == "dispatched_schema_data")
+    scenario.verify(schema_registry_contract.get(4).schema_owner == operator_B_address)
+
+    scenario.h3("Changing the owner of an Issuer through the Registry contract")
+    registry_contract.dispatch(sp.variant("set_issuer_owner", sp.record(
+        issuer_did = issuer_bytes_did,
+        owner_address = operator_B_address
+    ))).run(valid = True, sender = operator_A_address)
+    scenario.verify(issuer_registry_contract.get(issuer_bytes_did).issuer_owner == operator_B_address)
+
+    # FAIL - The dispatched actions are checked as the entry points of the same name
+    scenario.h4("FAIL - Deprecating an Issuer through the Registry contract, Operator is not the owner of the Issuer")
+    registry_contract.dispatch(sp.variant("set_issuer_deprecated", issuer_bytes_did)).run(valid = False, sender = operator_A_address)
+
+    scenario.h3("Deprecating a Schema through the Registry Logic contract")
+    registry_logic_contract.dispatch(sp.pack(sp.set_type_expr(
+        sp.variant("set_schema_deprecated", 4),
+        REGISTRY_LOGIC.DISPATCH_TYPE
+    ))).run(valid = True, sender = operator_B_address)
+    scenario.verify(schema_registry_contract.get(4).status == 2)
+
+    # FAIL - The packed action must be a Registry action
+    scenario.h4("FAIL - Dispatching an invalid action")
+    registry_logic_contract.dispatch(sp.pack("add_schema")).run(valid = False, sender = operator_B_address)
+
+    scenario.h3("Verifying several bindings through the Registry contract")
+    bindings = [bind_issuer_schema_valid, bind_issuer_schema_invalid_schema_id]
+    scenario.verify_equal(registry_contract.verify_bindings(bindings), registry_logic_contract.verify_bindings(bindings))
+    scenario.verify_equal(registry_contract.verify_bindings(bindings), [
+        registry_contract.verify_binding(bind_issuer_schema_valid),
+        registry_contract.verify_binding(bind_issuer_schema_invalid_schema_id)
+    ])
+    scenario.verify_equal(
+        registry_contract.get_credential_context(bind_issuer_schema_valid),
+        registry_logic_contract.get_credential_context(bind_issuer_schema_valid)
+    )
+
+    # Status names are compiled into the Registry Logic contract
+    scenario.h2("Status tables")
+
+    status_tables = registry_logic_contract.get_status_tables()
+    scenario.verify(status_tables.issuer_statuses[3] == "in_conflict")
+    scenario.verify(status_tables.schema_statuses[2] == "deprecated")
+    scenario.verify(~status_tables.schema_statuses.contains(3))
+    scenario.verify_equal(registry_contract.get_status_tables(), status_tables)
+
+    scenario.h3("Numeric statuses")
+
+    numeric_registry_logic_contract = REGISTRY_LOGIC.RegistryLogic(
+        certifier_address,
+        issuer_registry_contract.address,
+        schema_registry_contract.address,
+        numeric_statuses = True
+    )
+
+    scenario += numeric_registry_logic_contract
+
+    numeric_registry_contract = REGISTRY.Registry(
+        numeric_registry_logic_contract.address,
+        certifier_address,
+        numeric_statuses = True
+    )
+
+    scenario += numeric_registry_contract
+
+    # The status IDs map to the names returned by the default deployment
+    scenario.verify(status_tables.schema_statuses[numeric_registry_contract.get_schema(0).status] == registry_contract.get_schema(0).status)
+    scenario.verify(status_tables.issuer_statuses[numeric_registry_contract.get_issuer(issuer_did).status] == registry_contract.get_issuer(issuer_did).status)
+    scenario.verify(numeric_registry_contract.get_schema(0).status == schema_registry_contract.get(0).status)
+
+    # Paging through the Schemas and the records of an owner
+    scenario.h2("Enumeration")
+
+    scenario.h3("Listing Schemas")
+    scenario.verify(schema_registry_contract.list_schemas(sp.record(from_id = 1, limit = 2)) == sp.record(
+        schemas = [
+            sp.record(schema_id = 1, schema_owner = operator_B_address, status = schema_registry_contract.get(1).status),
+            sp.record(schema_id = 2, schema_owner = operator_B_address, status = schema_registry_contract.get(2).status)
+        ],
+        next_id = sp.some(3)
+    ))
+    scenario.verify(sp.len(schema_registry_contract.list_schemas(sp.record(from_id = 4, limit = 10)).schemas) == 1)
+    scenario.verify(schema_registry_contract.list_schemas(sp.record(from_id = 4, limit = 10)).next_id.is_none())
+    scenario.verify(sp.len(schema_registry_contract.list_schemas(sp.record(from_id = 10, limit = 10)).schemas) == 0)
+
+    scenario.h3("Listing the Schemas of an owner")
+    scenario.verify(schema_registry_contract.list_owner_schemas(sp.record(owner = operator_A_address, from_position = 0, limit = 10)) == sp.record(
+        schema_ids = [0, 3],
+        next_position = sp.none
+    ))
+    scenario.verify(schema_registry_contract.list_owner_schemas(sp.record(owner = operator_B_address, from_position = 0, limit = 2)) == sp.record(
+        schema_ids = [1, 2],
+        next_position = sp.some(2)
+    ))
+    scenario.verify(schema_registry_contract.list_owner_schemas(sp.record(owner = operator_B_address, from_position = 2, limit = 2)) == sp.record(
+        schema_ids = [4],
+        next_position = sp.none
+    ))
+
+    # Re-importing a Schema moves it to the index of its new owner
+    scenario.h4("Re-importing Schemas with a new owner")
+    migrated_schema_registry_contract.import_schemas([
+        sp.record(schema_id = 0, schema_data = "schema_data", schema_owner = operator_B_address, status = 2)
+    ]).run(valid = True, sender = certifier_address)
+    scenario.verify(sp.len(migrated_schema_registry_contract.list_owner_schemas(sp.record(owner = operator_A_address, from_position = 0, limit = 10)).schema_ids) == 0)
+    scenario.verify(migrated_schema_registry_contract.list_owner_schemas(sp.record(owner = operator_B_address, from_position = 0, limit = 10)).schema_ids == [2, 0])
+
+    # The last Schema of the owner takes the position of the removed one
+    migrated_schema_registry_contract.import_schemas([
+        sp.record(schema_id = 2, schema_data = "schema_data_2", schema_owner = operator_A_address, status = 1)
+    ]).run(valid = True, sender = certifier_address)
+    scenario.verify(migrated_schema_registry_contract.list_owner_schemas(sp.record(owner = operator_B_address, from_position = 0, limit = 10)).schema_ids == [0])
+    scenario.verify(migrated_schema_registry_contract.list_owner_schemas(sp.record(owner = operator_A_address, from_position = 0, limit = 10)).schema_ids == [2])
+
+    scenario.h3("Listing the Issuers of an owner")
+    scenario.verify(issuer_registry_contract.list_owner_issuers(sp.record(owner = operator_A_address, from_position = 0, limit = 10)) == sp.record(
+        issuer_dids = [issuer_did],
+        next_position = sp.none
+    ))
+    scenario.verify(issuer_registry_contract.list_owner_issuers(sp.record(owner = operator_B_address, from_position = 0, limit = 10)).issuer_dids == [
+        "did:tz:batch_did_1",
+        "did:tz:batch_did_2",
+        issuer_bytes_did
+    ])
+
+    # Changing the owner moves the Issuer, the last Issuer of the previous owner takes its position
+    scenario.h4("Setting Issuer owner, owner index")
+    registry_logic_contract.set_issuer_owner(sp.record(
+        issuer_did = "did:tz:batch_did_1",
+        new_owner_address = operator_A_address
+    )).run(valid = True, sender = operator_B_address)
+    scenario.verify(issuer_registry_contract.list_owner_issuers(sp.record(owner = operator_B_address, from_position = 0, limit = 10)).issuer_dids == [
+        issuer_bytes_did,
+        "did:tz:batch_did_2"
+    ])
+    scenario.verify(issuer_registry_contract.list_owner_issuers(sp.record(owner = operator_A_address, from_position = 0, limit = 1)) == sp.record(
+        issuer_dids = [issuer_did],
+        next_position = sp.some(1)
+    ))
+    scenario.verify(issuer_registry_contract.list_owner_issuers(sp.record(owner = operator_A_address, from_position = 1, limit = 1)).issuer_dids == ["did:tz:batch_did_1"])
+
+    scenario.h3("Listing the Issuers bound to a Schema")
+    registry_logic_contract.bind_issuer_schema(sp.record(
+        issuer_did = "did:tz:batch_did_2",
+        schema_id = 0
+    )).run(valid = True, sender = operator_B_address)
+
+    # Binding again does not add the Issuer twice
+    registry_logic_contract.bind_issuer_schema(bind_issuer_schema_valid).run(valid = True, sender = operator_A_address)
+    scenario.verify(schema_registry_contract.data.schema_issuer_count[0] == 2)
+
+    scenario.verify(registry_logic_contract.list_schema_issuers(sp.record(schema_id = 0, cursor = 0, limit = 1)) == sp.record(
+        issuers = [sp.record(issuer_did = issuer_did, status = 1)],
+        next_cursor = sp.some(1)
+    ))
+
+    # The listing gives the current status of the binding
+    registry_logic_contract.set_binding_deprecated(sp.record(
+        issuer_did = "did:tz:batch_did_2",
+        schema_id = 0
+    )).run(valid = True, sender = operator_B_address)
+    scenario.verify(registry_logic_contract.list_schema_issuers(sp.record(schema_id = 0, cursor = 1, limit = 1)) == sp.record(
+        issuers = [sp.record(issuer_did = "did:tz:batch_did_2", status = 2)],
+        next_cursor = sp.none
+    ))
+    scenario.verify_equal(
+        registry_contract.list_schema_issuers(sp.record(schema_id = 0, cursor = 0, limit = 10)),
+        registry_logic_contract.list_schema_issuers(sp.record(schema_id = 0, cursor = 0, limit = 10))
+    )
+    scenario.verify(sp.len(registry_logic_contract.list_schema_issuers(sp.record(schema_id = 999, cursor = 0, limit = 10)).issuers) == 0)
+
+    # Moving Issuers and Schemas to a new owner in one operation
+    scenario.h2("Ownership transfer")
+
+    ownership_transfer_B_to_A = sp.record(
+        old_owner = operator_B_address,
+        new_owner = operator_A_address,
+        issuer_dids = ["did:tz:batch_did_2"],
+        schema_ids = [4]
+    )
+
+    # FAIL - Only the old owner or the Certifier can transfer
+    scenario.h4("FAIL - Transferring ownership, non-valid operator")
+    registry_logic_contract.transfer_ownership(ownership_transfer_B_to_A).run(valid = False, sender = operator_A_address)
+
+    # FAIL - Every record must belong to the old owner
+    scenario.h4("FAIL - Transferring ownership, Schema of another owner")
+    registry_logic_contract.transfer_ownership(sp.record(
+        old_owner = operator_B_address,
+        new_owner = operator_A_address,
+        issuer_dids = [],
+        schema_ids = [4, 0]
+    )).run(valid = False, sender = operator_B_address)
+
+    scenario.h3("Transferring ownership, owner operator")
+    registry_logic_contract.transfer_ownership(ownership_transfer_B_to_A).run(valid = True, sender = operator_B_address)
+    scenario.verify(issuer_registry_contract.get("did:tz:batch_did_2").issuer_owner == operator_A_address)
+    scenario.verify(schema_registry_contract.get(4).schema_owner == operator_A_address)
+    scenario.verify(issuer_registry_contract.list_owner_issuers(sp.record(owner = operator_B_address, from_position = 0, limit = 10)).issuer_dids == [issuer_bytes_did])
+    scenario.verify(schema_registry_contract.list_owner_schemas(sp.record(owner = operator_A_address, from_position = 0, limit = 10)).schema_ids == [0, 3, 4])
+
+    # The moved Issuer can be changed by its new owner only
+    scenario.h4("FAIL - Setting Issuer status, previous owner")
+    registry_logic_contract.set_issuer_deprecated(sp.record(issuer_did = "did:tz:batch_did_2")).run(valid = False, sender = operator_B_address)
+
+    scenario.h3("Transferring ownership through the Registry contract, Certifier operator")
+    registry_contract.dispatch(sp.variant("transfer_ownership", sp.record(
+        old_owner = operator_A_address,
+        new_owner = operator_B_address,
+        issuer_dids = [],
+        schema_ids = [4]
+    ))).run(valid = True, sender = certifier_address)
+    scenario.verify(schema_registry_contract.get(4).schema_owner == operator_B_address)
+    scenario.verify(schema_registry_contract.list_owner_schemas(sp.record(owner = operator_B_address, from_position = 0, limit = 10)).schema_ids == [1, 2, 4])
+
+    # The Storage contracts check the owner and the status they find when they change a record,
+    # the Registry Logic contract passes the caller as the expected owner, none for the Certifier
+    scenario.h2("Compare-and-set changes")
+
+    scenario.h4("FAIL - Changing Issuer data in the Storage contract, unexpected owner")
+    issuer_registry_contract.change_data(sp.record(
+        issuer_did = "did:tz:batch_did_2",
+        issuer_data = "{}",
+        expected_owner = sp.some(operator_B_address)
+    )).run(valid = False, sender = registry_logic_contract.address)
+
+    scenario.h3("Changing Issuer data in the Storage contract, expected owner")
+    issuer_registry_contract.change_data(sp.record(
+        issuer_did = "did:tz:batch_did_2",
+        issuer_data = "{}",
+        expected_owner = sp.some(operator_A_address)
+    )).run(valid = True, sender = registry_logic_contract.address)
+
+    scenario.h4("FAIL - Changing Schema status in the Storage contract, unexpected owner")
+    schema_registry_contract.change_status(sp.record(
+        schema_id = 4,
+        status = 2,
+        expected_owner = sp.some(operator_A_address)
+    )).run(valid = False, sender = registry_logic_contract.address)
+
+    scenario.h4("FAIL - Changing Issuer status in the Storage contract, unexpected status")
+    issuer_registry_contract.change_status(sp.record(
+        issuer_did = "did:tz:batch_did_2",
+        status = 2,
+        expected_owner = sp.some(operator_A_address),
+        expected_statuses = sp.some(sp.set([3]))
+    )).run(valid = False, sender = registry_logic_contract.address)
+
+    # FAIL - Only the Registry Logic contract calls the Storage contracts
+    scenario.h4("FAIL - Changing Issuer owner in the Storage contract, non-Registry caller")
+    issuer_registry_contract.change_owner(sp.record(
+        issuer_did = "did:tz:batch_did_2",
+        new_owner_address = operator_B_address,
+        expected_owner = sp.none
+    )).run(valid = False, sender = operator_A_address)
+
+    scenario.h4("FAIL - Setting Issuer owner, non-owner operator")
+    registry_logic_contract.set_issuer_owner(sp.record(issuer_did = "did:tz:batch_did_2", new_owner_address = operator_B_address)).run(valid = False, sender = operator_B_address)
+
+    scenario.h4("FAIL - Setting Issuer data, unknown DID")
+    registry_logic_contract.set_issuer_data(sp.record(issuer_did = "did:tz:unknown_did", issuer_data = "{}")).run(valid = False, sender = certifier_address)
+
+    # An Issuer in conflict can only be changed by the Certifier
+    scenario.h3("Setting Issuer status in_conflict, Certifier operator")
+    registry_logic_contract.set_issuer_status(sp.record(issuer_did = "did:tz:batch_did_2", status = 3)).run(valid = True, sender = certifier_address)
+
+    scenario.h4("FAIL - Setting Issuer active, owner operator of an Issuer in conflict")
+    registry_logic_contract.set_issuer_active(sp.record(issuer_did = "did:tz:batch_did_2")).run(valid = False, sender = operator_A_address)
+
+    scenario.h3("Setting Issuer active, Certifier operator")
+    registry_logic_contract.set_issuer_active(sp.record(issuer_did = "did:tz:batch_did_2")).run(valid = True, sender = certifier_address)
+    scenario.verify(issuer_registry_contract.get("did:tz:batch_did_2").status == 1)
+
+    # Actions signed off-chain and submitted by a relayer
+    scenario.h2("Permits")
+
+    relayer = sp.test_account("Relayer")
+    chain_id = sp.chain_id_cst("0x9caecab9")
+
+    def make_permit(account, nonce, action, signing_account = None):
+        packed_action = sp.pack(sp.set_type_expr(action, REGISTRY_LOGIC.DISPATCH_TYPE))
+        payload = sp.pack(sp.record(
+            action = packed_action,
+            chain_id = chain_id,
+            contract = registry_logic_contract.address,
+            nonce = sp.nat(nonce)
+        ))
+        return sp.record(
+            public_key = account.public_key,
+            signature = sp.make_signature((signing_account or account).secret_key, payload, message_format = "Raw"),
+            nonce = nonce,
+            action = packed_action
+        )
+
+    permit_add_schema = make_permit(operator_A, 0, sp.variant("add_schema", "permit_schema_data"))
+    permit_deprecate_issuer = make_permit(operator_B, 0, sp.variant("set_issuer_deprecated", issuer_bytes_did))
+
+    # Every action runs with the rights of the account that signed it
+    scenario.h3("Applying permits of two accounts")
+    registry_logic_contract.apply_permits([permit_add_schema, permit_deprecate_issuer]).run(valid = True, sender = relayer, chain_id = chain_id)
+    scenario.verify(schema_registry_contract.get(5).schema_data == "permit_schema_data")
+    scenario.verify(schema_registry_contract.get(5).schema_owner == operator_A_address)
+    scenario.verify(issuer_registry_contract.get(issuer_bytes_did).status == 2)
+    scenario.verify(registry_logic_contract.get_permit_nonce(operator_A_address) == 1)
+    scenario.verify(registry_logic_contract.get_permit_nonce(relayer.address) == 0)
+
+    # FAIL - A permit is applied once
+    scenario.h4("FAIL - Applying a permit twice")
+    registry_logic_contract.apply_permits([permit_add_schema]).run(valid = False, sender = relayer, chain_id = chain_id, exception = "Invalid permit nonce")
+
+    # FAIL - The permit must be signed by the key it gives
+    scenario.h4("FAIL - Applying a permit signed by another account")
+    registry_logic_contract.apply_permits([
+        make_permit(operator_A, 1, sp.variant("set_schema_deprecated", 5), signing_account = operator_B)
+    ]).run(valid = False, sender = relayer, chain_id = chain_id, exception = "Invalid permit signature")
+
+    # FAIL - The owner and certifier rules apply to the signer
+    scenario.h4("FAIL - Applying a permit, signer is not the owner of the Issuer")
+    registry_logic_contract.apply_permits([
+        make_permit(operator_B, 1, sp.variant("set_issuer_deprecated", issuer_did))
+    ]).run(valid = False, sender = relayer, chain_id = chain_id)
+
+    # Permits of the same account are applied in the order of their nonces
+    scenario.h3("Applying consecutive permits of an account")
+    registry_logic_contract.apply_permits([
+        make_permit(operator_A, 1, sp.variant("set_schema_deprecated", 5)),
+        make_permit(operator_A, 2, sp.variant("set_schema_active", 5))
+    ]).run(valid = True, sender = relayer, chain_id = chain_id)
+    scenario.verify(schema_registry_contract.get(5).status == 1)
+    scenario.verify(registry_logic_contract.get_permit_nonce(operator_A_address) == 3)
+
+    # DID documents kept as sections, updated one section at a time
+    scenario.h2("Issuer data patches")
+
+    sections_did = "did:tz:sections_did"
+    key_1 = "{\"id\":\"#key-1\",\"publicKeyMultibase\":\"z6Mk1\"}"
+    key_2 = "{\"id\":\"#key-2\",\"publicKeyMultibase\":\"z6Mk2\"}"
+    rotated_key_1 = "{\"id\":\"#key-1\",\"publicKeyMultibase\":\"z6Mk3\"}"
+
+    def set_section(property, section_id, section_data):
+        return sp.variant("set_section", sp.record(property = property, section_id = section_id, section_data = section_data))
+
+    def remove_section(property, section_id):
+        return sp.variant("remove_section", sp.record(property = property, section_id = section_id))
+
+    registry_logic_contract.add_issuer(sp.record(
+        issuer_did = sections_did,
+        issuer_data = "{\"id\":\"did:tz:sections_did\"}"
+    )).run(valid = True, sender = operator_A_address)
+
+    scenario.h3("Adding sections to a DID document")
+    registry_logic_contract.apply_issuer_data_patch(sp.record(issuer_did = sections_did, patch = [
+        set_section("verificationMethod", "#key-1", key_1),
+        set_section("verificationMethod", "#key-2", key_2),
+        set_section("authentication", "#key-1", "\"#key-1\"")
+    ])).run(valid = True, sender = operator_A_address)
+    scenario.verify(registry_logic_contract.get_issuer(sections_did).issuer_data == sp.concat([
+        "{\"id\":\"did:tz:sections_did\",\"authentication\":[\"#key-1\"],\"verificationMethod\":[", key_1, ",", key_2, "]}"
+    ]))
+
+    # Only the changed section is sent and written, the others keep their place
+    scenario.h3("Rotating a key")
+    registry_logic_contract.apply_issuer_data_patch(sp.record(issuer_did = sections_did, patch = [
+        set_section("verificationMethod", "#key-1", rotated_key_1)
+    ])).run(valid = True, sender = operator_A_address)
+    scenario.verify(issuer_registry_contract.data.issuer_data_sections[sp.record(
+        issuer_did = sections_did, property = "verificationMethod", section_id = "#key-1"
+    )] == rotated_key_1)
+    scenario.verify(registry_logic_contract.get_issuer(sections_did).issuer_data == sp.concat([
+        "{\"id\":\"did:tz:sections_did\",\"authentication\":[\"#key-1\"],\"verificationMethod\":[", rotated_key_1, ",", key_2, "]}"
+    ]))
+
+    scenario.h3("Removing sections")
+    registry_logic_contract.apply_issuer_data_patch(sp.record(issuer_did = sections_did, patch = [
+        remove_section("authentication", "#key-1"),
+        remove_section("verificationMethod", "#key-1")
+    ])).run(valid = True, sender = operator_A_address)
+    scenario.verify(registry_logic_contract.get_issuer(sections_did).issuer_data == sp.concat([
+        "{\"id\":\"did:tz:sections_did\",\"verificationMethod\":[", key_2, "]}"
+    ]))
+
+    # FAIL - Only existing sections can be removed
+    scenario.h4("FAIL - Removing a section that does not exist")
+    registry_logic_contract.apply_issuer_data_patch(sp.record(issuer_did = sections_did, patch = [
+        remove_section("verificationMethod", "#key-1")
+    ])).run(valid = False, sender = operator_A_address, exception = "Section does not exist")
+
+    # FAIL - Patches follow the owner and certifier rules of set_issuer_data
+    scenario.h4("FAIL - Patching a DID document, Operator is not the owner of the Issuer")
+    registry_logic_contract.apply_issuer_data_patch(sp.record(issuer_did = sections_did, patch = [
+        set_section("service", "#hub", "{}")
+    ])).run(valid = False, sender = operator_B_address)
+
+    # FAIL - Sections are added to a JSON object
+    scenario.h4("FAIL - Patching issuer data that is not a JSON object")
+    registry_logic_contract.apply_issuer_data_patch(sp.record(issuer_did = issuer_did, patch = [
+        set_section("service", "#hub", "{}")
+    ])).run(valid = False, sender = operator_A_address, exception = "Invalid issuer data")
+
+    # FAIL - A property of the issuer data would be returned twice by get_issuer
+    scenario.h4("FAIL - Adding sections to a property of the issuer data")
+    registry_logic_contract.apply_issuer_data_patch(sp.record(issuer_did = sections_did, patch = [
+        set_section("id", "#id", "\"did:tz:other_did\"")
+    ])).run(valid = False, sender = operator_A_address, exception = "Property is in issuer data")
+
+    # The property is only looked up for its first section
+    scenario.h3("Adding a section to a property that already has sections")
+    registry_logic_contract.apply_issuer_data_patch(sp.record(issuer_did = sections_did, patch = [
+        set_section("verificationMethod", "#key-1", key_1)
+    ])).run(valid = True, sender = operator_A_address)
+
+    # The whole document replaces the sections
+    scenario.h3("Replacing a DID document with sections")
+    registry_logic_contract.set_issuer_data(sp.record(
+        issuer_did = sections_did,
+        issuer_data = "{\"id\":\"did:tz:sections_did\"}"
+    )).run(valid = True, sender = operator_A_address)
+    scenario.verify(registry_logic_contract.get_issuer(sections_did).issuer_data == "{\"id\":\"did:tz:sections_did\"}")
+    scenario.verify(~issuer_registry_contract.data.issuer_section_ids.contains(sections_did))
+
+    # Schemas too large for a single operation
+    scenario.h2("Chunked schemas")
+
+    schema_chunk_1 = "{\"$schema\":\"https://json-schema.org/draft/2020-12/schema\","
+    schema_chunk_2 = "\"type\":\"object\"}"
+
+    # The content hash is chained over the packed chunks
+    chunked_content_hash = scenario.compute(sp.sha256(sp.concat([
+        sp.sha256(sp.concat([sp.bytes("0x"), sp.pack(schema_chunk_1)])),
+        sp.pack(schema_chunk_2)
+    ])))
+
+    # The Schema ID is reserved when the upload begins
+    scenario.h3("Beginning a Schema upload")
+    upload_id = scenario.compute(schema_registry_contract.data.schema_last_id)
+    registry_logic_contract.begin_schema().run(valid = True, sender = operator_A_address)
+    scenario.verify(schema_registry_contract.data.schema_uploads[upload_id].schema_owner == operator_A_address)
+    scenario.verify(schema_registry_contract.data.schema_last_id == upload_id + 1)
+
+    scenario.h3("Appending chunks")
+    registry_logic_contract.append_schema_chunk(sp.record(schema_id = upload_id, chunk = schema_chunk_1)).run(valid = True, sender = operator_A_address)
+    registry_logic_contract.append_schema_chunk(sp.record(schema_id = upload_id, chunk = schema_chunk_2)).run(valid = True, sender = operator_A_address)
+    scenario.verify(schema_registry_contract.data.schema_uploads[upload_id].chunk_count == 2)
+
+    # FAIL - Only the caller that began the upload can append to it
+    scenario.h4("FAIL - Appending a chunk, Operator did not begin the upload")
+    registry_logic_contract.append_schema_chunk(sp.record(schema_id = upload_id, chunk = "{}")).run(valid = False, sender = operator_B_address, exception = "Incorrect owner")
+
+    # The Schema is added when the upload is finalized
+    scenario.verify(~schema_registry_contract.data.schema_map.contains(upload_id))
+
+    # FAIL - The content hash must match the uploaded chunks
+    scenario.h4("FAIL - Finalizing a Schema with an incorrect content hash")
+    registry_logic_contract.finalize_schema(sp.record(
+        schema_id = upload_id,
+        content_hash = sp.sha256(sp.pack(schema_chunk_1))
+    )).run(valid = False, sender = operator_A_address, exception = "Incorrect content hash")
+
+    scenario.h3("Finalizing a Schema")
+    registry_logic_contract.finalize_schema(sp.record(
+        schema_id = upload_id,
+        content_hash = chunked_content_hash
+    )).run(valid = True, sender = operator_A_address)
+    scenario.verify(~schema_registry_contract.data.schema_uploads.contains(upload_id))
+    scenario.verify(schema_registry_contract.get(upload_id).status == 1)
+    scenario.verify(schema_registry_contract.get_content_kind(upload_id) == "chunks")
+    scenario.verify(schema_registry_contract.data.schema_map[upload_id].schema_owner == operator_A_address)
+
+    # Chunks are read one at a time, in the order they were appended
+    scenario.h3("Reading the chunks of a Schema")
+    scenario.verify(registry_logic_contract.get_schema_chunk(sp.record(schema_id = upload_id, index = 0)).chunk == schema_chunk_1)
+    scenario.verify(registry_logic_contract.get_schema_chunk(sp.record(schema_id = upload_id, index = 1)).chunk == schema_chunk_2)
+    scenario.verify(registry_logic_contract.get_schema_chunk(sp.record(schema_id = upload_id, index = 1)).chunk_count == 2)
+
+    # Schemas added with add_schema are a single chunk
+    scenario.verify(registry_logic_contract.get_schema_chunk(sp.record(schema_id = 0, index = 0)).chunk_count == 1)
+
+    # FAIL - An upload is finalized once
+    scenario.h4("FAIL - Finalizing a Schema twice")
+    registry_logic_contract.finalize_schema(sp.record(
+        schema_id = upload_id,
+        content_hash = chunked_content_hash
+    )).run(valid = False, sender = operator_A_address, exception = "Upload does not exist")
+
+    # get_schema fails for the Schemas it has no content for, and points to the view to read them with
+    scenario.verify(schema_registry_contract.get_content_kind(0) == "on_chain")
+    scenario.verify(schema_registry_contract.get_content_kind(3) == "reference")
+    scenario.verify(sp.catch_exception(
+        registry_logic_contract.get_schema_chunk(sp.record(schema_id = 3, index = 0)),
+        t = sp.TString
+    ) == sp.some("Schema is stored off-chain, read it with get_schema_reference"))
+
+    # An upload that is not finalized can be cancelled, its chunks are deleted
+    scenario.h3("Cancelling a Schema upload")
+    cancelled_id = scenario.compute(schema_registry_contract.data.schema_last_id)
+    registry_logic_contract.begin_schema().run(valid = True, sender = operator_A_address)
+    registry_logic_contract.append_schema_chunk(sp.record(schema_id = cancelled_id, chunk = schema_chunk_1)).run(valid = True, sender = operator_A_address)
+
+    # FAIL - Only the caller that began the upload, or the Certifier, can cancel it
+    scenario.h4("FAIL - Cancelling a Schema upload, Operator did not begin the upload")
+    registry_logic_contract.cancel_schema(sp.record(schema_id = cancelled_id)).run(valid = False, sender = operator_B_address, exception = "Incorrect owner")
+
+    registry_logic_contract.cancel_schema(sp.record(schema_id = cancelled_id)).run(valid = True, sender = operator_A_address)
+    scenario.verify(~schema_registry_contract.data.schema_uploads.contains(cancelled_id))
+    scenario.verify(~schema_registry_contract.data.schema_chunks.contains(sp.record(schema_id = cancelled_id, index = 0)))
+    scenario.verify(~schema_registry_contract.data.schema_map.contains(cancelled_id))
+
+    # FAIL - A cancelled upload cannot be appended to
+    scenario.h4("FAIL - Appending a chunk to a cancelled upload")
+    registry_logic_contract.append_schema_chunk(sp.record(schema_id = cancelled_id, chunk = schema_chunk_2)).run(valid = False, sender = operator_A_address, exception = "Upload does not exist")
+
+    # The Certifier cancels the uploads that were abandoned
+    scenario.h3("Cancelling an abandoned Schema upload, Certifier")
+    abandoned_id = scenario.compute(schema_registry_contract.data.schema_last_id)
+    registry_logic_contract.begin_schema().run(valid = True, sender = operator_B_address)
+    registry_logic_contract.cancel_schema(sp.record(schema_id = abandoned_id)).run(valid = True, sender = certifier_address)
+    scenario.verify(~schema_registry_contract.data.schema_uploads.contains(abandoned_id))
+
+    # Large uploads are cancelled in several calls, the last chunks first
+    scenario.h3("Cancelling a large Schema upload")
+    large_id = scenario.compute(schema_registry_contract.data.schema_last_id)
+    registry_logic_contract.begin_schema().run(valid = True, sender = operator_A_address)
+    for index in range(SCHEMA_REGISTRY.CANCELLED_CHUNKS_PER_CALL + 1):
+        registry_logic_contract.append_schema_chunk(sp.record(schema_id = large_id, chunk = schema_chunk_1)).run(valid = True, sender = operator_A_address)
+
+    registry_logic_contract.cancel_schema(sp.record(schema_id = large_id)).run(valid = True, sender = operator_A_address)
+    scenario.verify(schema_registry_contract.data.schema_uploads[large_id].chunk_count == 1)
+    scenario.verify(schema_registry_contract.data.schema_chunks.contains(sp.record(schema_id = large_id, index = 0)))
+    scenario.verify(~schema_registry_contract.data.schema_chunks.contains(sp.record(schema_id = large_id, index = 1)))
+
+    # FAIL - An upload being cancelled takes no more chunks
+    scenario.h4("FAIL - Appending a chunk to an upload being cancelled")
+    registry_logic_contract.append_schema_chunk(sp.record(schema_id = large_id, chunk = schema_chunk_2)).run(valid = False, sender = operator_A_address, exception = "Upload is cancelled")
+
+    registry_logic_contract.cancel_schema(sp.record(schema_id = large_id)).run(valid = True, sender = operator_A_address)
+    scenario.verify(~schema_registry_contract.data.schema_uploads.contains(large_id))
+    scenario.verify(~schema_registry_contract.data.schema_chunks.contains(sp.record(schema_id = large_id, index = 0)))
+
+    # Schemas are found by the SHA-256 hash of their content
+    scenario.h2("Schema deduplication")
+
+    shared_schema = "{\"type\":\"object\",\"title\":\"Shared\"}"
+    shared_schema_hash = sp.sha256(sp.bytes("0x" + shared_schema.encode("ascii").hex()))
+
+    scenario.h3("Adding a Schema")
+    shared_schema_id = scenario.compute(schema_registry_contract.data.schema_last_id)
+    registry_logic_contract.add_schema(sp.record(schema_data = shared_schema)).run(valid = True, sender = operator_A_address)
+    scenario.verify(registry_logic_contract.find_schema_by_hash(shared_schema_hash) == sp.some(shared_schema_id))
+    scenario.verify(registry_logic_contract.find_schema_by_hash(sp.sha256(sp.bytes("0x00"))) == sp.none)
+
+    # The active Schema with the same content is reused, nothing is stored
+    scenario.h3("Adding the same Schema")
+    registry_logic_contract.add_schema(sp.record(schema_data = shared_schema)).run(valid = True, sender = operator_A_address)
+    scenario.verify(schema_registry_contract.data.schema_last_id == shared_schema_id + 1)
+
+    # The Schema of another owner is reused too, every time, and keeps its owner
+    scenario.h3("Adding the same Schema twice, other Operator")
+    registry_logic_contract.add_schema(sp.record(schema_data = shared_schema)).run(valid = True, sender = operator_B_address)
+    registry_logic_contract.add_schema(sp.record(schema_data = shared_schema)).run(valid = True, sender = operator_B_address)
+    scenario.verify(schema_registry_contract.data.schema_last_id == shared_schema_id + 1)
+    scenario.verify(schema_registry_contract.data.schema_map[shared_schema_id].schema_owner == operator_A_address)
+
+    # FAIL - The reused Schema is still changed by its owner only
+    scenario.h4("FAIL - Deprecating a reused Schema, Operator is not the owner")
+    registry_logic_contract.set_schema_deprecated(sp.record(schema_id = shared_schema_id)).run(valid = False, sender = operator_B_address)
+
+    # Batches are deduplicated too, within the batch as well
+    registry_logic_contract.add_schemas(sp.record(schemas_data = [shared_schema, "{}", "{}"])).run(valid = True, sender = operator_A_address)
+    scenario.verify(schema_registry_contract.data.schema_last_id == shared_schema_id + 2)
+
+    # A deprecated Schema is not reused, the new one takes its place in the index
+    scenario.h3("Adding the content of a deprecated Schema")
+    registry_logic_contract.set_schema_deprecated(sp.record(schema_id = shared_schema_id)).run(valid = True, sender = operator_A_address)
+    registry_logic_contract.add_schema(sp.record(schema_data = shared_schema)).run(valid = True, sender = operator_B_address)
+    scenario.verify(schema_registry_contract.data.schema_map[shared_schema_id + 2].schema_owner == operator_B_address)
+    scenario.verify(registry_logic_contract.find_schema_by_hash(shared_schema_hash) == sp.some(shared_schema_id + 2))
+
+@sp.add_test(name = "FastModeScripts")
+def test():
+    REGISTRY_LOGIC = sp.io.import_stored_contract("registryLogic.py")
+    ISSUER_REGISTRY = sp.io.import_stored_contract("issuerRegistry.py")
+    SCHEMA_REGISTRY = sp.io.import_stored_contract("schemaRegistry.py")
+    REGISTRY_FAST = sp.io.import_stored_contract("registryFast.py")
+    certifier = sp.test_account("Certifier")
+    operator_A = sp.test_account("Operator_A")
+    operator_B = sp.test_account("Operator_B")
+
+    certifier_address = certifier.address
+    operator_A_address = operator_A.address
+    operator_B_address = operator_B.address
+
+    scenario = sp.test_scenario()
+    scenario.h1("Fast mode")
+    scenario.table_of_contents()
+
+    scenario.h2("Contracts List")
+
+    # Multi-contract deployment
+
+    scenario.h3("Registry Logic contract")
+
+    registry_logic_contract = REGISTRY_LOGIC.RegistryLogic(
+        certifier_address
+    )
+
+    scenario += registry_logic_contract
+
+    scenario.h3("Issuer Registry contract")
+
+    issuer_registry_contract = ISSUER_REGISTRY.IssuerRegistry(
+        registry_logic_contract.address,
+        certifier_address
+    )
+
+    scenario += issuer_registry_contract
+
+    scenario.h3("Schema Registry contract")
+
+    schema_registry_contract = SCHEMA_REGISTRY.SchemaRegistry(
+        registry_logic_contract.address,
+        certifier_address
+    )
+
+    scenario += schema_registry_contract
+
+    registry_logic_contract.update_contract_address(sp.record(
+        contract_name = "issuer_registry_contract",
+        address = issuer_registry_contract.address
+    )).run(valid = True, sender = certifier_address)
+
+    registry_logic_contract.update_contract_address(sp.record(
+        contract_name = "schema_registry_contract",
+        address = schema_registry_contract.address
+    )).run(valid = True, sender = certifier_address)
+
+    # Single contract deployment
+
+    scenario.h3("Registry Fast contract")
+
+    registry_fast_contract = REGISTRY_FAST.RegistryFast(
+        certifier_address
+    )
+
+    scenario += registry_fast_contract
+
+    # Both deployments must accept and reject the same calls
+    def run_both(entry_point, parameters, valid, sender):
+        getattr(registry_logic_contract, entry_point)(parameters).run(valid = valid, sender = sender)
+        getattr(registry_fast_contract, entry_point)(parameters).run(valid = valid, sender = sender)
+
+    def verify_same_issuer(issuer_did):
+        scenario.verify_equal(registry_logic_contract.get_issuer(issuer_did), registry_fast_contract.get_issuer(issuer_did))
+
+    def verify_same_schema(schema_id):
+        scenario.verify_equal(registry_logic_contract.get_schema(schema_id), registry_fast_contract.get_schema(schema_id))
+
+    def verify_same_binding(binding):
+        scenario.verify_equal(registry_logic_contract.verify_binding(binding), registry_fast_contract.verify_binding(binding))
+        scenario.verify_equal(registry_logic_contract.verify_bindings([binding]), registry_fast_contract.verify_bindings([binding]))
+
+    issuer_did = "did:tz:fast_did"
+    binding = sp.record(issuer_did = issuer_did, schema_id = 0)
+    missing_binding = sp.record(issuer_did = issuer_did, schema_id = 1)
+
+    scenario.h2("Schemas")
+
+    scenario.h3("Adding a Schema")
+    run_both("add_schema", sp.record(schema_data = "schema_data"), True, operator_A_address)
+    verify_same_schema(0)
+    scenario.verify(registry_fast_contract.data.registry.schema_map[0].schema_owner == operator_A_address)
+
+    scenario.h3("Deprecating a Schema")
+    run_both("set_schema_deprecated", sp.record(schema_id = 0), True, operator_A_address)
+    verify_same_schema(0)
+
+    scenario.h4("FAIL - Activating a Schema, Operator is not the owner of the Schema")
+    run_both("set_schema_active", sp.record(schema_id = 0), False, operator_B_address)
+
+    scenario.h4("FAIL - Setting a Schema status, incorrect status")
+    run_both("set_schema_status", sp.record(schema_id = 0, status = 3), False, operator_A_address)
+
+    scenario.h4("FAIL - Activating a Schema, Schema does not exist")
+    run_both("set_schema_active", sp.record(schema_id = 5), False, operator_A_address)
+
+    scenario.h3("Activating a Schema as Certifier")
+    run_both("set_schema_active", sp.record(schema_id = 0), True, certifier_address)
+    verify_same_schema(0)
+
+    scenario.h2("Issuers")
+
+    scenario.h3("Adding an Issuer")
+    run_both("add_issuer", sp.record(issuer_did = issuer_did, issuer_data = "issuer_data"), True, operator_A_address)
+    verify_same_issuer(issuer_did)
+
+    scenario.h4("FAIL - Adding an Issuer, DID already exists")
+    run_both("add_issuer", sp.record(issuer_did = issuer_did, issuer_data = "issuer_data"), False, operator_B_address)
+
+    scenario.h3("Updating Issuer data")
+    run_both("set_issuer_data", sp.record(issuer_did = issuer_did, issuer_data = "new_issuer_data"), True, operator_A_address)
+    verify_same_issuer(issuer_did)
+
+    scenario.h4("FAIL - Updating Issuer data, Operator is not the owner of the Issuer")
+    run_both("set_issuer_data", sp.record(issuer_did = issuer_did, issuer_data = "issuer_data"), False, operator_B_address)
+
+    scenario.h4("FAIL - Updating Issuer data, DID does not exist")
+    run_both("set_issuer_data", sp.record(issuer_did = "did:tz:missing_did", issuer_data = "issuer_data"), False, operator_A_address)
+
+    scenario.h2("Bindings")
+
+    scenario.h3("Binding a Schema to an Issuer")
+    run_both("bind_issuer_schema", sp.record(issuer_did = issuer_did, schema_id = 0), True, operator_A_address)
+    verify_same_binding(binding)
+    verify_same_binding(missing_binding)
+
+    scenario.h4("FAIL - Binding a Schema, Operator is not the owner of the Issuer")
+    run_both("bind_issuer_schema", sp.record(issuer_did = issuer_did, schema_id = 1), False, operator_B_address)
+
+    scenario.h3("Deprecating a Binding")
+    run_both("set_binding_deprecated", binding, True, operator_A_address)
+    verify_same_binding(binding)
+
+    scenario.h4("FAIL - Deprecating a Binding, Binding does not exist")
+    run_both("set_binding_deprecated", missing_binding, False, operator_A_address)
+
+    scenario.h2("Statuses")
+
+    scenario.h3("Setting an Issuer in conflict as Certifier")
+    run_both("set_issuer_status", sp.record(issuer_did = issuer_did, status = 3), True, certifier_address)
+    verify_same_issuer(issuer_did)
+
+    scenario.h4("FAIL - Activating an Issuer in conflict, Operator is not the Certifier")
+    run_both("set_issuer_active", sp.record(issuer_did = issuer_did), False, operator_A_address)
+
+    scenario.h4("FAIL - Activating a Binding of an Issuer in conflict, Operator is not the Certifier")
+    run_both("set_binding_active", binding, False, operator_A_address)
+
+    scenario.h3("Activating an Issuer as Certifier")
+    run_both("set_issuer_active", sp.record(issuer_did = issuer_did), True, certifier_address)
+    verify_same_issuer(issuer_did)
+
+    scenario.h3("Activating a Binding")
+    run_both("set_binding_active", binding, True, operator_A_address)
+    verify_same_binding(binding)
+
+    scenario.h3("Deprecating an Issuer")
+    run_both("set_issuer_deprecated", sp.record(issuer_did = issuer_did), True, operator_A_address)
+    verify_same_issuer(issuer_did)
+
+    scenario.h4("FAIL - Setting an Issuer status, incorrect status")
+    run_both("set_issuer_status", sp.record(issuer_did = issuer_did, status = 4), False, operator_A_address)
+
+    scenario.h2("Ownership")
+
+    scenario.h3("Changing the owner of an Issuer")
+    run_both("set_issuer_owner", sp.record(issuer_did = issuer_did, new_owner_address = operator_B_address), True, operator_A_address)
+    verify_same_issuer(issuer_did)
+
+    scenario.h4("FAIL - Changing the owner of an Issuer, Operator is no longer the owner")
+    run_both("set_issuer_owner", sp.record(issuer_did = issuer_did, new_owner_address = operator_A_address), False, operator_A_address)
+
+    scenario.h2("Upgrading the logic")
+
+    # The Certifier replaces the add_schema logic, new Schemas are added as deprecated
+    def add_deprecated_schema_logic(logic_input):
+        parameters = REGISTRY_FAST.unpack_parameters(logic_input, sp.TRecord(schema_data = sp.TString))
+        registry = sp.local("registry", logic_input.registry)
+
+        registry.value.schema_map[registry.value.schema_last_id] = sp.record(
+            schema_data = parameters.schema_data,
+            schema_owner = sp.source,
+            status = 2
+        )
+        registry.value.schema_last_id += 1
+
+        sp.result(registry.value)
+
+    logic_update = sp.record(
+        logic_name = "add_schema",
+        logic = sp.build_lambda(add_deprecated_schema_logic)
+    )
+
+    scenario.h4("FAIL - Updating the logic, Operator is not the Certifier")
+    registry_fast_contract.update_logic(logic_update).run(valid = False, sender = operator_A_address)
+
+    scenario.h3("Updating the add_schema logic")
+    registry_fast_contract.update_logic(logic_update).run(valid = True, sender = certifier_address)
+
+    registry_fast_contract.add_schema(sp.record(schema_data = "schema_data")).run(valid = True, sender = operator_A_address)
+    scenario.verify(registry_fast_contract.get_schema(1).status == "deprecated")
+
+@sp.add_test(name = "CompactScripts")
+def test():
+    REGISTRY_LOGIC = sp.io.import_stored_contract("registryLogic.py")
+    ISSUER_REGISTRY = sp.io.import_stored_contract("issuerRegistry.py")
+    SCHEMA_REGISTRY = sp.io.import_stored_contract("schemaRegistry.py")
+    REGISTRY = sp.io.import_stored_contract("registry.py")
+    certifier = sp.test_account("Certifier")
+    operator_A = sp.test_account("Operator_A")
+    operator_B = sp.test_account("Operator_B")
+
+    certifier_address = certifier.address
+    operator_A_address = operator_A.address
+    operator_B_address = operator_B.address
+
+    scenario = sp.test_scenario()
+    scenario.h1("Compact build")
+    scenario.table_of_contents()
+
+    scenario.h2("Contracts List")
+
+    # Registry Logic contract with its own Storage contracts
+    def deploy(compact):
+        registry_logic_contract = REGISTRY_LOGIC.RegistryLogic(
+            certifier_address,
+            compact = compact
+        )
+        scenario += registry_logic_contract
+
+        issuer_registry_contract = ISSUER_REGISTRY.IssuerRegistry(
+            registry_logic_contract.address,
+            certifier_address
+        )
+        scenario += issuer_registry_contract
+
+        schema_registry_contract = SCHEMA_REGISTRY.SchemaRegistry(
+            registry_logic_contract.address,
+            certifier_address
+        )
+        scenario += schema_registry_contract
+
+        registry_logic_contract.update_contract_address(sp.record(
+            contract_name = "issuer_registry_contract",
+            address = issuer_registry_contract.address
+        )).run(valid = True, sender = certifier_address)
+
+        registry_logic_contract.update_contract_address(sp.record(
+            contract_name = "schema_registry_contract",
+            address = schema_registry_contract.address
+        )).run(valid = True, sender = certifier_address)
+
+        return registry_logic_contract
+
+    scenario.h3("Registry Logic contract")
+    registry_logic_contract = deploy(False)
+
+    scenario.h3("Compact Registry Logic contract")
+    compact_registry_logic_contract = deploy(True)
+
+    scenario.h3("Registry contract on the compact build")
+    registry_contract = REGISTRY.Registry(
+        compact_registry_logic_contract.address,
+        certifier_address
+    )
+    scenario += registry_contract
+
+    # Both builds must accept and reject the same calls
+    def run_both(entry_point, parameters, valid, sender):
+        getattr(registry_logic_contract, entry_point)(parameters).run(valid = valid, sender = sender)
+        getattr(compact_registry_logic_contract, entry_point)(parameters).run(valid = valid, sender = sender)
+
+    def verify_same_issuer(issuer_did):
+        scenario.verify_equal(registry_logic_contract.get_issuer(issuer_did), compact_registry_logic_contract.get_issuer(issuer_did))
+
+    def verify_same_schema(schema_id):
+        scenario.verify_equal(registry_logic_contract.get_schema(schema_id), compact_registry_logic_contract.get_schema(schema_id))
+
+    def verify_same_binding(binding):
+        scenario.verify_equal(registry_logic_contract.verify_binding(binding), compact_registry_logic_contract.verify_binding(binding))
+
+    issuer_did = "did:tz:compact_did"
+    binding = sp.record(issuer_did = issuer_did, schema_id = 0)
+
+    scenario.h2("Schemas")
+
+    scenario.h3("Adding Schemas")
+    run_both("add_schema", sp.record(schema_data = "schema_data"), True, operator_A_address)
+    run_both("add_schemas", sp.record(schemas_data = ["schema_data_1", "schema_data_2"]), True, operator_A_address)
+    verify_same_schema(0)
+    verify_same_schema(2)
+
+    scenario.h3("Deprecating a Schema")
+    run_both("set_schema_deprecated", sp.record(schema_id = 1), True, operator_A_address)
+    verify_same_schema(1)
+
+    scenario.h4("FAIL - Activating a Schema, Operator is not the owner of the Schema")
+    run_both("set_schema_active", sp.record(schema_id = 1), False, operator_B_address)
+
+    scenario.h4("FAIL - Setting a Schema status, incorrect status")
+    run_both("set_schema_status", sp.record(schema_id = 1, status = 3), False, operator_A_address)
+
+    scenario.h3("Setting a Schema status as Certifier")
+    run_both("set_schema_status", sp.record(schema_id = 1, status = 1), True, certifier_address)
+    verify_same_schema(1)
+
+    scenario.h2("Issuers")
+
+    scenario.h3("Adding an Issuer")
+    run_both("add_issuer", sp.record(issuer_did = issuer_did, issuer_data = "issuer_data"), True, operator_A_address)
+    verify_same_issuer(issuer_did)
+
+    scenario.h4("FAIL - Updating Issuer data, Operator is not the owner of the Issuer")
+    run_both("set_issuer_data", sp.record(issuer_did = issuer_did, issuer_data = "new_issuer_data"), False, operator_B_address)
+
+    scenario.h3("Setting an Issuer in conflict as Certifier")
+    run_both("set_issuer_status", sp.record(issuer_did = issuer_did, status = 3), True, certifier_address)
+    verify_same_issuer(issuer_did)
+
+    scenario.h4("FAIL - Activating an Issuer in conflict, Operator is not the Certifier")
+    run_both("set_issuer_active", sp.record(issuer_did = issuer_did), False, operator_A_address)
+
+    scenario.h3("Activating an Issuer as Certifier")
+    run_both("set_issuer_active", sp.record(issuer_did = issuer_did), True, certifier_address)
+    verify_same_issuer(issuer_did)
+
+    scenario.h2("Bindings")
+
+    scenario.h3("Binding a Schema to an Issuer")
+    run_both("bind_issuer_schema", binding, True, operator_A_address)
+    verify_same_binding(binding)
+
+    scenario.h3("Deprecating a Binding")
+    run_both("set_binding_deprecated", binding, True, operator_A_address)
+    verify_same_binding(binding)
+
+    scenario.h4("FAIL - Activating a Binding, Binding does not exist")
+    run_both("set_binding_active", sp.record(issuer_did = issuer_did, schema_id = 2), False, operator_A_address)
+
+    scenario.h3("Applying status changes")
+    run_both("apply_status_changes", sp.record(changes = [
+        sp.variant("binding", sp.record(issuer_did = issuer_did, schema_id = 0, status = 1)),
+        sp.variant("schema", sp.record(schema_id = 2, status = 2))
+    ]), True, operator_A_address)
+    verify_same_binding(binding)
+    verify_same_schema(2)
+
+    scenario.h2("Ownership")
+
+    scenario.h3("Changing the owner of an Issuer")
+    run_both("set_issuer_owner", sp.record(issuer_did = issuer_did, new_owner_address = operator_B_address), True, operator_A_address)
+    verify_same_issuer(issuer_did)
+
+    scenario.h2("Dispatch")
+
+    scenario.h3("Deprecating an Issuer through the Registry contract")
+    registry_contract.dispatch(sp.variant("set_issuer_deprecated", issuer_did)).run(valid = True, sender = operator_B_address)
+    scenario.verify(compact_registry_logic_contract.get_issuer(issuer_did).status == "deprecated")
+
+    scenario.h4("FAIL - Activating an Issuer through the Registry contract, Operator is not the owner of the Issuer")
+    registry_contract.dispatch(sp.variant("set_issuer_active", issuer_did)).run(valid = False, sender = operator_A_address)
@@ -0,0 +1,127 @@
+# Unit tests of didCodec.py
+#
+# Usage:
+#   python -m pytest test_didCodec.py
+
+import json
+import unittest
+import zlib
+
+import didCodec
+
+
+class EncodingTest(unittest.TestCase):
+
+    def test_sample_documents_round_trip(self):
+        for name, document in didCodec.sample_documents().items():
+            with self.subTest(document = name):
+                self.assertEqual(didCodec.decode(didCodec.encode(document)), document)
+
+    def test_first_byte_is_the_format_version(self):
+        data = didCodec.encode({"id": "did:tz:tz1"})
+        self.assertEqual(data[0], didCodec.FORMAT_DEFLATE_DID_V1)
+
+    def test_json_text_and_dict_give_the_same_bytes(self):
+        document = didCodec.sample_documents()["did:tz secp256k1 (README)"]
+        indented = json.dumps(document, indent = 4)
+        self.assertEqual(didCodec.encode(indented), didCodec.encode(document))
+        self.assertEqual(didCodec.encode(indented.encode("utf-8")), didCodec.encode(document))
+
+    def test_unknown_keys_are_kept(self):
+        document = {
+            "id": "did:example:123",
+            "x-vendor-extension": {"nested": [1, 2.5, None, True], "": "empty key"},
+            "verificationMethod": [{"id": "did:example:123#k", "type": "UnknownKeyType2099", "custom": "value"}]
+        }
+        self.assertEqual(didCodec.decode(didCodec.encode(document)), document)
+
+    def test_non_ascii_text_is_stored_as_utf8(self):
+        document = {"id": "did:web:example.com", "alsoKnownAs": ["Überprüfungsstelle", "検証機関", "\U0001F511"]}
+        self.assertEqual(didCodec.decode(didCodec.encode(document)), document)
+        self.assertIn("Überprüfungsstelle".encode("utf-8"), didCodec.compact_json(document))
+        self.assertNotIn(b"\\u", didCodec.compact_json(document))
+
+    def test_key_order_is_kept(self):
+        document = {"z": 1, "a": 2, "m": 3}
+        self.assertEqual(list(didCodec.decode(didCodec.encode(document))), ["z", "a", "m"])
+
+    def test_dictionary_beats_plain_deflate(self):
+        for name, document in didCodec.sample_documents().items():
+            with self.subTest(document = name):
+                plain = zlib.compress(didCodec.compact_json(document), 9)
+                self.assertLess(len(didCodec.encode(document)), len(plain))
+
+
+class DecodingTest(unittest.TestCase):
+
+    def test_hex_with_and_without_prefix(self):
+        document = {"id": "did:tz:tz1"}
+        data = didCodec.encode(document)
+        self.assertEqual(didCodec.decode("0x" + data.hex()), document)
+        self.assertEqual(didCodec.decode(data.hex()), document)
+
+    def test_empty_data_is_rejected(self):
+        with self.assertRaises(ValueError):
+            didCodec.decode(b"")
+
+    def test_unknown_format_version_is_rejected(self):
+        data = didCodec.encode({"id": "did:tz:tz1"})
+        with self.assertRaises(ValueError):
+            didCodec.decode(bytes([0x02]) + data[1:])
+
+    def test_oversized_document_is_rejected(self):
+        compressor = zlib.compressobj(level = 9, wbits = -15, zdict = didCodec.DID_DICTIONARY_V1)
+        body = json.dumps({"id": "x" * (didCodec.MAX_DOCUMENT_SIZE + 1)}).encode()
+        data = bytes([didCodec.FORMAT_DEFLATE_DID_V1]) + compressor.compress(body) + compressor.flush()
+        with self.assertRaises(ValueError):
+            didCodec.decode(data)
+
+
+class SectionsTest(unittest.TestCase):
+
+    def test_array_properties_become_sections(self):
+        document = {
+            "id": "did:tz:tz1",
+            "service": [{"id": "did:tz:tz1#s", "type": "LinkedDomains"}],
+            "authentication": ["did:tz:tz1#k"],
+            "alsoKnownAs": ["kept in the issuer_data"]
+        }
+        issuer_data, sections = didCodec.split_sections(document)
+        self.assertEqual(json.loads(issuer_data), {"id": "did:tz:tz1", "alsoKnownAs": ["kept in the issuer_data"]})
+        self.assertEqual(sections, {
+            ("service", "did:tz:tz1#s"): '{"id":"did:tz:tz1#s","type":"LinkedDomains"}',
+            ("authentication", "did:tz:tz1#k"): '"did:tz:tz1#k"'
+        })
+
+    def test_sections_are_ascii(self):
+        _, sections = didCodec.split_sections({"service": [{"id": "s", "name": "Prüfstelle"}]})
+        self.assertEqual(sections[("service", "s")], '{"id":"s","name":"Pr\\u00fcfstelle"}')
+
+    def test_duplicate_section_ids_are_rejected(self):
+        with self.assertRaises(ValueError):
+            didCodec.split_sections({"service": [{"id": "s"}, {"id": "s"}]})
+        with self.assertRaises(ValueError):
+            didCodec.split_sections({"service": [{"type": "no id"}]})
+
+    def test_patch_only_sends_changed_sections(self):
+        old = {"id": "d", "verificationMethod": [{"id": "d#1", "x": "a"}, {"id": "d#2", "x": "b"}]}
+        new = {"id": "d", "verificationMethod": [{"id": "d#1", "x": "c"}, {"id": "d#3", "x": "d"}]}
+        self.assertEqual(didCodec.section_patch(old, new), [
+            {"remove_section": {"property": "verificationMethod", "section_id": "d#2"}},
+            {"set_section": {"property": "verificationMethod", "section_id": "d#1", "section_data": '{"id":"d#1","x":"c"}'}},
+            {"set_section": {"property": "verificationMethod", "section_id": "d#3", "section_data": '{"id":"d#3","x":"d"}'}}
+        ])
+
+    def test_patch_of_a_new_document_adds_every_section(self):
+        document = {"id": "d", "service": [{"id": "d#s"}]}
+        self.assertEqual(didCodec.section_patch(None, document), [
+            {"set_section": {"property": "service", "section_id": "d#s", "section_data": '{"id":"d#s"}'}}
+        ])
+
+    def test_patch_rejects_changes_outside_the_sections(self):
+        with self.assertRaises(ValueError):
+            didCodec.section_patch({"id": "d"}, {"id": "e"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+# Unit tests of indexer.py
+#
+# The blocks of fixtures/indexer are synthetic, in the format of the node RPC.
+# main/ originates the Issuer Registry at level 1 and the Schema Registry at
+# level 3. fork/ replaces the blocks from level 3: the Schema Registry is
+# originated at level 4 with other big map IDs.
+#
+# Usage:
+#   python -m pytest test_indexer.py
+
+import os
+import unittest
+
+import indexer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "indexer")
+
+CONTRACTS = {
+    "issuer_registry": "KT1A91VqdhR8Xg6bRWDaC4h8MK9KfYo9o4Vi",
+    "schema_registry": "KT1BhFRuvKL9E8ggxycsHDf8qS42HLvCrXYr"
+}
+
+OWNER = "tz1KqTpEZ7Yob7QbPE4Hy4Wo8fHG8LhKxZSx"
+
+
+def new_indexer(chain, **options):
+    return indexer.Indexer(indexer.FixtureSource(os.path.join(FIXTURES, chain)), indexer.Store(":memory:"), CONTRACTS, **options)
+
+
+def table(store, name):
+    """Rows of a table, without the level they were written at."""
+    rows = store.db.execute("SELECT * FROM %s ORDER BY 1, 2" % name)
+    return [{column: value for column, value in dict(row).items() if column != "level"} for row in rows]
+
+
+class MichelineTest(unittest.TestCase):
+
+    def test_decode_address(self):
+        self.assertEqual(indexer.decode_address(bytes.fromhex("000002298c03ed7d454a101eb7022bc95f7e5f41ac78")), OWNER)
+        self.assertEqual(indexer.decode_address(bytes.fromhex("01" + "00" * 20 + "00")), "KT18amZmM5W7qDWVt2pH6uj7sCEd3kbzLrHT")
+
+    def test_flatten_binary_nary_and_sequence_pairs(self):
+        a, b, c = {"int": "1"}, {"string": "b"}, {"bytes": "0c"}
+        self.assertEqual(indexer.flatten({"prim": "Pair", "args": [a, {"prim": "Pair", "args": [b, c]}]}), [a, b, c])
+        self.assertEqual(indexer.flatten({"prim": "Pair", "args": [a, b, c]}), [a, b, c])
+        self.assertEqual(indexer.flatten([a, [b, c]]), [a, b, c])
+
+    def test_decode_columns(self):
+        value = {"prim": "Pair", "args": [
+            {"prim": "Pair", "args": [{"string": "doc"}, {"string": "did:tz:a"}]},
+            {"prim": "Pair", "args": [{"string": OWNER}, {"int": "3"}]}
+        ]}
+        table_name, _, columns = indexer.BIG_MAPS["issuer_registry"]["issuer_map"]
+        self.assertEqual(table_name, "issuers")
+        # The issuer_did of the value is not stored, it is the key
+        self.assertEqual(indexer.decode_columns(value, columns), {"issuer_data": "doc", "issuer_owner": OWNER, "status": 3})
+
+        with self.assertRaises(ValueError):
+            indexer.decode_columns({"int": "1"}, columns)
+
+    def test_decode_optimized_address(self):
+        self.assertEqual(indexer.decode_leaf({"bytes": "000002298c03ed7d454a101eb7022bc95f7e5f41ac78"}, "address"), OWNER)
+        self.assertEqual(indexer.decode_leaf({"bytes": "01ab"}, "bytes"), "01ab")
+
+    def test_annotated_big_maps_of_a_flattened_comb(self):
+        storage_type = {"prim": "pair", "args": [
+            {"prim": "address", "annots": ["%certifier"]},
+            {"prim": "pair", "args": [
+                {"prim": "big_map", "args": [{"prim": "string", "annots": ["%key"]}, {"prim": "bytes"}], "annots": ["%first"]},
+                {"prim": "big_map", "args": [{"prim": "nat"}, {"prim": "nat"}], "annots": ["%second"]}
+            ]}
+        ]}
+        value = {"prim": "Pair", "args": [{"string": OWNER}, {"int": "4"}, {"int": "5"}]}
+        self.assertEqual(indexer.annotated_big_maps(storage_type, value), {
+            "first": ({"prim": "string", "args": []}, {"prim": "bytes", "args": []}, 4),
+            "second": ({"prim": "nat", "args": []}, {"prim": "nat", "args": []}, 5)
+        })
+
+
+class IndexerTest(unittest.TestCase):
+
+    def test_index_main_chain(self):
+        main = new_indexer("main")
+        self.assertEqual(main.run(), 4)
+
+        self.assertEqual(table(main.store, "issuers"), [
+            {"issuer_did": "did:tz:a", "issuer_data": "doc a", "issuer_owner": OWNER, "status": 3},
+            {"issuer_did": "did:tz:b", "issuer_data": "doc b", "issuer_owner": OWNER, "status": 1}
+        ])
+        self.assertEqual(table(main.store, "schemas"), [{"schema_id": 0, "schema_data": "schema 0", "schema_owner": OWNER, "status": 1}])
+        self.assertEqual(table(main.store, "bindings"), [{"issuer_did": "did:tz:a", "schema_id": 0, "status": 1}])
+        self.assertEqual(main.big_maps, {
+            7: ("issuer_registry", "issuer_data_bytes_map"),
+            8: ("issuer_registry", "issuer_map"),
+            9: ("schema_registry", "issuer_schema_map"),
+            10: ("schema_registry", "schema_map")
+        })
+
+    def test_resume_from_last_level(self):
+        resumed = new_indexer("main", batch_size = 1)
+        self.assertEqual(resumed.run(to_level = 2), 2)
+        self.assertEqual(resumed.store.last_level(), 2)
+        self.assertEqual(resumed.run(), 4)
+
+        main = new_indexer("main")
+        main.run()
+        for name in ("issuers", "schemas", "bindings", "issuer_data_bytes"):
+            self.assertEqual(table(resumed.store, name), table(main.store, name))
+
+    def test_reorganization_rolls_back_replaced_blocks(self):
+        reorganized = new_indexer("main", batch_size = 2)
+        reorganized.run()
+        reorganized.source = indexer.FixtureSource(os.path.join(FIXTURES, "fork"))
+        self.assertEqual(reorganized.run(), 5)
+
+        self.assertEqual(table(reorganized.store, "issuers"), [
+            {"issuer_did": "did:tz:a", "issuer_data": "doc a v2", "issuer_owner": OWNER, "status": 2}
+        ])
+        self.assertEqual(table(reorganized.store, "issuer_data_bytes"), [])
+        self.assertEqual(table(reorganized.store, "schemas"), [{"schema_id": 0, "schema_data": "schema 0 v2", "schema_owner": OWNER, "status": 1}])
+        self.assertEqual(table(reorganized.store, "bindings"), [])
+        self.assertEqual([reorganized.store.block_hash(level) for level in range(1, 6)], ["B1", "B2", "C3", "C4", "C5"])
+
+        # The big maps of the replaced origination are forgotten, 9 and 10 belong to another contract on the fork
+        self.assertEqual(reorganized.big_maps, {
+            7: ("issuer_registry", "issuer_data_bytes_map"),
+            8: ("issuer_registry", "issuer_map"),
+            11: ("schema_registry", "issuer_schema_map"),
+            12: ("schema_registry", "schema_map")
+        })
+        self.assertEqual(reorganized.big_maps, reorganized.store.big_maps())
+
+        # Same index as when only the fork was seen
+        fork = new_indexer("fork")
+        fork.run()
+        for name in ("issuers", "schemas", "bindings", "issuer_data_bytes", "big_maps"):
+            self.assertEqual(table(reorganized.store, name), table(fork.store, name))
+
+    def test_reorganization_deeper_than_the_undo_log(self):
+        shallow = new_indexer("main", reorg_depth = 1)
+        shallow.run()
+        shallow.source = indexer.FixtureSource(os.path.join(FIXTURES, "fork"))
+        with self.assertRaises(RuntimeError):
+            shallow.run()
+
+    def test_blocks_are_streamed_in_order(self):
+        streamed = new_indexer("fork", batch_size = 2)
+        self.assertEqual([block["hash"] for block in streamed.blocks(1, 5)], ["B1", "B2", "C3", "C4", "C5"])
+        self.assertEqual([block["hash"] for block in streamed.blocks(4, 3)], [])
+
+        # Stopping early, as on a reorganization, cancels the fetches of the next batch
+        blocks = streamed.blocks(1, 5)
+        self.assertEqual(next(blocks)["hash"], "B1")
+        blocks.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+# Unit tests of relayer.py
+#
+# The node is a stub and simulate is replaced by a model of apply_permits that
+# checks the nonces of the signers, no node is needed.
+#
+# Usage:
+#   python -m pytest test_relayer.py
+
+import unittest
+from unittest import mock
+
+import relayer
+
+BOOTSTRAP1 = ("edpkuBknW28nW72KG6RoHtYW7p12T6GKc7nAbwYX5m8Wd9sDVC9yav", "tz1KqTpEZ7Yob7QbPE4Hy4Wo8fHG8LhKxZSx")
+BOOTSTRAP2 = ("edpktzNbDAUjUk697W7gYg2CRuBQjyPxbEg8dLccYYwKSKvkPvjtV9", "tz1gjaF81ZRRvdzjobyfVNsAeSC6PScjfQwN")
+
+CONFIG = {
+    "rpc": "http://localhost:20000",
+    "source": {"alias": "relayer", "address": "tz1relayer"},
+    "contracts": {"registry": "KT1Registry", "registry_logic": "KT1RegistryLogic"}
+}
+
+
+class StubNode:
+    """Answers the requests the relayer makes when it starts and prepares payloads."""
+
+    def __init__(self, rpc):
+        self.rpc = rpc
+        self.nonces = {}
+        self.posts = []
+
+    def request(self, path, body = None):
+        return "NetXdQprcVkpaWU"
+
+    def head(self, path):
+        if path == "/context/constants":
+            return {"hard_gas_limit_per_operation": "1040000", "hard_storage_limit_per_operation": "60000"}
+        return {"entrypoint_type": {"prim": "unit"}}
+
+    def post_head(self, path, body):
+        self.posts.append((path, body))
+        if path == "/helpers/scripts/run_script_view":
+            return {"data": {"int": str(self.nonces.get(body["input"]["string"], 0))}}
+        return {"packed": "05"}
+
+
+def new_relayer(batch_size = 50):
+    with mock.patch("relayer.benchmark.Node", StubNode):
+        return relayer.Relayer(CONFIG, batch_size)
+
+
+def apply_permits_model(failing_actions = ()):
+    """simulate of a registry where the actions in failing_actions fail and nonces start at 0."""
+    calls = []
+
+    def simulate(permits):
+        calls.append(list(permits))
+        nonces = {}
+        for permit in permits:
+            if permit["nonce"] != nonces.get(permit["signer"], 0):
+                return ["Invalid nonce"]
+            if permit["action_bytes"] in failing_actions:
+                return ["Failed %s" % permit["action_bytes"]]
+            nonces[permit["signer"]] = permit["nonce"] + 1
+        return None
+
+    return simulate, calls
+
+
+class KeyTest(unittest.TestCase):
+
+    def test_key_address(self):
+        self.assertEqual(relayer.key_address(BOOTSTRAP1[0]), BOOTSTRAP1[1])
+        self.assertEqual(relayer.key_address(BOOTSTRAP2[0]), BOOTSTRAP2[1])
+
+    def test_invalid_checksum(self):
+        with self.assertRaises(ValueError):
+            relayer.key_address(BOOTSTRAP1[0][:-1] + "b")
+
+
+class PayloadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.relayer = new_relayer()
+
+    def test_given_nonce_is_used_without_a_view_call(self):
+        with mock.patch.object(self.relayer, "next_nonce") as next_nonce:
+            payload = self.relayer.payload({"signer": BOOTSTRAP1[1], "action_bytes": "0501", "nonce": 0})
+        next_nonce.assert_not_called()
+        self.assertEqual(payload["nonce"], 0)
+
+    def test_next_nonce_counts_the_queued_permits(self):
+        self.relayer.node.nonces[BOOTSTRAP1[1]] = 3
+        for nonce in (3, 4):
+            self.relayer.submit({"public_key": BOOTSTRAP1[0], "signature": "edsig", "nonce": nonce, "action_bytes": "0x0501"})
+        self.relayer.submit({"public_key": BOOTSTRAP2[0], "signature": "edsig", "nonce": 0, "action_bytes": "0501"})
+
+        payload = self.relayer.payload({"public_key": BOOTSTRAP1[0], "action_bytes": "0502"})
+        self.assertEqual((payload["signer"], payload["nonce"]), (BOOTSTRAP1[1], 5))
+
+        packed = self.relayer.node.posts[-1][1]["data"]
+        self.assertEqual(packed["args"][1]["args"], [{"string": "KT1RegistryLogic"}, {"int": "5"}])
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.relayer = new_relayer()
+
+    def queue(self, *permits):
+        """Queue (signer key, nonce, action_bytes) permits, return them in order."""
+        return [
+            self.relayer.permits[self.relayer.submit({"public_key": key, "signature": "edsig", "nonce": nonce, "action_bytes": action})["id"]]
+            for key, nonce, action in permits
+        ]
+
+    def test_first_failing_finds_the_first_failing_permit(self):
+        for size in (1, 2, 7, 16):
+            for failing in range(size):
+                with self.subTest(size = size, failing = failing):
+                    permits = [{"signer": "tz1%d" % index, "nonce": 0, "action_bytes": "%02x" % index} for index in range(size)]
+                    simulate, calls = apply_permits_model({"%02x" % failing})
+                    with mock.patch.object(self.relayer, "simulate", simulate):
+                        self.assertEqual(self.relayer.first_failing(permits), failing)
+                    # Bisection, not one simulation per permit
+                    self.assertLessEqual(len(calls), max(1, (size - 1).bit_length()))
+
+    def test_failing_permit_drops_the_later_permits_of_its_signer(self):
+        a0, b0, a1, b1, a2 = self.queue(
+            (BOOTSTRAP1[0], 0, "a0"),
+            (BOOTSTRAP2[0], 0, "b0"),
+            (BOOTSTRAP1[0], 1, "a1"),
+            (BOOTSTRAP2[0], 1, "b1"),
+            (BOOTSTRAP1[0], 2, "a2")
+        )
+        simulate, _ = apply_permits_model({"a1"})
+        with mock.patch.object(self.relayer, "simulate", simulate):
+            batch = self.relayer.next_batch()
+
+        self.assertEqual(batch, [a0, b0, b1])
+        self.assertEqual((a1["status"], a1["errors"]), ("rejected", ["Failed a1"]))
+        self.assertEqual((a2["status"], a2["errors"]), ("rejected", ["Previous permit of the signer rejected"]))
+        self.assertEqual(self.relayer.queue, [a0, b0, b1])
+        self.assertEqual(self.relayer.stats["rejected"], 2)
+
+    def test_every_failing_signer_is_dropped(self):
+        permits = self.queue((BOOTSTRAP1[0], 0, "a0"), (BOOTSTRAP2[0], 0, "b0"), (BOOTSTRAP2[0], 1, "b1"))
+        simulate, _ = apply_permits_model({"a0", "b0"})
+        with mock.patch.object(self.relayer, "simulate", simulate):
+            self.assertEqual(self.relayer.next_batch(), [])
+        self.assertEqual([permit["status"] for permit in permits], ["rejected"] * 3)
+        self.assertEqual(self.relayer.queue, [])
+
+    def test_flush_injects_the_batch(self):
+        permits = self.queue((BOOTSTRAP1[0], 0, "a0"), (BOOTSTRAP1[0], 1, "a1"), (BOOTSTRAP2[0], 0, "b0"))
+        self.relayer.batch_size = 2
+        simulate, _ = apply_permits_model()
+        with mock.patch.object(self.relayer, "simulate", simulate), \
+                mock.patch.object(self.relayer, "inject", return_value = "ooHash") as inject:
+            self.assertEqual(self.relayer.flush(), 2)
+
+        inject.assert_called_once_with(permits[:2])
+        self.assertEqual([permit["status"] for permit in permits], ["included", "included", "queued"])
+        self.assertEqual(permits[0]["operation_hash"], "ooHash")
+        self.assertEqual(self.relayer.queue, permits[2:])
+
+
+if __name__ == "__main__":
+    unittest.main()
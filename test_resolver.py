@@ -0,0 +1,304 @@
+# Unit tests of resolver.py
+#
+# The views are answered by a stub fetch function, no node is needed.
+#
+# Usage:
+#   python -m pytest test_resolver.py
+
+import io
+import threading
+import time
+import unittest
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import resolver
+
+OWNER = "tz1KqTpEZ7Yob7QbPE4Hy4Wo8fHG8LhKxZSx"
+
+
+class StubFetch:
+    """View results by (kind, key), counting the calls."""
+
+    def __init__(self, results = None):
+        self.results = results or {}
+        self.calls = []
+
+    def __call__(self, kind, key, level):
+        self.calls.append((kind, key, level))
+        if (kind, key) not in self.results:
+            raise resolver.NotFound()
+        return self.results[(kind, key)]
+
+
+class CacheTest(unittest.TestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = resolver.Cache(max_entries = 2, ttl = 60)
+        cache.put("a", 1, 1)
+        cache.put("b", 2, 1)
+        cache.get("a")
+        cache.put("c", 3, 1)
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertIsNone(cache.get("b"))
+
+    def test_entries_expire_after_ttl(self):
+        with mock.patch("resolver.time.monotonic", return_value = 100.0):
+            cache = resolver.Cache(max_entries = 10, ttl = 5)
+            cache.put("a", 1, 1)
+        with mock.patch("resolver.time.monotonic", return_value = 105.0):
+            self.assertEqual(cache.get("a")["value"], 1)
+        with mock.patch("resolver.time.monotonic", return_value = 105.5):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_expired_entry_is_read_again(self):
+        fetch = StubFetch({("schema", 0): {"schema_data": "{}", "status": "active"}})
+        with mock.patch("resolver.time.monotonic", return_value = 0.0):
+            registry = resolver.Resolver(fetch, level = 1, ttl = 10)
+            registry.resolve("schema", 0)
+        with mock.patch("resolver.time.monotonic", return_value = 11.0):
+            registry.resolve("schema", 0)
+        self.assertEqual(len(fetch.calls), 2)
+
+
+class ResolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fetch = StubFetch({
+            ("issuer", "did:tz:a"): {"issuer_data": "doc a", "issuer_owner": OWNER, "status": "active"},
+            ("issuer", "did:tz:b"): {"issuer_data": "doc b", "issuer_owner": OWNER, "status": "active"},
+            ("schema", 0): {"schema_data": "{}", "status": "active"},
+            ("binding", ("did:tz:a", 0)): {"binding_exists": True, "status": 1}
+        })
+        self.resolver = resolver.Resolver(self.fetch, level = 10)
+
+    def test_hits_do_not_call_the_view(self):
+        first = self.resolver.resolve("issuer", "did:tz:a")
+        second = self.resolver.resolve("issuer", "did:tz:a")
+        self.assertEqual(first, second)
+        self.assertEqual(first[1], 10)
+        self.assertEqual(self.fetch.calls, [("issuer", "did:tz:a", 10)])
+        self.assertEqual((self.resolver.stats["misses"], self.resolver.stats["hits"]), (1, 1))
+
+    def test_missing_records_are_cached(self):
+        self.assertEqual(self.resolver.resolve("issuer", "did:tz:none"), (None, 10))
+        self.assertEqual(self.resolver.resolve("issuer", "did:tz:none"), (None, 10))
+        self.assertEqual(len(self.fetch.calls), 1)
+
+    def test_context_reads_at_one_level(self):
+        context = self.resolver.context("did:tz:a", 0)
+        self.assertEqual(context["level"], 10)
+        self.assertEqual(context["binding"], {"binding_exists": True, "status": 1})
+        self.assertEqual({level for _, _, level in self.fetch.calls}, {10})
+
+    def test_touched_keys_are_invalidated(self):
+        self.resolver.resolve("issuer", "did:tz:a")
+        self.resolver.resolve("issuer", "did:tz:b")
+        self.resolver.advance(11, {("issuer", "did:tz:a")})
+
+        # Only the touched key is read again, at the new level
+        self.resolver.resolve("issuer", "did:tz:a")
+        self.resolver.resolve("issuer", "did:tz:b")
+        self.assertEqual(self.fetch.calls[2:], [("issuer", "did:tz:a", 11)])
+        self.assertEqual(self.resolver.stats["invalidations"], 1)
+
+    def test_entry_newer_than_the_requested_level_is_not_used(self):
+        self.resolver.advance(11, set())
+        self.resolver.resolve("issuer", "did:tz:a")
+        self.assertEqual(self.resolver.resolve("issuer", "did:tz:a", 10)[1], 10)
+        self.assertEqual(self.fetch.calls, [("issuer", "did:tz:a", 11), ("issuer", "did:tz:a", 10)])
+
+    def test_result_read_before_a_new_block_is_not_cached(self):
+        def fetch(kind, key, level):
+            # A block arrives while the view is read
+            self.resolver.advance(level + 1, {(kind, key)})
+            return {"schema_data": "{}", "status": "active"}
+        self.resolver.fetch = fetch
+        self.resolver.resolve("schema", 0)
+        self.assertNotIn(("schema", 0), self.resolver.cache.entries)
+
+    def test_flush_drops_every_entry(self):
+        self.resolver.resolve("issuer", "did:tz:a")
+        self.resolver.flush(12)
+        self.assertEqual(len(self.resolver.cache.entries), 0)
+        self.assertEqual(self.resolver.level, 12)
+
+    def test_concurrent_requests_share_one_view_call(self):
+        release = threading.Event()
+        calls = []
+
+        def fetch(kind, key, level):
+            calls.append(key)
+            release.wait(5)
+            return {"issuer_data": "doc", "issuer_owner": OWNER, "status": "active"}
+
+        coalescing = resolver.Resolver(fetch, level = 1)
+        with ThreadPoolExecutor(max_workers = 4) as executor:
+            results = [executor.submit(coalescing.resolve, "issuer", "did:tz:a") for _ in range(4)]
+            deadline = time.monotonic() + 5
+            while coalescing.stats["coalesced"] < 3 and time.monotonic() < deadline:
+                time.sleep(0.001)
+            release.set()
+            values = [future.result() for future in results]
+
+        self.assertEqual(calls, ["did:tz:a"])
+        self.assertEqual(coalescing.stats["coalesced"], 3)
+        self.assertEqual(len(set(value["issuer_data"] for value, _ in values)), 1)
+        self.assertEqual(coalescing.in_flight, {})
+
+    def test_failed_view_call_fails_the_waiting_requests(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def fetch(kind, key, level):
+            started.set()
+            release.wait(5)
+            raise RuntimeError("node unavailable")
+
+        failing = resolver.Resolver(fetch, level = 1)
+        with ThreadPoolExecutor(max_workers = 2) as executor:
+            first = executor.submit(failing.resolve, "issuer", "did:tz:a")
+            started.wait(5)
+            second = executor.submit(failing.resolve, "issuer", "did:tz:a")
+            deadline = time.monotonic() + 5
+            while failing.stats["coalesced"] < 1 and time.monotonic() < deadline:
+                time.sleep(0.001)
+            release.set()
+            for future in (first, second):
+                with self.assertRaises(RuntimeError):
+                    future.result()
+
+        self.assertEqual(len(failing.cache.entries), 0)
+        self.assertEqual(failing.in_flight, {})
+
+
+class ChainTest(unittest.TestCase):
+
+    BIG_MAPS = {
+        8: ("issuer_registry", "issuer_map"),
+        9: ("schema_registry", "issuer_schema_map"),
+        10: ("schema_registry", "schema_map")
+    }
+
+    def block(self, level, block_hash, predecessor, diffs = (), entrypoint = None):
+        content = {"kind": "transaction", "metadata": {"operation_result": {"status": "applied", "lazy_storage_diff": list(diffs)}}}
+        if entrypoint is not None:
+            content["parameters"] = {"entrypoint": entrypoint, "value": {"prim": "Unit"}}
+        return {"hash": block_hash, "header": {"level": level, "predecessor": predecessor}, "operations": [[{"contents": [content]}]]}
+
+    def update(self, big_map_id, *keys):
+        return {"kind": "big_map", "id": str(big_map_id), "diff": {"action": "update", "updates": [{"key": key} for key in keys]}}
+
+    def test_touched_keys_of_a_block(self):
+        block = self.block(5, "B5", "B4", [
+            self.update(8, {"string": "did:tz:a"}),
+            self.update(9, {"prim": "Pair", "args": [{"string": "did:tz:a"}, {"int": "0"}]}),
+            self.update(10, {"int": "3"}),
+            # Not a big map of the registry
+            self.update(99, {"string": "other"})
+        ])
+        self.assertEqual(resolver.touched_keys(block, self.BIG_MAPS), {
+            ("issuer", "did:tz:a"), ("binding", ("did:tz:a", 0)), ("schema", 3)
+        })
+
+    def test_contract_address_update_drops_the_cache(self):
+        block = self.block(5, "B5", "B4", entrypoint = "update_contract_address")
+        self.assertIsNone(resolver.touched_keys(block, self.BIG_MAPS))
+
+    def test_watcher_invalidates_touched_keys_and_flushes_on_reorganization(self):
+        blocks = {
+            2: self.block(2, "B2", "B1", [self.update(8, {"string": "did:tz:a"})]),
+            3: self.block(3, "C3", "X2")
+        }
+        issuer_storage = {"prim": "big_map", "args": [{"prim": "string"}, {"prim": "unit"}], "annots": ["%issuer_map"]}
+        schema_storage = {"prim": "pair", "args": [
+            {"prim": "big_map", "args": [{"prim": "pair", "args": [{"prim": "string"}, {"prim": "nat"}]}, {"prim": "nat"}], "annots": ["%issuer_schema_map"]},
+            {"prim": "big_map", "args": [{"prim": "nat"}, {"prim": "unit"}], "annots": ["%schema_map"]}
+        ]}
+        scripts = {
+            "KT1Issuer": {"code": [{"prim": "storage", "args": [issuer_storage]}], "storage": {"int": "8"}},
+            "KT1Schema": {"code": [{"prim": "storage", "args": [schema_storage]}], "storage": {"prim": "Pair", "args": [{"int": "9"}, {"int": "10"}]}}
+        }
+        source = mock.Mock()
+        source.script.side_effect = scripts.get
+        source.block_hash.return_value = "B1"
+        source.block.side_effect = blocks.get
+
+        registry = resolver.Resolver(StubFetch(), level = 1)
+        registry.cache.put(("issuer", "did:tz:a"), None, 1)
+        registry.cache.put(("issuer", "did:tz:b"), None, 1)
+
+        watcher = resolver.ChainWatcher(source, registry, {"issuer_registry": "KT1Issuer", "schema_registry": "KT1Schema"})
+        self.assertEqual(watcher.big_maps, self.BIG_MAPS)
+
+        source.head_level.return_value = 2
+        watcher.poll()
+        self.assertEqual(list(registry.cache.entries), [("issuer", "did:tz:b")])
+        self.assertEqual(registry.level, 2)
+
+        # C3 does not follow B2
+        source.head_level.return_value = 3
+        watcher.poll()
+        self.assertEqual(len(registry.cache.entries), 0)
+        self.assertEqual((registry.level, registry.stats["flushes"]), (3, 1))
+
+
+class ViewTypesTest(unittest.TestCase):
+
+    def script(self, status_type):
+        def view(name, output_type):
+            return {"prim": "view", "args": [{"string": name}, {"prim": "string"}, output_type, []]}
+        return {"code": [
+            {"prim": "parameter", "args": [{"prim": "unit"}]},
+            view("get_issuer", {"prim": "pair", "args": [
+                {"prim": "string", "annots": ["%issuer_data"]},
+                {"prim": "pair", "args": [{"prim": "address", "annots": ["%issuer_owner"]}, {"prim": status_type, "annots": ["%status"]}]}
+            ]}),
+            view("get_schema", {"prim": "pair", "args": [{"prim": "string"}, {"prim": status_type}]}),
+            view("verify_binding", {"prim": "pair", "args": [{"prim": "bool"}, {"prim": "nat"}]})
+        ]}
+
+    def test_numeric_statuses_are_read_from_the_script(self):
+        views = resolver.view_types(self.script("nat"))
+        data = {"prim": "Pair", "args": [{"string": "doc"}, {"string": OWNER}, {"int": "3"}]}
+        self.assertEqual(resolver.decode_view("issuer", data, views), {"issuer_data": "doc", "issuer_owner": OWNER, "status": 3})
+
+    def test_status_names(self):
+        views = resolver.view_types(self.script("string"))
+        self.assertEqual(views, resolver.VIEWS)
+        data = {"prim": "Pair", "args": [{"string": "{}"}, {"string": "deprecated"}]}
+        self.assertEqual(resolver.decode_view("schema", data, views), {"schema_data": "{}", "status": "deprecated"})
+
+    def test_binding(self):
+        data = {"prim": "Pair", "args": [{"prim": "True"}, {"int": "1"}]}
+        self.assertEqual(resolver.decode_view("binding", data), {"binding_exists": True, "status": 1})
+
+    def test_missing_view_is_rejected(self):
+        script = self.script("nat")
+        del script["code"][1]
+        with self.assertRaises(RuntimeError):
+            resolver.view_types(script)
+
+
+class RpcFetcherTest(unittest.TestCase):
+
+    def fetch_rejected(self, message):
+        error = urllib.error.HTTPError("http://node", 500, "Internal Server Error", {}, io.BytesIO(message.encode()))
+        fetch = resolver.rpc_fetcher(mock.Mock(rpc = "http://node"), "KT1Registry", "NetXdQprcVkpaWU")
+        with mock.patch("urllib.request.urlopen", side_effect = error):
+            return fetch("schema", 1, 3)
+
+    def test_missing_schema_is_not_found(self):
+        with self.assertRaises(resolver.NotFound):
+            self.fetch_rejected('[{"id": "proto.alpha.michelson_v1.script_rejected", "with": {"string": "Invalid view"}}]')
+
+    def test_chunked_schema_is_an_invalid_request(self):
+        reason = "Schema is stored in chunks, read it with get_schema_chunk"
+        with self.assertRaisesRegex(ValueError, reason):
+            self.fetch_rejected('[{"id": "proto.alpha.michelson_v1.script_rejected", "with": {"string": "%s"}}]' % reason)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,334 @@
+# Unit tests of simulator.py
+#
+# The cases follow the rules checked by testScenarios.py on the contracts:
+# ownership, issuers in conflict, schema deduplication, permits and the
+# rollback of failed operations.
+#
+# Usage:
+#   python -m pytest test_simulator.py
+
+import hashlib
+import unittest
+
+import simulator
+
+CERTIFIER = simulator.DEFAULT_CERTIFIER
+OPERATOR_A = "tz1_operator_A"
+OPERATOR_B = "tz1_operator_B"
+
+
+def permit(signer, nonce, action, **parameters):
+    return {"signer": signer, "nonce": nonce, "action": action, "parameters": parameters}
+
+
+class RegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.logic = simulator.RegistryLogic(record_events = True)
+        self.logic.execute(OPERATOR_A, "add_issuer", {"issuer_did": "did:tz:a", "issuer_data": "{}"})
+        self.logic.execute(OPERATOR_A, "add_schema", {"schema_data": "schema_data"})
+
+    def assertFails(self, message, sender, action, **parameters):
+        with self.assertRaises(simulator.ContractError) as context:
+            self.logic.execute(sender, action, parameters)
+        self.assertEqual(context.exception.message, message)
+
+
+class OwnershipTest(RegistryTest):
+
+    def test_owner_and_certifier_change_an_issuer(self):
+        self.assertFails("Cannot be called from non-certified addresses", OPERATOR_B, "set_issuer_data", issuer_did = "did:tz:a", issuer_data = "b")
+        self.logic.execute(OPERATOR_A, "set_issuer_data", {"issuer_did": "did:tz:a", "issuer_data": "a"})
+        self.logic.execute(CERTIFIER, "set_issuer_data", {"issuer_did": "did:tz:a", "issuer_data": "certified"})
+        self.assertEqual(self.logic.get_issuer("did:tz:a")["issuer_data"], "certified")
+
+    def test_owner_and_certifier_change_a_schema(self):
+        self.assertFails("Incorrect owner", OPERATOR_B, "set_schema_deprecated", schema_id = 0)
+        self.logic.execute(OPERATOR_A, "set_schema_deprecated", {"schema_id": 0})
+        self.logic.execute(CERTIFIER, "set_schema_active", {"schema_id": 0})
+        self.assertEqual(self.logic.get_schema(0)["status"], "active")
+
+    def test_only_the_issuer_owner_binds_it(self):
+        self.assertFails("Binding not allowed", OPERATOR_B, "bind_issuer_schema", issuer_did = "did:tz:a", schema_id = 0)
+        self.logic.execute(OPERATOR_A, "bind_issuer_schema", {"issuer_did": "did:tz:a", "schema_id": 0})
+        self.assertEqual(self.logic.verify_binding("did:tz:a", 0), {"binding_exists": True, "status": 1})
+
+    def test_issuer_added_twice(self):
+        self.assertFails("Issuer did already exists", OPERATOR_B, "add_issuer", issuer_did = "did:tz:a", issuer_data = "{}")
+
+    def test_transfer_ownership(self):
+        self.logic.execute(OPERATOR_A, "transfer_ownership", {
+            "old_owner": OPERATOR_A, "new_owner": OPERATOR_B, "issuer_dids": ["did:tz:a"], "schema_ids": [0]
+        })
+        self.assertEqual(self.logic.get_issuer("did:tz:a")["issuer_owner"], OPERATOR_B)
+        self.assertEqual(self.logic.schema_registry.get(0)["schema_owner"], OPERATOR_B)
+        self.assertFails("Cannot be called from non-certified addresses", OPERATOR_A, "set_issuer_data", issuer_did = "did:tz:a", issuer_data = "a")
+
+    def test_storage_checks_the_expected_owner(self):
+        with self.assertRaises(simulator.ContractError) as context:
+            self.logic.issuer_registry.change_owner("did:tz:a", OPERATOR_B, OPERATOR_B)
+        self.assertEqual(context.exception.message, "Cannot be called from non-certified addresses")
+        with self.assertRaises(simulator.ContractError) as context:
+            self.logic.schema_registry.change_status(0, 2, OPERATOR_B)
+        self.assertEqual(context.exception.message, "Incorrect owner")
+        self.assertFails("Issuer did does not exist", CERTIFIER, "set_issuer_owner", issuer_did = "did:tz:b", new_owner_address = OPERATOR_B)
+
+        # None expects any owner, as for the certifier
+        self.logic.issuer_registry.change_owner("did:tz:a", OPERATOR_B, None)
+        self.assertEqual(self.logic.get_issuer("did:tz:a")["issuer_owner"], OPERATOR_B)
+
+    def test_imported_issuers_are_indexed(self):
+        self.logic.issuer_registry.import_issuers([
+            {"issuer_did": "did:tz:a", "issuer_data": "{}", "issuer_data_bytes": None, "issuer_owner": OPERATOR_B, "status": 1},
+            {"issuer_did": "did:tz:b", "issuer_data": "", "issuer_data_bytes": b"{}", "issuer_owner": OPERATOR_B, "status": 2}
+        ])
+        self.assertEqual(self.logic.issuer_registry.list_owner_issuers(OPERATOR_A, 0, 10)["issuer_dids"], [])
+        self.assertEqual(self.logic.issuer_registry.list_owner_issuers(OPERATOR_B, 0, 10)["issuer_dids"], ["did:tz:a", "did:tz:b"])
+
+        # The owner index lets the imported issuers change owner
+        self.logic.execute(OPERATOR_B, "transfer_ownership", {
+            "old_owner": OPERATOR_B, "new_owner": OPERATOR_A, "issuer_dids": ["did:tz:a", "did:tz:b"], "schema_ids": []
+        })
+        self.assertEqual(self.logic.issuer_registry.list_owner_issuers(OPERATOR_A, 0, 10)["issuer_dids"], ["did:tz:a", "did:tz:b"])
+
+
+class ConflictTest(RegistryTest):
+
+    def test_only_the_certifier_sets_the_conflict_status(self):
+        self.assertFails("Status change not allowed", OPERATOR_A, "set_issuer_status", issuer_did = "did:tz:a", status = 3)
+        self.logic.execute(CERTIFIER, "set_issuer_status", {"issuer_did": "did:tz:a", "status": 3})
+        self.assertEqual(self.logic.get_issuer("did:tz:a")["status"], "in_conflict")
+
+    def test_owner_cannot_change_an_issuer_in_conflict(self):
+        self.logic.execute(OPERATOR_A, "bind_issuer_schema", {"issuer_did": "did:tz:a", "schema_id": 0})
+        self.logic.execute(CERTIFIER, "set_issuer_status", {"issuer_did": "did:tz:a", "status": 3})
+
+        self.assertFails("Status change not allowed", OPERATOR_A, "set_issuer_active", issuer_did = "did:tz:a")
+        self.assertFails("Status change not allowed", OPERATOR_A, "set_binding_deprecated", issuer_did = "did:tz:a", schema_id = 0)
+        self.assertFails("Status change not allowed", OPERATOR_A, "apply_status_changes", changes = [
+            {"issuer": {"issuer_did": "did:tz:a", "status": 1}}
+        ])
+
+        self.logic.execute(CERTIFIER, "set_issuer_active", {"issuer_did": "did:tz:a"})
+        self.logic.execute(OPERATOR_A, "set_issuer_deprecated", {"issuer_did": "did:tz:a"})
+        self.assertEqual(self.logic.get_issuer("did:tz:a")["status"], "deprecated")
+
+    def test_statuses_must_be_in_the_tables(self):
+        self.assertFails("Incorrect status", OPERATOR_A, "set_schema_status", schema_id = 0, status = 3)
+        self.assertFails("Incorrect status", CERTIFIER, "set_issuer_status", issuer_did = "did:tz:a", status = 4)
+
+
+class IssuerDataPatchTest(RegistryTest):
+
+    def test_properties_of_the_issuer_data_have_no_sections(self):
+        self.logic.execute(OPERATOR_A, "set_issuer_data", {"issuer_did": "did:tz:a", "issuer_data": "{\"service\":[]}"})
+        self.assertFails("Property is in issuer data", OPERATOR_A, "apply_issuer_data_patch", issuer_did = "did:tz:a", patch = [
+            {"set_section": {"property": "service", "section_id": "#hub", "section_data": "{}"}}
+        ])
+        self.logic.execute(OPERATOR_A, "apply_issuer_data_patch", {"issuer_did": "did:tz:a", "patch": [
+            {"set_section": {"property": "authentication", "section_id": "#key-1", "section_data": "\"#key-1\""}}
+        ]})
+        self.assertEqual(self.logic.get_issuer("did:tz:a")["issuer_data"], "{\"service\":[],\"authentication\":[\"#key-1\"]}")
+
+
+class DeduplicationTest(RegistryTest):
+
+    def schema_hash(self, schema_data):
+        return hashlib.sha256(schema_data.encode()).hexdigest()
+
+    def test_active_schema_is_reused(self):
+        self.logic.execute(OPERATOR_A, "add_schemas", {"schemas_data": ["schema_data", "{}", "{}"]})
+        self.assertEqual(self.logic.schema_registry.schema_last_id, 2)
+        self.assertEqual(self.logic.events[-1], ("schema_reused", {"schema_id": 1, "schema_owner": OPERATOR_A}))
+
+    def test_schema_of_another_owner_is_reused(self):
+        # A second owner adding the same content twice gets the existing schema both times, with no copy
+        for _ in range(2):
+            self.logic.execute(OPERATOR_B, "add_schema", {"schema_data": "schema_data"})
+            self.assertEqual(self.logic.events[-1], ("schema_reused", {"schema_id": 0, "schema_owner": OPERATOR_B}))
+        self.assertEqual(self.logic.schema_registry.schema_last_id, 1)
+        self.assertEqual(self.logic.schema_registry.get(0)["schema_owner"], OPERATOR_A)
+
+        # Binding an issuer to the reused schema does not require owning it
+        self.logic.execute(OPERATOR_B, "add_issuer", {"issuer_did": "did:tz:b", "issuer_data": "{}"})
+        self.logic.execute(OPERATOR_B, "bind_issuer_schema", {"issuer_did": "did:tz:b", "schema_id": 0})
+
+    def test_deprecated_schema_is_not_reused(self):
+        self.logic.execute(OPERATOR_A, "set_schema_deprecated", {"schema_id": 0})
+        self.logic.execute(OPERATOR_A, "add_schema", {"schema_data": "schema_data"})
+        self.assertEqual(self.logic.find_schema_by_hash(self.schema_hash("schema_data")), 1)
+
+
+class ChunkedSchemaTest(RegistryTest):
+
+    def begin_upload(self, sender, *chunks):
+        schema_id = self.logic.schema_registry.schema_last_id
+        self.logic.execute(sender, "begin_schema", {})
+        for chunk in chunks:
+            self.logic.execute(sender, "append_schema_chunk", {"schema_id": schema_id, "chunk": chunk})
+        return schema_id
+
+    def test_get_schema_points_to_the_chunks(self):
+        schema_id = self.begin_upload(OPERATOR_A, "{", "}")
+        content_hash = b""
+        for chunk in ("{", "}"):
+            content_hash = hashlib.sha256(content_hash + simulator.pack_string(chunk)).digest()
+        self.logic.execute(OPERATOR_A, "finalize_schema", {"schema_id": schema_id, "content_hash": content_hash.hex()})
+
+        self.assertEqual(self.logic.get_schema_chunk(schema_id, 1), {"chunk": "}", "chunk_count": 2})
+        with self.assertRaises(simulator.ContractError) as context:
+            self.logic.get_schema(schema_id)
+        self.assertEqual(context.exception.message, "Schema is stored in chunks, read it with get_schema_chunk")
+
+    def test_get_schema_points_to_the_reference(self):
+        self.logic.execute(OPERATOR_A, "add_schema_reference", {"schema_hash": "00", "schema_uri": "http://localhost:8000/00"})
+        with self.assertRaises(simulator.ContractError) as context:
+            self.logic.get_schema(1)
+        self.assertEqual(context.exception.message, "Schema is stored off-chain, read it with get_schema_reference")
+        with self.assertRaises(simulator.ContractError) as context:
+            self.logic.get_schema_chunk(1, 0)
+        self.assertEqual(context.exception.message, "Schema is stored off-chain, read it with get_schema_reference")
+
+    def test_cancel_upload(self):
+        schema_id = self.begin_upload(OPERATOR_A, "{")
+        self.assertFails("Incorrect owner", OPERATOR_B, "cancel_schema", schema_id = schema_id)
+        self.logic.execute(OPERATOR_A, "cancel_schema", {"schema_id": schema_id})
+        self.assertEqual((self.logic.schema_registry.schema_uploads, self.logic.schema_registry.schema_chunks), ({}, {}))
+        self.assertFails("Upload does not exist", OPERATOR_A, "append_schema_chunk", schema_id = schema_id, chunk = "}")
+
+        # The certifier cancels the uploads that were abandoned
+        abandoned_id = self.begin_upload(OPERATOR_B)
+        self.logic.execute(CERTIFIER, "cancel_schema", {"schema_id": abandoned_id})
+        self.assertEqual(self.logic.schema_registry.schema_uploads, {})
+
+    def test_large_upload_is_cancelled_in_several_calls(self):
+        schema_registry = self.logic.schema_registry
+        schema_id = self.begin_upload(OPERATOR_A, *["{}"] * (simulator.CANCELLED_CHUNKS_PER_CALL + 1))
+
+        self.logic.execute(OPERATOR_A, "cancel_schema", {"schema_id": schema_id})
+        self.assertEqual(schema_registry.schema_uploads[schema_id].chunk_count, 1)
+        self.assertEqual(list(schema_registry.schema_chunks), [(schema_id, 0)])
+        self.assertFails("Upload is cancelled", OPERATOR_A, "append_schema_chunk", schema_id = schema_id, chunk = "}")
+        self.assertFails("Upload is cancelled", OPERATOR_A, "finalize_schema", schema_id = schema_id, content_hash = "00")
+
+        self.logic.execute(OPERATOR_A, "cancel_schema", {"schema_id": schema_id})
+        self.assertEqual((schema_registry.schema_uploads, schema_registry.schema_chunks), ({}, {}))
+        self.assertEqual([tag for tag, fields in self.logic.events].count("schema_upload_cancelled"), 1)
+
+
+class PermitTest(RegistryTest):
+
+    def test_actions_run_with_the_rights_of_the_signer(self):
+        self.logic.apply_permits([
+            permit(OPERATOR_A, 0, "set_issuer_data", issuer_did = "did:tz:a", issuer_data = "a"),
+            permit(OPERATOR_B, 0, "add_schema", schema_data = "b")
+        ])
+        self.assertEqual(self.logic.get_issuer("did:tz:a")["issuer_data"], "a")
+        self.assertEqual(self.logic.schema_registry.get(1)["schema_owner"], OPERATOR_B)
+
+        with self.assertRaises(simulator.ContractError) as context:
+            self.logic.apply_permits([permit(OPERATOR_B, 1, "set_issuer_data", issuer_did = "did:tz:a", issuer_data = "b")])
+        self.assertEqual(context.exception.message, "Cannot be called from non-certified addresses")
+
+    def test_nonces_are_used_in_order(self):
+        self.logic.apply_permits([permit(OPERATOR_A, 0, "add_schema", schema_data = "0"), permit(OPERATOR_A, 1, "add_schema", schema_data = "1")])
+        self.assertEqual(self.logic.get_permit_nonce(OPERATOR_A), 2)
+
+        # A permit is applied once, and not before the previous ones of its signer
+        for nonce in (1, 3):
+            with self.assertRaises(simulator.ContractError) as context:
+                self.logic.apply_permits([permit(OPERATOR_A, nonce, "add_schema", schema_data = "x")])
+            self.assertEqual(context.exception.message, "Invalid permit nonce")
+        self.assertEqual(self.logic.get_permit_nonce(OPERATOR_A), 2)
+
+    def test_import_is_not_a_permit_action(self):
+        with self.assertRaises(simulator.ContractError) as context:
+            self.logic.apply_permits([permit(CERTIFIER, 0, "import_schemas", schemas = [])])
+        self.assertEqual(context.exception.message, "Invalid action")
+
+
+class RollbackTest(RegistryTest):
+
+    def snapshot(self):
+        schema_registry = self.logic.schema_registry
+        return (
+            dict(self.logic.permit_nonces),
+            {did: (issuer.issuer_data, issuer.issuer_owner, issuer.status) for did, issuer in self.logic.issuer_registry.issuer_map.items()},
+            {schema_id: (schema.schema_owner, schema.status) for schema_id, schema in schema_registry.schema_map.items()},
+            dict(schema_registry.owner_schema_count),
+            schema_registry.schema_last_id,
+            list(self.logic.events)
+        )
+
+    def test_failed_permit_undoes_the_whole_operation(self):
+        before = self.snapshot()
+        with self.assertRaises(simulator.ContractError):
+            self.logic.apply_permits([
+                permit(OPERATOR_A, 0, "add_schema", schema_data = "new"),
+                permit(OPERATOR_A, 1, "set_schema_deprecated", schema_id = 5)
+            ])
+        self.assertEqual(self.snapshot(), before)
+
+    def test_failed_storage_call_undoes_the_previous_ones(self):
+        self.logic.execute(OPERATOR_B, "add_schema", {"schema_data": "b"})
+        before = self.snapshot()
+        # The issuers are moved before the schema of another owner fails the Schema Registry check
+        with self.assertRaises(simulator.ContractError):
+            self.logic.execute(OPERATOR_A, "transfer_ownership", {
+                "old_owner": OPERATOR_A, "new_owner": OPERATOR_B, "issuer_dids": ["did:tz:a"], "schema_ids": [1]
+            })
+        self.assertEqual(self.snapshot(), before)
+
+    def test_invalid_parameters_are_rejected_before_any_change(self):
+        before = self.snapshot()
+        for parameters in ({}, {"schema_data": "x", "status": 1}, ["x"]):
+            with self.assertRaises(simulator.ContractError) as context:
+                self.logic.apply_permits([permit(OPERATOR_A, 0, "add_issuer", issuer_did = "did:tz:b", issuer_data = "{}"), {
+                    "signer": OPERATOR_A, "nonce": 1, "action": "add_schema", "parameters": parameters
+                }])
+            self.assertEqual(context.exception.message, "Invalid parameters")
+        self.assertEqual(self.snapshot(), before)
+
+    def test_other_errors_undo_the_operation(self):
+        before = self.snapshot()
+        # A change without a status is a KeyError of the handler
+        with self.assertRaises(KeyError):
+            self.logic.apply_permits([
+                permit(OPERATOR_A, 0, "add_schema", schema_data = "new"),
+                permit(OPERATOR_A, 1, "apply_status_changes", changes = [{"schema": {"schema_id": 0}}])
+            ])
+        self.assertEqual(self.snapshot(), before)
+
+
+class WorkloadTest(unittest.TestCase):
+
+    def test_replay_counts_invalid_operations_as_failures(self):
+        logic = simulator.RegistryLogic()
+        count, failures = simulator.replay(logic, [
+            {"sender": OPERATOR_A, "action": "add_issuer", "parameters": {"issuer_did": "did:tz:a", "issuer_data": "{}"}},
+            {"sender": OPERATOR_A, "action": "add_schema", "parameters": {}},
+            {"sender": OPERATOR_A, "action": "set_issuer_status", "parameters": {"issuer_did": "did:tz:b", "status": 1}},
+            {"sender": OPERATOR_A, "action": "apply_status_changes", "parameters": {"changes": [{"issuer": {"issuer_did": "did:tz:a"}}]}},
+            {"action": "add_schema", "parameters": {"schema_data": "{}"}}
+        ])
+        self.assertEqual(count, 5)
+        self.assertEqual(failures, {
+            "Invalid parameters": 1,
+            "Issuer did does not exist": 1,
+            "Invalid operation: KeyError": 2
+        })
+        self.assertEqual(logic.issuer_registry.issuer_map["did:tz:a"].status, 1)
+
+    def test_synthetic_workload_fails_only_the_ownership_checks(self):
+        logic = simulator.RegistryLogic()
+        count, failures = simulator.replay(logic, simulator.synthetic_workload(20000, 50, 1))
+        self.assertEqual(count, 20000)
+        self.assertLessEqual(set(failures), {"Binding not allowed", "Status change not allowed", "Cannot be called from non-certified addresses"})
+        self.assertLess(sum(failures.values()), count * 0.05)
+
+        summary = simulator.summary(logic, count, failures, 2.0)
+        self.assertEqual(summary["operations_per_second"], (count - sum(failures.values())) // 2)
+
+
+if __name__ == "__main__":
+    unittest.main()